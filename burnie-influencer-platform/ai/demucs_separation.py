@@ -0,0 +1,23 @@
+"""
+Demucs Separation
+Standalone-script access to python-ai-backend/app/services/demucs_separation.py.
+
+The model, worker pool and stem cache live in the backend module; this file
+only puts python-ai-backend on sys.path and re-exports it, so the scripts here
+keep using `from demucs_separation import demucs_separator`.
+"""
+
+import sys
+from pathlib import Path
+
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent / "python-ai-backend")
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+from app.services.demucs_separation import (  # noqa: E402
+    DemucsSeparationService,
+    SeparatedStems,
+    demucs_separator,
+)
+
+__all__ = ["DemucsSeparationService", "SeparatedStems", "demucs_separator"]
@@ -4,12 +4,8 @@ import argparse
 from pathlib import Path
 from openai import OpenAI
 import ffmpeg
-import torch
-import torchaudio
-from demucs.pretrained import get_model
-from demucs.apply import apply_model
 import soundfile as sf
-import numpy as np
+from demucs_separation import demucs_separator
 import yt_dlp
 import re
 import uuid
@@ -58,27 +54,11 @@ def download_video(url, output_dir="downloads"):
 
 def separate_vocals_with_demucs(audio_path, output_path):
     """Separate vocals from background music using Demucs"""
-    print("🎵 Loading Demucs model for vocal separation...")
-    model = get_model('htdemucs')
-    model.eval()
-    
-    # Load audio
-    waveform, sample_rate = torchaudio.load(audio_path)
-    if waveform.shape[0] == 1:
-        waveform = waveform.repeat(2, 1)  # Ensure stereo
-    
     print("🔬 Separating vocals from background music...")
-    with torch.no_grad():
-        sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-    
-    # htdemucs outputs: drums, bass, other, vocals (index 3)
-    vocals = sources[3].numpy()
-    
-    # Convert to mono and save
-    if vocals.shape[0] == 2:
-        vocals = np.mean(vocals, axis=0)
+    stems = demucs_separator.separate(audio_path)
     
-    sf.write(output_path, vocals, sample_rate)
+    # Save mono vocals
+    sf.write(output_path, stems.vocals(), stems.sample_rate)
     print(f"✅ Clean vocals extracted to: {output_path}")
     return output_path
 
@@ -7513,11 +7513,7 @@ def trim_influencer_clip_at_speech_end(video_path: str, min_search_time: float =
         Path to trimmed video (or original if trimming not needed/failed)
     """
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
-        import numpy as np
+        from demucs_separation import demucs_separator
         
         print(f"\n{'='*60}")
         print(f"✂️ INFLUENCER CLIP TRIMMING: Detecting speech end point")
@@ -7540,29 +7536,11 @@ def trim_influencer_clip_at_speech_end(video_path: str, min_search_time: float =
         video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le', logger=None)
         print(f"🎵 Audio extracted for analysis")
         
-        # Load Demucs model
-        print("🤖 Loading Demucs model for speech detection...")
-        model = get_model('htdemucs')
-        model.eval()
-        
-        # Load audio with torchaudio
-        waveform, sample_rate = torchaudio.load(audio_path)
-        
-        # Ensure stereo for Demucs
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        
-        # Apply model to separate vocals
+        # Separate vocals with the shared Demucs model
         print("🔬 Separating vocals to detect speech...")
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-        
-        # Extract vocals (index 3 in htdemucs output)
-        vocals = sources[3].numpy()
-        
-        # Convert to mono if stereo
-        if vocals.shape[0] == 2:
-            vocals = np.mean(vocals, axis=0)
+        stems = demucs_separator.separate(audio_path)
+        vocals = stems.vocals()
+        sample_rate = stems.sample_rate
         
         # Calculate RMS energy in small windows to detect speech activity
         print("📊 Analyzing vocal track for speech activity...")
@@ -8636,40 +8614,16 @@ def separate_voice_with_demucs(audio_path: str, output_dir: str) -> Optional[str
     print(f"\n  🎵 Separating voice with Demucs (htdemucs model)...")
     
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
         import soundfile as sf
+        from demucs_separation import demucs_separator
         
-        # Load Demucs model (htdemucs is best for vocals)
-        print("  🤖 Loading Demucs htdemucs model...")
-        model = get_model('htdemucs')
-        model.eval()
-        
-        # Load audio with torchaudio
-        print("  📂 Loading audio file...")
-        waveform, sample_rate = torchaudio.load(audio_path)
-        
-        # Ensure stereo (demucs expects stereo input)
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        
-        # Apply model
+        # Separate with the shared htdemucs model (best for vocals)
         print("  🔬 Separating voice from music (this may take 10-30 seconds)...")
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-        
-        # htdemucs outputs: drums (0), bass (1), other (2), vocals (3)
-        vocals = sources[3].numpy()
-        
-        # Convert to mono if stereo
-        if vocals.shape[0] == 2:
-            vocals = np.mean(vocals, axis=0)
+        stems = demucs_separator.separate(audio_path)
         
-        # Save voice-only audio
+        # Save voice-only audio (mono)
         vocals_path = os.path.join(output_dir, f"vocals_{uuid.uuid4().hex[:8]}.wav")
-        sf.write(vocals_path, vocals, sample_rate)
+        sf.write(vocals_path, stems.vocals(), stems.sample_rate)
         
         print(f"  ✅ Vocals extracted: {vocals_path}")
         return vocals_path
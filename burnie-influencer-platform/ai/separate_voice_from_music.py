@@ -198,35 +198,14 @@ class VoiceMusicSeparator:
             numpy.ndarray: Separated voice audio
         """
         try:
-            import torch
-            import torchaudio
-            from demucs.pretrained import get_model
-            from demucs.apply import apply_model
+            from demucs_separation import demucs_separator
             
             print("🎵 Using Demucs (deep learning) for high-quality separation...")
             
-            # Load Demucs model (htdemucs is best for vocals)
-            model = get_model('htdemucs')
-            model.eval()
-            
-            # Load audio with torchaudio
-            waveform, sample_rate = torchaudio.load(self.audio_path)
-            
-            # Ensure stereo
-            if waveform.shape[0] == 1:
-                waveform = waveform.repeat(2, 1)
-            
-            # Apply model
-            with torch.no_grad():
-                sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-            
-            # Extract vocals (index 3 in htdemucs output)
-            # htdemucs outputs: drums, bass, other, vocals
-            vocals = sources[3].numpy()
-            
-            # Convert stereo to mono if needed
-            if vocals.shape[0] == 2:
-                vocals = np.mean(vocals, axis=0)
+            # Separate with the shared htdemucs model (best for vocals), mono vocals
+            stems = demucs_separator.separate(self.audio_path)
+            vocals = stems.vocals()
+            sample_rate = stems.sample_rate
             
             # Resample to original sample rate if needed
             if sample_rate != self.sr:
@@ -3031,13 +3031,8 @@ JSON only, no other text:"""
             str: Path to video file with voice only (music removed)
         """
         try:
-            import torch
-            import torchaudio
-            from demucs.pretrained import get_model
-            from demucs.apply import apply_model
-            import librosa
             import soundfile as sf
-            import numpy as np
+            from demucs_separation import demucs_separator
             
             print(f"🎵 Separating voice from background music using Demucs...")
             
@@ -3046,35 +3041,13 @@ JSON only, no other text:"""
             audio_path = video_path.replace('.mp4', '_audio.wav')
             video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le')
             
-            # Load Demucs model (htdemucs is best for vocals)
-            print("🤖 Loading Demucs model...")
-            model = get_model('htdemucs')
-            model.eval()
-            
-            # Load audio with torchaudio
-            print("📂 Loading audio file...")
-            waveform, sample_rate = torchaudio.load(audio_path)
-            
-            # Ensure stereo
-            if waveform.shape[0] == 1:
-                waveform = waveform.repeat(2, 1)
-            
-            # Apply model
+            # Separate with the shared htdemucs model (best for vocals)
             print("🔬 Separating voice from music (this may take 10-30 seconds)...")
-            with torch.no_grad():
-                sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-            
-            # Extract vocals (index 3 in htdemucs output)
-            # htdemucs outputs: drums, bass, other, vocals
-            vocals = sources[3].numpy()
-            
-            # Convert to mono if stereo
-            if vocals.shape[0] == 2:
-                vocals = np.mean(vocals, axis=0)
+            stems = demucs_separator.separate(audio_path)
             
-            # Save voice-only audio
+            # Save voice-only audio (mono)
             voice_only_audio_path = video_path.replace('.mp4', '_voice_only.wav')
-            sf.write(voice_only_audio_path, vocals, sample_rate)
+            sf.write(voice_only_audio_path, stems.vocals(), stems.sample_rate)
             print(f"✅ Voice-only audio saved: {voice_only_audio_path}")
             
             # Replace video audio with voice-only audio
@@ -184,13 +184,9 @@ def create_video_with_music_only(video_path: str, output_path: str, work_dir: st
     """Demucs: remove vocals, mix drums+bass+other, create video with visuals + background music only.
     If work_dir given, intermediate audio files are written there for cleanup."""
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
         import soundfile as sf
-        import numpy as np
         from moviepy.editor import VideoFileClip, AudioFileClip
+        from demucs_separation import demucs_separator
     except ImportError as e:
         print(f"  ❌ Missing dependency: {e}")
         return None
@@ -210,18 +206,9 @@ def create_video_with_music_only(video_path: str, output_path: str, work_dir: st
         clip.close()
 
         print("  🎤 Separating sources with Demucs...")
-        model = get_model("htdemucs")
-        model.eval()
-        waveform, sr = torchaudio.load(audio_path)
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device="cpu")[0]
-        # drums(0), bass(1), other(2), vocals(3) - keep 0+1+2, discard 3
-        no_vocals = sources[0].numpy() + sources[1].numpy() + sources[2].numpy()
-        if no_vocals.shape[0] == 2:
-            no_vocals = np.mean(no_vocals, axis=0, keepdims=True)
-        sf.write(music_path, no_vocals.T, sr)
+        stems = demucs_separator.separate(audio_path)
+        # drums + bass + other, vocals discarded (mono)
+        sf.write(music_path, stems.accompaniment(), stems.sample_rate)
 
         print("  📹 Creating video with music only...")
         clip = VideoFileClip(video_path)
@@ -0,0 +1,153 @@
+from typing import Dict, Any, List
+import json
+import logging
+from app.database.connection import get_db_session
+from app.utils.inspiration_urls import normalize_inspiration_url
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Kept in sync with migrations/dvyb_inspiration_links_normalized_url.sql
+ENSURE_COLUMNS_SQL = """
+    ALTER TABLE dvyb_inspiration_links ADD COLUMN IF NOT EXISTS "normalizedUrl" TEXT;
+    ALTER TABLE dvyb_inspiration_links ADD COLUMN IF NOT EXISTS "normalizedMediaUrl" TEXT;
+    CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_normalized_url
+        ON dvyb_inspiration_links ("normalizedUrl")
+        WHERE "isActive" = true AND "inspirationAnalysis" IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_normalized_media_url
+        ON dvyb_inspiration_links ("normalizedMediaUrl")
+        WHERE "isActive" = true AND "inspirationAnalysis" IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_unkeyed
+        ON dvyb_inspiration_links (id)
+        WHERE "normalizedUrl" IS NULL
+"""
+
+# Rows keyed per backfill round (rows added by the admin dashboard arrive without keys)
+BACKFILL_BATCH_SIZE = 500
+MAX_BACKFILL_BATCHES = 20
+
+
+class InspirationAnalysisRepository:
+    """Bulk lookups of stored inspiration analyses by normalized URL"""
+
+    _columns_ready = False
+
+    def ensure_columns(self) -> bool:
+        """Add the normalized URL columns and indexes if missing (once per process)"""
+        if InspirationAnalysisRepository._columns_ready:
+            return True
+        db = get_db_session()
+        try:
+            db.execute(text(ENSURE_COLUMNS_SQL))
+            db.commit()
+            InspirationAnalysisRepository._columns_ready = True
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to ensure dvyb_inspiration_links normalized URL columns: {e}")
+            return False
+        finally:
+            db.close()
+
+    def backfill_keys(self) -> int:
+        """Compute normalized keys for rows that do not have them yet; returns rows keyed"""
+        db = get_db_session()
+        keyed = 0
+        try:
+            for _ in range(MAX_BACKFILL_BATCHES):
+                rows = db.execute(text("""
+                    SELECT id, url, "mediaUrl"
+                    FROM dvyb_inspiration_links
+                    WHERE "normalizedUrl" IS NULL
+                    LIMIT :limit
+                """), {"limit": BACKFILL_BATCH_SIZE}).fetchall()
+                if not rows:
+                    break
+                db.execute(text("""
+                    UPDATE dvyb_inspiration_links
+                    SET "normalizedUrl" = :normalized_url, "normalizedMediaUrl" = :normalized_media_url
+                    WHERE id = :id
+                """), [
+                    {
+                        "id": row.id,
+                        # url is NOT NULL; "" marks rows whose url has no usable key so they are not rescanned
+                        "normalized_url": normalize_inspiration_url(row.url) or "",
+                        "normalized_media_url": normalize_inspiration_url(row.mediaUrl),
+                    }
+                    for row in rows
+                ])
+                db.commit()
+                keyed += len(rows)
+                if len(rows) < BACKFILL_BATCH_SIZE:
+                    break
+            if keyed:
+                logger.info(f"Keyed {keyed} dvyb_inspiration_links rows by normalized URL")
+            return keyed
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to backfill inspiration link URL keys: {e}")
+            return keyed
+        finally:
+            db.close()
+
+    def find_link_analyses(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored dvyb_inspiration_links analyses by normalized key (url or mediaUrl), one query"""
+        keys = [k for k in dict.fromkeys(keys) if k]
+        if not keys or not self.ensure_columns():
+            return {}
+        self.backfill_keys()
+        db = get_db_session()
+        try:
+            rows = db.execute(text("""
+                SELECT "normalizedUrl", "normalizedMediaUrl", "inspirationAnalysis"
+                FROM dvyb_inspiration_links
+                WHERE "isActive" = true
+                  AND "inspirationAnalysis" IS NOT NULL
+                  AND ("normalizedUrl" = ANY(:keys) OR "normalizedMediaUrl" = ANY(:keys))
+                ORDER BY id
+            """), {"keys": keys}).fetchall()
+        except Exception as e:
+            logger.error(f"Failed to look up inspiration analyses: {e}")
+            return {}
+        finally:
+            db.close()
+
+        wanted = set(keys)
+        found: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            try:
+                analysis = json.loads(row.inspirationAnalysis)
+            except (TypeError, ValueError):
+                continue
+            for key in (row.normalizedUrl, row.normalizedMediaUrl):
+                if key in wanted and key not in found:
+                    found[key] = analysis
+        return found
+
+    def find_brand_ad_analyses(self, s3_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """dvyb_brand_ads inventory analyses by creative S3 key ({"inventory_analysis", "media_type"}), one query"""
+        s3_keys = [k for k in dict.fromkeys(s3_keys) if k]
+        if not s3_keys:
+            return {}
+        db = get_db_session()
+        try:
+            rows = db.execute(text("""
+                SELECT "creativeImageS3Key", "creativeVideoS3Key", "inventoryAnalysis", "mediaType"
+                FROM dvyb_brand_ads
+                WHERE ("creativeImageS3Key" = ANY(:s3_keys) OR "creativeVideoS3Key" = ANY(:s3_keys))
+                  AND "inventoryAnalysis" IS NOT NULL
+            """), {"s3_keys": s3_keys}).fetchall()
+        except Exception as e:
+            logger.error(f"Failed to look up brand ad analyses: {e}")
+            return {}
+        finally:
+            db.close()
+
+        wanted = set(s3_keys)
+        found: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            inv = row.inventoryAnalysis if isinstance(row.inventoryAnalysis, dict) else json.loads(row.inventoryAnalysis)
+            for key in (row.creativeImageS3Key, row.creativeVideoS3Key):
+                if key in wanted and key not in found:
+                    found[key] = {"inventory_analysis": inv, "media_type": row.mediaType or "image"}
+        return found
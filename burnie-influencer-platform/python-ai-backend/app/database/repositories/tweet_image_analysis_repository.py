@@ -0,0 +1,103 @@
+from typing import Dict, Any, List
+import json
+import logging
+from app.database.connection import get_db_session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class TweetImageAnalysisRepository:
+    """Repository for cached tweet image analyses keyed by image content hash (schema: migrations/tweet_image_analysis_cache.sql)"""
+
+    def get_by_urls(self, urls: List[str], prompt_version: str) -> Dict[str, Dict[str, Any]]:
+        """Cached analyses for already-seen image URLs, keyed by URL"""
+        if not urls:
+            return {}
+        db = get_db_session()
+        try:
+            query = text("""
+                UPDATE tweet_image_analysis_cache
+                SET hit_count = hit_count + 1, last_used_at = NOW()
+                WHERE prompt_version = :prompt_version AND source_urls && CAST(:urls AS text[])
+                RETURNING content_hash, analysis, source_urls
+            """)
+            results = db.execute(query, {"prompt_version": prompt_version, "urls": urls}).fetchall()
+            db.commit()
+            wanted = set(urls)
+            found = {}
+            for row in results:
+                for url in row.source_urls:
+                    if url in wanted:
+                        found[url] = {"content_hash": row.content_hash, "analysis": row.analysis}
+            return found
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to look up image analyses by URL: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def get_by_hashes(self, hash_urls: Dict[str, List[str]], prompt_version: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Cached analyses for image content hashes, keyed by hash. The given
+        URLs are recorded as aliases so the next lookup can skip the download.
+        """
+        if not hash_urls:
+            return {}
+        db = get_db_session()
+        try:
+            found = {}
+            for content_hash, urls in hash_urls.items():
+                row = db.execute(text("""
+                    UPDATE tweet_image_analysis_cache
+                    SET source_urls = ARRAY(SELECT DISTINCT unnest(source_urls || CAST(:urls AS text[]))),
+                        hit_count = hit_count + 1,
+                        last_used_at = NOW()
+                    WHERE content_hash = :content_hash AND prompt_version = :prompt_version
+                    RETURNING analysis
+                """), {"content_hash": content_hash, "prompt_version": prompt_version, "urls": urls}).fetchone()
+                if row:
+                    found[content_hash] = {"content_hash": content_hash, "analysis": row.analysis}
+            db.commit()
+            return found
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to look up image analyses by hash: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def save_analyses(self, entries: List[Dict[str, Any]], prompt_version: str) -> int:
+        """Store new analyses (entries: content_hash, analysis, provider, source_urls)"""
+        if not entries:
+            return 0
+        db = get_db_session()
+        try:
+            query = text("""
+                INSERT INTO tweet_image_analysis_cache
+                    (content_hash, prompt_version, analysis, provider, source_urls)
+                VALUES (:content_hash, :prompt_version, CAST(:analysis AS jsonb), :provider, CAST(:source_urls AS text[]))
+                ON CONFLICT (content_hash, prompt_version) DO UPDATE SET
+                    analysis = EXCLUDED.analysis,
+                    provider = EXCLUDED.provider,
+                    source_urls = ARRAY(SELECT DISTINCT unnest(tweet_image_analysis_cache.source_urls || EXCLUDED.source_urls)),
+                    last_used_at = NOW()
+            """)
+            db.execute(query, [
+                {
+                    "content_hash": entry["content_hash"],
+                    "prompt_version": prompt_version,
+                    "analysis": json.dumps(entry["analysis"]),
+                    "provider": entry.get("provider"),
+                    "source_urls": entry.get("source_urls") or [],
+                }
+                for entry in entries
+            ])
+            db.commit()
+            return len(entries)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save image analyses: {e}")
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,78 @@
+from typing import Optional, Dict, Any, List
+import logging
+from app.database.connection import get_db_session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class TwitterSyncWatermarkRepository:
+    """Repository for per-handle tweet sync watermarks (schema: migrations/twitter_sync_watermarks.sql)"""
+
+    def get_watermarks(self, handles: List[str], sync_scope: str) -> Dict[str, Dict[str, Any]]:
+        """Get watermarks for several handles in one query, keyed by lowercase handle"""
+        if not handles:
+            return {}
+        db = get_db_session()
+        try:
+            query = text("""
+                SELECT * FROM twitter_sync_watermarks
+                WHERE sync_scope = :sync_scope AND twitter_handle = ANY(:handles)
+            """)
+            results = db.execute(query, {
+                "sync_scope": sync_scope,
+                "handles": [h.lower() for h in handles],
+            }).fetchall()
+            return {row.twitter_handle: dict(row._mapping) for row in results}
+        except Exception as e:
+            logger.error(f"Failed to get sync watermarks: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def get_watermark(self, handle: str, sync_scope: str) -> Optional[Dict[str, Any]]:
+        """Get the watermark for one handle"""
+        return self.get_watermarks([handle], sync_scope).get(handle.lower())
+
+    def save_watermark(
+        self,
+        handle: str,
+        sync_scope: str,
+        newest_tweet_id: Optional[str],
+        twitter_user_id: Optional[str] = None,
+        full_sync: bool = False,
+        tweets_fetched: int = 0
+    ) -> bool:
+        """Advance a handle's watermark (never moves newest_tweet_id backwards)"""
+        db = get_db_session()
+        try:
+            query = text("""
+                INSERT INTO twitter_sync_watermarks
+                    (twitter_handle, sync_scope, twitter_user_id, newest_tweet_id,
+                     last_refresh_at, last_full_sync_at, tweets_synced, updated_at)
+                VALUES
+                    (:handle, :sync_scope, :twitter_user_id, CAST(:newest_tweet_id AS BIGINT),
+                     NOW(), CASE WHEN :full_sync THEN NOW() END, :tweets_fetched, NOW())
+                ON CONFLICT (twitter_handle, sync_scope) DO UPDATE SET
+                    twitter_user_id = COALESCE(EXCLUDED.twitter_user_id, twitter_sync_watermarks.twitter_user_id),
+                    newest_tweet_id = GREATEST(twitter_sync_watermarks.newest_tweet_id, EXCLUDED.newest_tweet_id),
+                    last_refresh_at = NOW(),
+                    last_full_sync_at = COALESCE(EXCLUDED.last_full_sync_at, twitter_sync_watermarks.last_full_sync_at),
+                    tweets_synced = twitter_sync_watermarks.tweets_synced + EXCLUDED.tweets_synced,
+                    updated_at = NOW()
+            """)
+            db.execute(query, {
+                "handle": handle.lower(),
+                "sync_scope": sync_scope,
+                "twitter_user_id": str(twitter_user_id) if twitter_user_id else None,
+                "newest_tweet_id": str(newest_tweet_id) if newest_tweet_id else None,
+                "full_sync": full_sync,
+                "tweets_fetched": tweets_fetched,
+            })
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save sync watermark for @{handle}: {e}")
+            return False
+        finally:
+            db.close()
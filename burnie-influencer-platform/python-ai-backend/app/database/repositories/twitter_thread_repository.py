@@ -0,0 +1,59 @@
+from typing import Dict, Any, List
+import json
+import logging
+from app.database.connection import get_db_session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class TwitterThreadRepository:
+    """Repository for complete reconstructed Twitter threads (schema: migrations/twitter_thread_cache.sql)"""
+
+    def get_threads(self, conversation_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Stored thread posts for several conversations in one query, keyed by conversation_id"""
+        if not conversation_ids:
+            return {}
+        db = get_db_session()
+        try:
+            query = text("""
+                UPDATE twitter_thread_cache
+                SET last_used_at = NOW()
+                WHERE conversation_id = ANY(:conversation_ids)
+                RETURNING conversation_id, posts
+            """)
+            results = db.execute(query, {"conversation_ids": list(conversation_ids)}).fetchall()
+            db.commit()
+            return {row.conversation_id: row.posts for row in results}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to get cached threads: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def save_threads(self, threads: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Store complete threads (conversation_id -> JSON-serializable posts)"""
+        if not threads:
+            return 0
+        db = get_db_session()
+        try:
+            query = text("""
+                INSERT INTO twitter_thread_cache (conversation_id, posts, tweet_count)
+                VALUES (:conversation_id, CAST(:posts AS jsonb), :tweet_count)
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    posts = EXCLUDED.posts,
+                    tweet_count = EXCLUDED.tweet_count,
+                    last_used_at = NOW()
+            """)
+            db.execute(query, [
+                {"conversation_id": conversation_id, "posts": json.dumps(posts), "tweet_count": len(posts)}
+                for conversation_id, posts in threads.items()
+            ])
+            db.commit()
+            return len(threads)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save cached threads: {e}")
+            return 0
+        finally:
+            db.close()
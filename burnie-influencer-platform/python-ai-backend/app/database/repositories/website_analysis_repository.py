@@ -0,0 +1,59 @@
+from typing import Optional, Dict, Any
+import json
+import logging
+from app.database.connection import get_db_session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class WebsiteAnalysisRepository:
+    """Repository for cached website analyses keyed by domain and analyzer version (schema: migrations/website_analysis_cache.sql)"""
+
+    def get_analysis(self, domain: str, analyzer: str, analyzer_version: str) -> Optional[Dict[str, Any]]:
+        """Cached analysis with its age in seconds ({"result", "age_seconds"}), counting the hit"""
+        db = get_db_session()
+        try:
+            row = db.execute(text("""
+                UPDATE website_analysis_cache
+                SET hit_count = hit_count + 1
+                WHERE domain = :domain AND analyzer = :analyzer AND analyzer_version = :analyzer_version
+                RETURNING result, EXTRACT(EPOCH FROM (NOW() - refreshed_at)) AS age_seconds
+            """), {"domain": domain, "analyzer": analyzer, "analyzer_version": analyzer_version}).fetchone()
+            db.commit()
+            if not row:
+                return None
+            return {"result": row.result, "age_seconds": float(row.age_seconds)}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to look up website analysis for {domain}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def save_analysis(self, domain: str, analyzer: str, analyzer_version: str,
+                      result: Dict[str, Any], source_url: Optional[str] = None) -> bool:
+        """Store (or replace) the analysis for a domain"""
+        db = get_db_session()
+        try:
+            db.execute(text("""
+                INSERT INTO website_analysis_cache (domain, analyzer, analyzer_version, result, source_url)
+                VALUES (:domain, :analyzer, :analyzer_version, CAST(:result AS jsonb), :source_url)
+                ON CONFLICT (domain, analyzer, analyzer_version) DO UPDATE SET
+                    result = EXCLUDED.result,
+                    source_url = EXCLUDED.source_url,
+                    refreshed_at = NOW()
+            """), {
+                "domain": domain,
+                "analyzer": analyzer,
+                "analyzer_version": analyzer_version,
+                "result": json.dumps(result),
+                "source_url": source_url,
+            })
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save website analysis for {domain}: {e}")
+            return False
+        finally:
+            db.close()
@@ -8,6 +8,7 @@ os.environ['OTEL_LOGS_EXPORTER'] = 'none'
 import asyncio
 import json
 import logging
+import threading
 import warnings
 
 # Suppress telemetry-related warnings
@@ -308,6 +309,10 @@ class MiningStatusResponse(BaseModel):
 @app.on_event("startup")
 def startup_event():
     """Initialize database and services on startup"""
+    # Independent of the database: start loading Demucs weights even if init_db fails
+    from app.services.demucs_separation import DEMUCS_PRELOAD, demucs_separator
+    if DEMUCS_PRELOAD:
+        threading.Thread(target=demucs_separator.preload, name="demucs-preload", daemon=True).start()
     try:
         init_db()
         logger.info("✅ Database initialized successfully")
@@ -317,8 +322,10 @@ def startup_event():
         raise
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     """Cleanup on shutdown"""
+    from app.services.campaign_context_cache import campaign_context_cache
+    await campaign_context_cache.close()
     close_db()
     logger.info("🛑 Burnie AI Backend shutdown complete")
 
@@ -7,7 +7,7 @@ import asyncio
 import json
 import logging
 import time
-from datetime import datetime, date
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
@@ -15,6 +15,8 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
 from pydantic import BaseModel, Field
 
 from app.services.cookie_fun_processor import CookieFunProcessor
+from app.services.campaign_context_cache import campaign_context_cache
+from app.services.leaderboard_bulk_storage import leaderboard_bulk_storage
 from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -308,6 +310,23 @@ async def get_supported_platforms():
         }
     }
 
+class ContextCacheInvalidateRequest(BaseModel):
+    collection: Optional[str] = None  # "campaigns", "projects" or None for everything
+    item_id: Optional[int] = None
+
+@router.post("/context-cache/invalidate")
+async def invalidate_context_cache(request: ContextCacheInvalidateRequest):
+    """Invalidate cached campaign/project context (called by TypeScript backend on updates)"""
+    if request.collection and request.collection not in campaign_context_cache.COLLECTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown collection: {request.collection}")
+    campaign_context_cache.invalidate(request.collection, request.item_id)
+    return {"success": True, "stats": campaign_context_cache.get_stats()}
+
+@router.get("/context-cache/stats")
+async def get_context_cache_stats():
+    """Get campaign/project context cache statistics"""
+    return {"success": True, "stats": campaign_context_cache.get_stats()}
+
 @router.post("/process-comprehensive", response_model=ComprehensiveProcessResponse)
 async def process_snapshot_comprehensive(
     request: ComprehensiveProcessRequest,
@@ -334,8 +353,9 @@ async def process_snapshot_comprehensive(
         snapshot_date = datetime.fromisoformat(request.snapshot_date).date()
         
         # Fetch campaigns and projects context from TypeScript backend
-        campaigns_context = await _fetch_campaigns_context()
-        projects_context = await _fetch_projects_context()
+        campaigns_context, projects_context = await asyncio.gather(
+            _fetch_campaigns_context(), _fetch_projects_context()
+        )
         
         # Determine processing type based on snapshot data
         snapshot_type = request.dict().get('snapshot_type', 'leaderboard')
@@ -403,72 +423,24 @@ async def process_snapshot_comprehensive(
         )
 
 async def _fetch_campaigns_context() -> List[Dict[str, Any]]:
-    """Fetch available campaigns from TypeScript backend"""
+    """Fetch available campaigns from TypeScript backend (served from the shared context cache)"""
     try:
-        settings = get_settings()
-        typescript_backend_url = settings.typescript_backend_url
-        
-        logger.info(f"📋 Attempting to fetch campaigns from: {typescript_backend_url}/api/campaigns")
-        
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{typescript_backend_url}/api/campaigns") as response:
-                if response.status == 200:
-                    response_data = await response.json()
-                    logger.info(f"📋 Full response from TypeScript backend: {str(response_data)[:500]}...")
-                    
-                    # Extract campaigns from the 'data' field
-                    if response_data.get('success') and 'data' in response_data:
-                        campaigns = response_data['data']
-                        logger.info(f"📋 Fetched {len(campaigns)} campaigns from TypeScript backend")
-                        logger.info(f"📋 First campaign: {campaigns[0] if campaigns else 'None'}")
-                        return campaigns
-                    else:
-                        logger.error(f"❌ Unexpected response structure: {response_data}")
-                        return []
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ Failed to fetch campaigns: HTTP {response.status}")
-                    logger.error(f"❌ Response: {error_text}")
-                    return []
+        campaigns = await campaign_context_cache.get_campaigns()
+        logger.info(f"📋 Using {len(campaigns)} campaigns from context cache")
+        return campaigns
     except Exception as e:
-        import traceback
         logger.error(f"❌ Error fetching campaigns context: {e}")
-        logger.error(f"❌ Traceback:\n{traceback.format_exc()}")
         logger.error(f"❌ Will return empty list - processing may fail without campaigns")
         return []
 
 async def _fetch_projects_context() -> List[Dict[str, Any]]:
-    """Fetch available projects from TypeScript backend"""
+    """Fetch available projects from TypeScript backend (served from the shared context cache)"""
     try:
-        settings = get_settings()
-        typescript_backend_url = settings.typescript_backend_url
-        
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{typescript_backend_url}/api/projects") as response:
-                if response.status == 200:
-                    response_data = await response.json()
-                    logger.info(f"📁 Full projects response: {str(response_data)[:500]}...")
-                    
-                    # Extract projects from the 'data' field
-                    if response_data.get('success') and 'data' in response_data:
-                        projects = response_data['data']
-                        logger.info(f"📁 Fetched {len(projects)} projects from TypeScript backend")
-                        logger.info(f"📁 First project: {projects[0] if projects else 'None'}")
-                        return projects
-                    else:
-                        logger.error(f"❌ Unexpected projects response structure: {response_data}")
-                        return []
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ Failed to fetch projects: HTTP {response.status}")
-                    logger.error(f"❌ Response: {error_text}")
-                    return []
+        projects = await campaign_context_cache.get_projects()
+        logger.info(f"📁 Using {len(projects)} projects from context cache")
+        return projects
     except Exception as e:
-        import traceback
         logger.error(f"❌ Error fetching projects context: {e}")
-        logger.error(f"❌ Traceback:\n{traceback.format_exc()}")
         logger.error(f"❌ Will return empty list - processing may fail without projects")
         return []
 
@@ -493,10 +465,6 @@ async def _store_leaderboard_results(snapshot_ids: List[int], results: Dict[str,
         logger.info(f"💾 Storing leaderboard results for snapshots {snapshot_ids}")
         logger.info(f"💾 Background task started - this should be visible in logs")
         
-        # Get TypeScript backend URL
-        settings = get_settings()
-        typescript_backend_url = settings.typescript_backend_url
-        
         # Extract leaderboard data from results (direct key, not nested)
         leaderboard_data = results.get("leaderboard_data", [])
         
@@ -527,62 +495,25 @@ async def _store_leaderboard_results(snapshot_ids: List[int], results: Dict[str,
         for i, entry in enumerate(leaderboard_data):
             logger.info(f"💾   {i+1}. {entry.get('username')} (@{entry.get('handle')}) - Rank: {entry.get('position')}")
         
-        # Process each yapper in the leaderboard
-        for yapper in leaderboard_data:
-            # Debug: Log yapper data structure
-            logger.info(f"💾 Processing yapper data: {yapper}")
-            logger.info(f"💾 Required fields - campaign_id: {results.get('campaign_id')}, snapshot_date: {results.get('snapshot_date')}, twitter_handle: {yapper.get('handle')}")
-            
-            # Convert snapshot_date to string if it's a date object
-            snapshot_date_str = results.get("snapshot_date")
-            if isinstance(snapshot_date_str, date):
-                snapshot_date_str = snapshot_date_str.isoformat()
-            elif hasattr(snapshot_date_str, 'isoformat'):
-                snapshot_date_str = snapshot_date_str.isoformat()
-            else:
-                snapshot_date_str = str(snapshot_date_str)
-            
-            storage_data = {
-                "snapshot_ids": snapshot_ids,
-                "campaign_id": results.get("campaign_id"),
-                "platform_source": "cookie.fun",
-                "snapshot_date": snapshot_date_str,
-                
-                # Yapper information - map from LLM response structure
-                "yapper_twitter_handle": yapper.get("handle"),  # LLM response has "handle"
-                "yapper_display_name": yapper.get("username"),  # LLM response has "username"
-                "daily_rank": yapper.get("position"),  # LLM response has "position"
-                
-                # SNAP metrics - map from LLM response structure
-                "total_snaps": yapper.get("total_snaps"),
-                "snaps_24h": yapper.get("snaps_24h") or yapper.get("seven_day_snaps"),  # LLM response has "seven_day_snaps"
-                "snap_velocity": yapper.get("snap_velocity"),
-                
-                # Social metrics - map from LLM response structure
-                "smart_followers_count": yapper.get("smart_followers"),  # LLM response has "smart_followers"
-                "engagement_rate": yapper.get("engagement_rate"),
-                
-                # Metadata
-                "extraction_confidence": yapper.get("confidence", 0.8),
-                "llm_provider": results.get("llm_provider"),
-                "processing_status": "completed"
-            }
-            
-            # Debug: Log final storage data
-            logger.info(f"💾 Sending storage data: {storage_data}")
-            
-            # Store each yapper's data via TypeScript backend
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{typescript_backend_url}/api/leaderboard-yapper/store",
-                    json=storage_data
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ Leaderboard data stored for yapper: {yapper.get('username')}")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to store leaderboard data for {yapper.get('username')}: {error_text}")
+        # Stage every yapper and write the whole snapshot in one transaction
+        storage_result = await leaderboard_bulk_storage.store_leaderboard_snapshot(
+            leaderboard_data=leaderboard_data,
+            campaign_id=results.get("campaign_id"),
+            snapshot_ids=snapshot_ids,
+            snapshot_date=results.get("snapshot_date"),
+            platform_source="cookie.fun",
+            llm_provider=results.get("llm_provider"),
+            extraction_confidence=results.get("extraction_confidence", 0.8),
+        )
+        
+        if storage_result.get("success"):
+            logger.info(
+                f"✅ Leaderboard data stored: {storage_result['rows_written']} rows "
+                f"({storage_result['inserted']} inserted, {storage_result['updated']} updated, "
+                f"{storage_result['skipped']} skipped) in {storage_result['elapsed_ms']}ms"
+            )
+        else:
+            logger.error(f"❌ Failed to store leaderboard data: {storage_result.get('error')}")
                         
     except Exception as e:
         logger.error(f"❌ Error storing leaderboard results: {e}")
@@ -751,8 +682,9 @@ async def process_batch_snapshots(request: BatchProcessRequest, background_tasks
             logger.info(f"🏆 Processing {len(request.s3_keys)} campaign screenshots with multi-image LLM and local download")
             
             # Fetch campaigns and projects context
-            campaigns_context = await _fetch_campaigns_context()
-            projects_context = await _fetch_projects_context()
+            campaigns_context, projects_context = await asyncio.gather(
+                _fetch_campaigns_context(), _fetch_projects_context()
+            )
             
             # Process all images together using multi-image LLM with local download
             batch_result = await processor.process_multiple_snapshots_comprehensive_with_local_download(
@@ -24,6 +24,11 @@ import httpx
 
 from app.services.grok_prompt_service import grok_service
 from app.utils.web2_s3_helper import web2_s3_helper
+from app.utils.inspiration_urls import normalize_inspiration_url
+from app.services.inspiration_media_cache import inspiration_media_cache
+from app.services.demucs_separation import demucs_separator
+from app.services.speech_end_detector import speech_end_detector
+from app.services.fal_job_client import FalJob, fal_job_client
 import fal_client
 import os
 from app.config.settings import settings
@@ -277,8 +282,6 @@ if fal_api_key:
 # Track active generation jobs
 active_jobs: Dict[str, Any] = {}
 
-# Import for timeout mechanism
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import threading
 
 # Timeout for FAL clip generation (5 minutes = 300 seconds)
@@ -627,6 +630,7 @@ def calculate_clip_structure(video_length_mode: str, model_name: str) -> List[Di
 import re
 import cv2
 import yt_dlp
+from app.services.video_frame_sampler import probe_video, sample_video_frames
 
 def is_video_platform_url(url: str) -> bool:
     """Check if URL is from a supported video platform (YouTube, Instagram, Twitter/X)"""
@@ -663,7 +667,8 @@ def _is_direct_video_url(url: str) -> bool:
 
 def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspirations") -> tuple:
     """
-    Download video from URL.
+    Download video from URL (served from the shared inspiration media cache when
+    another job already downloaded it).
     - Direct URLs (S3, CDN): use requests.get
     - Platform URLs (YouTube/Instagram/Twitter): use yt-dlp with retry for Instagram
     Returns (video_path, is_video) - is_video is False if it's an image.
@@ -674,6 +679,13 @@ def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspiratio
     print(f"  📥 Downloading inspiration video...")
     print(f"     URL: {url[:80]}...")
     
+    if inspiration_media_cache.fetch(url, output_filename, lambda path: _download_inspiration_video_uncached(url, path)):
+        return (output_filename, True)
+    return (None, False)
+
+
+def _download_inspiration_video_uncached(url: str, output_filename: str) -> bool:
+    """Download a video into output_filename; False if it failed or the URL is not a video"""
     # Direct URLs (S3 presigned, CDN): use requests.get - yt-dlp fails on these
     if _is_direct_video_url(url):
         try:
@@ -684,10 +696,10 @@ def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspiratio
                     f.write(chunk)
             size = os.path.getsize(output_filename)
             print(f"  ✅ Downloaded: {size / 1024 / 1024:.2f} MB")
-            return (output_filename, True)
+            return True
         except Exception as e:
             print(f"  ❌ Direct download failed: {e}")
-            return (None, False)
+            return False
     
     # Platform URLs: use yt-dlp
     is_instagram = 'instagram.com' in url.lower()
@@ -727,7 +739,7 @@ def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspiratio
             elif step_name == "session" and session_id:
                 print(f"  🔐 Step 3: Retrying with session cookie...")
                 # Create a cookies file for yt-dlp
-                cookies_file = os.path.join(output_dir, 'instagram_cookies.txt')
+                cookies_file = os.path.join(os.path.dirname(output_filename), 'instagram_cookies.txt')
                 with open(cookies_file, 'w') as f:
                     f.write("# Netscape HTTP Cookie File\n")
                     f.write(f".instagram.com\tTRUE\t/\tTRUE\t0\tsessionid\t{session_id}\n")
@@ -740,10 +752,10 @@ def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspiratio
                 duration = info.get('duration', 0)
                 if duration == 0:
                     print(f"  ⚠️ No video found at URL (might be an image post)")
-                    return (None, False)
+                    return False
                 
                 print(f"  ✅ Downloaded: {duration:.1f}s video")
-                return (output_filename, True)
+                return True
                 
         except yt_dlp.utils.DownloadError as e:
             error_str = str(e).lower()
@@ -758,7 +770,7 @@ def download_inspiration_video(url: str, output_dir: str = "/tmp/dvyb-inspiratio
     
     print(f"  ❌ All video download attempts failed")
     print(f"     This may be due to: private content, geo-restrictions, or expired session")
-    return (None, False)
+    return False
 
 
 def download_inspiration_image(url: str, output_dir: str = "/tmp/dvyb-inspirations") -> tuple:
@@ -1234,6 +1246,7 @@ def download_inspiration_image(url: str, output_dir: str = "/tmp/dvyb-inspiratio
 def extract_frames_from_video(video_path: str, output_dir: str, fps: int = 1, max_duration: int = None) -> list:
     """
     Extract frames from video at specified FPS (default 1 frame per second).
+    Frames are sampled sparsely (see video_frame_sampler) and downscaled to the analysis size.
     
     Args:
         video_path: Path to the video file
@@ -1249,16 +1262,13 @@ def extract_frames_from_video(video_path: str, output_dir: str, fps: int = 1, ma
     
     os.makedirs(output_dir, exist_ok=True)
     
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    info = probe_video(video_path)
+    if not info:
         print(f"  ❌ Unable to open video: {video_path}")
         return []
+    duration = info['duration']
     
-    video_fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = total_frames / video_fps if video_fps > 0 else 0
-    
-    print(f"  📊 Video: {duration:.1f}s, {video_fps:.1f} FPS")
+    print(f"  📊 Video: {duration:.1f}s, {info['fps']:.1f} FPS")
     print(f"  📊 Max duration for frames: {max_duration}s (based on {max_duration // 8} clip(s))")
     
     # Calculate effective duration (trim to max if too long)
@@ -1267,33 +1277,14 @@ def extract_frames_from_video(video_path: str, output_dir: str, fps: int = 1, ma
         print(f"  ⚠️ Video too long ({duration:.1f}s), using first {max_duration}s only")
         effective_duration = max_duration
     
-    # Calculate max frames to extract based on effective duration
-    max_frames_to_extract = int(effective_duration * fps)
-    
-    frame_interval = int(video_fps / fps) if fps > 0 else int(video_fps)
+    frames = sample_video_frames(video_path, fps=fps, max_duration=effective_duration)
     frame_paths = []
-    frame_count = 0
-    saved_count = 0
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Stop if we've extracted enough frames for the effective duration
-        if saved_count >= max_frames_to_extract:
-            break
-        
-        if frame_count % frame_interval == 0:
-            frame_path = os.path.join(output_dir, f"frame_{saved_count:02d}.jpg")
-            cv2.imwrite(frame_path, frame)
-            frame_paths.append(frame_path)
-            saved_count += 1
-        
-        frame_count += 1
+    for saved_count, frame in enumerate(frames):
+        frame_path = os.path.join(output_dir, f"frame_{saved_count:02d}.jpg")
+        cv2.imwrite(frame_path, frame)
+        frame_paths.append(frame_path)
     
-    cap.release()
-    print(f"  ✅ Extracted {saved_count} frames (1 per second, from first {effective_duration:.0f}s)")
+    print(f"  ✅ Extracted {len(frame_paths)} frames ({fps} per second, from first {effective_duration:.0f}s)")
     return frame_paths
 
 
@@ -1316,12 +1307,7 @@ def extract_and_transcribe_audio(video_path: str, output_dir: str, max_duration:
     if max_duration is None:
         max_duration = MAX_VIDEO_INSPIRATION_DURATION
     
-    import torch
-    import torchaudio
-    from demucs.pretrained import get_model
-    from demucs.apply import apply_model
     import soundfile as sf
-    import numpy as np
     from openai import OpenAI
     
     audio_path = os.path.join(output_dir, "audio.wav")
@@ -1358,25 +1344,10 @@ def extract_and_transcribe_audio(video_path: str, output_dir: str, max_duration:
         
         # Step 3: Separate vocals with Demucs (only for transcription purposes)
         print(f"  🎤 Separating vocals with Demucs (for transcription only)...")
-        model = get_model('htdemucs')
-        model.eval()
+        stems = demucs_separator.separate(audio_path)
         
-        waveform, sample_rate = torchaudio.load(audio_path)
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-        
-        # htdemucs outputs: drums (0), bass (1), other (2), vocals (3)
-        vocals = sources[3].numpy()
-        
-        # Convert to mono if stereo for consistency
-        if vocals.shape[0] == 2:
-            vocals = np.mean(vocals, axis=0)
-        
-        # Save vocals for transcription
-        sf.write(vocals_path, vocals, sample_rate)
+        # Save vocals (mono) for transcription
+        sf.write(vocals_path, stems.vocals(), stems.sample_rate)
         
         # Step 4: Transcribe vocals with OpenAI Whisper
         print(f"  📝 Transcribing with OpenAI Whisper...")
@@ -1911,24 +1882,29 @@ async def process_image_inspiration_link(url: str, context: dict, account_id: in
             image_presigned_urls = [url]
         else:
             # Step 1: Download image(s)
-            image_paths, is_image = download_inspiration_image(url, output_dir)
+            image_paths, is_image = await asyncio.to_thread(download_inspiration_image, url, output_dir)
             if not is_image or not image_paths:
                 print(f"  ⚠️ No images downloaded, skipping image analysis")
                 return {}
             
             # Step 2: Upload images to S3 and get presigned URLs
             print(f"  📤 Uploading {len(image_paths)} image(s) to S3...")
-            image_presigned_urls = []
-            for i, image_path in enumerate(image_paths):
-                s3_key = web2_s3_helper.upload_from_file(
-                    file_path=image_path,
-                    folder=f"dvyb/inspiration-images/{account_id}",
-                    filename=f"image_{i:02d}_{uuid.uuid4().hex[:6]}.jpg"
-                )
-                if s3_key:
-                    presigned_url = web2_s3_helper.generate_presigned_url(s3_key)
-                    if presigned_url:
-                        image_presigned_urls.append(presigned_url)
+
+            def _upload_images() -> list:
+                presigned_urls = []
+                for i, image_path in enumerate(image_paths):
+                    s3_key = web2_s3_helper.upload_from_file(
+                        file_path=image_path,
+                        folder=f"dvyb/inspiration-images/{account_id}",
+                        filename=f"image_{i:02d}_{uuid.uuid4().hex[:6]}.jpg"
+                    )
+                    if s3_key:
+                        presigned_url = web2_s3_helper.generate_presigned_url(s3_key)
+                        if presigned_url:
+                            presigned_urls.append(presigned_url)
+                return presigned_urls
+
+            image_presigned_urls = await asyncio.to_thread(_upload_images)
             
             print(f"  ✅ Uploaded {len(image_presigned_urls)} image(s) to S3")
             
@@ -1937,7 +1913,7 @@ async def process_image_inspiration_link(url: str, context: dict, account_id: in
                 return {}
         
         # Step 3: Analyze with Grok
-        analysis = analyze_image_inspiration_with_grok(image_presigned_urls, context)
+        analysis = await asyncio.to_thread(analyze_image_inspiration_with_grok, image_presigned_urls, context)
         
         # Add metadata
         analysis["source_url"] = url
@@ -1987,7 +1963,7 @@ async def process_video_inspiration_link(url: str, context: dict, account_id: in
     os.makedirs(output_dir, exist_ok=True)
     
     try:
-        video_path, is_video = download_inspiration_video(url, output_dir)
+        video_path, is_video = await asyncio.to_thread(download_inspiration_video, url, output_dir)
         if not is_video or not video_path:
             print(f"  ⚠️ Not a video or download failed")
             return {}
@@ -2010,7 +1986,7 @@ async def process_video_inspiration_link(url: str, context: dict, account_id: in
             shutil.rmtree(output_dir, ignore_errors=True)
 
 
-def generate_clip_with_timeout_and_fallback(
+async def generate_clip_with_timeout_and_fallback(
     primary_model: dict,
     fallback_model: dict,
     clip_prompt: str,
@@ -2020,16 +1996,19 @@ def generate_clip_with_timeout_and_fallback(
     timeout_seconds: int = FAL_CLIP_TIMEOUT_SECONDS
 ) -> tuple:
     """
-    Generate a clip with FAL, with timeout and automatic model fallback.
+    Generate a clip with FAL, with timeout and a hedged model fallback.
+    
+    The fallback model is started once the primary runs past its p90 latency
+    (or fails / times out), and whichever clip finishes first is used.
     
     Args:
         primary_model: Primary model config dict with 'name', 'fal_model', 'clip_duration', 'duration_param'
-        fallback_model: Fallback model config to use if primary times out
+        fallback_model: Fallback model config to hedge with
         clip_prompt: The prompt for clip generation
         frame_presigned_url: Presigned URL of the starting frame
         clip_num: Clip number for logging
         video_idx: Video index for logging
-        timeout_seconds: Timeout in seconds (default 7 minutes)
+        timeout_seconds: Per-model timeout in seconds (the request is cancelled on timeout)
     
     Returns:
         tuple: (result, model_used_name, model_used_fal, clip_duration, success)
@@ -2056,68 +2035,29 @@ def generate_clip_with_timeout_and_fallback(
                 "resolution": "720p"
             }
     
-    def _call_fal_blocking(model_config: dict):
-        """Blocking FAL call to run in thread."""
-        model_name = model_config["name"]
-        fal_model = model_config["fal_model"]
-        fal_args = _build_fal_arguments(model_name, model_config)
-        
-        def on_queue_update(update):
-            if isinstance(update, fal_client.InProgress):
-                for log in update.logs:
-                    print(f"    [FAL] {log.get('message', '')}")
-        
-        result = fal_client.subscribe(
-            fal_model,
-            arguments=fal_args,
-            with_logs=True,
-            on_queue_update=on_queue_update
-        )
-        return result
+    primary = FalJob(primary_model["name"], primary_model["fal_model"],
+                     _build_fal_arguments(primary_model["name"], primary_model), result_key="video")
+    fallback = FalJob(fallback_model["name"], fallback_model["fal_model"],
+                      _build_fal_arguments(fallback_model["name"], fallback_model), result_key="video")
     
-    def _try_model_with_timeout(model_config: dict, is_fallback: bool = False) -> tuple:
-        """Try a model with timeout, returns (result, success)."""
-        model_name = model_config["name"]
-        label = "FALLBACK" if is_fallback else ""
-        
-        print(f"  🎬 [{model_name.upper()}] {label} Generating clip {clip_num} (timeout: {timeout_seconds}s / {timeout_seconds//60}min)...")
-        print(f"     Model: {model_config['fal_model']}")
-        print(f"     Duration: {model_config['clip_duration']}s")
-        
-        # Create executor WITHOUT context manager to avoid blocking on shutdown
-        executor = ThreadPoolExecutor(max_workers=1)
-        try:
-            future = executor.submit(_call_fal_blocking, model_config)
-            try:
-                result = future.result(timeout=timeout_seconds)
-                if result and "video" in result:
-                    print(f"  ✅ [{model_name.upper()}] {label} Clip generated successfully!")
-                    return (result, True)
-                else:
-                    print(f"  ⚠️ [{model_name.upper()}] {label} No video in result")
-                    return (None, False)
-            except FuturesTimeoutError:
-                print(f"\n  ⏰ TIMEOUT! [{model_name.upper()}] {label} did not respond within {timeout_seconds}s ({timeout_seconds//60} minutes)")
-                # Don't wait for the thread - let it run in background (FAL will handle it)
-                future.cancel()
-                return (None, False)
-        except Exception as e:
-            print(f"  ❌ [{model_name.upper()}] {label} Error: {e}")
-            return (None, False)
-        finally:
-            # Shutdown executor without waiting for pending futures
-            executor.shutdown(wait=False)
+    print(f"  🎬 [{primary.name.upper()}] Generating clip {clip_num} (timeout: {timeout_seconds}s / {timeout_seconds//60}min, fallback: {fallback.name.upper()})...")
+    print(f"     Model: {primary_model['fal_model']}")
+    print(f"     Duration: {primary_model['clip_duration']}s")
     
-    # Try primary model first
-    result, success = _try_model_with_timeout(primary_model, is_fallback=False)
-    if success:
-        return (result, primary_model["name"], primary_model["fal_model"], primary_model["clip_duration"], True)
+    outcome = await fal_job_client.hedged_async(
+        primary,
+        fallback,
+        timeout=timeout_seconds,
+        on_log=lambda message: print(f"    [FAL] {message}")
+    )
+    for model_name, error in outcome.errors.items():
+        print(f"  ⚠️ [{model_name.upper()}] {error}")
     
-    # Primary failed, try fallback
-    print(f"  🔄 Switching to fallback model: {fallback_model['name'].upper()}...")
-    result, success = _try_model_with_timeout(fallback_model, is_fallback=True)
-    if success:
-        return (result, fallback_model["name"], fallback_model["fal_model"], fallback_model["clip_duration"], True)
+    if outcome.job is not None:
+        used_model = primary_model if outcome.job is primary else fallback_model
+        label = "FALLBACK " if outcome.job is fallback else ""
+        print(f"  ✅ [{used_model['name'].upper()}] {label}Clip generated successfully!")
+        return (outcome.result, used_model["name"], used_model["fal_model"], used_model["clip_duration"], True)
     
     # Both failed
     print(f"  ❌ Both models failed - clip {clip_num} generation failed")
@@ -2617,12 +2557,7 @@ def separate_voice_from_music_demucs(video_path: str) -> str:
     This is specifically for Veo clips that have unwanted background music.
     """
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
         import soundfile as sf
-        import numpy as np
         
         print(f"🎵 Separating voice from background music using Demucs...")
         
@@ -2631,35 +2566,13 @@ def separate_voice_from_music_demucs(video_path: str) -> str:
         audio_path = video_path.replace('.mp4', '_audio.wav')
         video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le', logger=None)
         
-        # Load Demucs model (htdemucs is best for vocals)
-        print("🤖 Loading Demucs model...")
-        model = get_model('htdemucs')
-        model.eval()
-        
-        # Load audio with torchaudio
-        print("📂 Loading audio file...")
-        waveform, sample_rate = torchaudio.load(audio_path)
-        
-        # Ensure stereo
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        
-        # Apply model
+        # Separate with the shared htdemucs model (best for vocals)
         print("🔬 Separating voice from music (this may take 10-30 seconds)...")
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-        
-        # Extract vocals (index 3 in htdemucs output)
-        # htdemucs outputs: drums, bass, other, vocals
-        vocals = sources[3].numpy()
-        
-        # Convert to mono if stereo
-        if vocals.shape[0] == 2:
-            vocals = np.mean(vocals, axis=0)
+        stems = demucs_separator.separate(audio_path)
         
-        # Save voice-only audio
+        # Save voice-only audio (mono)
         voice_only_audio_path = video_path.replace('.mp4', '_voice_only.wav')
-        sf.write(voice_only_audio_path, vocals, sample_rate)
+        sf.write(voice_only_audio_path, stems.vocals(), stems.sample_rate)
         print(f"✅ Voice-only audio saved: {voice_only_audio_path}")
         
         # Replace video audio with voice-only audio
@@ -2704,7 +2617,8 @@ def separate_voice_from_music_demucs(video_path: str) -> str:
 def trim_ugc_clip_at_speech_end(video_path: str, min_search_time: float = 5.0, buffer_ms: int = 300) -> str:
     """
     Trim UGC/influencer clip at the point where speech ends (after min_search_time).
-    Uses Demucs to separate vocals and detect when the character stops speaking.
+    Uses a VAD on the clip audio to detect when the character stops speaking, separating
+    vocals with Demucs only when background music makes the VAD ambiguous.
     
     Args:
         video_path: Path to the video file
@@ -2715,13 +2629,6 @@ def trim_ugc_clip_at_speech_end(video_path: str, min_search_time: float = 5.0, b
         Path to trimmed video (or original if trimming not needed/failed)
     """
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
-        import soundfile as sf
-        import numpy as np
-        
         print(f"\n{'='*60}")
         print(f"✂️ UGC CLIP TRIMMING: Detecting speech end point")
         print(f"{'='*60}")
@@ -2743,85 +2650,18 @@ def trim_ugc_clip_at_speech_end(video_path: str, min_search_time: float = 5.0, b
         video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le', logger=None)
         print(f"🎵 Audio extracted for analysis")
         
-        # Load Demucs model
-        print("🤖 Loading Demucs model for speech detection...")
-        model = get_model('htdemucs')
-        model.eval()
-        
-        # Load audio with torchaudio
-        waveform, sample_rate = torchaudio.load(audio_path)
-        
-        # Ensure stereo for Demucs
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        
-        # Apply model to separate vocals
-        print("🔬 Separating vocals to detect speech...")
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0]
-        
-        # Extract vocals (index 3 in htdemucs output)
-        vocals = sources[3].numpy()
+        # Detect speech end: VAD on the raw audio, Demucs vocal separation only if the VAD is ambiguous
+        print("📊 Analyzing audio for speech activity...")
+        estimate = speech_end_detector.detect(audio_path, min_search_time)
+        print(f"🎙️ Speech end via {estimate.method} (VAD confidence {estimate.details.get('vad_confidence', estimate.confidence):.2f})")
         
-        # Convert to mono if stereo
-        if vocals.shape[0] == 2:
-            vocals = np.mean(vocals, axis=0)
-        
-        # Calculate RMS energy in small windows to detect speech activity
-        print("📊 Analyzing vocal track for speech activity...")
-        window_size = int(sample_rate * 0.05)  # 50ms windows
-        hop_size = int(sample_rate * 0.025)    # 25ms hop
-        
-        # Calculate RMS for each window
-        num_windows = (len(vocals) - window_size) // hop_size + 1
-        rms_values = []
-        
-        for i in range(num_windows):
-            start = i * hop_size
-            end = start + window_size
-            window = vocals[start:end]
-            rms = np.sqrt(np.mean(window ** 2))
-            rms_values.append(rms)
-        
-        rms_values = np.array(rms_values)
-        
-        # Normalize RMS values
-        if rms_values.max() > 0:
-            rms_normalized = rms_values / rms_values.max()
-        else:
-            print("⚠️ No audio detected, skipping trim")
-            video_clip.close()
-            os.remove(audio_path)
-            return video_path
-        
-        # Find speech threshold (use 10% of max as threshold)
-        speech_threshold = 0.10
-        
-        # Calculate time for each window
-        window_times = np.array([i * hop_size / sample_rate for i in range(len(rms_values))])
-        
-        # Find the LAST time speech is above threshold AFTER min_search_time
-        min_search_index = np.searchsorted(window_times, min_search_time)
-        
-        # Look for speech end after min_search_time
-        speech_active_after_min = rms_normalized[min_search_index:] > speech_threshold
-        
-        if not np.any(speech_active_after_min):
+        if estimate.speech_end is None:
             print(f"⚠️ No speech detected after {min_search_time}s, skipping trim")
             video_clip.close()
             os.remove(audio_path)
             return video_path
         
-        # Find the last index where speech is active (after min_search_time)
-        last_speech_indices = np.where(speech_active_after_min)[0]
-        if len(last_speech_indices) == 0:
-            print(f"⚠️ Speech ended before {min_search_time}s, skipping trim")
-            video_clip.close()
-            os.remove(audio_path)
-            return video_path
-        
-        last_speech_index = last_speech_indices[-1] + min_search_index
-        speech_end_time = window_times[last_speech_index]
+        speech_end_time = estimate.speech_end
         
         # Add buffer (300ms default)
         trim_time = speech_end_time + (buffer_ms / 1000.0)
@@ -4183,84 +4023,83 @@ def _inventory_analysis_to_video_inspiration(inv: dict) -> dict:
     }
 
 
-def get_existing_inspiration_analysis(url: str) -> Optional[Dict]:
+def _brand_ad_analysis_to_inspiration(url: str, s3_key: str, inv: dict, media_type: str) -> Dict:
+    """Wrap a dvyb_brand_ads inventory analysis as video_inspiration / image_inspiration."""
+    if media_type == "video":
+        # For video ads, wrap in video_inspiration; add source_url for Kling O3 v2v pipeline
+        video_insp = {"inventory_analysis": inv}
+        presigned = web2_s3_helper.generate_presigned_url(s3_key)
+        if presigned:
+            video_insp["source_url"] = presigned
+            print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (video) for: {url[:80]}...")
+            print(f"  📹 Added source_url for Kling O3 v2v pipeline")
+        else:
+            print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (video) for: {url[:80]}...")
+        return {"video_inspiration": video_insp}
+
+    # For image ads, convert to image_inspiration format and add presigned URL for FAL
+    img_insp = _inventory_analysis_to_image_inspiration(inv)
+    # Pass inspiration image to FAL for exact style matching (same as dvyb_inspiration_links)
+    presigned_url = web2_s3_helper.generate_presigned_url(s3_key)
+    if presigned_url:
+        img_insp["image_urls"] = [presigned_url]
+        print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (image) for: {url[:80]}...")
+        print(f"  📸 Added presigned S3 URL for inspiration image (will be passed to FAL)")
+    else:
+        print(f"  ⚠️ Failed to generate presigned URL for dvyb_brand_ads image, inspiration won't be passed to FAL")
+    return {"image_inspiration": img_insp}
+
+
+def get_existing_inspiration_analyses(urls: List[str]) -> Dict[str, Optional[Dict]]:
     """
-    Get existing inspiration analysis from database if it exists.
-    Checks both dvyb_inspiration_links (inspirationAnalysis) and dvyb_brand_ads (inventoryAnalysis).
-    Returns the analysis dict if found, None otherwise.
+    Get existing inspiration analyses for several URLs at once (one query per source table).
+    Checks both dvyb_inspiration_links (inspirationAnalysis, matched on the normalized url /
+    mediaUrl key) and dvyb_brand_ads (inventoryAnalysis, matched on the creative S3 key).
+    Returns {url: analysis dict or None}.
     """
+    results: Dict[str, Optional[Dict]] = {url: None for url in urls}
+    if not urls:
+        return results
     try:
-        from app.database.connection import get_db_session
-        from sqlalchemy import text
-        import json
-        
-        session = get_db_session()
-        try:
-            # 1. Check dvyb_inspiration_links (url or mediaUrl)
-            query = text("""
-                SELECT "inspirationAnalysis" 
-                FROM dvyb_inspiration_links 
-                WHERE "isActive" = true 
-                  AND (
-                    url = :url 
-                    OR "mediaUrl" = :url
-                  )
-                  AND "inspirationAnalysis" IS NOT NULL
-                LIMIT 1
-            """)
-            result = session.execute(query, {"url": url}).fetchone()
-            if result and result[0]:
-                analysis = json.loads(result[0])
+        from app.database.repositories.inspiration_analysis_repository import InspirationAnalysisRepository
+        repository = InspirationAnalysisRepository()
+
+        # 1. dvyb_inspiration_links (url or mediaUrl)
+        keys = {url: normalize_inspiration_url(url) for url in urls}
+        link_analyses = repository.find_link_analyses(list(keys.values()))
+        for url, key in keys.items():
+            if key in link_analyses:
+                results[url] = link_analyses[key]
                 print(f"  ✅ Found existing analysis in dvyb_inspiration_links for: {url[:80]}...")
-                return analysis
-
-            # 2. Check dvyb_brand_ads (creativeImageS3Key or creativeVideoS3Key) - for ads from discover/onboarding
-            s3_key = _extract_s3_key_from_url(url) or (url if url.startswith("dvyb_brands/") else None)
-            if s3_key:
-                ad_query = text("""
-                    SELECT "inventoryAnalysis", "mediaType"
-                    FROM dvyb_brand_ads
-                    WHERE ("creativeImageS3Key" = :s3_key OR "creativeVideoS3Key" = :s3_key)
-                      AND "inventoryAnalysis" IS NOT NULL
-                    LIMIT 1
-                """)
-                ad_result = session.execute(ad_query, {"s3_key": s3_key}).fetchone()
-                if ad_result and ad_result[0]:
-                    inv = ad_result[0] if isinstance(ad_result[0], dict) else json.loads(ad_result[0])
-                    media_type = ad_result[1] or "image"
-                    if media_type == "video":
-                        # For video ads, wrap in video_inspiration; add source_url for Kling O3 v2v pipeline
-                        video_insp = {"inventory_analysis": inv}
-                        presigned = web2_s3_helper.generate_presigned_url(s3_key)
-                        if presigned:
-                            video_insp["source_url"] = presigned
-                            print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (video) for: {url[:80]}...")
-                            print(f"  📹 Added source_url for Kling O3 v2v pipeline")
-                        else:
-                            print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (video) for: {url[:80]}...")
-                        return {"video_inspiration": video_insp}
-                    else:
-                        # For image ads, convert to image_inspiration format and add presigned URL for FAL
-                        img_insp = _inventory_analysis_to_image_inspiration(inv)
-                        # Pass inspiration image to FAL for exact style matching (same as dvyb_inspiration_links)
-                        presigned_url = web2_s3_helper.generate_presigned_url(s3_key)
-                        if presigned_url:
-                            img_insp["image_urls"] = [presigned_url]
-                            print(f"  ✅ Found existing inventory_analysis in dvyb_brand_ads (image) for: {url[:80]}...")
-                            print(f"  📸 Added presigned S3 URL for inspiration image (will be passed to FAL)")
-                        else:
-                            print(f"  ⚠️ Failed to generate presigned URL for dvyb_brand_ads image, inspiration won't be passed to FAL")
-                        return {"image_inspiration": img_insp}
 
-            print(f"  ℹ️  No existing analysis found in database for: {url[:80]}...")
-            return None
-                
-        finally:
-            session.close()
-            
+        # 2. dvyb_brand_ads (creativeImageS3Key or creativeVideoS3Key) - for ads from discover/onboarding
+        s3_keys = {
+            url: _extract_s3_key_from_url(url) or (url if url.startswith("dvyb_brands/") else None)
+            for url in urls if results[url] is None
+        }
+        ad_analyses = repository.find_brand_ad_analyses([k for k in s3_keys.values() if k])
+        for url, s3_key in s3_keys.items():
+            if s3_key in ad_analyses:
+                ad = ad_analyses[s3_key]
+                results[url] = _brand_ad_analysis_to_inspiration(url, s3_key, ad["inventory_analysis"], ad["media_type"])
+
+        for url, analysis in results.items():
+            if analysis is None:
+                print(f"  ℹ️  No existing analysis found in database for: {url[:80]}...")
+        return results
+
     except Exception as e:
         logger.warning(f"⚠️ Error checking database for existing analysis: {e}")
-        return None
+        return results
+
+
+def get_existing_inspiration_analysis(url: str) -> Optional[Dict]:
+    """
+    Get existing inspiration analysis from database if it exists.
+    Checks both dvyb_inspiration_links (inspirationAnalysis) and dvyb_brand_ads (inventoryAnalysis).
+    Returns the analysis dict if found, None otherwise.
+    """
+    return get_existing_inspiration_analyses([url]).get(url)
 
 
 def get_available_inspiration_categories() -> List[str]:
@@ -4438,6 +4277,60 @@ async def extract_inspiration_music_only(url: str, account_id: int, clips_per_vi
             shutil.rmtree(output_dir, ignore_errors=True)
 
 
+import copy
+from concurrent.futures import Future
+
+# In-flight inspiration link analyses shared across generation jobs. Jobs run on their own
+# event loops (asyncio.run in worker threads), so waiters join through a thread-safe Future.
+_inspiration_inflight: Dict[tuple, Future] = {}
+_inspiration_inflight_lock = threading.Lock()
+
+
+async def _single_flight_inspiration(key: tuple, analyze) -> dict:
+    """
+    Run analyze() once per key across concurrent jobs: a job asking for a link that another
+    job is already downloading/analyzing waits for that result instead of repeating the work.
+    """
+    with _inspiration_inflight_lock:
+        future = _inspiration_inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inspiration_inflight[key] = Future()
+    if not leader:
+        print(f"  🔗 Joining in-flight inspiration analysis for {key[1]}")
+        try:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+        except Exception as e:
+            print(f"  ⚠️ Shared inspiration analysis failed: {e}")
+            return {}
+    try:
+        result = await analyze()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inspiration_inflight_lock:
+            _inspiration_inflight.pop(key, None)
+
+
+async def _analyze_video_link(link: str, context: dict, account_id: int, clips_per_video: int) -> dict:
+    # Video links are only downloaded and verified here, so any account can share the result
+    key = ("video", normalize_inspiration_url(link) or link)
+    return await _single_flight_inspiration(
+        key, lambda: process_video_inspiration_link(link, context, account_id, clips_per_video)
+    )
+
+
+async def _analyze_image_link(link: str, context: dict, account_id: int) -> dict:
+    # Image analyses are brand-specific (Grok prompt uses the account context)
+    key = ("image", normalize_inspiration_url(link) or link, account_id)
+    return await _single_flight_inspiration(
+        key, lambda: process_image_inspiration_link(link, context, account_id)
+    )
+
+
 async def analyze_inspiration_links(links: List[str], context: dict = None, account_id: int = None, clips_per_video: int = 1, num_posts: int = None) -> Dict:
     """
     Analyze inspiration links - handles both video platforms and regular web links.
@@ -4502,6 +4395,9 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
         print(f"🖼️ Direct media links (S3/CDN): {len(direct_media_links)}")
         print(f"🌐 Regular links: {len(regular_links)}")
         
+        # One bulk lookup of stored analyses for every link in the request
+        existing_by_link = await asyncio.to_thread(get_existing_inspiration_analyses, valid_links)
+        
         result = {}
         
         # Process video/image platform links first (if any)
@@ -4516,9 +4412,9 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
             max_links_to_process = num_posts if num_posts else (4 if context.get("is_product_shot_flow", False) else len(video_links))
             links_to_process = video_links[:max_links_to_process]
             
-            for link in links_to_process:
-                # Check if analysis already exists in database
-                existing_analysis = get_existing_inspiration_analysis(link)
+            async def analyze_platform_link(link: str) -> tuple:
+                """(video inspiration, image inspiration) for one link; either may be None"""
+                existing_analysis = existing_by_link.get(link)
                 if existing_analysis:
                     # Use existing analysis, but still extract music (music extraction is not stored in DB)
                     if "video_inspiration" in existing_analysis:
@@ -4536,35 +4432,32 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
                             if "background_music_s3_key" not in video_inspiration:
                                 print(f"  ⚠️  Music extraction failed or not applicable, no music will be used")
                         
-                        video_inspirations.append(video_inspiration)
+                        return (video_inspiration, None)
                     elif "image_inspiration" in existing_analysis:
                         # Skip cached image inspiration for now - run fresh analysis so structure matches (style reference, no copycat)
                         print(f"  ⏭️  Skipping cached image inspiration analysis - running fresh Grok analysis...")
-                        image_analysis = await process_image_inspiration_link(link, context, account_id)
-                        if image_analysis:
-                            image_inspirations.append(image_analysis)
+                        return (None, await _analyze_image_link(link, context, account_id) or None)
                     else:
                         # If existing analysis doesn't have video/image structure, try processing
                         print(f"  ⚠️  Existing analysis found but doesn't match expected format, processing with Grok...")
-                        video_analysis = await process_video_inspiration_link(link, context, account_id, clips_per_video)
-                        if video_analysis:
-                            video_inspirations.append(video_analysis)
-                        else:
-                            image_analysis = await process_image_inspiration_link(link, context, account_id)
-                            if image_analysis:
-                                image_inspirations.append(image_analysis)
-                else:
-                    # No existing analysis, process with Grok (includes music extraction)
-                    # Try video first
-                    video_analysis = await process_video_inspiration_link(link, context, account_id, clips_per_video)
-                    if video_analysis:
-                        video_inspirations.append(video_analysis)
-                    else:
-                        # If video processing failed, try as image
-                        print(f"\n📸 Video processing failed, trying as image inspiration...")
-                        image_analysis = await process_image_inspiration_link(link, context, account_id)
-                        if image_analysis:
-                            image_inspirations.append(image_analysis)
+                
+                # No usable existing analysis, process with Grok (includes music extraction)
+                # Try video first
+                video_analysis = await _analyze_video_link(link, context, account_id, clips_per_video)
+                if video_analysis:
+                    return (video_analysis, None)
+                # If video processing failed, try as image
+                print(f"\n📸 Video processing failed, trying as image inspiration...")
+                return (None, await _analyze_image_link(link, context, account_id) or None)
+            
+            # Links are analyzed concurrently; results keep the order of the links
+            for video_analysis, image_analysis in await asyncio.gather(
+                *(analyze_platform_link(link) for link in links_to_process)
+            ):
+                if video_analysis:
+                    video_inspirations.append(video_analysis)
+                if image_analysis:
+                    image_inspirations.append(image_analysis)
             
             if video_inspirations:
                 result["video_inspiration"] = video_inspirations[0]  # Use first video inspiration
@@ -4594,9 +4487,9 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
             max_links_to_process = num_posts if num_posts else len(direct_media_links)
             links_to_process = direct_media_links[:max_links_to_process]
             
-            for link in links_to_process:
-                # Check if analysis already exists in database
-                existing_analysis = get_existing_inspiration_analysis(link)
+            async def analyze_direct_media_link(link: str) -> tuple:
+                """(video inspiration, image inspiration) for one direct media file; either may be None"""
+                existing_analysis = existing_by_link.get(link)
                 if existing_analysis:
                     # Use existing analysis directly
                     if "video_inspiration" in existing_analysis:
@@ -4613,51 +4506,34 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
                             if "background_music_s3_key" not in video_inspiration:
                                 print(f"  ⚠️  Music extraction failed or not applicable, no music will be used")
                         
-                        direct_video_inspirations.append(video_inspiration)
+                        return (video_inspiration, None)
                     elif "image_inspiration" in existing_analysis:
                         # Skip cached image inspiration for now - run fresh analysis so structure matches (style reference, no copycat)
                         print(f"  ⏭️  Skipping cached image inspiration - running fresh Grok analysis for: {link[:80]}...")
-                        image_analysis = await process_image_inspiration_link(link, context, account_id)
-                        if image_analysis:
-                            direct_image_inspirations.append(image_analysis)
+                        return (None, await _analyze_image_link(link, context, account_id) or None)
                     else:
                         # If existing analysis doesn't have expected structure, try processing
                         print(f"  ⚠️  Existing analysis found but doesn't match expected format, processing with Grok...")
-                        # Determine if it's image or video based on extension
-                        url_lower = link.lower()
-                        parsed_url = urlparse(link)
-                        path_lower = parsed_url.path.lower()
-                        image_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-                        video_extensions = ['.mp4', '.webm', '.mpeg', '.mov', '.avi', '.mkv']
-                        is_direct_image = any(path_lower.endswith(ext) for ext in image_extensions)
-                        
-                        if is_direct_image:
-                            image_analysis = await process_image_inspiration_link(link, context, account_id)
-                            if image_analysis:
-                                direct_image_inspirations.append(image_analysis)
-                        else:
-                            video_analysis = await process_video_inspiration_link(link, context, account_id, clips_per_video)
-                            if video_analysis:
-                                direct_video_inspirations.append(video_analysis)
-                else:
-                    # No existing analysis, process with Grok
-                    url_lower = link.lower()
-                    parsed_url = urlparse(link)
-                    path_lower = parsed_url.path.lower()
-                    image_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-                    video_extensions = ['.mp4', '.webm', '.mpeg', '.mov', '.avi', '.mkv']
-                    is_direct_image = any(path_lower.endswith(ext) for ext in image_extensions)
-                    
-                    if is_direct_image:
-                        print(f"  🖼️ Processing as direct image file...")
-                        image_analysis = await process_image_inspiration_link(link, context, account_id)
-                        if image_analysis:
-                            direct_image_inspirations.append(image_analysis)
-                    else:
-                        print(f"  🎬 Processing as direct video file...")
-                        video_analysis = await process_video_inspiration_link(link, context, account_id, clips_per_video)
-                        if video_analysis:
-                            direct_video_inspirations.append(video_analysis)
+                
+                # Determine if it's image or video based on extension
+                path_lower = urlparse(link).path.lower()
+                image_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
+                is_direct_image = any(path_lower.endswith(ext) for ext in image_extensions)
+                
+                if is_direct_image:
+                    print(f"  🖼️ Processing as direct image file...")
+                    return (None, await _analyze_image_link(link, context, account_id) or None)
+                print(f"  🎬 Processing as direct video file...")
+                return (await _analyze_video_link(link, context, account_id, clips_per_video) or None, None)
+            
+            # Files are analyzed concurrently; results keep the order of the links
+            for video_analysis, image_analysis in await asyncio.gather(
+                *(analyze_direct_media_link(link) for link in links_to_process)
+            ):
+                if video_analysis:
+                    direct_video_inspirations.append(video_analysis)
+                if image_analysis:
+                    direct_image_inspirations.append(image_analysis)
             
             # Add direct media inspirations to result
             if direct_video_inspirations:
@@ -4690,7 +4566,7 @@ async def analyze_inspiration_links(links: List[str], context: dict = None, acco
         combined_existing_analysis = {}
         
         for link in regular_links:
-            existing_analysis = get_existing_inspiration_analysis(link)
+            existing_analysis = existing_by_link.get(link)
             if existing_analysis:
                 # Merge existing analysis into result
                 if "summary" in existing_analysis:
@@ -9278,7 +9154,7 @@ async def generate_content(request: DvybAdhocGenerationRequest, prompts: Dict, c
                 print(f"  ✅ Frame presigned URL ready: {frame_presigned_url[:100]}...")
                 
                 # Use timeout-enabled clip generation with automatic fallback
-                result, used_model_name, used_fal_model, used_clip_duration, success = generate_clip_with_timeout_and_fallback(
+                result, used_model_name, used_fal_model, used_clip_duration, success = await generate_clip_with_timeout_and_fallback(
                     primary_model=current_primary_model,
                     fallback_model=current_fallback_model,
                     clip_prompt=clip_prompt,
@@ -9327,7 +9203,7 @@ async def generate_content(request: DvybAdhocGenerationRequest, prompts: Dict, c
                     
                     print(f"  ✅ {used_model_name.upper()} clip {clip_num} generation complete (with embedded audio)")
                     if used_model_name != model_name:
-                        print(f"  ℹ️ Note: Used fallback model due to primary model timeout")
+                        print(f"  ℹ️ Note: Used fallback model (primary was slower or failed)")
                     
                     # For multi-clip videos: lock model after first successful clip for consistency
                     if CLIPS_PER_VIDEO > 1 and clip_num == 1 and locked_model is None:
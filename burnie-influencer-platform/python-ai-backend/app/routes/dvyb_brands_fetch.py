@@ -14,6 +14,8 @@ import os
 import re
 import shutil
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -22,10 +24,31 @@ from pydantic import BaseModel
 import requests
 
 from app.config.settings import settings
+from app.services.image_dedup import HashedImage, dedupe_images, hash_image, image_hash_index
+from app.services.meta_seen_ad_index import (
+    STATE_NO_CREATIVES,
+    STATE_UPLOADED,
+    SeenAdRunStats,
+    meta_seen_ad_index,
+)
 from app.services.s3_storage_service import S3StorageService
 
 logger = logging.getLogger(__name__)
 
+# Concurrent creative downloads / size probes, shared by all brand fetches in this process
+BRAND_MEDIA_DOWNLOAD_CONCURRENCY = int(os.getenv("BRAND_MEDIA_DOWNLOAD_CONCURRENCY", "8"))
+# Ads of a batch whose creatives are ingested at the same time
+BRAND_MEDIA_ADS_CONCURRENCY = int(os.getenv("BRAND_MEDIA_ADS_CONCURRENCY", "4"))
+
+_media_pool = ThreadPoolExecutor(max_workers=BRAND_MEDIA_DOWNLOAD_CONCURRENCY, thread_name_prefix="brand-media")
+
+# Facebook CDN may 403 without a browser User-Agent and Referer
+_MEDIA_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Referer": "https://www.facebook.com/",
+}
+_CONTENT_RANGE_TOTAL_RE = re.compile(r"/(\d+)\s*$")
+
 # Video extensions for image-only filter (only save ads with image creatives, not video)
 _VIDEO_EXTENSIONS = (".mp4", ".webm", ".mov", ".m4v")
 
@@ -113,20 +136,44 @@ def _download_url_content(url: str) -> tuple[bytes, str] | None:
     # Decode HTML entities (e.g. &amp; -> &) so the request URL is valid; Facebook may 403 without Referer
     url = html.unescape(str(url).strip())
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Referer": "https://www.facebook.com/",
-        }
-        resp = requests.get(url, headers=headers, timeout=60)
+        resp = requests.get(url, headers=_MEDIA_HEADERS, timeout=60)
         resp.raise_for_status()
         content = resp.content
-        ct = resp.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
-        return (content, ct)
+        return (content, _response_content_type(resp))
     except Exception as e:
         logger.warning(f"Failed to download from {url[:60]}...: {e}")
         return None
 
 
+def _response_content_type(resp: requests.Response) -> str:
+    return resp.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+
+
+def _probe_media_size(url: str) -> tuple[int | None, str]:
+    """
+    (size in bytes, content type) of a creative from response headers, without downloading it.
+    Tries HEAD first, then a one-byte ranged GET (Content-Range carries the total size).
+    Size is None when neither tells it.
+    """
+    url = html.unescape(str(url or "").strip())
+    try:
+        resp = requests.head(url, headers=_MEDIA_HEADERS, timeout=15, allow_redirects=True)
+        if resp.ok and resp.headers.get("content-length"):
+            return (int(resp.headers["content-length"]), _response_content_type(resp))
+        with requests.get(
+            url, headers={**_MEDIA_HEADERS, "Range": "bytes=0-0"}, timeout=15, stream=True
+        ) as resp:
+            total = _CONTENT_RANGE_TOTAL_RE.search(resp.headers.get("content-range", ""))
+            if resp.status_code == 206 and total:
+                return (int(total.group(1)), _response_content_type(resp))
+            if resp.status_code == 200 and resp.headers.get("content-length"):
+                # Range ignored: the full-body length is just as good
+                return (int(resp.headers["content-length"]), _response_content_type(resp))
+    except (requests.RequestException, ValueError) as e:
+        logger.debug(f"Size probe failed for {url[:60]}...: {e}")
+    return (None, "")
+
+
 # Facebook CDN uses _s60x60_, _s600x600_ etc. Treat small sizes as thumbnails/icons to skip (same as extension flow).
 _SMALL_THUMBNAIL_SIZE = 200
 
@@ -167,24 +214,39 @@ def _download_all_images_and_upload_to_s3(
     urls: list[str],
     brand_id: int,
     meta_ad_id: str,
+    index_scope: str | None = None,
 ) -> tuple[str | None, list[str]]:
     """
     Filter out thumbnails/small images, then download each and upload to S3 (image, image_1, image_2, ...).
     Returns (primary_s3_key, extra_s3_keys). Skips small thumbnail/icon URLs (max dimension ≤200).
+    Downloads and uploads run concurrently on the shared media pool.
+
+    Near-identical downloads (same creative at several sizes) are collapsed to the
+    highest-resolution one. With index_scope (e.g. the brand domain), images already
+    uploaded for that scope reuse their S3 key instead of being uploaded again.
     """
     filtered = _filter_non_thumbnail_image_urls(urls)
     if not filtered:
         return (None, [])
-    primary_key: str | None = None
-    extra_keys: list[str] = []
-    safe_id = _sanitize_meta_ad_id(meta_ad_id)
-    for i, url in enumerate(filtered):
+
+    def download(url: str) -> HashedImage | None:
         result = _download_url_content(url)
-        if not result:
-            continue
-        content, raw_ct = result
-        if _is_video_content_type(raw_ct or ""):
+        if not result or _is_video_content_type(result[1] or ""):
+            return None
+        return hash_image(result[0], item=result[1])
+
+    downloaded = [image for image in _media_pool.map(download, filtered) if image is not None]
+    kept = dedupe_images(downloaded)
+    known = image_hash_index.find(index_scope, kept) if index_scope else [None] * len(kept)
+
+    # (image, s3_key, content type to upload; None = reuse the known key)
+    planned: list[tuple[HashedImage, str, str | None]] = []
+    safe_id = _sanitize_meta_ad_id(meta_ad_id)
+    for i, (image, match) in enumerate(zip(kept, known)):
+        if match and match["width"] * match["height"] >= image.pixels:
+            planned.append((image, match["s3_key"], None))
             continue
+        raw_ct = image.item
         ext = ".jpg"
         if "png" in (raw_ct or ""):
             ext = ".png"
@@ -192,17 +254,75 @@ def _download_all_images_and_upload_to_s3(
             ext = ".gif"
         elif "webp" in (raw_ct or ""):
             ext = ".webp"
-        ct = raw_ct or "image/jpeg"
         sub_key = "image" if i == 0 else f"image_{i}"
-        s3_key = f"dvyb_brands/{brand_id}/ads/{safe_id}/{sub_key}{ext}"
-        if s3_service._upload_to_s3(content, s3_key, ct).get("success"):
-            if i == 0:
-                primary_key = s3_key
-            else:
-                extra_keys.append(s3_key)
+        planned.append((image, f"dvyb_brands/{brand_id}/ads/{safe_id}/{sub_key}{ext}", raw_ct or "image/jpeg"))
+
+    def upload(entry: tuple[HashedImage, str, str | None]) -> str | None:
+        image, s3_key, ct = entry
+        if ct is None:
+            return s3_key
+        if not s3_service._upload_to_s3(image.content, s3_key, ct).get("success"):
+            return None
+        if index_scope:
+            image_hash_index.record(index_scope, image, s3_key)
+        return s3_key
+
+    keys = list(_media_pool.map(upload, planned))
+    primary_key: str | None = keys[0] if keys else None
+    extra_keys: list[str] = []
+    for s3_key in keys[1:]:
+        if s3_key and s3_key != primary_key and s3_key not in extra_keys:
+            extra_keys.append(s3_key)
+    reused = sum(1 for _, _, ct in planned if ct is None)
+    if len(kept) < len(downloaded) or reused:
+        logger.info(
+            "Image dedup for %s: %d downloaded, %d distinct, %d reused from earlier uploads",
+            meta_ad_id, len(downloaded), len(kept), reused,
+        )
     return (primary_key, extra_keys)
 
 
+def _creative_s3_key(brand_id: int, meta_ad_id: str, content_type: str, raw_ct: str) -> tuple[str, str]:
+    """(S3 key, upload Content-Type) for a single creative of an ad."""
+    ct = raw_ct or "application/octet-stream"
+    if content_type == "image":
+        ext = ".jpg" if "jpeg" in ct or "jpg" in ct else ".png" if "png" in ct else ".gif" if "gif" in ct else ".webp" if "webp" in ct else ".jpg"
+        ct = ct if ct and ct != "application/octet-stream" else "image/jpeg"
+    else:
+        ext = ".mp4" if "mp4" in ct else ".webm" if "webm" in ct else ".mov" if "quicktime" in ct else ".mp4"
+        ct = ct if ct and ct != "application/octet-stream" else "video/mp4"
+    safe_id = _sanitize_meta_ad_id(meta_ad_id)
+    return (f"dvyb_brands/{brand_id}/ads/{safe_id}/{content_type}{ext}", ct)
+
+
+def _stream_creative_to_s3(
+    s3_service: S3StorageService,
+    url: str,
+    brand_id: int,
+    meta_ad_id: str,
+    content_type: str,
+    image_only: bool,
+) -> str | None:
+    """Stream one creative from its URL straight into an S3 (multipart) upload. Returns S3 key or None."""
+    url = html.unescape(str(url or "").strip())
+    try:
+        with requests.get(url, headers=_MEDIA_HEADERS, timeout=60, stream=True) as resp:
+            resp.raise_for_status()
+            raw_ct = _response_content_type(resp)
+            if image_only and _is_video_content_type(raw_ct):
+                return None
+            s3_key, ct = _creative_s3_key(brand_id, meta_ad_id, content_type, raw_ct)
+            resp.raw.decode_content = True
+            result = s3_service.upload_stream_with_key(resp.raw, s3_key, ct)
+    except requests.RequestException as e:
+        logger.warning(f"Failed to download from {url[:60]}...: {e}")
+        return None
+    if result.get("success"):
+        return s3_key
+    logger.warning(f"Failed to upload creative to S3: {result.get('error')}")
+    return None
+
+
 def _download_largest_and_upload_to_s3(
     s3_service: S3StorageService,
     urls: list[str],
@@ -212,7 +332,10 @@ def _download_largest_and_upload_to_s3(
     image_only: bool = False,  # When True, reject video URLs and video Content-Type (only save image creatives)
 ) -> str | None:
     """
-    Download all creatives from URLs, pick the one with maximum size, upload to S3.
+    Pick the creative with maximum size among URLs and upload it to S3.
+    Sizes come from concurrent HEAD / ranged probes, so only the winner is downloaded,
+    and it is streamed straight into S3. URLs whose size the headers do not tell are
+    downloaded fully and compared as before.
     When image_only=True (media=image): only accept image URLs and image Content-Type; reject video.
     Returns S3 key or None.
     """
@@ -222,26 +345,35 @@ def _download_largest_and_upload_to_s3(
         urls = [u for u in urls if not _is_video_url(u)]
         if not urls:
             return None
-    candidates: list[tuple[bytes, str]] = []
-    for url in urls:
-        result = _download_url_content(url)
-        if result:
-            _, raw_ct = result
-            if image_only and _is_video_content_type(raw_ct or ""):
-                continue  # Skip video content when we only want images
-            candidates.append(result)
-    if not candidates:
+    probes = list(_media_pool.map(_probe_media_size, urls))
+    sized = sorted(
+        (
+            (size, url)
+            for url, (size, raw_ct) in zip(urls, probes)
+            if size and not (image_only and _is_video_content_type(raw_ct))
+        ),
+        key=lambda x: x[0],
+        reverse=True,
+    )
+    unsized = [url for url, (size, _) in zip(urls, probes) if not size]
+    downloaded = [
+        result
+        for result in _media_pool.map(_download_url_content, unsized)
+        if result and not (image_only and _is_video_content_type(result[1] or ""))
+    ]
+    best_downloaded = max(downloaded, key=lambda x: len(x[0]), default=None)
+
+    for size, url in sized:
+        if best_downloaded and len(best_downloaded[0]) > size:
+            break
+        s3_key = _stream_creative_to_s3(s3_service, url, brand_id, meta_ad_id, content_type, image_only)
+        if s3_key:
+            return s3_key
+
+    if not best_downloaded:
         return None
-    content, raw_ct = max(candidates, key=lambda x: len(x[0]))
-    ct = raw_ct or "application/octet-stream"
-    if content_type == "image":
-        ext = ".jpg" if "jpeg" in ct or "jpg" in ct else ".png" if "png" in ct else ".gif" if "gif" in ct else ".webp" if "webp" in ct else ".jpg"
-        ct = ct if ct and ct != "application/octet-stream" else "image/jpeg"
-    else:
-        ext = ".mp4" if "mp4" in ct else ".webm" if "webm" in ct else ".mov" if "quicktime" in ct else ".mp4"
-        ct = ct if ct and ct != "application/octet-stream" else "video/mp4"
-    safe_id = _sanitize_meta_ad_id(meta_ad_id)
-    s3_key = f"dvyb_brands/{brand_id}/ads/{safe_id}/{content_type}{ext}"
+    content, raw_ct = best_downloaded
+    s3_key, ct = _creative_s3_key(brand_id, meta_ad_id, content_type, raw_ct)
     result = s3_service._upload_to_s3(content, s3_key, ct)
     if result.get("success"):
         return s3_key
@@ -312,6 +444,12 @@ def _run_brands_fetch_task(
     # When pool exhausted and <20 saved: increase limit (100->200->...), fetch again.
     POOL_INITIAL = 100
     BATCH_SIZE = 20
+    # Seen-ad index: ads already uploaded for this brand reuse their S3 keys; ads that recently
+    # yielded no creatives are not re-snapshotted; fresh snapshots skip Puppeteer.
+    seen_scope = f"brand:{brand_id}"
+    seen_stats = SeenAdRunStats()
+    ingest_stats = {"ads": 0, "images": 0, "videos": 0, "seconds": 0.0}
+    task_start = time.time()
 
     try:
         for country_code in country_codes:
@@ -362,6 +500,18 @@ def _run_brands_fetch_task(
                     if aid:
                         all_processed_ids.add(aid)
 
+                processed = meta_seen_ad_index.get_processed(
+                    seen_scope, [ad.get("id") for ad in batch], stats=seen_stats
+                )
+                skipped_ids = {
+                    aid for aid, entry in processed.items() if meta_seen_ad_index.is_recent_no_creatives(entry)
+                }
+                if skipped_ids:
+                    batch = [ad for ad in batch if str(ad.get("id") or "").strip() not in skipped_ids]
+                    logger.info("   Seen-ad index: skipping %d ad(s) that recently had no creatives", len(skipped_ids))
+                if not batch:
+                    continue
+
                 logger.info(
                     "   Batch: processing %d ads from pool (target: %d saved, have %d)",
                     len(batch),
@@ -376,7 +526,7 @@ def _run_brands_fetch_task(
 
                 # Run Puppeteer on batch snapshot URLs
                 _, apify_path = meta_ads_fetch.run_puppeteer_snapshot_for_ads(
-                    batch, apify_token, out_dir
+                    batch, apify_token, out_dir, seen_stats=seen_stats
                 )
 
                 # Enrich (Gemini only on first batch; reuse enrichment_override for rest)
@@ -402,7 +552,7 @@ def _run_brands_fetch_task(
 
                 ads_ui = out_data.get("ads") or []
 
-                for ad in ads_ui:
+                def ingest_ad_creatives(ad: dict) -> None:
                     meta_ad_id = str(ad.get("id") or ad.get("metaAdId") or "").strip()
                     ad["creativeImageS3Key"] = None
                     ad["extraImageS3Keys"] = []
@@ -414,9 +564,22 @@ def _run_brands_fetch_task(
                     if not vid_urls and ad.get("creativeVideoUrl"):
                         vid_urls = [ad.get("creativeVideoUrl")]
 
+                    seen = processed.get(meta_ad_id)
+                    if seen and seen["state"] == STATE_UPLOADED:
+                        # Uploaded for this brand in an earlier run: reuse the S3 keys
+                        keys = seen["s3_keys"]
+                        if want_image:
+                            ad["creativeImageS3Key"] = keys.get("creativeImageS3Key")
+                            ad["extraImageS3Keys"] = keys.get("extraImageS3Keys") or []
+                        if want_video:
+                            ad["creativeVideoS3Key"] = keys.get("creativeVideoS3Key")
+                        if ad["creativeImageS3Key"] or ad["creativeVideoS3Key"]:
+                            return
+
                     if want_image and img_urls:
                         primary_key, extra_keys = _download_all_images_and_upload_to_s3(
-                            s3_service, img_urls, brand_id, meta_ad_id
+                            s3_service, img_urls, brand_id, meta_ad_id,
+                            index_scope=f"brand_ads:{brand_domain or brand_id}",
                         )
                         if primary_key:
                             ad["creativeImageS3Key"] = primary_key
@@ -435,13 +598,38 @@ def _run_brands_fetch_task(
                             ad["creativeVideoS3Key"] = s3_key
                             logger.info("Uploaded video (max of %d): %s -> %s", len(vid_urls), meta_ad_id, s3_key)
 
+                ingest_start = time.time()
+                with ThreadPoolExecutor(max_workers=BRAND_MEDIA_ADS_CONCURRENCY) as ad_pool:
+                    list(ad_pool.map(ingest_ad_creatives, ads_ui))
+                ingest_stats["seconds"] += time.time() - ingest_start
+                ingest_stats["ads"] += len(ads_ui)
+                ingest_stats["images"] += sum(
+                    bool(ad.get("creativeImageS3Key")) + len(ad.get("extraImageS3Keys") or []) for ad in ads_ui
+                )
+                ingest_stats["videos"] += sum(1 for ad in ads_ui if ad.get("creativeVideoS3Key"))
+
                 saved_this_batch = 0
                 for ad in ads_ui:
                     if ad.get("creativeImageS3Key") or ad.get("creativeVideoS3Key"):
+                        meta_seen_ad_index.mark_processed(
+                            seen_scope,
+                            str(ad.get("id") or ad.get("metaAdId") or ""),
+                            STATE_UPLOADED,
+                            {
+                                "creativeImageS3Key": ad.get("creativeImageS3Key"),
+                                "extraImageS3Keys": ad.get("extraImageS3Keys") or [],
+                                "creativeVideoS3Key": ad.get("creativeVideoS3Key"),
+                            },
+                        )
                         _callback_success(callback_url, [ad], enrichment, is_complete=False)
                         saved_this_batch += 1
                     else:
                         meta_ad_id_skip = str(ad.get("id") or ad.get("metaAdId") or "").strip()
+                        if ad.get("creativeImageUrls") or ad.get("creativeVideoUrls"):
+                            # Downloads failed: cached snapshot URLs may have expired, scrape again next time
+                            meta_seen_ad_index.forget_snapshots([meta_ad_id_skip])
+                        else:
+                            meta_seen_ad_index.mark_processed(seen_scope, meta_ad_id_skip, STATE_NO_CREATIVES)
                         logger.info(
                             "   Skipped %s: no creatives extracted (img=%d, vid=%d)",
                             meta_ad_id_skip,
@@ -463,6 +651,16 @@ def _run_brands_fetch_task(
 
         _callback_success(callback_url, [], enrichment, is_complete=True)
     finally:
+        logger.info("Seen-ad index hits for brand %s: %s", brand_id, seen_stats.summary())
+        logger.info(
+            "Brand %s timing: %.1fs total, creative ingestion %.1fs for %d ads (%d images, %d videos)",
+            brand_id,
+            time.time() - task_start,
+            ingest_stats["seconds"],
+            ingest_stats["ads"],
+            ingest_stats["images"],
+            ingest_stats["videos"],
+        )
         shutil.rmtree(tmpdir, ignore_errors=True)
 
 
@@ -536,7 +734,14 @@ async def run_inventory_analysis(request: RunInventoryAnalysisRequest):
             })
     if not image_items:
         return {"success": True, "results": {}}
-    results = analyze_ad_images_with_grok(image_items)
+    seen_stats = SeenAdRunStats()
+    results = meta_seen_ad_index.get_analyses([it["ad_id"] for it in image_items], stats=seen_stats)
+    pending = [it for it in image_items if it["ad_id"] not in results]
+    if pending:
+        fresh = analyze_ad_images_with_grok(pending)
+        meta_seen_ad_index.save_analyses(fresh)
+        results.update(fresh)
+    logger.info(f"Inventory analysis: {len(image_items) - len(pending)}/{len(image_items)} from seen-ad index")
     return {"success": True, "results": results}
 
 
@@ -373,6 +373,7 @@ def _run_fetch_in_background(
                     print(f"[fetch-domain-images BG] Instagram @{ig_handle}: {len(urls)} image URLs, download in batches of {GROK_BATCH_SIZE}, Grok filter each batch until {MAX_INSTAGRAM_IMAGES} product images")
                     product_saved = 0
                     start_idx = 0
+                    seen_keys: set[str] = set()
                     while product_saved < MAX_INSTAGRAM_IMAGES and urls:
                         batch_urls = urls[:GROK_BATCH_SIZE]
                         urls = urls[GROK_BATCH_SIZE:]
@@ -380,6 +381,9 @@ def _run_fetch_in_background(
                             break
                         downloaded = download_instagram_batch(batch_urls, domain_hash, start_idx)
                         start_idx += len(downloaded)
+                        # Images reused from the hash index can repeat across batches of one run
+                        downloaded = [img for img in downloaded if img["s3_key"] not in seen_keys]
+                        seen_keys.update(img["s3_key"] for img in downloaded)
                         if not downloaded:
                             continue
                         print(f"[fetch-domain-images BG] Instagram batch: downloaded {len(downloaded)}, running Grok (brand_context={bool(brand_context)})")
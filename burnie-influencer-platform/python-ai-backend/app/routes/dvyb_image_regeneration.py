@@ -10,10 +10,10 @@ import time
 from typing import Optional
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-import fal_client
 import httpx
 
 from app.utils.web2_s3_helper import web2_s3_helper
+from app.services.fal_job_client import fal_job_client
 
 logger = logging.getLogger(__name__)
 
@@ -78,15 +78,10 @@ async def process_regeneration_and_callback(request: RegenerateImageRequest):
         for i, url in enumerate(image_urls):
             logger.info(f"   {i + 1}. {url[:80]}...")
         
-        def on_queue_update(update):
-            if isinstance(update, fal_client.InProgress):
-                for log in update.logs:
-                    logger.info(f"   FAL: {log['message']}")
-        
         # Call fal nano-banana-pro edit with same parameters as dvyb_adhoc_generation
         logger.info(f"🚀 Calling fal-ai/nano-banana-pro/edit...")
         
-        result = fal_client.subscribe(
+        result = await fal_job_client.run_async(
             "fal-ai/nano-banana-pro/edit",
             arguments={
                 "prompt": prompt_to_use,
@@ -97,8 +92,7 @@ async def process_regeneration_and_callback(request: RegenerateImageRequest):
                 "image_urls": image_urls,
                 "negative_prompt": "blurry, low quality, distorted, oversaturated, unrealistic proportions, unrealistic face, unrealistic body, unrealistic proportions, unrealistic features, hashtags, double logos, extra text"
             },
-            with_logs=True,
-            on_queue_update=on_queue_update
+            on_log=lambda message: logger.info(f"   FAL: {message}")
         )
         
         if not result or "images" not in result or not result["images"]:
@@ -16,8 +16,8 @@ import os
 import random
 import logging
 from typing import Dict, List, Optional
-import fal_client
 from app.utils.web2_s3_helper import web2_s3_helper
+from app.services.fal_job_client import fal_job_client
 
 logger = logging.getLogger(__name__)
 
@@ -105,7 +105,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
             # Generate with Nano Banana Edit
             image_urls = [presigned_logo_url] if logo_needed else [presigned_logo_url]  # Logo always passed as reference
             
-            result = fal_client.subscribe(
+            result = await fal_job_client.run_async(
                 "fal-ai/nano-banana/edit",
                 arguments={
                     "prompt": prompt,
@@ -113,8 +113,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
                     "aspect_ratio": "1:1",
                     "image_urls": image_urls,
                     "negative_prompt": "blur, distort, low quality, text overlay, watermark"
-                },
-                with_logs=True
+                }
             )
             
             if result and "images" in result and result["images"]:
@@ -191,7 +190,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
                 if not image_urls and presigned_logo_url:
                     image_urls.append(presigned_logo_url)
                 
-                result = fal_client.subscribe(
+                result = await fal_job_client.run_async(
                     "fal-ai/nano-banana/edit",
                     arguments={
                         "prompt": image_prompt,
@@ -199,8 +198,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
                         "aspect_ratio": "1:1",
                         "image_urls": image_urls,
                         "negative_prompt": "blur, distort, low quality, text overlay, watermark"
-                    },
-                    with_logs=True
+                    }
                 )
                 
                 if result and "images" in result and result["images"]:
@@ -249,7 +247,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
                     continue
                 
                 # Generate clip with Veo3.1
-                result = fal_client.subscribe(
+                result = await fal_job_client.run_async(
                     "fal-ai/veo3.1/fast/image-to-video",
                     arguments={
                         "prompt": clip_prompt,
@@ -258,8 +256,7 @@ async def generate_content_veo(request, prompts: Dict, context: Dict, generation
                         "duration": "8s",        # Fixed for Veo3.1
                         "generate_audio": True,   # Embedded voiceover/speech
                         "resolution": "720p"
-                    },
-                    with_logs=True
+                    }
                 )
                 
                 if result and "video" in result:
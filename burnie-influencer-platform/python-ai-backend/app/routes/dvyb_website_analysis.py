@@ -27,8 +27,12 @@ from openai import OpenAI
 import os
 from botocore.exceptions import ClientError
 from app.services.storage_config import create_s3_client, get_default_bucket
+from app.services.website_asset_fetcher import website_asset_fetcher
+from app.services.website_analysis_cache import normalize_domain, website_analysis_cache
+from app.services.image_dedup import hash_image, image_hash_index
 import uuid
 import io
+import functools
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +56,7 @@ class WebsiteAnalysisRequest(BaseModel):
     """Request for website analysis"""
     url: str
     account_id: Optional[int] = None
+    force_refresh: bool = False
 
 
 class WebsiteAnalysisResponse(BaseModel):
@@ -65,6 +70,9 @@ class WebsiteAnalysisResponse(BaseModel):
 # UTILITY FUNCTIONS
 # ============================================
 
+# Bump when prompts or extraction logic change so cached domain analyses are not reused
+WEBSITE_ANALYZER_VERSION = "v1"
+
 # Color extraction regex patterns
 HEX_RE = re.compile(r'#([0-9a-fA-F]{3,8})\b')
 RGB_RE = re.compile(r'rgb\s*\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\)')
@@ -102,12 +110,14 @@ def extract_base_name(url: str) -> str:
         return "brand"
 
 
+ANALYZER_HEADERS = {
+    "User-Agent": "DVYB-WebsiteAnalyzer/1.0 (+https://dvyb.ai)"
+}
+
+
 def fetch_url(url: str, timeout=12):
     """Fetch URL content with proper headers"""
-    headers = {
-        "User-Agent": "DVYB-WebsiteAnalyzer/1.0 (+https://dvyb.ai)"
-    }
-    resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+    resp = requests.get(url, headers=ANALYZER_HEADERS, timeout=timeout, allow_redirects=True)
     resp.raise_for_status()
     return resp
 
@@ -372,9 +382,8 @@ class ColorPaletteExtractor:
         if manifest_link and manifest_link.get("href"):
             manifest_url = urllib.parse.urljoin(base_url, manifest_link.get("href"))
             try:
-                headers = {"User-Agent": "DVYB-WebsiteAnalyzer/1.0"}
-                resp = requests.get(manifest_url, headers=headers, timeout=5)
-                if resp.status_code == 200:
+                resp = website_asset_fetcher.fetch(manifest_url, timeout=5, headers=ANALYZER_HEADERS)
+                if resp and resp.ok:
                     import json
                     manifest = json.loads(resp.text)
                     
@@ -1480,24 +1489,25 @@ def extract_colors_from_website(url: str, html: str, soup: BeautifulSoup) -> Dic
         # Initialize improved color extractor
         extractor = ColorPaletteExtractor(url)
         
-        # Extract colors from HTML (buttons, hero, theme-color, manifest, SVG, headers, styles)
-        extractor.extract_from_soup(soup, html)
-        
-        # Find and fetch external CSS files
+        # Find external CSS files (top 8 to avoid slow requests) and fetch them together with the
+        # manifest concurrently; the manifest lookup in extract_from_soup is then served from the cache
         css_links = find_css_links(soup, url)
         logger.info(f"  → Found {len(css_links)} external CSS files")
+        manifest_link = soup.find("link", rel="manifest")
+        manifest_urls = [urllib.parse.urljoin(url, manifest_link.get("href"))] if manifest_link and manifest_link.get("href") else []
+        assets = website_asset_fetcher.fetch_many(css_links[:8] + manifest_urls, headers=ANALYZER_HEADERS)
+        
+        # Extract colors from HTML (buttons, hero, theme-color, manifest, SVG, headers, styles)
+        extractor.extract_from_soup(soup, html)
         
-        # Fetch top CSS files (limit to avoid slow requests)
         fetched_css = 0
         for link in css_links[:8]:
-            try:
-                r = fetch_url(link)
-                extractor.extract_from_css(r.text)
-                fetched_css += 1
-                time.sleep(0.1)  # Be polite
-            except Exception as e:
-                logger.debug(f"  Could not fetch CSS {link}: {e}")
+            r = assets.get(link)
+            if r is None or not r.ok:
+                logger.debug(f"  Could not fetch CSS {link}: {r.status if r else 'no response'}")
                 continue
+            extractor.extract_from_css(r.text)
+            fetched_css += 1
         
         logger.info(f"  → Fetched {fetched_css} CSS files")
         
@@ -1560,6 +1570,7 @@ class LogoExtractor:
         self.soup = soup
         self.domain = urllib.parse.urlparse(url).netloc
         self.candidates = []
+        self._probes: Dict[str, Any] = {}
     
     def extract_logo(self) -> Dict[str, Any]:
         """
@@ -1577,7 +1588,10 @@ class LogoExtractor:
         # Strategy 3: Check apple-touch-icon (high quality)
         self._check_apple_touch_icon()
         
-        # Strategy 4: Check common logo paths
+        # Strategy 4: Check common logo paths (probed concurrently with the default favicon)
+        self._probes = website_asset_fetcher.fetch_many(
+            self._common_path_urls() + [self._default_favicon_url()], method="HEAD", timeout=3
+        )
         self._check_common_paths()
         
         # Strategy 5: Check favicon as fallback
@@ -1731,8 +1745,18 @@ class LogoExtractor:
         except Exception as e:
             logger.error(f"Error checking apple touch icon: {e}")
     
-    def _check_common_paths(self):
-        """Check common logo file paths"""
+    def _probe(self, url: str, timeout: float):
+        """HEAD response for a URL (from the concurrent probe batch when it was part of it)"""
+        if url in self._probes:
+            return self._probes[url]
+        return website_asset_fetcher.fetch(url, method="HEAD", timeout=timeout)
+    
+    def _default_favicon_url(self) -> str:
+        parsed_url = urllib.parse.urlparse(self.url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+    
+    def _common_path_urls(self) -> List[str]:
+        """Common logo file paths"""
         domain_name = self.domain.split('.')[0].replace('www', '')
         common_paths = [
             '/logo.png',
@@ -1753,19 +1777,17 @@ class LogoExtractor:
             f'/images/{domain_name}.png',
             f'/assets/{domain_name}.png',
         ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
+        return [urllib.parse.urljoin(self.url, path) for path in common_paths]
+    
+    def _check_common_paths(self):
+        """Check common logo file paths"""
         found_count = 0
-        for path in common_paths:
-            if found_count >= 3:  # Limit to 3 found logos to avoid too many requests
+        for logo_url in self._common_path_urls():
+            if found_count >= 3:  # Limit to 3 found logos
                 break
-            logo_url = urllib.parse.urljoin(self.url, path)
             try:
-                response = requests.head(logo_url, timeout=2, allow_redirects=True, headers=headers)
-                if response.status_code == 200:
+                response = self._probe(logo_url, timeout=2)
+                if response is not None and response.ok:
                     content_type = response.headers.get('content-type', '')
                     if 'image' in content_type or logo_url.endswith(('.svg', '.png', '.jpg', '.webp')):
                         self.candidates.append({
@@ -1775,11 +1797,8 @@ class LogoExtractor:
                         })
                         logger.info(f"  → Found at common path: {logo_url}")
                         found_count += 1
-            except requests.exceptions.RequestException:
-                # Silently skip failed paths - could be blocked or not exist
-                pass
             except Exception as e:
-                logger.debug(f"  → Common path check failed for {path}: {e}")
+                logger.debug(f"  → Common path check failed for {logo_url}: {e}")
     
     def _check_favicon(self):
         """Check favicon as last resort"""
@@ -1796,13 +1815,10 @@ class LogoExtractor:
                 logger.info(f"  → Found favicon: {logo_url[:60]}...")
             
             # Also try default favicon.ico
-            parsed_url = urllib.parse.urlparse(self.url)
-            default_favicon = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+            default_favicon = self._default_favicon_url()
             try:
-                response = requests.head(default_favicon, timeout=3, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                if response.status_code == 200:
+                response = self._probe(default_favicon, timeout=3)
+                if response is not None and response.ok:
                     self.candidates.append({
                         'url': default_favicon,
                         'source': 'default_favicon',
@@ -2037,10 +2053,35 @@ def extract_logo_url_from_html(url: str, soup: BeautifulSoup) -> Optional[str]:
         return None
 
 
-async def download_and_upload_logo_to_s3(logo_url: str, account_id: Optional[int] = None) -> Optional[Dict[str, str]]:
+def _logo_index_scope(site_domain: Optional[str], account_folder: str) -> Optional[str]:
+    """Hash index scope for logos of a domain uploaded under an account folder"""
+    return f"logos:{site_domain}:{account_folder}" if site_domain else None
+
+
+def _reuse_indexed_logo(s3_client, bucket_name: str, scope: Optional[str], image) -> Optional[Dict[str, str]]:
+    """Presigned reference to a perceptually identical logo already uploaded for this scope"""
+    s3_key = image_hash_index.reusable(scope, image) if scope else None
+    if not s3_key:
+        return None
+    logger.info(f"  ♻️ Logo already uploaded for this domain, reusing: {s3_key}")
+    presigned_url = s3_client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket_name, 'Key': s3_key},
+        ExpiresIn=3600
+    )
+    return {
+        "s3_key": s3_key,
+        "presigned_url": presigned_url
+    }
+
+
+async def download_and_upload_logo_to_s3(logo_url: str, account_id: Optional[int] = None,
+                                         site_domain: Optional[str] = None) -> Optional[Dict[str, str]]:
     """
     Download logo from URL and upload to S3.
     Converts WEBP and SVG to PNG before uploading.
+    With site_domain, a logo perceptually identical to one already uploaded for
+    that domain (another size / favicon variant) reuses the existing S3 key.
     Returns dict with S3 key and presigned URL if successful, None otherwise.
     """
     try:
@@ -2178,6 +2219,11 @@ async def download_and_upload_logo_to_s3(logo_url: str, account_id: Optional[int
         
         # Generate S3 key
         account_folder = f"dvyb/logos/{account_id}" if account_id else "dvyb/logos/temp"
+        index_scope = _logo_index_scope(site_domain, account_folder)
+        hashed = hash_image(final_content)
+        reused = _reuse_indexed_logo(s3_client, bucket_name, index_scope, hashed)
+        if reused:
+            return reused
         filename = f"{uuid.uuid4()}.{ext}"
         s3_key = f"{account_folder}/{filename}"
         
@@ -2193,6 +2239,8 @@ async def download_and_upload_logo_to_s3(logo_url: str, account_id: Optional[int
         )
         
         logger.info(f"  ✅ Uploaded logo to S3: {s3_key}")
+        if index_scope:
+            image_hash_index.record(index_scope, hashed, s3_key)
         
         # Generate presigned URL (expires in 1 hour)
         presigned_url = s3_client.generate_presigned_url(
@@ -2575,6 +2623,7 @@ async def analyze_website(url: str) -> Dict[str, Any]:
         
         # Step 2: Fetch website HTML
         logger.info(f"  → Fetching website content...")
+        fetch_failed = False
         try:
             resp = fetch_url(url)
             html = resp.text
@@ -2582,6 +2631,7 @@ async def analyze_website(url: str) -> Dict[str, Any]:
         except Exception as e:
             logger.error(f"  ✗ Failed to fetch website: {e}")
             html = ""
+            fetch_failed = True
         
         # Step 3: Parse HTML
         soup = BeautifulSoup(html, "html.parser")
@@ -2592,7 +2642,7 @@ async def analyze_website(url: str) -> Dict[str, Any]:
         
         # Step 5: Extract colors
         logger.info(f"  → Extracting color palette...")
-        color_palette = extract_colors_from_website(url, html, soup)
+        color_palette = await asyncio.to_thread(extract_colors_from_website, url, html, soup)
         logger.info(f"  → Extracted Colors: {color_palette}")
         print(f"\n🎨 EXTRACTED COLOR PALETTE FROM WEBSITE:")
         print(f"   Primary: {color_palette.get('primary')}")
@@ -2653,6 +2703,9 @@ async def analyze_website(url: str) -> Dict[str, Any]:
                 "color_palette": data.get("color_palette", color_palette),
                 "source_urls": data.get("source_urls", [url]),
             }
+            if fetch_failed:
+                # Analyzed without the site's HTML: not shared through the domain cache
+                result["_fetch_failed"] = True
             
             logger.info(f"✅ Website analysis completed successfully (markdown cleaned)")
             print("\n✅ FINAL RESULT BEING RETURNED TO FRONTEND (after markdown cleanup):")
@@ -2708,8 +2761,10 @@ async def analyze_website_endpoint(request: WebsiteAnalysisRequest):
         
         logger.info(f"📥 Received website analysis request for: {request.url}")
         
-        # Analyze website
-        result = await analyze_website(request.url)
+        # Analyze website (cached per domain)
+        result = await website_analysis_cache.get_or_analyze(
+            request.url, "full", WEBSITE_ANALYZER_VERSION, analyze_website, force_refresh=request.force_refresh
+        )
         
         return {
             "success": True,
@@ -2944,6 +2999,17 @@ async def call_gpt4o_chat(prompt: str) -> str:
 # BRANDFETCH LOGO & OPENAI COLOR EXTRACTION
 # ============================================
 
+@functools.lru_cache(maxsize=1)
+def _default_brandfetch_logo_hash():
+    """Perceptual hash of the default Brandfetch logo (computed once per process)"""
+    from PIL import Image
+    import imagehash
+
+    default_logo_path = os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'default-image.png')
+    with Image.open(default_logo_path) as default_image:
+        return imagehash.phash(default_image.convert('RGB'))
+
+
 def is_default_brandfetch_logo(image_content: bytes) -> bool:
     """
     Check if the fetched logo is the default Brandfetch logo (the "B" logo).
@@ -2962,17 +3028,13 @@ def is_default_brandfetch_logo(image_content: bytes) -> bool:
             logger.warning(f"  ⚠️ Default Brandfetch logo not found at: {default_logo_path}")
             return False
         
-        # Load both images
+        # Load the fetched image in the same mode as the default logo
         fetched_image = Image.open(io.BytesIO(image_content))
-        default_image = Image.open(default_logo_path)
-        
-        # Convert to same mode for comparison
         fetched_image = fetched_image.convert('RGB')
-        default_image = default_image.convert('RGB')
         
         # Use perceptual hash for comparison (resilient to format/size changes)
         fetched_hash = imagehash.phash(fetched_image)
-        default_hash = imagehash.phash(default_image)
+        default_hash = _default_brandfetch_logo_hash()
         
         # Calculate difference (0 = identical, higher = more different)
         hash_diff = fetched_hash - default_hash
@@ -3272,6 +3334,11 @@ async def upload_brandfetch_logo_to_s3(logo_data: Dict[str, Any], account_id: Op
             return None
         
         account_folder = f"dvyb/logos/{account_id}" if account_id else "dvyb/logos/temp"
+        index_scope = _logo_index_scope(normalize_domain(logo_data.get('domain')), account_folder)
+        hashed = hash_image(final_content)
+        reused = _reuse_indexed_logo(s3_client, bucket_name, index_scope, hashed)
+        if reused:
+            return reused
         filename = f"{uuid.uuid4()}.{ext}"
         s3_key = f"{account_folder}/{filename}"
         
@@ -3286,6 +3353,8 @@ async def upload_brandfetch_logo_to_s3(logo_data: Dict[str, Any], account_id: Op
         )
         
         logger.info(f"  ✅ Uploaded to S3: {s3_key}")
+        if index_scope:
+            image_hash_index.record(index_scope, hashed, s3_key)
         
         # Generate presigned URL
         presigned_url = s3_client.generate_presigned_url(
@@ -3335,6 +3404,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
         
         # Step 2: Fetch website HTML
         logger.info(f"  → Fetching website content...")
+        fetch_failed = False
         try:
             resp = fetch_url(url)
             html = resp.text
@@ -3342,6 +3412,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
         except Exception as e:
             logger.error(f"  ✗ Failed to fetch website: {e}")
             html = ""
+            fetch_failed = True
         
         # Step 3: Parse HTML
         soup = BeautifulSoup(html, "html.parser")
@@ -3371,6 +3442,13 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
                 # Extract colors from logo using OpenAI Vision
                 brandfetch_colors = await extract_colors_from_logo_with_openai(logo_data['presigned_url'])
                 
+                if not brandfetch_colors:
+                    # Vision unavailable/failed: quantize the logo locally (same palette structure)
+                    from app.services.image_palette import extract_palette_from_image
+                    brandfetch_colors = await asyncio.to_thread(extract_palette_from_image, brandfetch_logo['content'])
+                    if brandfetch_colors:
+                        logger.info(f"  ✅ Colors extracted from Brandfetch logo by local quantization: {brandfetch_colors}")
+                
                 if brandfetch_colors:
                     logger.info(f"  ✅ Colors extracted from Brandfetch logo via OpenAI Vision")
                     print(f"\n🎨 BRANDFETCH + OPENAI VISION COLORS:")
@@ -3425,10 +3503,17 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
             elif not logo_data:
                 print(f"\n⚠️ BRANDFETCH FAILED - Using fallback for logo and colors")
             
+            # CSS colors and logo candidates are fetched concurrently (off the event loop)
+            logo_extractor = LogoExtractor(url, soup) if need_fallback_logo else None
+            colors_task = asyncio.create_task(
+                asyncio.to_thread(extract_colors_from_website, url, html, soup)
+            ) if need_fallback_colors else None
+            logo_task = asyncio.create_task(asyncio.to_thread(logo_extractor.extract_logo)) if logo_extractor else None
+            
             # FALLBACK STEP A: Extract colors from website CSS (if OpenAI Vision failed)
             if need_fallback_colors:
                 logger.info(f"  → Extracting color palette from website CSS...")
-                color_palette = extract_colors_from_website(url, html, soup)
+                color_palette = await colors_task
                 logger.info(f"  → CSS Extracted Colors: {color_palette}")
                 print(f"\n🎨 CSS EXTRACTED COLOR PALETTE FROM WEBSITE:")
                 print(f"   Primary: {color_palette.get('primary')}")
@@ -3438,8 +3523,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
             # FALLBACK STEP B: Extract logo from website (only if Brandfetch logo failed)
             if need_fallback_logo:
                 logger.info(f"  → Trying intelligent logo extraction...")
-                logo_extractor = LogoExtractor(url, soup)
-                logo_result = logo_extractor.extract_logo()
+                logo_result = await logo_task
                 
                 logo_confidence = 0.0
                 
@@ -3453,7 +3537,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
                     
                     # Only upload if confidence is reasonable (> 20%)
                     if logo_confidence >= 0.2:
-                        logo_data = await download_and_upload_logo_to_s3(logo_url, None)
+                        logo_data = await download_and_upload_logo_to_s3(logo_url, None, normalize_domain(url))
                         
                         # If download failed, try other candidates
                         if not logo_data and all_logo_candidates:
@@ -3461,7 +3545,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
                             for candidate in all_logo_candidates:
                                 if candidate['url'] != logo_url:
                                     logger.info(f"  → Trying alternative: {candidate['url'][:60]}...")
-                                    logo_data = await download_and_upload_logo_to_s3(candidate['url'], None)
+                                    logo_data = await download_and_upload_logo_to_s3(candidate['url'], None, normalize_domain(url))
                                     if logo_data:
                                         logger.info(f"  ✅ Alternative logo uploaded successfully")
                                         break
@@ -3487,7 +3571,7 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
                     logger.info(f"  → No logo found/uploaded, trying fallback paths...")
                     for fallback_url in fallback_paths:
                         logger.info(f"  → Trying: {fallback_url}")
-                        logo_data = await download_and_upload_logo_to_s3(fallback_url, None)
+                        logo_data = await download_and_upload_logo_to_s3(fallback_url, None, normalize_domain(url))
                         if logo_data:
                             logger.info(f"  ✅ Fallback logo uploaded: {fallback_url}")
                             break
@@ -3720,6 +3804,10 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
             print(f"   Title: {analysis_data['suggested_first_topic']['title']}")
             print(f"   Description: {analysis_data['suggested_first_topic']['description'][:80]}...")
         
+        if fetch_failed:
+            # Analyzed without the site's HTML: not shared through the domain cache
+            analysis_data["_fetch_failed"] = True
+        
         logger.info("✅ Fast website analysis complete!")
         print("\n✅ FAST ANALYSIS COMPLETE")
         print(f"   Base Name: {analysis_data.get('base_name')}")
@@ -3737,6 +3825,22 @@ async def analyze_website_fast(url: str) -> Dict[str, Any]:
         raise
 
 
+def with_fresh_logo_url(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a (possibly cached) analysis with a newly presigned logo URL; cached ones expire after an hour"""
+    if not result.get("logo_s3_key"):
+        return result
+    try:
+        presigned_url = create_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': get_default_bucket(), 'Key': result["logo_s3_key"]},
+            ExpiresIn=3600
+        )
+        return {**result, "logo_presigned_url": presigned_url}
+    except ClientError as e:
+        logger.warning(f"⚠️ Could not presign cached logo {result['logo_s3_key']}: {e}")
+        return result
+
+
 @router.post("/api/dvyb/analyze-website-fast")
 async def analyze_website_fast_endpoint(request: WebsiteAnalysisRequest):
     """
@@ -3759,8 +3863,11 @@ async def analyze_website_fast_endpoint(request: WebsiteAnalysisRequest):
         
         logger.info(f"⚡ Received FAST website analysis request for: {request.url}")
         
-        # Analyze website (fast method)
-        result = await analyze_website_fast(request.url)
+        # Analyze website (fast method, cached per domain)
+        result = await website_analysis_cache.get_or_analyze(
+            request.url, "fast", WEBSITE_ANALYZER_VERSION, analyze_website_fast, force_refresh=request.force_refresh
+        )
+        result = with_fresh_logo_url(result)
         
         return {
             "success": True,
@@ -3785,6 +3892,8 @@ async def website_analysis_health():
         "service": "DVYB Website Analysis",
         "status": "operational" if openai_client else "degraded",
         "openai_configured": bool(openai_client),
+        "analysis_cache": website_analysis_cache.get_stats(),
+        "asset_cache": website_asset_fetcher.get_stats(),
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
 
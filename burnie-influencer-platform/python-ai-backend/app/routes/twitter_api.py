@@ -2,39 +2,19 @@
 Twitter API routes for fetching leaderboard yapper data
 """
 
-import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
 from app.services.twitter_leaderboard_service import TwitterLeaderboardService
+from app.services.twitter_rate_limiter import twitter_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/twitter", tags=["Twitter API"])
 
-# Create thread pool executor for isolating Twitter API calls
-twitter_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="twitter-api")
-
-def sync_fetch_twitter_data(twitter_handle: str, yapper_name: str):
-    """Synchronous wrapper for Twitter API calls - runs in separate thread"""
-    try:
-        twitter_service = TwitterLeaderboardService()
-        # This will run the async method in a new event loop in the thread
-        return asyncio.run(twitter_service.fetch_yapper_twitter_data(
-            twitter_handle=twitter_handle,
-            yapper_name=yapper_name
-        ))
-    except Exception as e:
-        logger.error(f"❌ Error in sync Twitter fetch: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
-
 class FetchYapperRequest(BaseModel):
     twitter_handle: str
     yapper_name: str
@@ -58,10 +38,11 @@ class FetchYapperResponse(BaseModel):
 async def get_twitter_queue_status():
     """Get status of Twitter queue processing for debugging"""
     try:
-        # This would require importing and checking the TypeScript cron service status
-        # For now, just return basic Python backend status
+        # Cron queue state lives in the TypeScript backend; this reports the
+        # Python-side rate-limit scheduler (budgets and waiting requests per endpoint)
         return {
             "python_backend_status": "running",
+            "rate_limit_scheduler": twitter_rate_limiter.get_queue_state(),
             "message": "Check TypeScript backend logs for detailed cron queue status"
         }
     except Exception as e:
@@ -82,13 +63,12 @@ async def fetch_yapper_twitter_data(request: FetchYapperRequest, background_task
     try:
         logger.info(f"🐦 API request for Twitter data: @{request.twitter_handle}")
         
-        # Run Twitter API call in isolated thread to prevent rate limit blocking
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            twitter_executor,
-            sync_fetch_twitter_data,
-            request.twitter_handle,
-            request.yapper_name
+        # Twitter calls run in worker threads under the shared rate-limit scheduler
+        # (interactive lane), so they never block the event loop
+        twitter_service = TwitterLeaderboardService()
+        result = await twitter_service.fetch_yapper_twitter_data(
+            twitter_handle=request.twitter_handle,
+            yapper_name=request.yapper_name
         )
         
         # Convert to response model
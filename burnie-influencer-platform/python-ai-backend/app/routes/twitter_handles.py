@@ -14,6 +14,11 @@ import json
 from sqlalchemy import text
 
 from app.config.settings import get_settings
+from app.services.twitter_rate_limiter import (
+    twitter_rate_limiter, BULK, ENDPOINT_USER_BY_USERNAME, ENDPOINT_USER_TWEETS
+)
+from app.services.twitter_sync_watermarks import twitter_sync_watermarks, SCOPE_POPULAR_HANDLE
+from app.services.tweet_bulk_ingestion import tweet_bulk_ingestion
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -72,15 +77,20 @@ class TwitterService:
             logger.error("❌ Twitter Bearer token not configured")
             raise ValueError("Twitter Bearer token is required")
     
-    def _make_request(self, url: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Make authenticated request to Twitter API"""
+    async def _make_request(self, url: str, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make authenticated request to Twitter API, paced by the shared rate-limit scheduler"""
         headers = {
             'Authorization': f'Bearer {self.bearer_token}',
             'Content-Type': 'application/json'
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            await twitter_rate_limiter.acquire(endpoint)
+            try:
+                response = await asyncio.to_thread(requests.get, url, headers=headers, params=params, timeout=30)
+                twitter_rate_limiter.observe(endpoint, response.headers, response.status_code)
+            finally:
+                twitter_rate_limiter.release(endpoint)
             
             if response.status_code == 429:
                 logger.warning("⚠️ Twitter API rate limit exceeded")
@@ -107,7 +117,7 @@ class TwitterService:
                 'user.fields': 'id,username,name,description,public_metrics,verified,profile_image_url,created_at'
             }
             
-            data = self._make_request(url, params)
+            data = await self._make_request(url, ENDPOINT_USER_BY_USERNAME, params)
             
             if 'data' in data:
                 return data['data']
@@ -139,7 +149,7 @@ class TwitterService:
             if since_id:
                 params['since_id'] = since_id
             
-            data = self._make_request(url, params)
+            data = await self._make_request(url, ENDPOINT_USER_TWEETS, params)
             
             tweets = data.get('data', [])
             media_dict = {}
@@ -297,7 +307,8 @@ async def refresh_twitter_handles_data(request: TwitterHandleRefreshRequest):
     Refresh Twitter data for popular handles and store individual tweets
     
     - First time: Fetches latest 30 tweets
-    - Subsequent: Fetches tweets since last_tweet_id
+    - Subsequent: Fetches tweets since the stored sync watermark (or last_tweet_id)
+    - Scheduled full re-sync refetches the latest tweets to refresh metrics
     """
     try:
         logger.info(f"🔄 Refreshing Twitter data for {len(request.twitter_handles)} handles")
@@ -309,16 +320,19 @@ async def refresh_twitter_handles_data(request: TwitterHandleRefreshRequest):
         results = []
         errors = []
         
+        sync_plans = await twitter_sync_watermarks.plan_syncs(request.twitter_handles, SCOPE_POPULAR_HANDLE)
+        
         for i, (handle_id, twitter_handle) in enumerate(zip(request.handle_ids, request.twitter_handles)):
             try:
-                # Add delay between requests to respect rate limits
-                if i > 0:
-                    await asyncio.sleep(1)  # 1 second delay between requests
-                
-                # Get last_tweet_id from TypeScript backend
-                last_tweet_id = None
-                if request.last_tweet_ids and i < len(request.last_tweet_ids):
-                    last_tweet_id = request.last_tweet_ids[i] if request.last_tweet_ids[i] else None
+                plan = sync_plans[twitter_handle.lower()]
+                if plan.has_watermark:
+                    # Stored watermark wins; it is cleared when a full re-sync is due
+                    last_tweet_id = plan.since_id
+                else:
+                    # Get last_tweet_id from TypeScript backend
+                    last_tweet_id = None
+                    if request.last_tweet_ids and i < len(request.last_tweet_ids):
+                        last_tweet_id = request.last_tweet_ids[i] if request.last_tweet_ids[i] else None
                 
                 # Determine fetch strategy based on last_tweet_id
                 if last_tweet_id:
@@ -326,16 +340,22 @@ async def refresh_twitter_handles_data(request: TwitterHandleRefreshRequest):
                 else:
                     logger.info(f"🆕 First-time fetch for @{twitter_handle} - getting 30 tweets")
                 
-                handle_data = await twitter_service.fetch_handle_data(
-                    handle_id=handle_id,
-                    twitter_handle=twitter_handle,
-                    last_tweet_id=last_tweet_id
-                )
+                # Refreshes run on the bulk lane: paced by x-rate-limit-* headers
+                # and never starving interactive Twitter requests
+                with twitter_rate_limiter.lane(BULK):
+                    handle_data = await twitter_service.fetch_handle_data(
+                        handle_id=handle_id,
+                        twitter_handle=twitter_handle,
+                        last_tweet_id=last_tweet_id
+                    )
                 
                 if handle_data.success:
                     # Store individual tweets in database via TypeScript backend
                     logger.info(f"🔄 Calling store_tweets_in_database for @{twitter_handle}")
-                    await store_tweets_in_database(handle_data)
+                    if await store_tweets_in_database(handle_data):
+                        await twitter_sync_watermarks.record_sync(
+                            plan, [tweet.id for tweet in handle_data.tweets], handle_data.profile.id
+                        )
                     logger.info(f"✅ Completed store_tweets_in_database for @{twitter_handle}")
                     
                     results.append({
@@ -377,147 +397,15 @@ async def refresh_twitter_handles_data(request: TwitterHandleRefreshRequest):
         logger.error(f"❌ Error in refresh endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def store_tweets_in_database(handle_data: TwitterHandleData):
-    """Store individual tweets in the database via TypeScript backend"""
-    try:
-        print(f"🚀 STORE_TWEETS_IN_DATABASE CALLED for @{handle_data.twitter_handle} with {len(handle_data.tweets)} tweets")
-        logger.info(f"💾 Starting to store {len(handle_data.tweets)} tweets for @{handle_data.twitter_handle}")
-        
-        # Import here to avoid circular imports
-        from app.database.connection import get_db_session
-        
-        # Get database session
-        session = get_db_session()
-        print(f"🔗 Database session created: {session}")
-        
-        try:
-            logger.info(f"💾 Processing {len(handle_data.tweets)} tweets for storage")
-            
-            # Group tweets by conversation_id to identify threads
-            conversation_groups = {}
-            for tweet in handle_data.tweets:
-                conv_id = tweet.conversation_id
-                logger.info(f"🔍 Tweet {tweet.id} has conversation_id: {conv_id}")
-                if conv_id not in conversation_groups:
-                    conversation_groups[conv_id] = []
-                conversation_groups[conv_id].append(tweet)
-            
-            # Debug: Print conversation groups
-            for conv_id, tweets in conversation_groups.items():
-                logger.info(f"📊 Conversation {conv_id}: {len(tweets)} tweets")
-                for tweet in tweets:
-                    logger.info(f"  - Tweet {tweet.id} at {tweet.created_at}")
-            
-            # Sort tweets within each conversation by created_at to determine thread position
-            for conv_id, tweets_in_conversation in conversation_groups.items():
-                tweets_in_conversation.sort(key=lambda x: x.created_at)
-            
-            logger.info(f"📊 Found {len(conversation_groups)} conversations, {sum(1 for conv in conversation_groups.values() if len(conv) > 1)} with multiple tweets")
-            
-            # Prepare tweets for insertion
-            tweets_to_insert = []
-            for tweet in handle_data.tweets:
-                # Parse engagement metrics
-                engagement_metrics = {
-                    'like_count': tweet.public_metrics.get('like_count', 0),
-                    'retweet_count': tweet.public_metrics.get('retweet_count', 0),
-                    'reply_count': tweet.public_metrics.get('reply_count', 0),
-                    'quote_count': tweet.public_metrics.get('quote_count', 0)
-                }
-                
-                # Get tweet images from the tweet_media_map
-                tweet_images = handle_data.tweet_media_map.get(tweet.id, [])
-                
-                # Determine thread information
-                conv_id = tweet.conversation_id
-                tweets_in_conversation = conversation_groups[conv_id]
-                is_thread = len(tweets_in_conversation) > 1
-                
-                logger.info(f"🔍 Tweet {tweet.id}: conv_id={conv_id}, tweets_in_conversation={len(tweets_in_conversation)}, is_thread={is_thread}")
-                
-                # Debug: Check if conversation_id is being accessed correctly
-                logger.info(f"🔍 Tweet {tweet.id}: conversation_id field = {getattr(tweet, 'conversation_id', 'NOT_FOUND')}")
-                
-                # Find thread position and parent tweet
-                thread_position = None
-                parent_tweet_id = None
-                
-                if is_thread:
-                    # Find this tweet's position in the conversation
-                    for i, conv_tweet in enumerate(tweets_in_conversation):
-                        if conv_tweet.id == tweet.id:
-                            thread_position = i + 1  # 1-based position
-                            if i > 0:
-                                parent_tweet_id = tweets_in_conversation[0].id  # First tweet is the parent
-                            break
-                
-                # Debug logging
-                if tweet_images:
-                    logger.info(f"📸 Storing {len(tweet_images)} images for tweet {tweet.id}: {tweet_images}")
-                else:
-                    logger.debug(f"📝 No images for tweet {tweet.id}")
-                
-                if is_thread:
-                    logger.info(f"🧵 Thread tweet {tweet.id}: position {thread_position}, parent {parent_tweet_id}")
-                
-                # Debug: Check what we're actually storing
-                tweet_images_json = json.dumps(tweet_images) if tweet_images else None
-                logger.info(f"🔍 Tweet {tweet.id} - tweet_images: {tweet_images}, JSON: {tweet_images_json}")
-                
-                # Parse posted_at timestamp
-                posted_at = datetime.fromisoformat(tweet.created_at.replace('Z', '+00:00'))
-                
-                # Use raw SQL to insert tweets
-                insert_query = text("""
-                    INSERT INTO popular_twitter_handles 
-                    (twitter_handle, tweet_id, tweet_text, tweet_images, is_thread, thread_position, 
-                     parent_tweet_id, engagement_metrics, posted_at, content_category, 
-                     anthropic_analysis, openai_analysis, fetched_at, updated_at)
-                    VALUES (:twitter_handle, :tweet_id, :tweet_text, :tweet_images, :is_thread, :thread_position, 
-                            :parent_tweet_id, :engagement_metrics, :posted_at, :content_category, 
-                            :anthropic_analysis, :openai_analysis, :fetched_at, :updated_at)
-                    ON CONFLICT (tweet_id) DO UPDATE SET
-                        tweet_text = EXCLUDED.tweet_text,
-                        tweet_images = EXCLUDED.tweet_images,
-                        engagement_metrics = EXCLUDED.engagement_metrics,
-                        updated_at = EXCLUDED.updated_at
-                """)
-                
-                try:
-                    session.execute(insert_query, {
-                        'twitter_handle': handle_data.twitter_handle,
-                        'tweet_id': tweet.id,
-                        'tweet_text': tweet.text,
-                        'tweet_images': json.dumps(tweet_images) if tweet_images else None,
-                        'is_thread': is_thread,
-                        'thread_position': thread_position,
-                        'parent_tweet_id': parent_tweet_id,
-                        'engagement_metrics': json.dumps(engagement_metrics),
-                        'posted_at': posted_at,
-                        'content_category': None,  # Could be auto-classified later
-                        'anthropic_analysis': None,
-                        'openai_analysis': None,
-                        'fetched_at': datetime.now(timezone.utc),
-                        'updated_at': datetime.now(timezone.utc)
-                    })
-                    logger.info(f"✅ Inserted tweet {tweet.id} with {len(tweet_images)} images")
-                except Exception as e:
-                    logger.error(f"❌ Error inserting tweet {tweet.id}: {str(e)}")
-                    raise
-            
-            # Commit all tweets
-            print(f"💾 Committing {len(handle_data.tweets)} tweets to database")
-            session.commit()
-            print(f"✅ Successfully committed tweets to database")
-            logger.info(f"✅ Stored {len(handle_data.tweets)} tweets for @{handle_data.twitter_handle}")
-            
-        finally:
-            print(f"🔌 Closing database session")
-            session.close()
-            
-    except Exception as e:
-        logger.error(f"❌ Error storing tweets in database: {str(e)}")
+async def store_tweets_in_database(handle_data: TwitterHandleData) -> bool:
+    """Store a handle's tweets in popular_twitter_handles with one bulk upsert (True once committed)"""
+    logger.info(f"💾 Storing {len(handle_data.tweets)} tweets for @{handle_data.twitter_handle}")
+    result = await tweet_bulk_ingestion.store_handle_tweets(handle_data)
+    if not result.get("success"):
         # Don't raise the error, just log it so the main flow continues
+        logger.error(f"❌ Error storing tweets in database: {result.get('error')}")
+        return False
+    return True
 
 @router.get("/test-db")
 async def test_database():
@@ -0,0 +1,263 @@
+"""
+Campaign Context Cache Service
+Keeps campaign/project context from the TypeScript backend warm in-process so
+snapshot processing and content generation stop refetching it per request.
+
+- One long-lived aiohttp session (keep-alive) shared by all lookups
+- TTL per collection, revalidated with ETag / If-Modified-Since (304 = reuse body)
+- Per-ID lookups (campaign/project by id) served from an index built once per load
+- Explicit invalidation hooks for when campaigns/projects change upstream
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a cached collection is revalidated against the backend
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv('CONTEXT_CACHE_TTL_SECONDS', '300'))
+# Seconds before a cached per-ID campaign DB record is reloaded
+CAMPAIGN_RECORD_TTL_SECONDS = int(os.getenv('CAMPAIGN_RECORD_TTL_SECONDS', '120'))
+
+
+class _CachedCollection:
+    """A cached list response plus its validators and id index"""
+
+    def __init__(self):
+        self.items: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at: float = 0.0
+        self.loaded: bool = False
+        self.stale: bool = False
+
+    def set_items(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self.by_id = {
+            str(item.get('id')): item
+            for item in items
+            if isinstance(item, dict) and item.get('id') is not None
+        }
+        self.loaded = True
+
+    def is_fresh(self, ttl: int) -> bool:
+        return self.loaded and not self.stale and (time.monotonic() - self.fetched_at) < ttl
+
+    def mark_fetched(self):
+        self.fetched_at = time.monotonic()
+        self.stale = False
+
+
+class CampaignContextCache:
+    """Shared cache for campaign and project context"""
+
+    COLLECTIONS = {
+        'campaigns': '/api/campaigns',
+        'projects': '/api/projects',
+    }
+
+    def __init__(self, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS,
+                 record_ttl_seconds: int = CAMPAIGN_RECORD_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.record_ttl_seconds = record_ttl_seconds
+        self._session = None
+        self._collections: Dict[str, _CachedCollection] = {
+            name: _CachedCollection() for name in self.COLLECTIONS
+        }
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # campaign_id -> (loaded_at, record) for DB-backed campaign lookups
+        self._campaign_records: Dict[int, Any] = {}
+        self._stats = {
+            'hits': 0,
+            'revalidated_not_modified': 0,
+            'refreshed': 0,
+            'errors': 0,
+            'record_hits': 0,
+            'record_misses': 0,
+            'invalidations': 0,
+        }
+
+    def _get_lock(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    async def _get_session(self):
+        """Return the shared aiohttp session, creating it on first use"""
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session (call on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _load_collection(self, name: str, force_refresh: bool = False) -> _CachedCollection:
+        """Return a collection, revalidating it against the backend once its TTL expires"""
+        cached = self._collections[name]
+        if not force_refresh and cached.is_fresh(self.ttl_seconds):
+            self._stats['hits'] += 1
+            return cached
+
+        async with self._get_lock(f"collection:{name}"):
+            # Another request may have refreshed it while we waited
+            if not force_refresh and cached.is_fresh(self.ttl_seconds):
+                self._stats['hits'] += 1
+                return cached
+
+            settings = get_settings()
+            url = f"{settings.typescript_backend_url}{self.COLLECTIONS[name]}"
+            headers = {}
+            if cached.loaded and not force_refresh:
+                if cached.etag:
+                    headers['If-None-Match'] = cached.etag
+                if cached.last_modified:
+                    headers['If-Modified-Since'] = cached.last_modified
+
+            try:
+                session = await self._get_session()
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        cached.mark_fetched()
+                        self._stats['revalidated_not_modified'] += 1
+                        logger.info(f"♻️ {name} context not modified, reusing {len(cached.items)} cached entries")
+                        return cached
+
+                    if response.status != 200:
+                        error_text = await response.text()
+                        self._stats['errors'] += 1
+                        logger.error(f"❌ Failed to fetch {name}: HTTP {response.status}")
+                        logger.error(f"❌ Response: {error_text[:500]}")
+                        return cached
+
+                    response_data = await response.json()
+                    if not (isinstance(response_data, dict) and response_data.get('success') and 'data' in response_data):
+                        self._stats['errors'] += 1
+                        logger.error(f"❌ Unexpected {name} response structure: {str(response_data)[:500]}")
+                        return cached
+
+                    cached.set_items(response_data['data'] or [])
+                    cached.etag = response.headers.get('ETag')
+                    cached.last_modified = response.headers.get('Last-Modified')
+                    cached.mark_fetched()
+                    self._stats['refreshed'] += 1
+                    logger.info(f"📋 Cached {len(cached.items)} {name} from TypeScript backend")
+                    return cached
+
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"❌ Error fetching {name} context: {e}")
+                if cached.loaded:
+                    logger.warning(f"⚠️ Serving stale {name} context ({len(cached.items)} entries)")
+                return cached
+
+    async def get_campaigns(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Get all campaigns (cached)"""
+        return (await self._load_collection('campaigns', force_refresh)).items
+
+    async def get_projects(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Get all projects (cached)"""
+        return (await self._load_collection('projects', force_refresh)).items
+
+    async def get_campaign(self, campaign_id: Any) -> Optional[Dict[str, Any]]:
+        """Get a single campaign from the cached campaigns list"""
+        return (await self._load_collection('campaigns')).by_id.get(str(campaign_id))
+
+    async def get_project(self, project_id: Any) -> Optional[Dict[str, Any]]:
+        """Get a single project from the cached projects list"""
+        return (await self._load_collection('projects')).by_id.get(str(project_id))
+
+    async def get_campaign_record(self, campaign_id: int,
+                                  loader: Optional[Callable[[int], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get an active campaign row from the database, cached per ID.
+
+        Used by content generation, which needs the raw DB record rather than
+        the API representation. Misses are not cached so newly activated
+        campaigns show up immediately.
+        """
+        entry = self._campaign_records.get(campaign_id)
+        if entry and (time.monotonic() - entry[0]) < self.record_ttl_seconds:
+            self._stats['record_hits'] += 1
+            return dict(entry[1])
+
+        async with self._get_lock(f"campaign_record:{campaign_id}"):
+            entry = self._campaign_records.get(campaign_id)
+            if entry and (time.monotonic() - entry[0]) < self.record_ttl_seconds:
+                self._stats['record_hits'] += 1
+                return dict(entry[1])
+
+            self._stats['record_misses'] += 1
+            if loader is None:
+                from app.database.repositories.campaign_repository import CampaignRepository
+                loader = CampaignRepository().get_campaign_by_id
+
+            record = await asyncio.to_thread(loader, campaign_id)
+            if record:
+                self._campaign_records[campaign_id] = (time.monotonic(), record)
+                return dict(record)
+            return record
+
+    def invalidate(self, collection: Optional[str] = None, item_id: Optional[Any] = None):
+        """
+        Invalidate cached context.
+
+        - No arguments: drop everything
+        - collection only: force that collection to refetch on next access
+        - collection='campaigns' + item_id: also drop that campaign's DB record
+        """
+        self._stats['invalidations'] += 1
+        names = [collection] if collection else list(self._collections.keys())
+        for name in names:
+            if name in self._collections:
+                # Keep validators so the refetch can still be a cheap 304
+                self._collections[name].stale = True
+
+        if collection in (None, 'campaigns'):
+            if item_id is None:
+                self._campaign_records.clear()
+            else:
+                try:
+                    self._campaign_records.pop(int(item_id), None)
+                except (TypeError, ValueError):
+                    pass
+
+        logger.info(f"🗑️ Invalidated context cache: collection={collection or 'all'}, id={item_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        now = time.monotonic()
+        return {
+            **self._stats,
+            'ttl_seconds': self.ttl_seconds,
+            'campaign_records_cached': len(self._campaign_records),
+            'collections': {
+                name: {
+                    'loaded': c.loaded,
+                    'entries': len(c.items),
+                    'age_seconds': round(now - c.fetched_at, 1) if c.loaded else None,
+                    'has_etag': bool(c.etag),
+                    'has_last_modified': bool(c.last_modified),
+                }
+                for name, c in self._collections.items()
+            },
+        }
+
+
+# Global instance
+campaign_context_cache = CampaignContextCache()
@@ -22,6 +22,8 @@ from app.config.settings import get_settings
 from app.services.llm_providers import MultiProviderLLMService, LLMProviderFactory
 from app.services.s3_snapshot_storage import S3SnapshotStorage
 from app.services.twitter_service import TwitterService
+from app.services.leaderboard_bulk_storage import leaderboard_bulk_storage
+from app.services.twitter_sync_watermarks import twitter_sync_watermarks, SCOPE_LEADERBOARD
 
 logger = logging.getLogger(__name__)
 
@@ -1425,9 +1427,23 @@ class CookieFunProcessor:
             fetched_count = 0
             handles_processed = []
             errors = []
+            fetched_results = []
             
             logger.info(f"🐦 Fetching Twitter data for {len(leaderboard_data)} yappers directly via python-ai-backend")
             
+            # Plan incremental syncs: handles with a watermark only fetch tweets newer than it
+            clean_handles = [
+                twitter_service.clean_username(yapper.get("twitter_handle", "").strip())
+                for yapper in leaderboard_data
+                if yapper.get("twitter_handle", "").strip()
+            ]
+            clean_handles = [handle for handle in clean_handles if handle]
+            sync_plans = await twitter_sync_watermarks.plan_syncs(clean_handles, SCOPE_LEADERBOARD)
+            stored_tweets = await asyncio.to_thread(
+                leaderboard_bulk_storage.get_latest_recent_tweets, clean_handles, platform
+            )
+            synced = []  # (plan, tweet_ids, user_id) recorded once storage succeeded
+            
             for yapper in leaderboard_data:
                 twitter_handle = yapper.get("twitter_handle", "").strip()
                 display_name = yapper.get("display_name", "").strip()
@@ -1442,17 +1458,47 @@ class CookieFunProcessor:
                         errors.append(f"@{twitter_handle}: Invalid handle format")
                         continue
                     
+                    plan = sync_plans[clean_handle.lower()]
+                    previous_tweets = stored_tweets.get(clean_handle.lower())
+                    if plan.is_incremental and not previous_tweets:
+                        # Nothing stored to merge with: fetch (and record) a full sync
+                        plan = plan.as_full("no stored tweets")
+                    since_id = plan.since_id if plan.is_incremental else None
+                    
+                    # Get user profile information (reuses the user id stored with the watermark)
+                    user_id = plan.twitter_user_id or await twitter_service.get_user_id(clean_handle)
+                    if not user_id:
+                        errors.append(f"@{twitter_handle}: User not found")
+                        continue
+                    
                     # Fetch user tweets using the working Twitter service 
                     individual_posts, threads = await twitter_service.get_latest_tweets_with_threads(
                         username=clean_handle,
-                        count=20  # Fetch last 20 tweets like the old service
+                        count=20,  # Fetch last 20 tweets like the old service
+                        since_id=since_id,
+                        user_id=user_id
                     )
                     
-                    # Get user profile information
-                    user_id = await twitter_service.get_user_id(clean_handle)
-                    if not user_id:
-                        errors.append(f"@{twitter_handle}: User not found")
-                        continue
+                    new_tweets = [
+                        {
+                            "id": post.tweet_id,
+                            "text": post.text,
+                            "created_at": post.created_at.isoformat(),
+                            "likes": post.engagement_metrics.get("likes", 0),
+                            "retweets": post.engagement_metrics.get("retweets", 0),
+                            "replies": post.engagement_metrics.get("replies", 0),
+                            "hashtags": post.hashtags,
+                        }
+                        for post in individual_posts[:20]  # Limit to 20 tweets
+                    ]
+                    
+                    recent_tweets = new_tweets
+                    if since_id:
+                        # Incremental: merge new tweets with the last stored ones (newest first)
+                        merged = {str(tweet.get("id")): tweet for tweet in previous_tweets if tweet.get("id")}
+                        merged.update({str(tweet["id"]): tweet for tweet in new_tweets})
+                        recent_tweets = sorted(merged.values(), key=lambda t: int(t["id"]), reverse=True)[:20]
+                        logger.info(f"♻️ @{clean_handle}: {len(new_tweets)} new tweets since {since_id}")
                     
                     # Build result similar to old TwitterLeaderboardService format
                     result = {
@@ -1460,18 +1506,7 @@ class CookieFunProcessor:
                         "twitter_handle": clean_handle,
                         "yapper_name": display_name,
                         "profile": {"user_id": user_id, "followers_count": 0},  # Basic profile
-                        "recent_tweets": [
-                            {
-                                "id": post.tweet_id,
-                                "text": post.text,
-                                "created_at": post.created_at.isoformat(),
-                                "likes": post.engagement_metrics.get("likes", 0),
-                                "retweets": post.engagement_metrics.get("retweets", 0),
-                                "replies": post.engagement_metrics.get("replies", 0),
-                                "hashtags": post.hashtags,
-                            }
-                            for post in individual_posts[:20]  # Limit to 20 tweets
-                        ],
+                        "recent_tweets": recent_tweets,
                         "tweet_image_urls": [],  # Can be enhanced later
                         "engagement_metrics": {},
                         "fetch_timestamp": datetime.utcnow().isoformat()
@@ -1482,10 +1517,8 @@ class CookieFunProcessor:
                         handles_processed.append(twitter_handle)
                         logger.info(f"✅ Fetched Twitter data for @{twitter_handle}")
                         
-                        # Store data via TypeScript backend (using existing endpoint)
-                        await self._store_yapper_twitter_data(
-                            result, campaign_id, snapshot_date, platform
-                        )
+                        fetched_results.append(result)
+                        synced.append((plan, [tweet["id"] for tweet in new_tweets], user_id))
                         
                     else:
                         error_msg = result.get("error", "Unknown error")
@@ -1500,11 +1533,27 @@ class CookieFunProcessor:
                 # Add small delay to avoid rate limits
                 await asyncio.sleep(0.5)
             
+            # Store all fetched Twitter data for this snapshot in one bulk write
+            storage_result = await leaderboard_bulk_storage.store_yapper_twitter_data(
+                fetched_results, campaign_id, snapshot_date, platform
+            )
+            if not storage_result.get("success"):
+                logger.error(f"❌ Failed to store Twitter data: {storage_result.get('error')}")
+            else:
+                # Only advance watermarks for handles whose tweets were actually stored
+                stored_handles = set(storage_result.get("updated_handles") or [])
+                for plan, tweet_ids, user_id in synced:
+                    if plan.handle.lower() in stored_handles:
+                        await twitter_sync_watermarks.record_sync(plan, tweet_ids, user_id)
+                    else:
+                        logger.warning(f"⚠️ @{plan.handle}: no leaderboard row updated, keeping watermark")
+            
             return {
                 "fetched_count": fetched_count,
                 "handles_processed": handles_processed,
                 "errors": errors,
-                "total_yappers": len(leaderboard_data)
+                "total_yappers": len(leaderboard_data),
+                "storage": storage_result
             }
             
         except Exception as e:
@@ -1516,48 +1565,6 @@ class CookieFunProcessor:
                 "total_yappers": len(leaderboard_data)
             }
     
-    async def _store_yapper_twitter_data(
-        self,
-        twitter_data: Dict[str, Any],
-        campaign_id: Optional[int],
-        snapshot_date: date,
-        platform: str
-    ):
-        """Store fetched Twitter data in leaderboard_yappers_twitter_data table via TypeScript backend"""
-        try:
-            # Prepare data for storage
-            storage_data = {
-                "twitter_handle": twitter_data.get("twitter_handle"),
-                "yapper_name": twitter_data.get("yapper_name"),
-                "campaign_id": campaign_id,
-                "platform": platform,
-                "snapshot_date": snapshot_date.isoformat(),
-                "profile_data": twitter_data.get("profile"),
-                "recent_tweets": twitter_data.get("recent_tweets", []),
-                "tweet_image_urls": twitter_data.get("tweet_image_urls", []),
-                "engagement_metrics": twitter_data.get("engagement_metrics"),
-                "fetch_timestamp": twitter_data.get("fetch_timestamp")
-            }
-            
-            # Use TypeScript backend to store (existing endpoint)
-            import aiohttp
-            typescript_backend_url = self.settings.typescript_backend_url
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{typescript_backend_url}/api/leaderboard-yapper/store",
-                    json=storage_data
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ Stored Twitter data for @{twitter_data.get('twitter_handle')}")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to store Twitter data: {error_text}")
-                        
-        except Exception as e:
-            logger.error(f"❌ Error storing Twitter data: {e}")
-            # Continue silently - fetching was successful even if storage failed
-    
     async def _upload_to_s3(
         self, 
         image_path: str, 
@@ -3749,86 +3756,29 @@ class CookieFunProcessor:
 
             logger.info(f"📊 Storing {len(leaderboard_data)} leaderboard entries for campaign {campaign_id}")
             
-            # Store each leaderboard entry
-            stored_entries = []
-            failed_entries = []
+            # Stage all entries and upsert them in a single transaction
+            storage_result = await leaderboard_bulk_storage.store_leaderboard_snapshot(
+                leaderboard_data=leaderboard_data,
+                campaign_id=campaign_id,
+                snapshot_ids=snapshot_ids,
+                snapshot_date=snapshot_date,
+                platform_source="cookie.fun",
+                llm_provider=leaderboard_result.get("llm_provider"),
+                extraction_confidence=leaderboard_result.get("extraction_confidence", 0.8)
+            )
             
-            for entry in leaderboard_data:
-                try:
-                    # Map LLM response to database fields
-                    storage_payload = {
-                        "snapshotIds": snapshot_ids,
-                        "snapshotDate": snapshot_date.isoformat(),
-                        "platformSource": "cookie.fun",
-                        "llmProvider": leaderboard_result.get("llm_provider"),
-                        "processingStatus": "completed",
-                        "extractionConfidence": leaderboard_result.get("extraction_confidence", 0.8)
-                    }
-                    
-                    # Yapper data - map from LLM response structure
-                    if "handle" in entry:
-                        storage_payload["yapperTwitterHandle"] = entry["handle"]
-                    if "username" in entry:
-                        storage_payload["displayName"] = entry["username"]
-                    if "total_snaps" in entry:
-                        storage_payload["totalSnaps"] = entry["total_snaps"]
-                    if "seven_day_snaps" in entry:
-                        storage_payload["sevenDaySnaps"] = entry["seven_day_snaps"]
-                    if "smart_followers" in entry:
-                        storage_payload["smartFollowers"] = entry["smart_followers"]
-                    if "position" in entry:
-                        storage_payload["rank"] = entry["position"]
-                    if "status" in entry:
-                        storage_payload["status"] = entry["status"]
-                    if "special_badge" in entry:
-                        storage_payload["specialBadge"] = entry["special_badge"]
-                    
-                    # Campaign data
-                    if campaign_id:
-                        storage_payload["campaignId"] = campaign_id
-                    if "campaign_title" in leaderboard_result:
-                        storage_payload["campaignTitle"] = leaderboard_result["campaign_title"]
-                    
-                    # Send to TypeScript backend
-                    settings = get_settings()
-                    typescript_backend_url = settings.typescript_backend_url
-                    
-                    async with aiohttp.ClientSession() as session:
-                        url = f"{typescript_backend_url}/api/leaderboard-yapper/store"
-                        
-                        async with session.post(url, json=storage_payload) as response:
-                            if response.status == 200:
-                                result = await response.json()
-                                if result.get("success"):
-                                    stored_entries.append(entry.get("handle", "unknown"))
-                                    logger.info(f"✅ Stored leaderboard entry for {entry.get('handle', 'unknown')}")
-                                else:
-                                    failed_entries.append({
-                                        "yapper": entry.get("handle", "unknown"),
-                                        "error": result.get("message", "Unknown error")
-                                    })
-                                    logger.error(f"❌ Failed to store leaderboard entry: {result.get('message')}")
-                            else:
-                                failed_entries.append({
-                                    "yapper": entry.get("handle", "unknown"),
-                                    "error": f"HTTP {response.status}"
-                                })
-                                logger.error(f"❌ HTTP error storing leaderboard entry: {response.status}")
-                                
-                except Exception as e:
-                    failed_entries.append({
-                        "yapper": entry.get("handle", "unknown"),
-                        "error": str(e)
-                    })
-                    logger.error(f"❌ Exception storing leaderboard entry: {str(e)}")
+            if not storage_result.get("success"):
+                logger.error(f"❌ Failed to store leaderboard entries: {storage_result.get('error')}")
+                return storage_result
 
             return {
                 "success": True,
                 "total_entries": len(leaderboard_data),
-                "stored_entries": len(stored_entries),
-                "failed_entries": len(failed_entries),
-                "stored_yappers": stored_entries,
-                "failed_details": failed_entries
+                "stored_entries": storage_result["rows_written"],
+                "inserted_entries": storage_result["inserted"],
+                "updated_entries": storage_result["updated"],
+                "skipped_entries": storage_result["skipped"],
+                "elapsed_ms": storage_result["elapsed_ms"]
             }
             
         except Exception as e:
@@ -65,6 +65,7 @@ from app.services.llm_content_generators import unified_generator, UnifiedConten
 from app.tools.video_creation_tool import VideoCreationTool
 from app.tools.crew_video_creation_tool import CrewVideoCreationTool
 from app.services.mining_context_service import gather_miner_context
+from app.services.campaign_context_cache import campaign_context_cache
 
 logger = logging.getLogger(__name__)
 
@@ -372,7 +373,9 @@ class CrewAIService:
                 raise ValueError(f"User not found: {mining_session.user_id}")
             
             # Get campaign data
-            self.campaign_data = self.campaign_repo.get_campaign_by_id(mining_session.campaign_id)
+            self.campaign_data = await campaign_context_cache.get_campaign_record(
+                mining_session.campaign_id, loader=self.campaign_repo.get_campaign_by_id
+            )
             if not self.campaign_data:
                 raise ValueError(f"Campaign not found: {mining_session.campaign_id}")
             
@@ -953,7 +956,9 @@ class CrewAIService:
             if not user_id:
                 logger.warning("⚠️ No user_id available, fetching admin context only")
                 # Fallback to basic campaign data
-                campaign_data = self.campaign_repo.get_campaign_by_id(campaign_id)
+                campaign_data = await campaign_context_cache.get_campaign_record(
+                    campaign_id, loader=self.campaign_repo.get_campaign_by_id
+                )
                 if not campaign_data:
                     logger.error(f"❌ Campaign {campaign_id} not found")
                     return
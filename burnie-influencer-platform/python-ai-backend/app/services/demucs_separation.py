@@ -0,0 +1,198 @@
+"""
+Demucs Separation
+Process-wide htdemucs source separation (vocals / drums / bass / other).
+
+Callers used to run get_model('htdemucs') for every clip, which reloads
+~80 MB of weights and rebuilds the network each time. This service:
+
+- loads the model once per process (lazily, or at startup with DEMUCS_PRELOAD=true)
+- runs inference in a bounded worker pool (DEMUCS_WORKERS workers, each using
+  DEMUCS_TORCH_THREADS intra-op threads), so concurrent jobs queue instead of
+  oversubscribing the CPU
+- accepts several clips per call (separate_many)
+- caches separated stems in memory by audio content hash (LRU, bounded by
+  DEMUCS_STEM_CACHE_MAX_BYTES), and concurrent requests for the same audio
+  share one separation
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEMUCS_MODEL_NAME = os.getenv('DEMUCS_MODEL_NAME', 'htdemucs')
+# Concurrent separations per process
+DEMUCS_WORKERS = int(os.getenv('DEMUCS_WORKERS', '1'))
+# torch intra-op threads (0 = torch default)
+DEMUCS_TORCH_THREADS = int(os.getenv('DEMUCS_TORCH_THREADS', '0'))
+DEMUCS_STEM_CACHE_MAX_BYTES = int(os.getenv('DEMUCS_STEM_CACHE_MAX_BYTES', str(512 * 1024 ** 2)))
+DEMUCS_PRELOAD = os.getenv('DEMUCS_PRELOAD', 'false').lower() == 'true'
+
+# htdemucs source order
+DRUMS, BASS, OTHER, VOCALS = range(4)
+
+
+@dataclass
+class SeparatedStems:
+    """Separated sources of one clip (shared between callers, read-only)"""
+    sources: np.ndarray  # (4, channels, samples) float32: drums, bass, other, vocals
+    sample_rate: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.sources.nbytes
+
+    @staticmethod
+    def _channels(audio: np.ndarray, mono: bool) -> np.ndarray:
+        return np.mean(audio, axis=0) if mono and audio.shape[0] == 2 else audio
+
+    def vocals(self, mono: bool = True) -> np.ndarray:
+        """Vocal stem ((samples,) if mono, else (channels, samples))"""
+        return self._channels(self.sources[VOCALS], mono)
+
+    def accompaniment(self, mono: bool = True) -> np.ndarray:
+        """Everything but vocals (drums + bass + other)"""
+        return self._channels(self.sources[DRUMS] + self.sources[BASS] + self.sources[OTHER], mono)
+
+
+def _audio_hash(audio_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DemucsSeparationService:
+    """Shared Demucs model with a bounded inference pool and a stem cache"""
+
+    def __init__(self, model_name: str = DEMUCS_MODEL_NAME, workers: int = DEMUCS_WORKERS,
+                 torch_threads: int = DEMUCS_TORCH_THREADS,
+                 cache_max_bytes: int = DEMUCS_STEM_CACHE_MAX_BYTES):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads
+        self.cache_max_bytes = cache_max_bytes
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='demucs')
+        self._cache: "OrderedDict[str, SeparatedStems]" = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'separations': 0, 'cache_hits': 0, 'joined': 0}
+
+    def get_model(self):
+        """The process-wide model, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import torch
+                    from demucs.pretrained import get_model
+
+                    if self.torch_threads > 0:
+                        torch.set_num_threads(self.torch_threads)
+                    start = time.perf_counter()
+                    model = get_model(self.model_name)
+                    model.eval()
+                    self._model = model
+                    logger.info(f"🤖 Loaded Demucs model {self.model_name} in {time.perf_counter() - start:.1f}s")
+        return self._model
+
+    def preload(self) -> None:
+        """Load the model ahead of the first request (failures are logged, not raised)"""
+        try:
+            self.get_model()
+        except Exception as e:
+            logger.warning(f"⚠️ Demucs preload failed: {e}")
+
+    def _separate(self, audio_path: str) -> SeparatedStems:
+        import torch
+        import torchaudio
+        from demucs.apply import apply_model
+
+        model = self.get_model()
+        waveform, sample_rate = torchaudio.load(audio_path)
+        if waveform.shape[0] == 1:
+            waveform = waveform.repeat(2, 1)
+        start = time.perf_counter()
+        with torch.no_grad():
+            sources = apply_model(model, waveform.unsqueeze(0), device='cpu')[0].numpy()
+        sources.setflags(write=False)
+        with self._lock:
+            self._stats['separations'] += 1
+        logger.info(f"🔬 Demucs separated {waveform.shape[1] / sample_rate:.1f}s of audio "
+                    f"in {time.perf_counter() - start:.1f}s")
+        return SeparatedStems(sources=sources, sample_rate=sample_rate)
+
+    def _remember(self, key: str, stems: SeparatedStems) -> None:
+        if stems.nbytes > self.cache_max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = stems
+            self._cache_bytes += stems.nbytes
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+
+    def _submit(self, audio_path: str) -> Future:
+        """Future for the stems of one audio file (cached, joined or newly queued)"""
+        key = f"{self.model_name}:{_audio_hash(audio_path)}"
+        with self._lock:
+            stems = self._cache.get(key)
+            if stems is not None:
+                self._cache.move_to_end(key)
+                self._stats['cache_hits'] += 1
+                future = Future()
+                future.set_result(stems)
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats['joined'] += 1
+                return future
+            future = self._pool.submit(self._separate, audio_path)
+            self._inflight[key] = future
+
+        def _done(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                self._remember(key, done.result())
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(_done)
+        return future
+
+    def separate(self, audio_path: str) -> SeparatedStems:
+        """Separate one audio file (WAV/any torchaudio-readable format); raises on failure"""
+        return self._submit(audio_path).result()
+
+    def separate_many(self, audio_paths: Sequence[str]) -> List[SeparatedStems]:
+        """Separate several clips through the pool; results in input order (raises on the first failure)"""
+        futures = [self._submit(path) for path in audio_paths]
+        return [future.result() for future in futures]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Service statistics for this process"""
+        with self._lock:
+            return {
+                **self._stats,
+                'model_loaded': self._model is not None,
+                'in_flight': len(self._inflight),
+                'cached_clips': len(self._cache),
+                'cached_bytes': self._cache_bytes,
+            }
+
+
+# Global instance
+demucs_separator = DemucsSeparationService()
@@ -0,0 +1,259 @@
+"""
+FAL Job Client
+Process-wide fal.ai queue client with per-model latency tracking and hedged fallback.
+
+fal_client.subscribe() ties up a thread for the whole generation (minutes
+for a video clip), and clip generation waited for the primary model's full
+timeout before it started the fallback model from scratch. This client:
+
+- submits jobs to the fal queue and polls status/result on one shared
+  background event loop, so many jobs can be in flight without a thread each
+- can be awaited from any event loop (run_async, hedged_async) or called
+  from plain threads (run, hedged)
+- cancels the fal request when a job times out or its caller is cancelled
+- records latency per model (and duration argument). hedged() starts the
+  fallback model once the primary has run longer than its p90 latency (or
+  has failed), and returns whichever valid result arrives first. The other
+  request is cancelled; the time a cancelled or timed-out job had run is
+  recorded as a lower bound, so slow runs do not drop out of the window.
+  Until FAL_HEDGE_MIN_SAMPLES durations are recorded, the fallback starts
+  when the primary times out (previous behavior).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+import fal_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds between queue status polls per job
+FAL_POLL_INTERVAL_SECONDS = float(os.getenv('FAL_POLL_INTERVAL_SECONDS', '2'))
+# Recent completions kept per model for the latency percentile
+FAL_LATENCY_WINDOW = int(os.getenv('FAL_LATENCY_WINDOW', '50'))
+# Completions needed before hedging on the percentile instead of the timeout
+FAL_HEDGE_MIN_SAMPLES = int(os.getenv('FAL_HEDGE_MIN_SAMPLES', '5'))
+FAL_HEDGE_PERCENTILE = float(os.getenv('FAL_HEDGE_PERCENTILE', '90'))
+
+
+@dataclass
+class FalJob:
+    """One fal request; result_key (if set) must be present in the result for it to count as a success"""
+    name: str
+    application: str
+    arguments: Dict[str, Any]
+    result_key: Optional[str] = None
+
+    @property
+    def latency_key(self) -> str:
+        """Latency bucket: the application, split by clip duration where the model takes one"""
+        duration = self.arguments.get('duration')
+        return f"{self.application}:{duration}" if duration else self.application
+
+    def is_valid(self, result: Any) -> bool:
+        return bool(result) and (self.result_key is None or self.result_key in result)
+
+
+@dataclass
+class HedgedResult:
+    """Outcome of hedged(): job is the job whose result was used (None if all failed)"""
+    result: Optional[Dict[str, Any]]
+    job: Optional[FalJob]
+    hedged: bool
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class LatencyTracker:
+    """Sliding window of job durations per latency key (successes, plus cancelled jobs as lower bounds)"""
+
+    def __init__(self, window: int = FAL_LATENCY_WINDOW, min_samples: int = FAL_HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, pct: float = FAL_HEDGE_PERCENTILE) -> Optional[float]:
+        """Latency percentile for key (None until min_samples completions are recorded)"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, self.min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {'samples': len(self._samples[key]), 'p50': self.percentile(key, 50), 'p90': self.percentile(key, 90)}
+            for key in keys
+        }
+
+
+class FalJobClient:
+    """fal queue jobs on a shared background event loop"""
+
+    def __init__(self, poll_interval: float = FAL_POLL_INTERVAL_SECONDS,
+                 latency: Optional[LatencyTracker] = None):
+        self.poll_interval = poll_interval
+        self.latency = latency or LatencyTracker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._loop_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'cancelled': 0,
+                       'hedges': 0, 'fallback_wins': 0}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='fal-jobs', daemon=True).start()
+                # AsyncClient's HTTP connection pool is bound to the loop it first runs on
+                self._client = fal_client.AsyncClient()
+                self._loop = loop
+                logger.info("🔌 Started FAL job event loop")
+        return self._loop
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    async def _poll(self, job: FalJob, on_log: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        start = time.monotonic()
+        handle = await self._client.submit(job.application, arguments=job.arguments)
+        self._count('submitted')
+        try:
+            logs_seen = 0
+            while True:
+                status = await handle.status(with_logs=on_log is not None)
+                logs = getattr(status, 'logs', None) or []
+                if on_log:
+                    for log in logs[logs_seen:]:
+                        on_log(log.get('message', ''))
+                logs_seen = max(logs_seen, len(logs))
+                if isinstance(status, fal_client.Completed):
+                    break
+                await asyncio.sleep(self.poll_interval)
+            result = await handle.get()
+        except asyncio.CancelledError:
+            # Timed out or lost a hedge: it took at least this long, and dropping it would bias p90 low
+            self.latency.record(job.latency_key, time.monotonic() - start)
+            self._count('cancelled')
+            try:
+                await handle.cancel()
+            except Exception as e:
+                logger.debug(f"FAL cancel of {job.application} ({handle.request_id}) failed: {e}")
+            raise
+        except Exception:
+            self._count('failed')
+            raise
+        elapsed = time.monotonic() - start
+        self._count('completed')
+        if job.is_valid(result):
+            self.latency.record(job.latency_key, elapsed)
+        logger.info(f"✅ FAL {job.name} ({job.application}) finished in {elapsed:.1f}s")
+        return result
+
+    async def _run(self, job: FalJob, timeout: Optional[float],
+                   on_log: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(self._poll(job, on_log), timeout)
+        except asyncio.TimeoutError:
+            self._count('timed_out')
+            raise TimeoutError(f"{job.application} did not finish within {timeout}s") from None
+
+    async def _hedged(self, primary: FalJob, fallback: FalJob, timeout: Optional[float],
+                      hedge_after: Optional[float], on_log: Optional[Callable[[str], None]]) -> HedgedResult:
+        if hedge_after is None:
+            hedge_after = self.latency.percentile(primary.latency_key)
+            if hedge_after is not None:
+                logger.info(f"⏱️ {primary.name} p{FAL_HEDGE_PERCENTILE:.0f} latency {hedge_after:.0f}s, "
+                            f"hedging with {fallback.name} after that")
+        loop = asyncio.get_running_loop()
+        hedge_at = loop.time() + hedge_after if hedge_after is not None else None
+        tasks = {asyncio.ensure_future(self._run(primary, timeout, on_log)): primary}
+        errors: Dict[str, str] = {}
+        hedged = False
+        try:
+            while tasks:
+                wait = None if hedged or hedge_at is None else max(0.0, hedge_at - loop.time())
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job = tasks.pop(task)
+                    error = task.exception()
+                    if error is None and job.is_valid(task.result()):
+                        if job is fallback:
+                            self._count('fallback_wins')
+                        return HedgedResult(task.result(), job, hedged, errors)
+                    errors[job.name] = str(error) if error else f"no {job.result_key} in result"
+                    logger.warning(f"⚠️ FAL {job.name} failed: {errors[job.name]}")
+                if not hedged and (not tasks or (hedge_at is not None and loop.time() >= hedge_at)):
+                    reason = "primary failed" if not tasks else f"primary past {hedge_after:.0f}s"
+                    logger.info(f"🔀 Starting fallback {fallback.name} ({reason})")
+                    tasks[asyncio.ensure_future(self._run(fallback, timeout, on_log))] = fallback
+                    hedged = True
+                    self._count('hedges')
+            return HedgedResult(None, None, hedged, errors)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # finished alongside the winner; mark its error as retrieved
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    async def run_async(self, application: str, arguments: Dict[str, Any], timeout: Optional[float] = None,
+                        on_log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Run one fal application and return its result, awaitable from any event loop.
+
+        Raises the fal error, or TimeoutError after `timeout` seconds (the request is then
+        cancelled). on_log receives each new log message while the job runs.
+        """
+        job = FalJob(application, application, arguments)
+        return await asyncio.wrap_future(self._submit(self._run(job, timeout, on_log)))
+
+    def run(self, application: str, arguments: Dict[str, Any], timeout: Optional[float] = None,
+            on_log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Blocking run_async for synchronous code"""
+        job = FalJob(application, application, arguments)
+        return self._submit(self._run(job, timeout, on_log)).result()
+
+    async def hedged_async(self, primary: FalJob, fallback: FalJob, timeout: Optional[float] = None,
+                           hedge_after: Optional[float] = None,
+                           on_log: Optional[Callable[[str], None]] = None) -> HedgedResult:
+        """
+        Run primary, adding fallback once primary exceeds hedge_after seconds (default: its p90
+        latency, else its timeout) or fails; returns the first valid result. Each job gets its
+        own `timeout`. Never raises for job failures; check HedgedResult.job.
+        """
+        return await asyncio.wrap_future(self._submit(self._hedged(primary, fallback, timeout, hedge_after, on_log)))
+
+    def hedged(self, primary: FalJob, fallback: FalJob, timeout: Optional[float] = None,
+               hedge_after: Optional[float] = None,
+               on_log: Optional[Callable[[str], None]] = None) -> HedgedResult:
+        """Blocking hedged_async for synchronous code"""
+        return self._submit(self._hedged(primary, fallback, timeout, hedge_after, on_log)).result()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counters and per-model latency for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, 'latency': self.latency.snapshot()}
+
+
+# Global instance
+fal_job_client = FalJobClient()
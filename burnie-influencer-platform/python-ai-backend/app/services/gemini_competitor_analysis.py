@@ -335,59 +335,15 @@ def _get_brand_enrichment_from_gemini(
         return {"category": "Others", "similar_competitors": []}
 
 
-def _expand_keywords_for_matching(keywords: list[str]) -> list[str]:
-    """
-    Expand keywords for flexible matching in ad_creative_link_captions.
-    E.g. lululemon.com -> [lululemon.com, lululemon]; titikaactive -> [titikaactive].
-    Matches keyword in any form (domain or brand name).
-    """
-    expanded = set()
-    for k in keywords:
-        k = str(k).strip().lower()
-        if not k:
-            continue
-        expanded.add(k)
-        if "." in k and not k.startswith("."):
-            base = k.split(".")[0]
-            if len(base) >= 2:
-                expanded.add(base)
-    return list(expanded)
-
-
 def _filter_ads_by_keyword_in_captions(ads: list[dict], keywords: list[str]) -> list[dict]:
     """
     Keep only ads where keyword appears in ad_creative_link_captions or ad_creative_link_titles.
     Keyword can be anything (lululemon, titikaactive, lululemon.com). Matches substring (any form).
+    Uses meta_ads_fetch.AdFilterEngine (all keywords compiled into one pattern, one pass per ad).
     """
     if not keywords:
         return ads
-    kw_lower = _expand_keywords_for_matching(keywords)
-    if not kw_lower:
-        return ads
-
-    def _ad_contains_keyword(ad: dict) -> bool:
-        def _matches(text: str) -> bool:
-            return text and any(kw in (text or "").lower() for kw in kw_lower)
-
-        def _extract_texts(field_val: list) -> list[str]:
-            texts = []
-            for item in (field_val or []):
-                if isinstance(item, str):
-                    texts.append(item)
-                elif isinstance(item, dict):
-                    texts.append(item.get("text") or item.get("caption") or item.get("name") or item.get("value") or "")
-                else:
-                    texts.append(str(item))
-            return texts
-
-        for field_key in ("ad_creative_link_captions", "ad_creative_link_titles"):
-            field_val = ad.get(field_key) or []
-            for text in _extract_texts(field_val if isinstance(field_val, list) else [field_val]):
-                if _matches(str(text)):
-                    return True
-        return False
-
-    return [ad for ad in ads if _ad_contains_keyword(ad)]
+    return _load_meta_ads_fetch().AdFilterEngine(keywords=keywords).apply(ads)
 
 
 def enrich_ads_with_gemini(
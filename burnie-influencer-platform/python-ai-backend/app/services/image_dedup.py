@@ -0,0 +1,182 @@
+"""
+Image Dedup
+Perceptual-hash deduplication of logos and brand images before upload and analysis.
+
+Brand creatives and logo candidates often contain the same picture several
+times (a logo at several sizes, favicon variants, repeated hero images).
+Images are hashed with a 64-bit pHash. Hashes within IMAGE_DEDUP_MAX_DISTANCE
+bits count as the same picture, and only the highest-resolution member of
+each cluster is kept.
+
+A per-domain hash index (a local SQLite file, like the seen-ad index)
+remembers which S3 key already holds each picture. Repeat fetches reuse that
+key instead of uploading and analyzing the image again.
+"""
+
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+import imagehash
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+IMAGE_HASH_INDEX_PATH = Path(
+    os.getenv("IMAGE_HASH_INDEX_PATH") or Path(tempfile.gettempdir()) / "dvyb_image_hashes.sqlite3"
+)
+# Hamming distance (of 64 bits) up to which two images count as the same picture
+IMAGE_DEDUP_MAX_DISTANCE = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "6"))
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS image_hashes (
+        scope TEXT NOT NULL,
+        phash TEXT NOT NULL,
+        s3_key TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (scope, phash)
+    );
+"""
+
+
+@dataclass
+class HashedImage:
+    """Downloaded image with its perceptual hash (phash None if it could not be decoded)"""
+    content: bytes
+    phash: Optional[int] = None
+    width: int = 0
+    height: int = 0
+    item: Any = None  # caller payload (URL, content type, ...)
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def hash_image(content: bytes, item: Any = None) -> HashedImage:
+    """Perceptual hash and dimensions of an image (undecodable images, e.g. SVG, get no hash)"""
+    try:
+        image = Image.open(io.BytesIO(content))
+        width, height = image.size
+        image.draft('RGB', (256, 256))
+        phash = int(str(imagehash.phash(image.convert('RGB'))), 16)
+        return HashedImage(content=content, phash=phash, width=width, height=height, item=item)
+    except Exception as e:
+        logger.debug(f"Could not hash image: {e}")
+        return HashedImage(content=content, item=item)
+
+
+def hash_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def dedupe_images(images: Iterable[HashedImage],
+                  max_distance: int = IMAGE_DEDUP_MAX_DISTANCE) -> List[HashedImage]:
+    """
+    Collapse near-identical images, keeping the highest-resolution member of
+    each cluster at the position of the cluster's first image. Images without
+    a hash are kept as they are.
+    """
+    kept: List[HashedImage] = []
+    for image in images:
+        if image.phash is None:
+            kept.append(image)
+            continue
+        for i, other in enumerate(kept):
+            if other.phash is not None and hash_distance(other.phash, image.phash) <= max_distance:
+                if image.pixels > other.pixels:
+                    kept[i] = image
+                break
+        else:
+            kept.append(image)
+    return kept
+
+
+class ImageHashIndex:
+    """SQLite-backed per-domain index of uploaded images by perceptual hash"""
+
+    def __init__(self, path: Path = IMAGE_HASH_INDEX_PATH, max_distance: int = IMAGE_DEDUP_MAX_DISTANCE):
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def find(self, scope: str, images: List[HashedImage]) -> List[Optional[dict]]:
+        """Known upload ({"s3_key", "width", "height"}) for each image, or None"""
+        if not scope or not any(image.phash is not None for image in images):
+            return [None] * len(images)
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT phash, s3_key, width, height FROM image_hashes WHERE scope = ?", (scope,)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Image hash index lookup failed: {e}")
+            return [None] * len(images)
+
+        known = [(int(row["phash"], 16), dict(row)) for row in rows]
+        matches: List[Optional[dict]] = []
+        for image in images:
+            match = None
+            if image.phash is not None:
+                for phash, row in known:
+                    if hash_distance(phash, image.phash) <= self.max_distance:
+                        match = row
+                        break
+            matches.append(match)
+        return matches
+
+    def record(self, scope: str, image: HashedImage, s3_key: str) -> None:
+        """Remember where a picture was uploaded for this scope"""
+        if not scope or image.phash is None or not s3_key:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("""
+                        INSERT INTO image_hashes (scope, phash, s3_key, width, height, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (scope, phash) DO UPDATE SET
+                            s3_key = excluded.s3_key, width = excluded.width,
+                            height = excluded.height, updated_at = excluded.updated_at
+                    """, (scope, f"{image.phash:016x}", s3_key, image.width, image.height, time.time()))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Image hash index write failed: {e}")
+
+    def reusable(self, scope: str, image: HashedImage) -> Optional[str]:
+        """S3 key of a known upload of this picture at no lower resolution (None: upload it)"""
+        match = self.find(scope, [image])[0]
+        if match and match["width"] * match["height"] >= image.pixels:
+            return match["s3_key"]
+        return None
+
+
+# Global instance
+image_hash_index = ImageHashIndex()
@@ -0,0 +1,271 @@
+"""
+Image Palette Extraction
+Vectorized brand palette extraction from logo / screenshot images.
+
+The image is downsampled to a bounded pixel budget and handled as a uint8
+NumPy array:
+
+1. Transparent pixels are dropped, and a uniform border (the logo's
+   background) is detected and masked out
+2. Remaining pixels are median-cut into a small set of boxes
+3. Box colors closer than PALETTE_MERGE_DELTA_E in CIE Lab are merged
+
+The result has the same {"primary", "secondary", "accent"} structure as the
+OpenAI Vision logo color extraction, so it can stand in for it.
+
+Run `python image_palette.py [dir]` to benchmark against per-pixel counting
+(default corpus: the logos in the frontends' public/assets folders).
+"""
+
+import io
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Pixels kept after downsampling
+PALETTE_PIXEL_BUDGET = int(os.getenv('PALETTE_PIXEL_BUDGET', '40000'))
+# Median-cut boxes before merging
+PALETTE_MAX_BOXES = 16
+# Colors closer than this (CIE76 delta E) are merged
+PALETTE_MERGE_DELTA_E = 12.0
+# Lab chroma below which a color counts as neutral (white / gray / black)
+NEUTRAL_CHROMA = 12.0
+# Share of border pixels that must agree for the border to count as background
+BACKGROUND_BORDER_SHARE = 0.6
+# Clusters below this share of the image are ignored as primary / accent candidates
+MIN_COLOR_SHARE = 0.02
+
+ImageInput = Union[bytes, Image.Image]
+
+
+def _to_hex(rgb: np.ndarray) -> str:
+    r, g, b = (int(round(float(c))) for c in rgb)
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (..., 3) in 0-255 to CIE Lab (D65)"""
+    c = rgb.astype(np.float64) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ np.array([
+        [0.4124564, 0.2126729, 0.0193339],
+        [0.3575761, 0.7151522, 0.1191920],
+        [0.1804375, 0.0721750, 0.9503041],
+    ])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+def _load_pixels(image: ImageInput, pixel_budget: int) -> np.ndarray:
+    """Downsampled RGBA pixels as an (height, width, 4) uint8 array"""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    # JPEG decoders can downscale while decoding
+    image.draft('RGB', (512, 512))
+    image = image.convert('RGBA')
+    width, height = image.size
+    if width * height > pixel_budget:
+        scale = (pixel_budget / (width * height)) ** 0.5
+        image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.BOX)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def _detect_background(pixels: np.ndarray) -> Optional[np.ndarray]:
+    """Mean color of the border if most opaque border pixels agree (None otherwise)"""
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    border = border[border[:, 3] >= 128, :3]
+    if len(border) == 0:
+        return None
+    # Bucket to 4 bits per channel to find the dominant border color
+    buckets = (border >> 4).astype(np.int32)
+    keys = (buckets[:, 0] << 8) | (buckets[:, 1] << 4) | buckets[:, 2]
+    values, counts = np.unique(keys, return_counts=True)
+    best = counts.argmax()
+    if counts[best] < BACKGROUND_BORDER_SHARE * len(border):
+        return None
+    return border[keys == values[best]].mean(axis=0)
+
+
+def _median_cut(rgb: np.ndarray, max_boxes: int) -> List[np.ndarray]:
+    """Split pixels (N, 3) into up to max_boxes boxes along their widest channel"""
+    boxes = [rgb]
+    while len(boxes) < max_boxes:
+        ranges = [(box.max(axis=0).astype(np.int32) - box.min(axis=0)) if len(box) > 1 else np.zeros(3, np.int32)
+                  for box in boxes]
+        index = max(range(len(boxes)), key=lambda i: int(ranges[i].max()) * len(boxes[i]))
+        if ranges[index].max() == 0:
+            break
+        box = boxes.pop(index)
+        channel = int(ranges[index].argmax())
+        order = np.argsort(box[:, channel], kind='stable')
+        middle = len(box) // 2
+        boxes += [box[order[:middle]], box[order[middle:]]]
+    return boxes
+
+
+def quantize_image(image: ImageInput, pixel_budget: int = PALETTE_PIXEL_BUDGET,
+                   max_boxes: int = PALETTE_MAX_BOXES,
+                   merge_delta_e: float = PALETTE_MERGE_DELTA_E) -> Dict[str, Any]:
+    """
+    Quantize an image into merged palette colors.
+
+    Returns:
+        {"colors": [{"hex", "share", "chroma"}, ...] by share (background excluded),
+         "background": hex or None}
+    """
+    pixels = _load_pixels(image, pixel_budget)
+    background = _detect_background(pixels)
+
+    flat = pixels.reshape(-1, 4)
+    rgb = flat[flat[:, 3] >= 128, :3]
+    if background is not None and len(rgb):
+        distance = np.linalg.norm(rgb_to_lab(rgb) - rgb_to_lab(background), axis=1)
+        rgb = rgb[distance >= merge_delta_e]
+    if len(rgb) == 0:
+        return {"colors": [], "background": _to_hex(background) if background is not None else None}
+
+    boxes = [box for box in _median_cut(rgb, max_boxes) if len(box)]
+    means = np.array([box.mean(axis=0) for box in boxes])
+    counts = np.array([len(box) for box in boxes], dtype=np.float64)
+    labs = rgb_to_lab(means)
+
+    # Greedy merge, largest boxes first
+    merged: List[Dict[str, Any]] = []
+    for i in np.argsort(-counts):
+        for cluster in merged:
+            if np.linalg.norm(cluster['lab'] - labs[i]) < merge_delta_e:
+                total = cluster['count'] + counts[i]
+                cluster['rgb'] = (cluster['rgb'] * cluster['count'] + means[i] * counts[i]) / total
+                cluster['count'] = total
+                cluster['lab'] = rgb_to_lab(cluster['rgb'])
+                break
+        else:
+            merged.append({'rgb': means[i], 'count': counts[i], 'lab': labs[i]})
+
+    merged.sort(key=lambda cluster: cluster['count'], reverse=True)
+    return {
+        "colors": [
+            {
+                "hex": _to_hex(cluster['rgb']),
+                "share": round(float(cluster['count'] / len(rgb)), 4),
+                "chroma": round(float(np.hypot(cluster['lab'][1], cluster['lab'][2])), 1),
+            }
+            for cluster in merged
+        ],
+        "background": _to_hex(background) if background is not None else None,
+    }
+
+
+def _shade(hex_color: str, factor: float) -> str:
+    rgb = np.array([int(hex_color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+    target = 255.0 if factor > 0 else 0.0
+    return _to_hex(rgb + (target - rgb) * abs(factor))
+
+
+def extract_palette_from_image(image: ImageInput) -> Optional[Dict[str, str]]:
+    """
+    Brand palette {"primary", "secondary", "accent"} (uppercase hex) from a logo
+    or screenshot. Same structure as extract_colors_from_logo_with_openai.
+    Returns None if the image cannot be decoded or has no visible colors.
+    """
+    try:
+        quantized = quantize_image(image)
+    except Exception as e:
+        logger.warning(f"⚠️ Palette quantization failed: {e}")
+        return None
+
+    colors = [c for c in quantized["colors"] if c["share"] >= MIN_COLOR_SHARE] or quantized["colors"]
+    if not colors:
+        return None
+
+    # Primary: most prominent non-neutral color, else the most prominent color
+    chromatic = [c for c in colors if c["chroma"] >= NEUTRAL_CHROMA]
+    primary = (chromatic or colors)[0]["hex"]
+    rest = [c["hex"] for c in colors if c["hex"] != primary]
+
+    # Secondary: the logo background if there is one, else the next color (white like the Vision prompt)
+    secondary = quantized["background"] or (rest.pop(0) if rest else "#FFFFFF")
+    rest = [h for h in rest if h != secondary]
+
+    # Accent: next chromatic color, else a darker / lighter variant of primary
+    chromatic_rest = [c["hex"] for c in chromatic if c["hex"] in rest]
+    if chromatic_rest:
+        accent = chromatic_rest[0]
+    elif rest:
+        accent = rest[0]
+    else:
+        primary_lightness = float(rgb_to_lab(np.array([int(primary[i:i + 2], 16) for i in (1, 3, 5)]))[0])
+        accent = _shade(primary, -0.35 if primary_lightness > 50 else 0.35)
+
+    return {"primary": primary, "secondary": secondary, "accent": accent}
+
+
+def _legacy_palette(image: ImageInput, max_colors: int = 3) -> List[str]:
+    """Per-pixel Python counting at full size (benchmark baseline)"""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    counts = Counter()
+    data = image.convert('RGBA').tobytes()
+    for i in range(0, len(data), 4):
+        r, g, b, a = data[i:i + 4]
+        if a >= 128:
+            counts[(r >> 3 << 3, g >> 3 << 3, b >> 3 << 3)] += 1
+    return [f"#{r:02X}{g:02X}{b:02X}" for (r, g, b), _ in counts.most_common(max_colors)]
+
+
+def benchmark_palette(paths: List[str]) -> Dict[str, Any]:
+    """Time per-pixel counting against the vectorized pipeline on a set of image files"""
+    images = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                images.append((path, f.read()))
+        except OSError as e:
+            logger.warning(f"⚠️ Skipping {path}: {e}")
+
+    results = {"images": len(images), "legacy_seconds": 0.0, "vectorized_seconds": 0.0, "palettes": {}}
+    for path, data in images:
+        start = time.perf_counter()
+        _legacy_palette(data)
+        results["legacy_seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results["palettes"][os.path.basename(path)] = extract_palette_from_image(data)
+        results["vectorized_seconds"] += time.perf_counter() - start
+
+    results["legacy_seconds"] = round(results["legacy_seconds"], 3)
+    results["vectorized_seconds"] = round(results["vectorized_seconds"], 3)
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python image_palette.py [image dir or files...]
+    # Default corpus: the project logos and badges shipped with the web frontends
+    repo_root = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')
+    args = sys.argv[1:] or [os.path.join(repo_root, 'burnie-influencer-platform', 'frontend', 'public'),
+                            os.path.join(repo_root, 'dvyb', 'src', 'assets')]
+    files = []
+    for arg in args:
+        if os.path.isdir(arg):
+            files += [os.path.join(arg, name) for name in sorted(os.listdir(arg))
+                      if name.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.gif'))]
+        else:
+            files.append(arg)
+    report = benchmark_palette(files)
+    for name, palette in report["palettes"].items():
+        print(f"{name}: {palette}")
+    print(f"{report['images']} images: per-pixel {report['legacy_seconds']}s, "
+          f"vectorized {report['vectorized_seconds']}s")
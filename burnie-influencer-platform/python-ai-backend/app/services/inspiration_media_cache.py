@@ -0,0 +1,288 @@
+"""
+Inspiration Media Cache
+Shared on-disk cache of downloaded inspiration videos (Instagram / TikTok / YouTube / S3).
+
+Every generation job that references an inspiration link used to download
+the video again (yt-dlp or a presigned S3 GET) into its own temp directory
+and delete it afterwards. Downloads now go through this cache:
+
+- entries are keyed by normalized source URL (see normalize_inspiration_url),
+  so tracking parameters, /reel/ vs /p/ and re-signed S3 URLs share one entry
+- files are stored content-addressed (sha256), so different links to the same
+  video share one file
+- a local SQLite index records size, hash and last access; the least recently
+  used files are evicted once INSPIRATION_MEDIA_CACHE_MAX_BYTES is exceeded
+- concurrent requests for the same URL in this process share one download
+- cached files are checked against their recorded size and sha256 before use,
+  corrupt or missing files are dropped and downloaded again
+
+Callers get their own hardlink (or copy) of the cached file inside their
+working directory, so they can keep deleting that directory when done.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from app.utils.inspiration_urls import normalize_inspiration_url
+
+logger = logging.getLogger(__name__)
+
+INSPIRATION_MEDIA_CACHE_DIR = Path(
+    os.getenv("INSPIRATION_MEDIA_CACHE_DIR") or Path(tempfile.gettempdir()) / "dvyb-inspiration-cache"
+)
+INSPIRATION_MEDIA_CACHE_MAX_BYTES = int(os.getenv("INSPIRATION_MEDIA_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))
+# Files larger than this share of the budget are served but not kept
+INSPIRATION_MEDIA_CACHE_MAX_ENTRY_FRACTION = 0.25
+
+# Downloads into the given path and returns True on success
+DownloadFn = Callable[[str], bool]
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS media_blobs (
+        sha256 TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS media_urls (
+        url_key TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_media_urls_sha256 ON media_urls (sha256);
+"""
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _materialize(source: Path, dest: str) -> None:
+    """Hardlink the cached file to dest (copy across filesystems)"""
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copyfile(source, dest)
+
+
+class InspirationMediaCache:
+    """Size-bounded LRU cache of inspiration media keyed by normalized URL and content hash"""
+
+    def __init__(self, root: Path = INSPIRATION_MEDIA_CACHE_DIR,
+                 max_bytes: int = INSPIRATION_MEDIA_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.blob_dir = self.root / "blobs"
+        self.tmp_dir = self.root / "tmp"
+        self.index_path = self.root / "index.sqlite3"
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "joined": 0, "corrupt": 0, "evicted": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.blob_dir.mkdir(parents=True, exist_ok=True)
+                    self.tmp_dir.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.index_path, timeout=30)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    conn.close()
+                    self._schema_ready = True
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _lookup(self, url_key: str) -> Optional[Path]:
+        """Verified cached file for a URL key (touches its LRU position), or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute("""
+                SELECT b.sha256, b.size, b.filename
+                FROM media_urls u JOIN media_blobs b ON b.sha256 = u.sha256
+                WHERE u.url_key = ?
+            """, (url_key,)).fetchone()
+            if row is None:
+                return None
+            path = self.blob_dir / row["filename"]
+            try:
+                intact = path.stat().st_size == row["size"] and _sha256_file(path) == row["sha256"]
+            except OSError:
+                intact = False
+            if not intact:
+                self._stats["corrupt"] += 1
+                logger.warning(f"⚠️ Cached inspiration media for {url_key} failed integrity check, dropping it")
+                with conn:
+                    self._drop_blob(conn, row["sha256"], row["filename"])
+                return None
+            with conn:
+                conn.execute("UPDATE media_blobs SET last_access = ? WHERE sha256 = ?", (time.time(), row["sha256"]))
+            return path
+        finally:
+            conn.close()
+
+    def _drop_blob(self, conn: sqlite3.Connection, sha256: str, filename: str) -> None:
+        conn.execute("DELETE FROM media_urls WHERE sha256 = ?", (sha256,))
+        conn.execute("DELETE FROM media_blobs WHERE sha256 = ?", (sha256,))
+        try:
+            (self.blob_dir / filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _store(self, url_key: str, downloaded: Path, suffix: str) -> Path:
+        """Move a finished download into the content-addressed store and index it"""
+        size = downloaded.stat().st_size
+        sha256 = _sha256_file(downloaded)
+        filename = f"{sha256}{suffix}"
+        blob = self.blob_dir / filename
+        if blob.exists():
+            downloaded.unlink()
+        else:
+            os.replace(downloaded, blob)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO media_blobs (sha256, size, filename, last_access) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (sha256) DO UPDATE SET last_access = excluded.last_access
+                """, (sha256, size, filename, now))
+                conn.execute("""
+                    INSERT INTO media_urls (url_key, sha256, created_at) VALUES (?, ?, ?)
+                    ON CONFLICT (url_key) DO UPDATE SET sha256 = excluded.sha256, created_at = excluded.created_at
+                """, (url_key, sha256, now))
+            self._evict(conn, keep=sha256)
+        finally:
+            conn.close()
+        logger.info(f"💾 Cached inspiration media {url_key} ({size / 1024 / 1024:.2f} MB, {sha256[:12]})")
+        return blob
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> None:
+        """Drop least recently used files until the cache fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT sha256, size, filename FROM media_blobs WHERE sha256 != ? ORDER BY last_access", (keep,)
+        ).fetchall()
+        with conn:
+            for row in rows:
+                if total <= self.max_bytes:
+                    break
+                self._drop_blob(conn, row["sha256"], row["filename"])
+                total -= row["size"]
+                self._stats["evicted"] += 1
+                logger.info(f"🧹 Evicted cached inspiration media {row['sha256'][:12]} ({row['size'] / 1024 / 1024:.2f} MB)")
+
+    def _download_into_cache(self, url_key: str, download: DownloadFn, suffix: str) -> Optional[Path]:
+        """Run the download in a private temp directory and store the result (None on failure)"""
+        work_dir = self.tmp_dir / uuid.uuid4().hex
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            target = work_dir / f"media{suffix}"
+            if not download(str(target)) or not target.exists() or target.stat().st_size == 0:
+                return None
+            if target.stat().st_size > self.max_bytes * INSPIRATION_MEDIA_CACHE_MAX_ENTRY_FRACTION:
+                # Too big to keep: hand it over uncached (the caller moves it out before cleanup)
+                uncached = self.tmp_dir / f"{uuid.uuid4().hex}{suffix}"
+                os.replace(target, uncached)
+                return uncached
+            return self._store(url_key, target, suffix)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _single_flight(self, url_key: str, download: DownloadFn, suffix: str) -> Optional[Path]:
+        with self._inflight_lock:
+            future = self._inflight.get(url_key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[url_key] = future
+        if not leader:
+            self._stats["joined"] += 1
+            logger.info(f"🔗 Joining in-flight inspiration media download for {url_key}")
+            return future.result()
+
+        try:
+            path = self._download_into_cache(url_key, download, suffix)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(url_key, None)
+
+    def fetch(self, url: str, dest_path: str, download: DownloadFn) -> bool:
+        """
+        Place the media behind url at dest_path, from the cache where possible.
+
+        Args:
+            url: Source URL (platform link or direct media URL)
+            dest_path: Where the caller wants the file (its directory must exist)
+            download: Downloads the URL into a given path, returns True on success
+
+        Returns True if dest_path now holds the media.
+        """
+        url_key = normalize_inspiration_url(url)
+        if not url_key:
+            return download(dest_path)
+        suffix = Path(dest_path).suffix or ".mp4"
+
+        try:
+            cached = self._lookup(url_key)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Inspiration media cache unavailable, downloading directly: {e}")
+            return download(dest_path)
+        if cached is not None:
+            try:
+                _materialize(cached, dest_path)
+                self._stats["hits"] += 1
+                logger.info(f"♻️ Serving cached inspiration media for {url_key}")
+                return True
+            except FileNotFoundError:
+                pass  # evicted between lookup and link
+
+        self._stats["misses"] += 1
+        try:
+            path = self._single_flight(url_key, download, suffix)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Inspiration media cache write failed, downloading directly: {e}")
+            return download(dest_path)
+        if path is None:
+            return False
+        try:
+            if path.parent == self.tmp_dir:
+                os.replace(path, dest_path)
+            else:
+                _materialize(path, dest_path)
+            return True
+        except FileNotFoundError:
+            # Uncached file already claimed by another waiter, or evicted right after being stored
+            return download(dest_path)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics for this process"""
+        return {**self._stats, "in_flight": len(self._inflight)}
+
+
+# Global instance
+inspiration_media_cache = InspirationMediaCache()
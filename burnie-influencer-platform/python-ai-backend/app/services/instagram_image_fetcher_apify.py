@@ -4,67 +4,254 @@ Uses Apify to avoid instaloader blocking and rate limits.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 import mimetypes
+import re
 import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Callable
+from urllib.parse import parse_qs, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from app.config.settings import settings
+from app.services.image_dedup import HashedImage, hash_distance, hash_image, image_hash_index
 from app.utils.image_validation import validate_image_for_grok
 from app.utils.web2_s3_helper import web2_s3_helper
 
 logger = logging.getLogger(__name__)
 
+# Concurrent downloads+uploads, and the time budget for one batch (partial results after that)
+INSTAGRAM_DOWNLOAD_CONCURRENCY = 6
+INSTAGRAM_BATCH_BUDGET_SECONDS = 45.0
+# Retries for throttled (429) / failing (5xx) CDN responses; expired signed URLs are not retried
+INSTAGRAM_DOWNLOAD_RETRIES = 2
+INSTAGRAM_MAX_RETRY_AFTER_SECONDS = 5.0
 
-def _download_and_upload(
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One session for all downloads so CDN connections are reused across images
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=INSTAGRAM_DOWNLOAD_CONCURRENCY))
+
+
+def _index_scope(domain_hash: str) -> str:
+    return f"domain-products:{domain_hash}"
+
+
+def _cdn_url_expired(url: str) -> bool:
+    """Instagram/Facebook CDN URLs are signed with an `oe` (hex unix time) expiry; past it they 403."""
+    oe = parse_qs(urlparse(url).query).get("oe")
+    if not oe or not re.fullmatch(r"[0-9A-Fa-f]{8}", oe[0]):
+        return False
+    return int(oe[0], 16) < time.time()
+
+
+def _get_with_retries(url: str, headers: dict) -> requests.Response:
+    """GET (streamed) with backoff on throttling / server errors, honoring Retry-After."""
+    for attempt in range(INSTAGRAM_DOWNLOAD_RETRIES + 1):
+        try:
+            r = _session.get(url, headers=headers, timeout=30, stream=True)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == INSTAGRAM_DOWNLOAD_RETRIES:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+            continue
+        if r.status_code not in _RETRY_STATUSES or attempt == INSTAGRAM_DOWNLOAD_RETRIES:
+            return r
+        retry_after = r.headers.get("retry-after", "")
+        delay = float(retry_after) if retry_after.isdigit() else 0.5 * 2 ** attempt
+        r.close()
+        time.sleep(min(delay, INSTAGRAM_MAX_RETRY_AFTER_SECONDS))
+    return r
+
+
+def _download_image(
     url: str,
-    domain_hash: str,
-    idx: int,
     referer: str = "https://www.instagram.com/",
-) -> dict | None:
-    """Download image from URL and upload to S3. Returns {s3_key, presigned_url, sourceLabel} or None."""
+) -> tuple[str, str, str, HashedImage, str] | None:
+    """
+    Download and validate one image into a temp file (no upload).
+    Returns (tmp_path, ext, content_type, hashed image, sha256 hex) or None; the caller owns tmp_path.
+    """
+    if _cdn_url_expired(url):
+        logger.debug(f"Skipping expired Instagram CDN URL: {url[:80]}")
+        return None
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
         "Accept": "image/avif,image/webp,image/apng,*/*;q=0.8",
         "Referer": referer,
     }
+    tmp_path = None
     try:
-        r = requests.get(url, headers=headers, timeout=30, stream=True)
-        r.raise_for_status()
-        ct = r.headers.get("content-type", "").lower()
-        ext = mimetypes.guess_extension(ct.split(";")[0].strip()) if ct else None
-        if not ext or ext not in (".jpg", ".jpeg", ".png", ".webp", ".gif"):
-            ext = ".jpg"
-        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-            for chunk in r.iter_content(chunk_size=8192):
-                tmp.write(chunk)
-            tmp_path = tmp.name
-        try:
-            validated = validate_image_for_grok(tmp_path)
-            if not validated:
-                return None
+        with _get_with_retries(url, headers) as r:
+            r.raise_for_status()
+            ct = r.headers.get("content-type", "").lower()
+            ext = mimetypes.guess_extension(ct.split(";")[0].strip()) if ct else None
+            if not ext or ext not in (".jpg", ".jpeg", ".png", ".webp", ".gif"):
+                ext = ".jpg"
+            with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
+                tmp_path = tmp.name
+                for chunk in r.iter_content(chunk_size=8192):
+                    tmp.write(chunk)
+        validated = validate_image_for_grok(tmp_path)
+        if validated:
+            content = Path(tmp_path).read_bytes()
+            hashed = hash_image(content)
+            hashed.content = b""  # only the hash is needed from here on
             ext, content_type = validated
-            s3_key = f"dvyb/domain-products/{domain_hash}/ig_{idx}{ext}"
-            upload_result = web2_s3_helper.upload_file_to_s3(
-                tmp_path, s3_key, content_type
-            )
-            if upload_result.get("success"):
-                presigned = web2_s3_helper.generate_presigned_url(s3_key)
-                return {
-                    "s3_key": s3_key,
-                    "presigned_url": presigned or "",
-                    "sourceLabel": "instagram",
-                }
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+            return (tmp_path, ext, content_type, hashed, hashlib.sha256(content).hexdigest())
     except Exception as e:
-        logger.debug(f"Failed to download/upload Instagram image: {e}")
+        logger.debug(f"Failed to download Instagram image: {e}")
+    if tmp_path:
+        Path(tmp_path).unlink(missing_ok=True)
     return None
 
 
+def _discard_download(future) -> None:
+    """Done-callback for downloads abandoned by the batch: remove their temp file."""
+    result = future.result() if not future.cancelled() and future.exception() is None else None
+    if result:
+        Path(result[0]).unlink(missing_ok=True)
+
+
+def _record_late_upload(future, scope: str, hashed: HashedImage) -> None:
+    """Done-callback for uploads still running when the batch returned: index them for later runs."""
+    result = future.result() if not future.cancelled() and future.exception() is None else None
+    if result:
+        image_hash_index.record(scope, hashed, result["s3_key"])
+
+
+def _image_entry(s3_key: str) -> dict:
+    return {
+        "s3_key": s3_key,
+        "presigned_url": web2_s3_helper.generate_presigned_url(s3_key) or "",
+        "sourceLabel": "instagram",
+    }
+
+
+def _upload_image(tmp_path: str, s3_key: str, content_type: str) -> dict | None:
+    """Upload a downloaded image (removing the temp file). Returns {s3_key, presigned_url, sourceLabel} or None."""
+    try:
+        if web2_s3_helper.upload_file_to_s3(tmp_path, s3_key, content_type).get("success"):
+            return _image_entry(s3_key)
+    except Exception as e:
+        logger.debug(f"Failed to upload Instagram image: {e}")
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+    return None
+
+
+def ingest_instagram_images(
+    urls: list[str],
+    domain_hash: str,
+    start_idx: int = 0,
+    referer: str = "https://www.instagram.com/",
+    max_images: int | None = None,
+    budget_seconds: float = INSTAGRAM_BATCH_BUDGET_SECONDS,
+    on_image_ready: Callable[[dict], None] | None = None,
+) -> list[dict]:
+    """
+    Download images concurrently (at most INSTAGRAM_DOWNLOAD_CONCURRENCY in flight, shared
+    session) and upload the ones needed. S3 keys are content-addressed
+    (ig_<sha256 prefix>); start_idx is kept for callers and no longer used for keys.
+    Images whose hash is already stored for the domain reuse the stored S3 key (fresh
+    presigned URL) instead of being uploaded again, and count toward max_images; repeats
+    within this batch are dropped before upload. Stops at max_images or when the time budget
+    runs out, returning what is ready by then (in URL order). on_image_ready is called
+    (in the calling thread) as each image is ready.
+    """
+    if not urls:
+        return []
+    scope = _index_scope(domain_hash)
+    deadline = time.time() + budget_seconds
+    saved: dict[int, dict] = {}
+    claimed = 0  # images saved, reused or uploading
+    batch_hashes: list[HashedImage] = []
+    next_urls = iter(enumerate(urls))
+    pending: dict = {}  # future -> (url index, "download" | "upload", hashed image)
+
+    def needed() -> bool:
+        return max_images is None or claimed < max_images
+
+    def refill() -> None:
+        downloads = sum(1 for _, kind, _ in pending.values() if kind == "download")
+        while needed() and downloads < INSTAGRAM_DOWNLOAD_CONCURRENCY:
+            item = next(next_urls, None)
+            if item is None:
+                return
+            i, url = item
+            pending[pool.submit(_download_image, url, referer)] = (i, "download", None)
+            downloads += 1
+
+    def ready(i: int, img: dict) -> None:
+        saved[i] = img
+        if on_image_ready:
+            try:
+                on_image_ready(img)
+            except Exception as e:
+                logger.warning(f"on_image_ready failed: {e}")
+
+    pool = ThreadPoolExecutor(max_workers=min(INSTAGRAM_DOWNLOAD_CONCURRENCY, len(urls)))
+    try:
+        refill()
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, kind, hashed = pending.pop(future)
+                result = future.result() if future.exception() is None else None
+                if kind == "upload":
+                    if result:
+                        image_hash_index.record(scope, hashed, result["s3_key"])
+                        ready(i, result)
+                    else:
+                        claimed -= 1
+                    continue
+                if not result:
+                    continue
+                tmp_path, ext, content_type, hashed, digest = result
+                duplicate = hashed.phash is not None and any(
+                    hash_distance(seen.phash, hashed.phash) <= image_hash_index.max_distance
+                    for seen in batch_hashes
+                )
+                if not needed() or duplicate:
+                    Path(tmp_path).unlink(missing_ok=True)
+                    continue
+                if hashed.phash is not None:
+                    batch_hashes.append(hashed)
+                claimed += 1
+                known_key = image_hash_index.reusable(scope, hashed)
+                if known_key:
+                    Path(tmp_path).unlink(missing_ok=True)
+                    logger.debug(f"Reusing Instagram image already stored for domain: {known_key}")
+                    ready(i, _image_entry(known_key))
+                    continue
+                s3_key = f"dvyb/domain-products/{domain_hash}/ig_{digest[:16]}{ext}"
+                pending[pool.submit(_upload_image, tmp_path, s3_key, content_type)] = (i, "upload", hashed)
+            refill()
+        if pending:
+            logger.info(
+                f"Instagram ingest: stopping with {len(pending)} image(s) unfinished "
+                f"({len(saved)} saved, {'budget exhausted' if time.time() >= deadline else 'target reached'})"
+            )
+        for future, (_, kind, hashed) in pending.items():
+            if kind == "download":
+                future.add_done_callback(_discard_download)
+            else:
+                future.add_done_callback(lambda f, hashed=hashed: _record_late_upload(f, scope, hashed))
+    finally:
+        # Unstarted work is dropped; running downloads/uploads finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+    return [saved[i] for i in sorted(saved)]
+
+
 def get_instagram_image_urls(handle: str) -> list[str]:
     """
     Run Apify Instagram profile scraper and return list of image URLs (no download).
@@ -110,14 +297,10 @@ def download_instagram_batch(
 ) -> list[dict]:
     """
     Download up to len(urls) images and upload to S3. Returns list of {s3_key, presigned_url, sourceLabel}.
-    Uses start_idx, start_idx+1, ... for S3 keys (ig_{start_idx}.jpg etc).
+    Downloads run concurrently under INSTAGRAM_BATCH_BUDGET_SECONDS; images already
+    stored for the domain come back with their existing S3 key (start_idx is unused).
     """
-    results: list[dict] = []
-    for i, url in enumerate(urls):
-        img = _download_and_upload(url, domain_hash, start_idx + i, referer)
-        if img:
-            results.append(img)
-    return results
+    return ingest_instagram_images(urls, domain_hash, start_idx, referer)
 
 
 def _extract_image_urls_from_profile(profile: dict) -> list[str]:
@@ -218,16 +401,18 @@ def fetch_images_from_instagram_apify(
                     image_urls.extend(_extract_image_urls_from_profile(sub))
 
     print(f"[fetch-domain-images] Apify Instagram: {len(image_urls)} image URLs to try")
-    results: list[dict] = []
-    for i, url in enumerate(image_urls):
-        if len(results) >= max_images:
-            break
-        img_data = _download_and_upload(url, domain_hash, len(results))
-        if img_data:
-            results.append(img_data)
-            if on_image_ready:
-                on_image_ready(img_data)
-            print(f"[fetch-domain-images] Apify Instagram: saved {len(results)}/{max_images} - {img_data.get('s3_key', '?')}")
+    saved_count = 0
+
+    def image_ready(img_data: dict) -> None:
+        nonlocal saved_count
+        saved_count += 1
+        if on_image_ready:
+            on_image_ready(img_data)
+        print(f"[fetch-domain-images] Apify Instagram: saved {saved_count}/{max_images} - {img_data.get('s3_key', '?')}")
+
+    results = ingest_instagram_images(
+        image_urls, domain_hash, max_images=max_images, on_image_ready=image_ready
+    )
 
     print(f"[fetch-domain-images] Apify Instagram: done, {len(results)} images saved (target {max_images})")
     return results
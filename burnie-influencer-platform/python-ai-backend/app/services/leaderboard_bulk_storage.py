@@ -0,0 +1,393 @@
+"""
+Leaderboard Bulk Storage Service
+Writes extracted leaderboard snapshots into leaderboard_yapper_data in bulk.
+
+Instead of one HTTP call + existence check per yapper, all rows of a snapshot
+are staged, de-duplicated and written with chunked multi-row
+INSERT ... ON CONFLICT DO UPDATE statements inside a single transaction.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.database.connection import get_db_session
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row statement (keeps bind parameter count well below PG limits)
+BULK_CHUNK_SIZE = 500
+
+_LEADERBOARD_COLUMNS = (
+    '"twitterHandle"', '"displayName"', '"campaignId"', '"snapshotId"', '"platformSource"',
+    '"snapshotDate"', '"leaderboardPosition"', '"totalSnaps"', '"snaps24h"', '"smartFollowers"',
+    '"leaderboardData"',
+)
+
+
+def _to_number(value: Any, as_int: bool = False) -> Optional[float]:
+    """Parse LLM-extracted numbers like '1,234', '12.5K' or '3M' (None if unparseable)"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if as_int else float(value)
+    match = re.match(r'^\s*([-+]?[\d,]*\.?\d+)\s*([kKmMbB]?)', str(value))
+    if not match:
+        return None
+    try:
+        number = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+    number *= {'k': 1e3, 'm': 1e6, 'b': 1e9}.get(match.group(2).lower(), 1)
+    return int(round(number)) if as_int else number
+
+
+def _clean_handle(handle: Any) -> str:
+    return str(handle or '').strip().lstrip('@')
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).date()
+
+
+class LeaderboardBulkStorage:
+    """Bulk upsert path for leaderboard snapshot storage"""
+
+    def __init__(self, chunk_size: int = BULK_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def stage_leaderboard_rows(
+        self,
+        leaderboard_data: List[Dict[str, Any]],
+        campaign_id: int,
+        snapshot_ids: List[int],
+        snapshot_date: Any,
+        platform_source: str = "cookie.fun",
+        llm_provider: Optional[str] = None,
+        extraction_confidence: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Normalize LLM leaderboard entries into table rows.
+
+        Returns (rows, skipped). Entries without a handle are skipped and
+        duplicate handles are collapsed (last one wins), because a single
+        ON CONFLICT statement cannot touch the same row twice.
+        """
+        primary_snapshot_id = snapshot_ids[0] if isinstance(snapshot_ids, list) else snapshot_ids
+        snapshot_day = _as_date(snapshot_date)
+        now_iso = datetime.utcnow().isoformat()
+
+        staged: Dict[str, Dict[str, Any]] = {}
+        skipped = 0
+        for entry in leaderboard_data or []:
+            if not isinstance(entry, dict):
+                skipped += 1
+                continue
+            handle = _clean_handle(entry.get("handle") or entry.get("twitter_handle"))
+            if not handle:
+                skipped += 1
+                continue
+            if handle.lower() in staged:
+                skipped += 1
+
+            staged[handle.lower()] = {
+                "twitter_handle": handle[:100],
+                "display_name": (entry.get("username") or entry.get("display_name") or None),
+                "campaign_id": campaign_id,
+                "snapshot_id": primary_snapshot_id,
+                "platform_source": platform_source,
+                "snapshot_date": snapshot_day,
+                "leaderboard_position": _to_number(entry.get("position") or entry.get("daily_rank"), as_int=True),
+                "total_snaps": _to_number(entry.get("total_snaps")),
+                "snaps_24h": _to_number(entry.get("snaps_24h") or entry.get("seven_day_snaps")),
+                "smart_followers": _to_number(entry.get("smart_followers"), as_int=True),
+                "leaderboard_data": json.dumps({
+                    "snap_velocity": entry.get("snap_velocity"),
+                    "engagement_rate": entry.get("engagement_rate"),
+                    "status": entry.get("status"),
+                    "special_badge": entry.get("special_badge"),
+                    "extraction_confidence": entry.get("confidence", extraction_confidence),
+                    "llm_provider": llm_provider,
+                    "processing_status": "completed",
+                    "snapshot_ids": snapshot_ids,
+                    "created_at": now_iso,
+                }),
+            }
+
+        return list(staged.values()), skipped
+
+    def _upsert_chunk(self, session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert one chunk, returning (inserted, updated)"""
+        values_sql = []
+        params: Dict[str, Any] = {}
+        for i, row in enumerate(rows):
+            values_sql.append(
+                f"(:h{i}, :dn{i}, :c{i}, :s{i}, :p{i}, :d{i}, COALESCE(:pos{i}, 0), "
+                f":ts{i}, :s24{i}, :sf{i}, CAST(:ld{i} AS jsonb))"
+            )
+            params.update({
+                f"h{i}": row["twitter_handle"],
+                f"dn{i}": row["display_name"],
+                f"c{i}": row["campaign_id"],
+                f"s{i}": row["snapshot_id"],
+                f"p{i}": row["platform_source"],
+                f"d{i}": row["snapshot_date"],
+                f"pos{i}": row["leaderboard_position"],
+                f"ts{i}": row["total_snaps"],
+                f"s24{i}": row["snaps_24h"],
+                f"sf{i}": row["smart_followers"],
+                f"ld{i}": row["leaderboard_data"],
+            })
+
+        query = text(f"""
+            INSERT INTO leaderboard_yapper_data ({', '.join(_LEADERBOARD_COLUMNS)})
+            VALUES {', '.join(values_sql)}
+            ON CONFLICT ("twitterHandle", "campaignId", "platformSource", "snapshotDate") DO UPDATE SET
+                "displayName" = COALESCE(EXCLUDED."displayName", leaderboard_yapper_data."displayName"),
+                "leaderboardPosition" = CASE WHEN EXCLUDED."leaderboardPosition" > 0
+                    THEN EXCLUDED."leaderboardPosition" ELSE leaderboard_yapper_data."leaderboardPosition" END,
+                "totalSnaps" = COALESCE(EXCLUDED."totalSnaps", leaderboard_yapper_data."totalSnaps"),
+                "snaps24h" = COALESCE(EXCLUDED."snaps24h", leaderboard_yapper_data."snaps24h"),
+                "smartFollowers" = COALESCE(EXCLUDED."smartFollowers", leaderboard_yapper_data."smartFollowers"),
+                "leaderboardData" = COALESCE(leaderboard_yapper_data."leaderboardData", '{{}}'::jsonb)
+                    || (EXCLUDED."leaderboardData" - 'created_at')
+                    || jsonb_build_object('updated_at', to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS')),
+                "updatedAt" = now()
+            RETURNING (xmax = 0) AS inserted
+        """)
+        results = session.execute(query, params).fetchall()
+        inserted = sum(1 for r in results if r.inserted)
+        return inserted, len(results) - inserted
+
+    def store_leaderboard_rows(self, rows: List[Dict[str, Any]], skipped: int = 0) -> Dict[str, Any]:
+        """Write staged rows in one transaction (synchronous)"""
+        start_time = time.time()
+        if not rows:
+            return {
+                "success": True, "rows_written": 0, "inserted": 0, "updated": 0,
+                "skipped": skipped, "elapsed_ms": 0.0,
+            }
+
+        campaign_id = rows[0]["campaign_id"]
+        snapshot_id = rows[0]["snapshot_id"]
+        session = get_db_session()
+        try:
+            # Same preconditions as the per-row endpoint, but checked once per snapshot
+            exists = session.execute(text("""
+                SELECT
+                    EXISTS(SELECT 1 FROM campaigns WHERE id = :campaign_id) AS campaign_exists,
+                    EXISTS(SELECT 1 FROM platform_snapshots WHERE id = :snapshot_id) AS snapshot_exists
+            """), {"campaign_id": campaign_id, "snapshot_id": snapshot_id}).fetchone()
+            if not exists.campaign_exists:
+                return {"success": False, "error": f"Campaign with ID {campaign_id} not found"}
+            if not exists.snapshot_exists:
+                return {"success": False, "error": f"Snapshot with ID {snapshot_id} not found"}
+
+            inserted = updated = 0
+            for chunk_start in range(0, len(rows), self.chunk_size):
+                chunk_inserted, chunk_updated = self._upsert_chunk(
+                    session, rows[chunk_start:chunk_start + self.chunk_size]
+                )
+                inserted += chunk_inserted
+                updated += chunk_updated
+
+            session.commit()
+            elapsed_ms = round((time.time() - start_time) * 1000, 1)
+            logger.info(
+                f"✅ Bulk stored {inserted + updated} leaderboard rows for campaign {campaign_id} "
+                f"({inserted} inserted, {updated} updated, {skipped} skipped) in {elapsed_ms}ms"
+            )
+            return {
+                "success": True,
+                "rows_written": inserted + updated,
+                "inserted": inserted,
+                "updated": updated,
+                "skipped": skipped,
+                "elapsed_ms": elapsed_ms,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Bulk leaderboard storage failed for campaign {campaign_id}: {e}")
+            return {"success": False, "error": str(e), "elapsed_ms": round((time.time() - start_time) * 1000, 1)}
+        finally:
+            session.close()
+
+    async def store_leaderboard_snapshot(
+        self,
+        leaderboard_data: List[Dict[str, Any]],
+        campaign_id: int,
+        snapshot_ids: List[int],
+        snapshot_date: Any,
+        platform_source: str = "cookie.fun",
+        llm_provider: Optional[str] = None,
+        extraction_confidence: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Stage and bulk-store one leaderboard snapshot"""
+        if not campaign_id:
+            return {"success": False, "error": "campaign_id is required"}
+        if not snapshot_ids:
+            return {"success": False, "error": "snapshot_ids are required"}
+
+        rows, skipped = self.stage_leaderboard_rows(
+            leaderboard_data, campaign_id, snapshot_ids, snapshot_date,
+            platform_source, llm_provider, extraction_confidence,
+        )
+        result = await asyncio.to_thread(self.store_leaderboard_rows, rows, skipped)
+        result["total_entries"] = len(leaderboard_data or [])
+        return result
+
+    def update_twitter_data_rows(
+        self,
+        twitter_results: List[Dict[str, Any]],
+        campaign_id: int,
+        snapshot_date: Any,
+        platform_source: str = "cookie.fun",
+    ) -> Dict[str, Any]:
+        """
+        Attach fetched Twitter data to this snapshot's leaderboard rows with a
+        single UPDATE ... FROM (VALUES ...) per chunk (synchronous).
+        updated_handles lists the (lowercased) handles that matched a row.
+        """
+        start_time = time.time()
+        snapshot_day = _as_date(snapshot_date)
+
+        staged: Dict[str, Dict[str, Any]] = {}
+        for result in twitter_results or []:
+            handle = _clean_handle(result.get("twitter_handle"))
+            if handle:
+                staged[handle.lower()] = {**result, "twitter_handle": handle}
+        rows = list(staged.values())
+        skipped = len(twitter_results or []) - len(rows)
+        if not rows:
+            return {"success": True, "rows_written": 0, "updated_handles": [], "skipped": skipped, "elapsed_ms": 0.0}
+
+        session = get_db_session()
+        try:
+            updated = 0
+            updated_handles = set()
+            for chunk_start in range(0, len(rows), self.chunk_size):
+                chunk = rows[chunk_start:chunk_start + self.chunk_size]
+                values_sql = []
+                params: Dict[str, Any] = {
+                    "campaign_id": campaign_id,
+                    "platform_source": platform_source,
+                    "snapshot_date": snapshot_day,
+                }
+                for i, row in enumerate(chunk):
+                    profile = row.get("profile") or {}
+                    values_sql.append(
+                        f"(:h{i}, CAST(:pr{i} AS jsonb), CAST(:rt{i} AS jsonb), CAST(:img{i} AS text[]), "
+                        f"CAST(:fc{i} AS integer), CAST(:fg{i} AS integer), CAST(:tc{i} AS integer))"
+                    )
+                    params.update({
+                        f"h{i}": row["twitter_handle"],
+                        f"pr{i}": json.dumps(profile),
+                        f"rt{i}": json.dumps(row.get("recent_tweets") or []),
+                        f"img{i}": list(row.get("tweet_image_urls") or []),
+                        f"fc{i}": _to_number(profile.get("followers_count"), as_int=True),
+                        f"fg{i}": _to_number(profile.get("following_count"), as_int=True),
+                        f"tc{i}": _to_number(profile.get("tweet_count"), as_int=True),
+                    })
+
+                query = text(f"""
+                    UPDATE leaderboard_yapper_data AS l SET
+                        "twitterProfile" = v.profile,
+                        "recentTweets" = v.recent_tweets,
+                        "tweetImageUrls" = v.image_urls,
+                        "followersCount" = COALESCE(NULLIF(v.followers_count, 0), l."followersCount"),
+                        "followingCount" = COALESCE(v.following_count, l."followingCount"),
+                        "tweetsCount" = COALESCE(v.tweet_count, l."tweetsCount"),
+                        "lastTwitterFetch" = now(),
+                        "twitterFetchStatus" = 'completed',
+                        "processedAt" = now(),
+                        "updatedAt" = now()
+                    FROM (VALUES {', '.join(values_sql)})
+                        AS v(handle, profile, recent_tweets, image_urls, followers_count, following_count, tweet_count)
+                    WHERE l."twitterHandle" = v.handle
+                      AND l."campaignId" = :campaign_id
+                      AND l."platformSource"::text = :platform_source
+                      AND l."snapshotDate" = :snapshot_date
+                    RETURNING l."twitterHandle"
+                """)
+                returned = session.execute(query, params).fetchall()
+                updated += len(returned)
+                updated_handles.update(row[0].lower() for row in returned if row[0])
+
+            session.commit()
+            elapsed_ms = round((time.time() - start_time) * 1000, 1)
+            logger.info(f"✅ Bulk attached Twitter data to {updated}/{len(rows)} leaderboard rows in {elapsed_ms}ms")
+            return {
+                "success": True,
+                "rows_written": updated,
+                "updated_handles": sorted(updated_handles),
+                "unmatched": len(rows) - len(updated_handles),
+                "skipped": skipped,
+                "elapsed_ms": elapsed_ms,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Bulk Twitter data update failed for campaign {campaign_id}: {e}")
+            return {"success": False, "error": str(e), "elapsed_ms": round((time.time() - start_time) * 1000, 1)}
+        finally:
+            session.close()
+
+    def get_latest_recent_tweets(
+        self,
+        handles: List[str],
+        platform_source: str = "cookie.fun",
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Most recently stored recentTweets per handle (any campaign), keyed by
+        lowercase handle. Used to merge incremental fetches with history.
+        """
+        cleaned = sorted({_clean_handle(h).lower() for h in handles or [] if _clean_handle(h)})
+        if not cleaned:
+            return {}
+
+        session = get_db_session()
+        try:
+            query = text("""
+                SELECT DISTINCT ON (lower(l."twitterHandle"))
+                    lower(l."twitterHandle") AS handle, l."recentTweets" AS recent_tweets
+                FROM leaderboard_yapper_data l
+                WHERE lower(l."twitterHandle") = ANY(:handles)
+                  AND l."platformSource"::text = :platform_source
+                  AND l."recentTweets" IS NOT NULL
+                  AND l."lastTwitterFetch" IS NOT NULL
+                ORDER BY lower(l."twitterHandle"), l."lastTwitterFetch" DESC
+            """)
+            results = session.execute(query, {"handles": cleaned, "platform_source": platform_source}).fetchall()
+            return {row.handle: list(row.recent_tweets or []) for row in results}
+        except Exception as e:
+            logger.error(f"❌ Failed to load stored recent tweets: {e}")
+            return {}
+        finally:
+            session.close()
+
+    async def store_yapper_twitter_data(
+        self,
+        twitter_results: List[Dict[str, Any]],
+        campaign_id: Optional[int],
+        snapshot_date: Any,
+        platform_source: str = "cookie.fun",
+    ) -> Dict[str, Any]:
+        """Bulk-attach fetched Twitter data for a snapshot's yappers"""
+        if not campaign_id:
+            return {"success": False, "error": "campaign_id is required"}
+        return await asyncio.to_thread(
+            self.update_twitter_data_rows, twitter_results, campaign_id, snapshot_date, platform_source
+        )
+
+
+# Global instance
+leaderboard_bulk_storage = LeaderboardBulkStorage()
@@ -5,20 +5,35 @@ Meta Ads Library (same logic as TS meta-ads-fetch.ts: running or recent ads with
 Snapshot URL from Apify is used as-is (not parsed for id).
 """
 import argparse
+import asyncio
+import codecs
+import hashlib
 import html
 import json
+import os
 import re
+import shutil
 import sys
+import tempfile
 import time
 import urllib.parse
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable
 from urllib.parse import urlparse
 
+import aiohttp
 from apify_client import ApifyClient
 
+try:
+    from app.services.meta_seen_ad_index import SeenAdRunStats, meta_seen_ad_index
+except ImportError:  # run as a script from app/services
+    from meta_seen_ad_index import SeenAdRunStats, meta_seen_ad_index
+
 # Meta Graph API ads_archive – full fields (same as typescript-backend meta-ads-fetch.ts)
 META_AD_ARCHIVE_FIELDS = [
     "id",
@@ -554,6 +569,226 @@ def filter_ads_by_keyword_in_captions(ads: list[dict], keywords: list[str]) -> l
     return [ad for ad in ads if _ad_contains_keyword(ad, kw_lower)]
 
 
+# Rule names reported by AdFilterEngine, in evaluation order
+RULE_EXCLUDED = "excluded"
+RULE_THREE_BUCKETS = "three_buckets"
+RULE_COUNTRY = "country"
+RULE_DOMAIN_OR_HANDLE = "domain_or_handle"
+RULE_KEYWORD = "keyword"
+
+
+class AdFilterEngine:
+    """
+    The filter_ads_by_* passes compiled into one matcher and evaluated in a single pass per ad.
+
+    Keyword / domain / handle rules become one combined regex run once over the ad's joined
+    captions and titles (instead of every keyword against every field); dates, cutoffs and country
+    names are resolved once per engine, and location-name matches are memoized. Results are the same
+    as applying exclude -> filter_ads_by_three_buckets -> filter_ads_by_country ->
+    filter_ads_by_domain_or_handle / filter_ads_by_keyword_in_captions in that order. Each rejected
+    ad is counted once, under the first rule it fails; decisions are memoized by ad id, so filtering
+    the same ads again (per page, then the whole pool) is cheap and does not double count.
+    """
+
+    def __init__(
+        self,
+        *,
+        exclude_ids: set[str] | None = None,
+        recent: bool = False,
+        min_running_days: int = 15,
+        stopped_within_days: int = 15,
+        country: str | None = None,
+        filter_domain: str | None = None,
+        filter_handle: str | None = None,
+        keywords: list[str] | None = None,
+    ):
+        self.evaluated = 0
+        self.rejections: dict[str, int] = {}
+        self._decisions: dict[str, str | None] = {}
+        self._rules: list[tuple[str, Callable[[dict], bool]]] = []
+
+        self._exclude_ids = set(exclude_ids or ())
+        if self._exclude_ids:
+            self._rules.append((RULE_EXCLUDED, lambda ad: (ad.get("id") or "").strip() not in self._exclude_ids))
+
+        if recent:
+            today = _today_utc()
+            self._today = today
+            self._min_running_days = min_running_days
+            self._stopped_cutoff = today - timedelta(days=stopped_within_days)
+            self._dates: dict[str, date | None] = {}
+            self._rules.append((RULE_THREE_BUCKETS, self._passes_three_buckets))
+
+        code = (country or "").upper()
+        if code and code != "ALL":
+            codes = EU_COUNTRY_CODES if code == "EU" else [code]
+            self._country_codes = set(codes)
+            self._country_names = []
+            for cc in codes:
+                names = [n.lower() for n in COUNTRY_CODE_TO_NAMES.get(cc, [cc])]
+                self._country_names.append((names, names[0] if names else cc.lower()))
+            self._location_matches: dict[str, bool] = {}
+            self._rules.append((RULE_COUNTRY, self._targets_country))
+
+        self._text_pattern: re.Pattern | None = None
+        if filter_domain is not None:
+            alternatives = []
+            brand = (filter_domain or "").lower().strip()
+            if brand:
+                # Same pattern as _text_contains_domain_strict (its URL-host check only matches text this does)
+                alternatives.append(
+                    r"(?:^|[^a-z0-9.])(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)*" + re.escape(brand) + r"(?:$|[^a-z0-9])"
+                )
+            handle = (filter_handle or "").strip().lstrip("@").lower()
+            if handle:
+                alternatives.append(r"(?<![a-z0-9_])@?" + re.escape(handle) + r"(?![a-z0-9_])")
+            if alternatives:
+                self._text_pattern = re.compile("|".join(alternatives))
+                self._rules.append((RULE_DOMAIN_OR_HANDLE, self._matches_text))
+        elif keywords:
+            expanded = _expand_keywords_for_matching(keywords)
+            if expanded:
+                # Longest first so the alternation behaves like a keyword trie
+                self._text_pattern = re.compile(
+                    "|".join(re.escape(k) for k in sorted(expanded, key=len, reverse=True))
+                )
+                self._rules.append((RULE_KEYWORD, self._matches_text))
+
+    @property
+    def rule_names(self) -> list[str]:
+        return [name for name, _ in self._rules]
+
+    def _day(self, value) -> date | None:
+        if value is None:
+            return None
+        key = str(value)
+        if key not in self._dates:
+            try:
+                self._dates[key] = date.fromisoformat(key.strip()[:10])
+            except ValueError:
+                parsed = _parse_date(key)
+                self._dates[key] = parsed.date() if parsed else None
+        return self._dates[key]
+
+    def _passes_three_buckets(self, ad: dict) -> bool:
+        # Buckets 1 and 3 both accept any ad that is still running
+        if _has_no_stop_time(ad):
+            return True
+        # Bucket 2: stopped within the window after running at least min_running_days
+        stop = self._day(ad.get("ad_delivery_stop_time"))
+        if not stop or not (self._stopped_cutoff <= stop <= self._today):
+            return False
+        start = self._day(ad.get("ad_delivery_start_time"))
+        return bool(start) and (stop - start).days >= self._min_running_days
+
+    def _location_matches_country(self, loc_lower: str) -> bool:
+        hit = self._location_matches.get(loc_lower)
+        if hit is None:
+            hit = any(
+                any(n in loc_lower or loc_lower in n for n in names) or name_to_match in loc_lower
+                for names, name_to_match in self._country_names
+            )
+            self._location_matches[loc_lower] = hit
+        return hit
+
+    def _targets_country(self, ad: dict) -> bool:
+        breakdown = ad.get("age_country_gender_reach_breakdown") or []
+        target_locs = ad.get("target_locations") or []
+        if not breakdown and not target_locs:
+            return True
+        if isinstance(breakdown, list):
+            for item in breakdown:
+                if isinstance(item, dict) and (item.get("country") or "").upper() in self._country_codes:
+                    return True
+        if isinstance(target_locs, list):
+            for loc in target_locs:
+                loc_name = (loc.get("name") or "").strip() if isinstance(loc, dict) else ""
+                if loc_name and self._location_matches_country(loc_name.lower()):
+                    return True
+        return False
+
+    def _matches_text(self, ad: dict) -> bool:
+        texts = _extract_texts_from_ad(ad)
+        return bool(texts) and self._text_pattern.search("\n".join(texts).lower()) is not None
+
+    def rejecting_rule(self, ad: dict) -> str | None:
+        """Name of the first rule the ad fails, or None if it passes all of them."""
+        aid = (ad.get("id") or "").strip()
+        if aid and aid in self._decisions:
+            return self._decisions[aid]
+        self.evaluated += 1
+        decision = None
+        for name, passes in self._rules:
+            if not passes(ad):
+                decision = name
+                self.rejections[name] = self.rejections.get(name, 0) + 1
+                break
+        if aid:
+            self._decisions[aid] = decision
+        return decision
+
+    def apply(self, ads: list[dict]) -> list[dict]:
+        """Ads passing every rule, in input order."""
+        if not self._rules:
+            return list(ads)
+        return [ad for ad in ads if self.rejecting_rule(ad) is None]
+
+    __call__ = apply
+
+    def rejection_summary(self) -> str:
+        return ", ".join(f"{name} {self.rejections.get(name, 0)}" for name in self.rule_names) or "no rules"
+
+
+def benchmark_ad_filters(n_ads: int = 100_000, seed: int = 7) -> dict:
+    """
+    Compare AdFilterEngine against the sequential filter_ads_by_* passes on a synthetic pool.
+    Returns timings (seconds), result sizes, whether both agree, and per-rule rejections.
+    """
+    import random
+
+    rng = random.Random(seed)
+    today = _today_utc()
+    brands = ["mejuri.com", "shop.mejuri.com", "xyzmejuri.com", "lululemon.com", "nike.com", "@mejuri", "mejuri_official"]
+    locations = ["United States", "Germany", "Paris, France", "Ontario, Canada", "India", "England, United Kingdom"]
+    ads = []
+    for i in range(n_ads):
+        start = today - timedelta(days=rng.randint(0, 120))
+        stop = None if rng.random() < 0.5 else start + timedelta(days=rng.randint(0, 60))
+        ads.append({
+            "id": str(10_000_000 + i),
+            "ad_delivery_start_time": start.isoformat(),
+            "ad_delivery_stop_time": stop.isoformat() if stop else None,
+            "ad_creative_link_captions": [f"Shop now at {rng.choice(brands)}"],
+            "ad_creative_link_titles": [f"New arrivals {rng.randint(1, 99)}", rng.choice(brands).upper()],
+            "target_locations": [{"name": rng.choice(locations)}] if rng.random() < 0.8 else [],
+        })
+    exclude_ids = {str(10_000_000 + i) for i in range(0, n_ads, 10)}
+
+    started = time.perf_counter()
+    legacy = [a for a in ads if (a.get("id") or "").strip() not in exclude_ids]
+    legacy = filter_ads_by_three_buckets(legacy)
+    legacy = filter_ads_by_country(legacy, "EU")
+    legacy = filter_ads_by_domain_or_handle(legacy, "mejuri.com", "mejuri")
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine = AdFilterEngine(
+        exclude_ids=exclude_ids, recent=True, country="EU", filter_domain="mejuri.com", filter_handle="mejuri"
+    )
+    compiled = engine.apply(ads)
+    engine_seconds = time.perf_counter() - started
+
+    return {
+        "ads": n_ads,
+        "legacy_seconds": round(legacy_seconds, 3),
+        "engine_seconds": round(engine_seconds, 3),
+        "legacy_kept": len(legacy),
+        "engine_kept": len(compiled),
+        "identical": [a["id"] for a in legacy] == [a["id"] for a in compiled],
+        "rejections": dict(engine.rejections),
+    }
+
+
 # Common video extensions / URL patterns
 VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".m4v"}
 VIDEO_QUERY_PATHS = re.compile(r"\.(mp4|webm|mov|m4v)(\?|$)", re.I)
@@ -665,86 +900,154 @@ def _decode_url(u: str) -> str:
     return s
 
 
-def fetch_snapshot_html(snapshot_url: str, timeout: int = 20) -> str:
-    """Fetch snapshot page HTML (browser-like User-Agent). Facebook may return 400 for server requests."""
-    uas = [
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    ]
+_SNAPSHOT_USER_AGENTS = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+]
+
+
+# Snapshot media patterns (same as TS meta-ads-fetch), in the order their results are merged
+_SNAPSHOT_MEDIA_PATTERNS = (
+    ("video_tag", re.compile(r"<video\s[^>]*>", re.I)),
+    ("og_image", re.compile(r'property=["\']og:image["\']\s+content=["\']([^"\']+)["\']', re.I)),
+    ("og_video", re.compile(r'property=["\']og:video(?::url)?["\']\s+content=["\']([^"\']+)["\']', re.I)),
+    ("fbcdn_video", re.compile(r"(https://video[^\"'\s]+\.fbcdn\.net/[^\"'\s]+\.(?:mp4|webm)(?:\?[^\"'\s]*)?)", re.I)),
+    ("scontent", re.compile(r"(https://scontent[^\"'\s]+\.fbcdn\.net/[^\"'\s]+)")),
+)
+_VIDEO_TAG_SRC = re.compile(r'\ssrc=["\']([^"\']+)["\']', re.I)
+_VIDEO_TAG_POSTER = re.compile(r'\sposter=["\']([^"\']+)["\']', re.I)
+_VIDEO_EXTENSION_IN_URL = re.compile(r"\.(mp4|webm|mov)(\?|$)", re.I)
+# Matches ending this close to the end of the buffered HTML may be cut off; they are re-scanned
+_SNAPSHOT_SCAN_OVERLAP = 8192
+# Streaming stops once media was found and this much further HTML brought nothing new
+SNAPSHOT_MEDIA_QUIET_BYTES = 64 * 1024
+_SNAPSHOT_CHUNK_BYTES = 32 * 1024
+
+
+class SnapshotMediaExtractor:
+    """
+    Incremental snapshot media extraction (same patterns as TS meta-ads-fetch): feed() HTML as it
+    streams in, then result().
+    Only the newly received part (plus a small overlap) is scanned per chunk. quiet() tells the
+    caller when media has been found and the page has moved past it, so the download can stop.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._scanned = 0
+        self._last_media_end: int | None = None
+        # pattern name -> {match start: (match end, groups)}
+        self._matches: dict[str, dict[int, tuple[int, tuple]]] = {name: {} for name, _ in _SNAPSHOT_MEDIA_PATTERNS}
+
+    def feed(self, chunk: str) -> None:
+        self._text += chunk
+        self._scan(final=False)
+
+    def close(self) -> None:
+        self._scan(final=True)
+
+    def _scan(self, final: bool) -> None:
+        text = self._text
+        safe_end = len(text) if final else len(text) - _SNAPSHOT_SCAN_OVERLAP
+        if safe_end <= self._scanned:
+            return
+        start = max(0, self._scanned - _SNAPSHOT_SCAN_OVERLAP)
+        for name, pattern in _SNAPSHOT_MEDIA_PATTERNS:
+            found = self._matches[name]
+            for m in pattern.finditer(text, start):
+                if m.end() > safe_end:
+                    break
+                if m.start() not in found:
+                    found[m.start()] = (m.end(), (m.group(0),) + m.groups())
+                    self._last_media_end = max(self._last_media_end or 0, m.end())
+        self._scanned = safe_end
+
+    def quiet(self, quiet_bytes: int = SNAPSHOT_MEDIA_QUIET_BYTES) -> bool:
+        """True once media was found and at least quiet_bytes of later HTML held no more."""
+        return self._last_media_end is not None and self._scanned - self._last_media_end >= quiet_bytes
+
+    def result(self) -> tuple[list[str], list[str]]:
+        image_urls: list[str] = []
+        video_urls: list[str] = []
+        seen_i: set[str] = set()
+        seen_v: set[str] = set()
+
+        def add_image(url: str) -> None:
+            u = _decode_url(url)
+            if u and u not in seen_i:
+                seen_i.add(u)
+                image_urls.append(u)
+
+        def add_video(url: str) -> None:
+            u = _decode_url(url)
+            if u and u not in seen_v:
+                seen_v.add(u)
+                video_urls.append(u)
+
+        for name, _ in _SNAPSHOT_MEDIA_PATTERNS:
+            # Document order, non-overlapping (as a single finditer over the whole page)
+            previous_end = -1
+            for match_start in sorted(self._matches[name]):
+                match_end, groups = self._matches[name][match_start]
+                if match_start < previous_end:
+                    continue
+                previous_end = match_end
+                if name == "video_tag":
+                    m = _VIDEO_TAG_SRC.search(groups[0])
+                    if m:
+                        add_video(m.group(1))
+                    m = _VIDEO_TAG_POSTER.search(groups[0])
+                    if m:
+                        add_image(m.group(1))
+                elif name == "og_image":
+                    add_image(groups[1])
+                elif name in ("og_video", "fbcdn_video"):
+                    add_video(groups[1])
+                elif groups[1] and not _VIDEO_EXTENSION_IN_URL.search(groups[1]):
+                    add_image(groups[1])
+        return image_urls, video_urls
+
+
+def fetch_snapshot_media(snapshot_url: str, timeout: int = 20) -> tuple[list[str], list[str]]:
+    """
+    Stream the snapshot page and extract media URLs while it downloads; stops reading once the media
+    block has been passed (SnapshotMediaExtractor.quiet). Browser-like headers, trying each
+    User-Agent in turn (Facebook may return 400 for server requests).
+    """
     headers = {
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.9",
         "Referer": "https://www.facebook.com/ads/library/",
     }
     last_err: Exception | None = None
-    for ua in uas:
+    for ua in _SNAPSHOT_USER_AGENTS:
         try:
-            req = urllib.request.Request(
-                snapshot_url,
-                headers={**headers, "User-Agent": ua},
-            )
+            req = urllib.request.Request(snapshot_url, headers={**headers, "User-Agent": ua})
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                if resp.status == 200:
-                    body = resp.read().decode(errors="replace")
-                    if body:
-                        return body
+                if resp.status != 200:
+                    continue
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                extractor = SnapshotMediaExtractor()
+                received = 0
+                while True:
+                    chunk = resp.read(_SNAPSHOT_CHUNK_BYTES)
+                    if not chunk:
+                        # Whole page read: scan the tail too
+                        extractor.feed(decoder.decode(b"", final=True))
+                        extractor.close()
+                        break
+                    received += len(chunk)
+                    extractor.feed(decoder.decode(chunk))
+                    if extractor.quiet():
+                        # Tail is left unscanned: a URL there may be cut off
+                        break
+                if received:
+                    return extractor.result()
         except Exception as e:
             last_err = e
     raise last_err or RuntimeError("Request failed")
 
 
-def extract_media_urls_from_snapshot_html(html: str) -> tuple[list[str], list[str]]:
-    """Extract image and video URLs from snapshot page HTML (same patterns as TS meta-ads-fetch)."""
-    image_urls: list[str] = []
-    video_urls: list[str] = []
-    seen_i: set[str] = set()
-    seen_v: set[str] = set()
-
-    def add_image(url: str) -> None:
-        u = _decode_url(url)
-        if u and u not in seen_i:
-            seen_i.add(u)
-            image_urls.append(u)
-
-    def add_video(url: str) -> None:
-        u = _decode_url(url)
-        if u and u not in seen_v:
-            seen_v.add(u)
-            video_urls.append(u)
-
-    # 1) <video ... src="..."> and poster="..."
-    for tag in re.finditer(r"<video\s[^>]*>", html, re.I):
-        t = tag.group(0)
-        m = re.search(r'\ssrc=["\']([^"\']+)["\']', t, re.I)
-        if m:
-            add_video(m.group(1))
-        m = re.search(r'\sposter=["\']([^"\']+)["\']', t, re.I)
-        if m:
-            add_image(m.group(1))
-
-    # 2) og:image / og:video meta tags
-    for m in re.finditer(r'property=["\']og:image["\']\s+content=["\']([^"\']+)["\']', html, re.I):
-        add_image(m.group(1))
-    for m in re.finditer(r'property=["\']og:video(?::url)?["\']\s+content=["\']([^"\']+)["\']', html, re.I):
-        add_video(m.group(1))
-
-    # 3) fbcdn video URLs
-    for m in re.finditer(
-        r"(https://video[^\"'\s]+\.fbcdn\.net/[^\"'\s]+\.(?:mp4|webm)(?:\?[^\"'\s]*)?)",
-        html,
-        re.I,
-    ):
-        add_video(m.group(1))
-
-    # 4) scontent image URLs (skip video extensions)
-    for m in re.finditer(r"(https://scontent[^\"'\s]+\.fbcdn\.net/[^\"'\s]+)", html):
-        u = m.group(1)
-        if u and not re.search(r"\.(mp4|webm|mov)(\?|$)", u, re.I):
-            add_image(u)
-
-    return image_urls, video_urls
-
-
 # Page function for Apify Puppeteer Scraper when scraping ad_snapshot_url: extract images/videos from page.
 PUPPETEER_SNAPSHOT_PAGE_FUNCTION = r"""
 async function pageFunction(context) {
@@ -1542,6 +1845,50 @@ def resolve_facebook_handle_to_page_id(meta_token: str, handle: str) -> str | No
     return None
 
 
+# ads_archive page responses cached on disk, keyed by the normalized request URL (query + cursor,
+# access token excluded). Repeat runs for the same brand/window replay pages without API calls.
+META_PAGE_CACHE_DIR = Path(os.getenv("META_ADS_PAGE_CACHE_DIR") or Path(tempfile.gettempdir()) / "meta_ads_page_cache")
+META_PAGE_CACHE_TTL_SECONDS = int(os.getenv("META_ADS_PAGE_CACHE_TTL_SECONDS", "21600"))
+# Minimum spacing between live ads_archive requests (previously a sleep between pages)
+META_PAGE_MIN_INTERVAL_SECONDS = 0.5
+_last_meta_page_request_at = 0.0
+
+
+def _meta_page_cache_key(url: str) -> str:
+    parsed = urlparse(url)
+    params = sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True) if k != "access_token"
+    )
+    normalized = f"{parsed.path}?{urllib.parse.urlencode(params)}"
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _meta_api_request_cached(url: str, min_interval: float = META_PAGE_MIN_INTERVAL_SECONDS) -> dict:
+    """_meta_api_request with the on-disk page cache (TTL META_PAGE_CACHE_TTL_SECONDS; 0 disables)."""
+    global _last_meta_page_request_at
+    cache_path = META_PAGE_CACHE_DIR / f"{_meta_page_cache_key(url)}.json"
+    if META_PAGE_CACHE_TTL_SECONDS > 0:
+        try:
+            if time.time() - cache_path.stat().st_mtime < META_PAGE_CACHE_TTL_SECONDS:
+                return json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+    wait = _last_meta_page_request_at + min_interval - time.time()
+    if wait > 0:
+        time.sleep(wait)
+    _last_meta_page_request_at = time.time()
+    data = _meta_api_request(url)
+    if META_PAGE_CACHE_TTL_SECONDS > 0 and "data" in data:
+        try:
+            META_PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            tmp_path.replace(cache_path)
+        except OSError as e:
+            print(f"   Warning: could not cache Meta API page: {e}", file=sys.stderr)
+    return data
+
+
 def fetch_ads_via_meta_api(
     meta_token: str,
     search_terms: str,
@@ -1553,6 +1900,8 @@ def fetch_ads_via_meta_api(
     ad_delivery_date_min: str | None = None,
     search_type: str = "KEYWORD_UNORDERED",
     search_page_ids: list[int] | None = None,
+    page_filter: Callable[[list[dict]], list[dict]] | None = None,
+    target_count: int | None = None,
 ) -> list[dict]:
     """
     Fetch ads from Meta Graph API ads_archive (same flow as TS meta-ads-fetch.ts).
@@ -1563,8 +1912,13 @@ def fetch_ads_via_meta_api(
 
     ad_active_status: ACTIVE (default), INACTIVE, or ALL - filters by delivery status.
     ad_delivery_date_min: YYYY-MM-DD - only ads delivered on/after this date (recency).
+    page_filter + target_count: paging stops once page_filter has accepted target_count ads (default limit)
+      instead of after limit raw ads; all fetched ads are returned unfiltered.
+    The next page is requested while the current one is being filtered; responses go through the page cache.
     """
     limit_per_request = min(limit, 100)
+    target = target_count if target_count is not None else limit
+    accepted = 0
     all_ads: list[dict] = []
     seen_ids: set[str] = set()
     # When searching by page ID, use ALL countries to match Ads Library UI (country=ALL); otherwise API often returns 0
@@ -1574,7 +1928,7 @@ def fetch_ads_via_meta_api(
 
     def fetch_page(ad_reached_countries: str, next_url: str | None = None) -> tuple[list[dict], str | None]:
         if next_url:
-            data = _meta_api_request(next_url)
+            data = _meta_api_request_cached(next_url)
         else:
             # Mirror Ads Library UI: active_status=active, ad_type=all, media_type=all, search_type=page, view_all_page_id
             # ad_reached_countries: API expects JSON array e.g. ["US"] (doc: ad_reached_countries=['US'])
@@ -1596,24 +1950,43 @@ def fetch_ads_via_meta_api(
             if not search_page_ids and media_type and media_type != "both":
                 params["media_type"] = media_type.upper()
             url = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}/ads_archive?" + urllib.parse.urlencode(params)
-            data = _meta_api_request(url)
+            data = _meta_api_request_cached(url)
         return data.get("data") or [], (data.get("paging") or {}).get("next")
 
+    def enough() -> bool:
+        return accepted >= target if page_filter else len(all_ads) >= limit
+
+    def add_page(page: list[dict]) -> None:
+        nonlocal accepted
+        new_ads = []
+        for ad in page:
+            if not page_filter and len(all_ads) >= limit:
+                break
+            aid = (ad.get("id") or "").strip()
+            if aid and aid not in seen_ids:
+                seen_ids.add(aid)
+                all_ads.append(ad)
+                new_ads.append(ad)
+        if page_filter and new_ads:
+            accepted += len(page_filter(new_ads))
+
+    def result() -> list[dict]:
+        _normalize_ad_snapshot_urls(all_ads)
+        return all_ads if page_filter else all_ads[:limit]
+
     if country.upper() == "EU" and not search_page_ids:
         # Fetch one page per EU country, then merge and dedupe by ad id (like TS); cap at limit
-        for i, cc in enumerate(EU_COUNTRY_CODES):
-            if len(all_ads) >= limit:
-                break
-            page, _ = fetch_page(cc)
-            for ad in page:
-                if len(all_ads) >= limit:
+        # Next country's page is requested while the current one is merged / filtered
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            pending = prefetch.submit(fetch_page, EU_COUNTRY_CODES[0])
+            for i in range(len(EU_COUNTRY_CODES)):
+                page, _ = pending.result()
+                pending = prefetch.submit(fetch_page, EU_COUNTRY_CODES[i + 1]) if i + 1 < len(EU_COUNTRY_CODES) else None
+                add_page(page)
+                if enough():
+                    if pending is not None:
+                        pending.cancel()
                     break
-                aid = (ad.get("id") or "").strip()
-                if aid and aid not in seen_ids:
-                    seen_ids.add(aid)
-                    all_ads.append(ad)
-            if i < len(EU_COUNTRY_CODES) - 1:
-                time.sleep(0.4)
         print(f"   EU: fetched from {len(EU_COUNTRY_CODES)} countries → {len(all_ads)} unique ads")
         # Fallback: if media_type filter gave 0, retry first EU country without media filter
         if len(all_ads) == 0 and media_type and media_type != "both":
@@ -1633,35 +2006,27 @@ def fetch_ads_via_meta_api(
             if ad_delivery_date_min:
                 params["ad_delivery_date_min"] = ad_delivery_date_min
             url = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}/ads_archive?" + urllib.parse.urlencode(params)
-            data = _meta_api_request(url)
-            for ad in (data.get("data") or []):
-                if len(all_ads) >= limit:
-                    break
-                aid = (ad.get("id") or "").strip()
-                if aid and aid not in seen_ids:
-                    seen_ids.add(aid)
-                    all_ads.append(ad)
+            data = _meta_api_request_cached(url)
+            add_page(data.get("data") or [])
             if all_ads:
                 print(f"   Got {len(all_ads)} ad(s) without media filter")
-        _normalize_ad_snapshot_urls(all_ads)
-        return all_ads[:limit]
+        return result()
 
     # Single country (or ALL when search_page_ids): fetch pages until we have enough; respect -l
-    next_url: str | None = None
-    page_count = 0
-    while page_count < max_pages and len(all_ads) < limit:
-        page, next_url = fetch_page(effective_country, next_url)
-        for ad in page:
-            if len(all_ads) >= limit:
+    # The next cursor is requested as soon as a page arrives, while that page is merged / filtered
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = prefetch.submit(fetch_page, effective_country)
+        page_count = 0
+        while pending is not None:
+            page, next_url = pending.result()
+            page_count += 1
+            has_more = bool(next_url) and len(page) > 0 and page_count < max_pages
+            pending = prefetch.submit(fetch_page, effective_country, next_url) if has_more else None
+            add_page(page)
+            if enough():
+                if pending is not None:
+                    pending.cancel()  # if already in flight, the page still lands in the cache
                 break
-            aid = (ad.get("id") or "").strip()
-            if aid and aid not in seen_ids:
-                seen_ids.add(aid)
-                all_ads.append(ad)
-        page_count += 1
-        if not next_url or len(page) == 0:
-            break
-        time.sleep(0.5)
 
     # Fallback: if media_type filter gave 0 results, retry without it (Meta API can return 0 for IMAGE/VIDEO when ads exist)
     if len(all_ads) == 0 and media_type and media_type != "both":
@@ -1681,15 +2046,8 @@ def fetch_ads_via_meta_api(
         if ad_delivery_date_min:
             params["ad_delivery_date_min"] = ad_delivery_date_min
         url = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}/ads_archive?" + urllib.parse.urlencode(params)
-        data = _meta_api_request(url)
-        page = data.get("data") or []
-        for ad in page:
-            if len(all_ads) >= limit:
-                break
-            aid = (ad.get("id") or "").strip()
-            if aid and aid not in seen_ids:
-                seen_ids.add(aid)
-                all_ads.append(ad)
+        data = _meta_api_request_cached(url)
+        add_page(data.get("data") or [])
         if all_ads:
             print(f"   Got {len(all_ads)} ad(s) without media filter (download will prefer {media_type})")
 
@@ -1704,7 +2062,7 @@ def fetch_ads_via_meta_api(
         fallback_countries = META_ADS_ARCHIVE_COUNTRY_CODES
         print(f"   ad_reached_countries=ALL returned 0 for keyword search; retrying with all supported countries (no media filter)...")
         for fc in fallback_countries:
-            if len(all_ads) >= limit:
+            if enough():
                 break
             params = {
                 "access_token": meta_token,
@@ -1719,25 +2077,284 @@ def fetch_ads_via_meta_api(
                 params["ad_delivery_date_min"] = ad_delivery_date_min
             url = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}/ads_archive?" + urllib.parse.urlencode(params)
             try:
-                data = _meta_api_request(url)
+                data = _meta_api_request_cached(url, min_interval=0.3)
             except Exception as e:
                 print(f"   Fallback country {fc} failed: {e}", file=sys.stderr)
                 continue
-            page = data.get("data") or []
-            for ad in page:
-                if len(all_ads) >= limit:
-                    break
-                aid = (ad.get("id") or "").strip()
-                if aid and aid not in seen_ids:
-                    seen_ids.add(aid)
-                    all_ads.append(ad)
+            add_page(data.get("data") or [])
             if all_ads:
                 print(f"   Got {len(all_ads)} ad(s) with ad_reached_countries={fc}")
                 break
-            time.sleep(0.3)
 
-    _normalize_ad_snapshot_urls(all_ads)
-    return all_ads[:limit]
+    return result()
+
+
+# Concurrent creative downloads: bounded pool over keep-alive connections per CDN host,
+# streamed to <name>.part (resumed with Range on retry), header checks before the body.
+CREATIVE_DOWNLOAD_CONCURRENCY = int(os.getenv("META_CREATIVE_DOWNLOAD_CONCURRENCY", "8"))
+CREATIVE_DOWNLOAD_PER_HOST = int(os.getenv("META_CREATIVE_DOWNLOAD_PER_HOST", "4"))
+CREATIVE_DOWNLOAD_RETRIES = 3
+MAX_IMAGE_SIZE_MB = 20
+MAX_VIDEO_SIZE_MB = 300
+# Per output folder: url -> {file, sha256, size}; lets re-runs skip creatives already on disk
+CREATIVE_INDEX_FILENAME = ".creatives_index.json"
+_DOWNLOAD_CHUNK_BYTES = 256 * 1024
+_DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Referer": "https://www.facebook.com/",
+    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,video/*,*/*;q=0.8",
+}
+# Error pages served with 200 (login walls, "URL signature expired") are never creatives
+_REJECTED_CONTENT_TYPES = ("text/", "application/json", "application/xml", "application/xhtml")
+
+
+@dataclass
+class CreativeDownload:
+    """One creative to fetch. filepath without suffix gets the extension from URL / Content-Type."""
+    url: str
+    filepath: Path
+    kind: str = "image"
+    min_size_bytes: int | None = None
+    max_size_bytes: int | None = None
+    ad_id: str | None = None
+    # Filled in by download_creatives()
+    status: str = "pending"  # downloaded | reused_url | reused_hash | rejected | failed
+    saved_path: Path | None = None
+    size_bytes: int = 0
+    content_hash: str | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("downloaded", "reused_url", "reused_hash")
+
+
+class _CreativeIndex:
+    """URL and content-hash index of creatives already on disk (persisted per output folder)."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.by_url: dict[str, dict] = {}
+        self.by_hash: dict[str, Path] = {}
+        if path is None or not path.exists():
+            return
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for url, entry in (entries if isinstance(entries, dict) else {}).items():
+            file_path = path.parent / str(entry.get("file") or "")
+            try:
+                if file_path.is_file() and file_path.stat().st_size == entry.get("size"):
+                    self.by_url[url] = entry
+                    self.by_hash.setdefault(entry.get("sha256"), file_path)
+            except OSError:
+                continue
+
+    def lookup_url(self, url: str) -> Path | None:
+        entry = self.by_url.get(url)
+        if not entry:
+            return None
+        file_path = self._resolve(entry["file"])
+        return file_path if file_path.is_file() else None
+
+    def lookup_hash(self, content_hash: str) -> Path | None:
+        file_path = self.by_hash.get(content_hash)
+        return file_path if file_path is not None and file_path.is_file() else None
+
+    def record(self, url: str, file_path: Path, content_hash: str, size: int) -> None:
+        self.by_url[url] = {"file": self._relative(file_path), "sha256": content_hash, "size": size}
+        self.by_hash.setdefault(content_hash, file_path)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.write_text(json.dumps(self.by_url, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"   Warning: could not save creative index {self.path}: {e}", file=sys.stderr)
+
+    def _relative(self, file_path: Path) -> str:
+        if self.path is not None and file_path.parent == self.path.parent:
+            return file_path.name
+        return str(file_path)
+
+    def _resolve(self, name: str) -> Path:
+        return self.path.parent / name if self.path is not None else Path(name)
+
+
+class _CreativeRejected(Exception):
+    """Response is not a usable creative (wrong type / size); not retried."""
+
+
+def _check_creative_response(job: CreativeDownload, content_type: str | None, total_size: int | None) -> None:
+    """Reject from headers alone, before any body bytes are read."""
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct and ct.startswith(_REJECTED_CONTENT_TYPES):
+        raise _CreativeRejected(f"unexpected Content-Type {ct}")
+    if total_size is not None:
+        if job.min_size_bytes is not None and total_size < job.min_size_bytes:
+            raise _CreativeRejected(f"too small ({total_size} bytes)")
+        if job.max_size_bytes is not None and total_size > job.max_size_bytes:
+            raise _CreativeRejected(f"too large ({total_size} bytes)")
+
+
+def _response_total_size(resp, offset: int) -> int | None:
+    """Full object size from Content-Range (206) or Content-Length (200)."""
+    if resp.status == 206:
+        match = re.search(r"/(\d+)$", resp.headers.get("Content-Range") or "")
+        return int(match.group(1)) if match else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Materialize an already-downloaded creative under another name (hard link when possible)."""
+    if target.exists():
+        if target.samefile(source):
+            return
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+async def _stream_to_part(session, job: CreativeDownload, url: str, part: Path, retries: int) -> str | None:
+    """Stream url into part, resuming a partial transfer with Range. Returns the Content-Type."""
+    content_type: str | None = None
+    last_error: Exception | None = None
+    for attempt in range(1, retries + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        headers = dict(_DOWNLOAD_HEADERS)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        try:
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 416 and offset:
+                    part.unlink()  # stale partial file; start over
+                    continue
+                if resp.status in (408, 429) or resp.status >= 500:
+                    raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                if resp.status not in (200, 206):
+                    raise _CreativeRejected(f"HTTP {resp.status}")
+                if resp.status == 200:
+                    offset = 0  # server ignored Range
+                content_type = resp.headers.get("Content-Type") or content_type
+                total_size = _response_total_size(resp, offset)
+                _check_creative_response(job, content_type, total_size)
+                written = offset
+                with open(part, "ab" if offset else "wb") as f:
+                    async for chunk in resp.content.iter_chunked(_DOWNLOAD_CHUNK_BYTES):
+                        written += len(chunk)
+                        if job.max_size_bytes is not None and written > job.max_size_bytes:
+                            raise _CreativeRejected(f"too large (> {job.max_size_bytes} bytes)")
+                        f.write(chunk)
+                if total_size is not None and written < total_size:
+                    raise aiohttp.ClientPayloadError(f"incomplete body ({written}/{total_size} bytes)")
+                return content_type
+        except _CreativeRejected:
+            part.unlink(missing_ok=True)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_error = e
+            if attempt < retries:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+    raise last_error or RuntimeError("download failed")
+
+
+async def _download_creative(session, job: CreativeDownload, index: _CreativeIndex,
+                             url_locks: dict[str, asyncio.Lock], retries: int) -> None:
+    url = _decode_url(job.url)
+    # Same URL in several jobs (shared creatives across ads): transfer once, reuse for the rest
+    async with url_locks.setdefault(url, asyncio.Lock()):
+        existing = index.lookup_url(url)
+        if existing is not None:
+            target = job.filepath if job.filepath.suffix else job.filepath.with_suffix(existing.suffix)
+            _link_or_copy(existing, target)
+            job.status, job.saved_path, job.size_bytes = "reused_url", target, existing.stat().st_size
+            return
+
+        part = job.filepath.with_name(job.filepath.name + ".part")
+        try:
+            content_type = await _stream_to_part(session, job, url, part, retries)
+        except _CreativeRejected as e:
+            job.status, job.error = "rejected", str(e)
+            return
+        except Exception as e:
+            job.status, job.error = "failed", str(e) or type(e).__name__
+            print(f"   Warning: failed to download {url[:60]}... : {job.error}", file=sys.stderr)
+            return
+
+        size = part.stat().st_size
+        if job.min_size_bytes is not None and size < job.min_size_bytes:
+            part.unlink(missing_ok=True)
+            job.status, job.error = "rejected", f"too small ({size} bytes)"
+            return
+        content_hash = await asyncio.to_thread(_file_sha256, part)
+        target = job.filepath if job.filepath.suffix else job.filepath.with_suffix(get_extension(url, content_type))
+        duplicate = index.lookup_hash(content_hash)
+        if duplicate is not None and duplicate != target:
+            part.unlink(missing_ok=True)
+            _link_or_copy(duplicate, target)
+            job.status = "reused_hash"
+        else:
+            part.replace(target)
+            job.status = "downloaded"
+        job.saved_path, job.size_bytes, job.content_hash = target, size, content_hash
+        index.record(url, target, content_hash, size)
+
+
+async def _download_creatives_async(jobs: list[CreativeDownload], index: _CreativeIndex,
+                                    concurrency: int, per_host: int, timeout: int, retries: int) -> None:
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=timeout)
+    url_locks: dict[str, asyncio.Lock] = {}
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        await asyncio.gather(*(_download_creative(session, job, index, url_locks, retries) for job in jobs))
+
+
+def download_creatives(
+    jobs: list[CreativeDownload],
+    index_path: Path | None = None,
+    concurrency: int = CREATIVE_DOWNLOAD_CONCURRENCY,
+    per_host: int = CREATIVE_DOWNLOAD_PER_HOST,
+    timeout: int = 60,
+    retries: int = CREATIVE_DOWNLOAD_RETRIES,
+) -> list[CreativeDownload]:
+    """
+    Download creatives concurrently (sync entry point; fills in each job's status / saved_path).
+    Images are capped at MAX_IMAGE_SIZE_MB and videos at MAX_VIDEO_SIZE_MB unless the job sets max_size_bytes.
+    With index_path, URLs already recorded there are linked instead of re-downloaded and the index is updated.
+    """
+    if not jobs:
+        return jobs
+    for job in jobs:
+        if job.max_size_bytes is None:
+            job.max_size_bytes = (MAX_VIDEO_SIZE_MB if job.kind == "video" else MAX_IMAGE_SIZE_MB) * 1024 * 1024
+    index = _CreativeIndex(index_path)
+
+    def run() -> None:
+        asyncio.run(_download_creatives_async(jobs, index, concurrency, per_host, timeout, retries))
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        run()
+    else:
+        # Called from inside an event loop (e.g. a FastAPI handler): run on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(run).result()
+    index.save()
+    return jobs
 
 
 def download_url(
@@ -1749,41 +2366,53 @@ def download_url(
     """Download URL to filepath; append extension if needed. Returns True on success.
     When min_size_bytes is set (e.g. for images), skips if Content-Length or actual size is smaller.
     """
-    # Decode HTML entities (e.g. &amp; -> &) so fbcdn URLs work; otherwise "Bad URL hash" / 400
-    url = _decode_url(url)
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Referer": "https://www.facebook.com/",
-            "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-        }
-        if min_size_bytes is not None:
-            # HEAD first to avoid downloading small images (favicons, thumbnails)
-            head_req = urllib.request.Request(url, headers=headers, method="HEAD")
-            try:
-                with urllib.request.urlopen(head_req, timeout=timeout) as head_resp:
-                    cl = head_resp.headers.get("Content-Length")
-                    if cl is not None:
-                        try:
-                            if int(cl) < min_size_bytes:
-                                return False
-                        except ValueError:
-                            pass
-            except Exception:
-                pass  # no HEAD support or error; proceed with GET and check size after
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            content_type = resp.headers.get("Content-Type")
-            data = resp.read()
-        if min_size_bytes is not None and len(data) < min_size_bytes:
-            return False
-        ext = get_extension(url, content_type)
-        final_path = filepath if filepath.suffix else filepath.with_suffix(ext)
-        final_path.write_bytes(data)
-        return True
-    except Exception as e:
-        print(f"   Warning: failed to download {url[:60]}... : {e}", file=sys.stderr)
-        return False
+    kind = "video" if is_video_url(_decode_url(url)) else "image"
+    job = CreativeDownload(url=url, filepath=filepath, kind=kind, min_size_bytes=min_size_bytes)
+    return download_creatives([job], timeout=timeout)[0].ok
+
+
+def _creative_jobs(out_dir: Path, ad_id: str, urls_to_download: list[tuple[str, str]]) -> list[CreativeDownload]:
+    """Download jobs for one ad, named <ad_id>_<kind>[_<i>] as before."""
+    safe_id = re.sub(r"[/\\]", "_", ad_id)
+    jobs = []
+    for i, (url, kind) in enumerate(urls_to_download):
+        stem = f"{safe_id}_{kind}"
+        if len(urls_to_download) > 1:
+            stem += f"_{i}"
+        jobs.append(CreativeDownload(
+            url=url,
+            filepath=out_dir / stem,
+            kind=kind,
+            min_size_bytes=(MIN_IMAGE_SIZE_KB * 1024) if kind == "image" else None,
+            ad_id=ad_id,
+        ))
+    return jobs
+
+
+def _download_creative_jobs(jobs: list[CreativeDownload], out_dir: Path) -> int:
+    """Run run_fetch's collected downloads in one concurrent pass; prints per-file lines and a summary."""
+    if not jobs:
+        return 0
+    started = time.time()
+    download_creatives(jobs, index_path=out_dir / CREATIVE_INDEX_FILENAME)
+    counts: dict[str, int] = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+        if job.ok and job.saved_path is not None:
+            print(f"   Saved: {job.saved_path.name}")
+    transferred_mb = sum(j.size_bytes for j in jobs if j.status in ("downloaded", "reused_hash")) / (1024 * 1024)
+    print(
+        f"   Creative downloads: {counts.get('downloaded', 0)} new, {counts.get('reused_url', 0)} reused by URL, "
+        f"{counts.get('reused_hash', 0)} duplicate content, {counts.get('rejected', 0)} rejected, "
+        f"{counts.get('failed', 0)} failed ({transferred_mb:.1f} MB in {time.time() - started:.1f}s)"
+    )
+    hashes_by_ad: dict[str, dict[str, str]] = {}
+    for job in jobs:
+        if job.ok and job.ad_id and job.content_hash:
+            hashes_by_ad.setdefault(job.ad_id, {})[job.url] = job.content_hash
+    for ad_id, hashes in hashes_by_ad.items():
+        meta_seen_ad_index.record_media_hashes(ad_id, hashes)
+    return sum(1 for job in jobs if job.ok)
 
 
 def _library_id_from_item(item: dict) -> str | None:
@@ -1798,6 +2427,44 @@ def _library_id_from_item(item: dict) -> str | None:
     return None
 
 
+def _ad_pool_filter(
+    *,
+    exclude_ids: set[str],
+    recent: bool,
+    min_running_days: int,
+    stopped_within_days: int,
+    country: str,
+    keyword_filter: bool,
+    keywords: list[str],
+    filter_keywords: list[str] | None,
+    filter_domain: str | None,
+    filter_handle: str | None,
+) -> AdFilterEngine:
+    """
+    The post-fetch filters of fetch_ad_pool / run_fetch as one AdFilterEngine. Also passed to
+    fetch_ads_via_meta_api as page_filter so paging stops once enough ads survive filtering.
+    """
+    text_filter = keyword_filter and (filter_domain is not None or filter_keywords or keywords)
+    caption_filter_kw = (filter_keywords if filter_keywords is not None else keywords) if (filter_keywords or keywords) else []
+    return AdFilterEngine(
+        exclude_ids=exclude_ids,
+        recent=recent,
+        min_running_days=min_running_days,
+        stopped_within_days=stopped_within_days,
+        # Single-country requests are already targeted by the API; only EU / ALL are re-checked
+        country=country if country.upper() in ("EU", "ALL") else None,
+        filter_domain=filter_domain if text_filter else None,
+        filter_handle=filter_handle if text_filter else None,
+        keywords=caption_filter_kw if text_filter and filter_domain is None else None,
+    )
+
+
+def _print_filter_result(engine: AdFilterEngine, before: int, after: int, keyword_filter: bool) -> None:
+    print(f"   Filters (single pass): {before} → {after} rejected by rule: {engine.rejection_summary()}")
+    if not keyword_filter:
+        print("   Keyword filter: skipped (--no-keyword-filter)")
+
+
 def fetch_ad_pool(
     *,
     keywords: list[str],
@@ -1844,6 +2511,18 @@ def fetch_ad_pool(
     else:
         print(f"Fetching ads from Meta Graph API (ads_archive){filter_str}...")
     active_status = ad_active_status or "ACTIVE"
+    pool_filter = _ad_pool_filter(
+        exclude_ids=exclude_ids,
+        recent=recent,
+        min_running_days=min_running_days,
+        stopped_within_days=stopped_within_days,
+        country=country,
+        keyword_filter=keyword_filter,
+        keywords=keywords,
+        filter_keywords=filter_keywords,
+        filter_domain=filter_domain,
+        filter_handle=filter_handle,
+    )
     try:
         fetched_ads = fetch_ads_via_meta_api(
             meta_token,
@@ -1855,6 +2534,8 @@ def fetch_ad_pool(
             ad_delivery_date_min=ad_delivery_date_min,
             search_type=meta_search_type,
             search_page_ids=search_page_ids,
+            page_filter=pool_filter,
+            target_count=pool_size,
         )
     except urllib.error.HTTPError as e:
         if e.code == 500 and search_page_ids and active_status.upper() == "ACTIVE":
@@ -1869,6 +2550,8 @@ def fetch_ad_pool(
                 ad_delivery_date_min=ad_delivery_date_min,
                 search_type=meta_search_type,
                 search_page_ids=search_page_ids,
+                page_filter=pool_filter,
+                target_count=pool_size,
             )
         else:
             raise
@@ -1892,6 +2575,8 @@ def fetch_ad_pool(
                     ad_delivery_date_min=ad_delivery_date_min,
                     search_type=meta_search_type,
                     search_page_ids=None,
+                    page_filter=pool_filter,
+                    target_count=pool_size,
                 )
                 if alt_ads:
                     fetched_ads = alt_ads
@@ -1909,50 +2594,11 @@ def fetch_ad_pool(
         if not fetched_ads:
             print(f"   No ads for page_id(s)={search_page_ids}. Check page ID or try a different country.")
 
-    before_exclude = len(fetched_ads)
-    fetched_ads = [a for a in fetched_ads if (a.get("id") or "").strip() not in exclude_ids]
-    excluded_count = before_exclude - len(fetched_ads)
-    if excluded_count > 0:
-        print(f"   Excluded {excluded_count} ad(s) already in DB or previously processed this run.")
-
-    if recent:
-        meta_ads = filter_ads_by_three_buckets(
-            fetched_ads,
-            min_running_days=min_running_days,
-            stopped_within_days=stopped_within_days,
-        )
-        if fetched_ads and len(meta_ads) < len(fetched_ads):
-            print(f"   Filter (3 buckets): {len(fetched_ads)} → {len(meta_ads)} (running>{min_running_days}d | stopped in last {stopped_within_days}d+ran long | any running)")
-        if not meta_ads:
-            return []
-    else:
-        meta_ads = fetched_ads
-
-    country_upper = country.upper()
-    if country_upper in ("EU", "ALL"):
-        before_country = len(meta_ads)
-        meta_ads = filter_ads_by_country(meta_ads, country)
-        if before_country > 0 and len(meta_ads) < before_country:
-            print(f"   Country filter ({country}): {before_country} → {len(meta_ads)}")
+    meta_ads = pool_filter.apply(fetched_ads)
+    _print_filter_result(pool_filter, len(fetched_ads), len(meta_ads), keyword_filter)
     if not meta_ads:
         return []
 
-    if keyword_filter and (filter_domain is not None or filter_keywords or keywords):
-        before_caption = len(meta_ads)
-        if filter_domain is not None:
-            meta_ads = filter_ads_by_domain_or_handle(meta_ads, filter_domain, filter_handle)
-        else:
-            caption_filter_kw = (filter_keywords if filter_keywords is not None else keywords) if (filter_keywords or keywords) else []
-            if caption_filter_kw:
-                meta_ads = filter_ads_by_keyword_in_captions(meta_ads, caption_filter_kw)
-        if before_caption > 0 and len(meta_ads) < before_caption:
-            print(f"   Keyword filter (in link_captions/link_titles): {before_caption} → {len(meta_ads)}")
-        if not meta_ads:
-            return []
-    else:
-        if not keyword_filter:
-            print("   Keyword filter: skipped (--no-keyword-filter)")
-
     if len(meta_ads) > pool_size:
         meta_ads = meta_ads[:pool_size]
         print(f"   Pool capped to {pool_size} ad(s) (will process 20 at a time until target saved).")
@@ -1963,31 +2609,43 @@ def run_puppeteer_snapshot_for_ads(
     meta_ads: list[dict],
     apify_token: str,
     out_dir: Path,
+    seen_stats: SeenAdRunStats | None = None,
 ) -> tuple[list[dict], Path]:
     """
     Run Apify Puppeteer Scraper on snapshot URLs for the given meta ads.
+    Ads with a fresh snapshot in the seen-ad index are not scraped again (hits recorded in seen_stats).
     Returns (apify_items, apify_path). Does not download media.
     """
-    start_urls = []
-    for ad in meta_ads:
-        snapshot_url = (ad.get("ad_snapshot_url") or "").strip()
-        if not snapshot_url:
-            continue
-        ad_id = (ad.get("id") or "unknown").strip()
-        start_urls.append({"url": snapshot_url, "userData": {"adId": ad_id}})
-    if not start_urls:
-        return ([], out_dir / "apify_results.json")
-    print(f"Running Apify Puppeteer Scraper on {len(start_urls)} snapshot URL(s)...")
-    client = ApifyClient(apify_token)
-    run_input = {
-        "startUrls": start_urls,
-        "pageFunction": PUPPETEER_SNAPSHOT_PAGE_FUNCTION,
-        "proxyConfiguration": {"useApifyProxy": True},
-        "maxCrawlingDepth": 0,
-    }
-    run = client.actor("apify/puppeteer-scraper").call(run_input=run_input)
-    apify_items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
     apify_path = out_dir / "apify_results.json"
+    snapshot_ads = [
+        ((ad.get("id") or "unknown").strip(), (ad.get("ad_snapshot_url") or "").strip())
+        for ad in meta_ads
+        if (ad.get("ad_snapshot_url") or "").strip()
+    ]
+    if not snapshot_ads:
+        return ([], apify_path)
+    cached = meta_seen_ad_index.get_snapshots([ad_id for ad_id, _ in snapshot_ads], stats=seen_stats)
+    start_urls = [
+        {"url": snapshot_url, "userData": {"adId": ad_id}}
+        for ad_id, snapshot_url in snapshot_ads
+        if ad_id not in cached
+    ]
+    apify_items: list[dict] = []
+    if start_urls:
+        print(f"Running Apify Puppeteer Scraper on {len(start_urls)} snapshot URL(s) ({len(cached)} from seen-ad index)...")
+        client = ApifyClient(apify_token)
+        run_input = {
+            "startUrls": start_urls,
+            "pageFunction": PUPPETEER_SNAPSHOT_PAGE_FUNCTION,
+            "proxyConfiguration": {"useApifyProxy": True},
+            "maxCrawlingDepth": 0,
+        }
+        run = client.actor("apify/puppeteer-scraper").call(run_input=run_input)
+        apify_items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+        meta_seen_ad_index.save_snapshots(apify_items)
+    else:
+        print(f"All {len(cached)} snapshot(s) served from seen-ad index; skipping Apify Puppeteer Scraper.")
+    apify_items.extend(cached.values())
     with open(apify_path, "w", encoding="utf-8") as f:
         json.dump(apify_items, f, indent=2, ensure_ascii=False)
     print(f"Saved Apify snapshot results ({len(apify_items)} item(s)) to {apify_path}")
@@ -2050,6 +2708,18 @@ def run_fetch(
     else:
         print(f"Fetching ads from Meta Graph API (ads_archive){filter_str}...")
     active_status = ad_active_status or "ACTIVE"
+    pool_filter = _ad_pool_filter(
+        exclude_ids=exclude_meta_ad_ids or set(),
+        recent=recent,
+        min_running_days=min_running_days,
+        stopped_within_days=stopped_within_days,
+        country=country,
+        keyword_filter=keyword_filter,
+        keywords=keywords,
+        filter_keywords=filter_keywords,
+        filter_domain=filter_domain,
+        filter_handle=filter_handle,
+    )
     try:
         fetched_ads = fetch_ads_via_meta_api(
             meta_token,
@@ -2061,6 +2731,8 @@ def run_fetch(
             ad_delivery_date_min=ad_delivery_date_min,
             search_type=meta_search_type,
             search_page_ids=search_page_ids,
+            page_filter=pool_filter,
+            target_count=max_ads_to_save,
         )
     except urllib.error.HTTPError as e:
         if e.code == 500 and search_page_ids and active_status.upper() == "ACTIVE":
@@ -2075,6 +2747,8 @@ def run_fetch(
                 ad_delivery_date_min=ad_delivery_date_min,
                 search_type=meta_search_type,
                 search_page_ids=search_page_ids,
+                page_filter=pool_filter,
+                target_count=max_ads_to_save,
             )
         else:
             raise
@@ -2099,6 +2773,8 @@ def run_fetch(
                     ad_delivery_date_min=ad_delivery_date_min,
                     search_type=meta_search_type,
                     search_page_ids=None,
+                    page_filter=pool_filter,
+                    target_count=max_ads_to_save,
                 )
                 if alt_ads:
                     fetched_ads = alt_ads
@@ -2116,50 +2792,15 @@ def run_fetch(
         if not fetched_ads:
             print(f"   No ads for page_id(s)={search_page_ids}. Check page ID or try a different country.")
 
-    exclude_ids = exclude_meta_ad_ids or set()
-    if exclude_ids:
-        before_exclude = len(fetched_ads)
-        fetched_ads = [a for a in fetched_ads if (a.get("id") or "").strip() not in exclude_ids]
-        if before_exclude > 0 and len(fetched_ads) < before_exclude:
-            print(f"   Excluded {before_exclude - len(fetched_ads)} ad(s) already in DB (ad copy + creatives fetched).")
-
-    if recent:
-        meta_ads = filter_ads_by_three_buckets(
-            fetched_ads,
-            min_running_days=min_running_days,
-            stopped_within_days=stopped_within_days,
-        )
-        if fetched_ads and len(meta_ads) < len(fetched_ads):
-            print(f"   Filter (3 buckets): {len(fetched_ads)} → {len(meta_ads)} (running>{min_running_days}d | stopped in last {stopped_within_days}d+ran long | any running)")
-        if not meta_ads:
-            raise SystemExit("No ads match the 3-bucket filter. Nothing saved.")
-    else:
-        meta_ads = fetched_ads
-
-    country_upper = country.upper()
-    if country_upper in ("EU", "ALL"):
-        before_country = len(meta_ads)
-        meta_ads = filter_ads_by_country(meta_ads, country)
-        if before_country > 0 and len(meta_ads) < before_country:
-            print(f"   Country filter ({country}): {before_country} → {len(meta_ads)}")
+    meta_ads = pool_filter.apply(fetched_ads)
+    _print_filter_result(pool_filter, len(fetched_ads), len(meta_ads), keyword_filter)
     if not meta_ads:
-        raise SystemExit("No ads after filters. Nothing saved.")
-
-    if keyword_filter and (filter_domain is not None or filter_keywords or keywords):
-        before_caption = len(meta_ads)
-        if filter_domain is not None:
-            meta_ads = filter_ads_by_domain_or_handle(meta_ads, filter_domain, filter_handle)
-        else:
-            caption_filter_kw = (filter_keywords if filter_keywords is not None else keywords) if (filter_keywords or keywords) else []
-            if caption_filter_kw:
-                meta_ads = filter_ads_by_keyword_in_captions(meta_ads, caption_filter_kw)
-        if before_caption > 0 and len(meta_ads) < before_caption:
-            print(f"   Keyword filter (in link_captions/link_titles): {before_caption} → {len(meta_ads)}")
-        if not meta_ads:
+        emptied_by = [name for name in pool_filter.rule_names if pool_filter.rejections.get(name)]
+        if emptied_by and emptied_by[-1] == RULE_THREE_BUCKETS:
+            raise SystemExit("No ads match the 3-bucket filter. Nothing saved.")
+        if emptied_by and emptied_by[-1] in (RULE_DOMAIN_OR_HANDLE, RULE_KEYWORD):
             raise SystemExit("No ads have keyword in ad creative fields. Nothing saved.")
-    else:
-        if not keyword_filter:
-            print("   Keyword filter: skipped (--no-keyword-filter)")
+        raise SystemExit("No ads after filters. Nothing saved.")
 
     if len(meta_ads) > max_ads_to_save:
         meta_ads = meta_ads[:max_ads_to_save]
@@ -2172,20 +2813,42 @@ def run_fetch(
 
     apify_path: Path | None = None
     downloaded = 0
+    creative_jobs: list[CreativeDownload] = []
+    seen_stats = SeenAdRunStats()
 
     if creatives_from == "snapshot":
         if download_media:
-            for ad in meta_ads:
-                snapshot_url = (ad.get("ad_snapshot_url") or "").strip()
-                if not snapshot_url:
-                    continue
-                ad_id = (ad.get("id") or "unknown").strip()
+            snapshot_ads = [
+                ((ad.get("id") or "unknown").strip(), (ad.get("ad_snapshot_url") or "").strip())
+                for ad in meta_ads
+                if (ad.get("ad_snapshot_url") or "").strip()
+            ]
+
+            # Snapshot pages seen recently are not fetched again; the rest are streamed and parsed as they arrive
+            cached_snapshots = meta_seen_ad_index.get_snapshots([ad_id for ad_id, _ in snapshot_ads], stats=seen_stats)
+            to_fetch = [(ad_id, url) for ad_id, url in snapshot_ads if ad_id not in cached_snapshots]
+            with ThreadPoolExecutor(max_workers=CREATIVE_DOWNLOAD_CONCURRENCY) as pool:
+                futures = [pool.submit(fetch_snapshot_media, snapshot_url) for _, snapshot_url in to_fetch]
+            snapshot_media: dict[str, tuple[list[str], list[str]]] = {
+                ad_id: (item.get("images") or [], item.get("videos") or [])
+                for ad_id, item in cached_snapshots.items()
+            }
+            fresh_items = []
+            for (ad_id, snapshot_url), future in zip(to_fetch, futures):
                 try:
-                    html = fetch_snapshot_html(snapshot_url)
-                    image_urls, video_urls = extract_media_urls_from_snapshot_html(html)
+                    snapshot_media[ad_id] = future.result()
                 except Exception as e:
                     print(f"   Warning: failed to fetch snapshot for {ad_id}: {e}", file=sys.stderr)
                     continue
+                image_urls, video_urls = snapshot_media[ad_id]
+                fresh_items.append({"adId": ad_id, "url": snapshot_url, "images": image_urls, "videos": video_urls})
+            meta_seen_ad_index.save_snapshots(fresh_items)
+            if cached_snapshots:
+                print(f"   Reused {len(cached_snapshots)} cached snapshot result(s), fetched {len(to_fetch)}")
+            for ad_id, _ in snapshot_ads:
+                if ad_id not in snapshot_media:
+                    continue
+                image_urls, video_urls = snapshot_media[ad_id]
                 if want_image and want_video:
                     urls_to_download = [(u, "image") for u in image_urls] + [(u, "video") for u in video_urls[:1]]
                 elif want_image:
@@ -2194,62 +2857,23 @@ def run_fetch(
                     urls_to_download = [(u, "video") for u in video_urls[:1]]
                 else:
                     urls_to_download = []
-                safe_id = re.sub(r"[/\\]", "_", ad_id)
-                for i, (url, kind) in enumerate(urls_to_download):
-                    min_bytes = (MIN_IMAGE_SIZE_KB * 1024) if kind == "image" else None
-                    stem = f"{safe_id}_{kind}"
-                    if len(urls_to_download) > 1:
-                        stem += f"_{i}"
-                    filepath = out_dir / stem
-                    if download_url(url, filepath, min_size_bytes=min_bytes):
-                        downloaded += 1
-                        print(f"   Saved: {filepath.name}")
+                creative_jobs.extend(_creative_jobs(out_dir, ad_id, urls_to_download))
     elif creatives_from == "apify-snapshot":
-        start_urls = []
-        for ad in meta_ads:
-            snapshot_url = (ad.get("ad_snapshot_url") or "").strip()
-            if not snapshot_url:
-                continue
-            ad_id = (ad.get("id") or "unknown").strip()
-            start_urls.append({"url": snapshot_url, "userData": {"adId": ad_id}})
-        if start_urls:
-            print(f"Running Apify Puppeteer Scraper on {len(start_urls)} snapshot URL(s)...")
-            client = ApifyClient(apify_token)
-            run_input = {
-                "startUrls": start_urls,
-                "pageFunction": PUPPETEER_SNAPSHOT_PAGE_FUNCTION,
-                "proxyConfiguration": {"useApifyProxy": True},
-                "maxCrawlingDepth": 0,
-            }
-            run = client.actor("apify/puppeteer-scraper").call(run_input=run_input)
-            apify_items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-            apify_path = out_dir / "apify_results.json"
-            with open(apify_path, "w", encoding="utf-8") as f:
-                json.dump(apify_items, f, indent=2, ensure_ascii=False)
-            print(f"Saved Apify snapshot results ({len(apify_items)} item(s)) to {apify_path}")
-            if download_media:
-                for item in apify_items:
-                    ad_id = (item.get("adId") or "unknown").strip()
-                    image_urls = item.get("images") or []
-                    video_urls = item.get("videos") or []
-                    if want_image and want_video:
-                        urls_to_download = [(u, "image") for u in image_urls] + [(u, "video") for u in video_urls[:1]]
-                    elif want_image:
-                        urls_to_download = [(u, "image") for u in image_urls]
-                    elif want_video:
-                        urls_to_download = [(u, "video") for u in video_urls[:1]]
-                    else:
-                        urls_to_download = []
-                    safe_id = re.sub(r"[/\\]", "_", ad_id)
-                    for i, (url, kind) in enumerate(urls_to_download):
-                        min_bytes = (MIN_IMAGE_SIZE_KB * 1024) if kind == "image" else None
-                        stem = f"{safe_id}_{kind}"
-                        if len(urls_to_download) > 1:
-                            stem += f"_{i}"
-                        filepath = out_dir / stem
-                        if download_url(url, filepath, min_size_bytes=min_bytes):
-                            downloaded += 1
-                            print(f"   Saved: {filepath.name}")
+        apify_items, apify_path = run_puppeteer_snapshot_for_ads(meta_ads, apify_token, out_dir, seen_stats=seen_stats)
+        if download_media:
+            for item in apify_items:
+                ad_id = (item.get("adId") or "unknown").strip()
+                image_urls = item.get("images") or []
+                video_urls = item.get("videos") or []
+                if want_image and want_video:
+                    urls_to_download = [(u, "image") for u in image_urls] + [(u, "video") for u in video_urls[:1]]
+                elif want_image:
+                    urls_to_download = [(u, "image") for u in image_urls]
+                elif want_video:
+                    urls_to_download = [(u, "video") for u in video_urls[:1]]
+                else:
+                    urls_to_download = []
+                creative_jobs.extend(_creative_jobs(out_dir, ad_id, urls_to_download))
     else:
         meta_ids = set()
         for ad in meta_ads:
@@ -2296,19 +2920,13 @@ def run_fetch(
                         urls_to_download = []
                     if not urls_to_download:
                         continue
-                    safe_id = re.sub(r"[/\\]", "_", library_id)
-                    for i, (url, kind) in enumerate(urls_to_download):
-                        min_bytes = (MIN_IMAGE_SIZE_KB * 1024) if kind == "image" else None
-                        stem = f"{safe_id}_{kind}"
-                        if len(urls_to_download) > 1:
-                            stem += f"_{i}"
-                        filepath = out_dir / stem
-                        if download_url(url, filepath, min_size_bytes=min_bytes):
-                            downloaded += 1
-                            print(f"   Saved: {filepath.name}")
+                    creative_jobs.extend(_creative_jobs(out_dir, library_id, urls_to_download))
 
     if download_media:
+        downloaded = _download_creative_jobs(creative_jobs, out_dir)
         print(f"\nDownloaded {downloaded} creative(s) to {out_dir}")
+    if seen_stats.lookups:
+        print(f"   Seen-ad index hits: {seen_stats.summary()}")
     apify_path_resolved = out_dir / "apify_results.json" if (out_dir / "apify_results.json").exists() else None
     return (out_dir, meta_path, apify_path_resolved)
 
@@ -2320,7 +2938,6 @@ def main() -> None:
     parser.add_argument(
         "-o",
         "--output",
-        required=True,
         type=Path,
         help="Output folder path where creatives will be saved",
     )
@@ -2365,7 +2982,6 @@ def main() -> None:
     )
     parser.add_argument(
         "--meta-token",
-        required=True,
         help="Meta Graph API access token – used for full ads metadata (ad_snapshot_url, targeting)",
     )
     parser.add_argument(
@@ -2405,8 +3021,21 @@ def main() -> None:
         action="store_true",
         help="Skip downloading creatives (still save meta_ads.json and apify_results.json)",
     )
+    parser.add_argument(
+        "--benchmark-filters",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Benchmark the single-pass filter engine against the sequential filter passes on N synthetic ads, then exit.",
+    )
     args = parser.parse_args()
 
+    if args.benchmark_filters:
+        print(json.dumps(benchmark_ad_filters(args.benchmark_filters), indent=2))
+        return
+    if args.output is None or not args.meta_token:
+        parser.error("-o/--output and --meta-token are required")
+
     ad_delivery_date_min = args.delivery_date_min
     if ad_delivery_date_min is None and args.delivery_date_min_days is not None:
         d = (datetime.now(timezone.utc) - timedelta(days=args.delivery_date_min_days)).date()
@@ -0,0 +1,249 @@
+"""
+Meta Seen-Ad Index
+Local persistent index of Meta ads we have already processed, keyed by ad archive id.
+
+Brand fetches and meta_ads_fetch runs keep seeing the same ads. The index
+(a SQLite file, so it also works when meta_ads_fetch runs as a script)
+remembers per ad:
+
+- the Puppeteer snapshot result (creative URLs), reused within
+  META_SEEN_AD_SNAPSHOT_TTL_HOURS because fbcdn URLs are signed and expire
+- content hashes of downloaded media
+- the Grok inventory analysis
+- per scope (e.g. "brand:42"): processed state and uploaded S3 keys
+
+Callers look ads up before snapshotting, downloading and analyzing, and only
+do that work for misses. A SeenAdRunStats passed to the lookups collects
+per-run hit rates for logging.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+META_SEEN_AD_INDEX_PATH = Path(
+    os.getenv("META_SEEN_AD_INDEX_PATH") or Path(tempfile.gettempdir()) / "meta_seen_ads.sqlite3"
+)
+# Snapshot creative URLs are signed by the CDN; do not reuse them for longer than this
+META_SEEN_AD_SNAPSHOT_TTL_HOURS = int(os.getenv("META_SEEN_AD_SNAPSHOT_TTL_HOURS", "24"))
+
+STATE_UPLOADED = "uploaded"
+STATE_NO_CREATIVES = "no_creatives"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS seen_ads (
+        ad_id TEXT PRIMARY KEY,
+        snapshot TEXT,
+        snapshot_at REAL,
+        media_hashes TEXT,
+        analysis TEXT,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS seen_ad_scopes (
+        ad_id TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        state TEXT NOT NULL,
+        s3_keys TEXT,
+        processed_at REAL NOT NULL,
+        PRIMARY KEY (ad_id, scope)
+    );
+"""
+
+
+@dataclass
+class SeenAdRunStats:
+    """Index lookups / hits for one run, per stage (snapshot, media, analysis)"""
+    lookups: dict[str, int] = field(default_factory=dict)
+    hits: dict[str, int] = field(default_factory=dict)
+
+    def record(self, stage: str, lookups: int, hits: int) -> None:
+        self.lookups[stage] = self.lookups.get(stage, 0) + lookups
+        self.hits[stage] = self.hits.get(stage, 0) + hits
+
+    def hit_rates(self) -> dict[str, float]:
+        return {
+            stage: round(self.hits.get(stage, 0) / count, 3) if count else 0.0
+            for stage, count in self.lookups.items()
+        }
+
+    def summary(self) -> str:
+        if not self.lookups:
+            return "no lookups"
+        return ", ".join(
+            f"{stage} {self.hits.get(stage, 0)}/{count} ({rate:.0%})"
+            for (stage, count), rate in zip(self.lookups.items(), self.hit_rates().values())
+        )
+
+
+def _ids(ad_ids: Iterable[Any]) -> list[str]:
+    return list(dict.fromkeys(str(a).strip() for a in ad_ids if a is not None and str(a).strip()))
+
+
+class MetaSeenAdIndex:
+    """SQLite-backed index of processed Meta ads (one connection per call; safe across threads)"""
+
+    def __init__(self, path: Path = META_SEEN_AD_INDEX_PATH,
+                 snapshot_ttl_hours: int = META_SEEN_AD_SNAPSHOT_TTL_HOURS):
+        self.path = Path(path)
+        self.snapshot_ttl_seconds = snapshot_ttl_hours * 3600
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def _select(self, query: str, ad_ids: list[str], *params: Any) -> list[sqlite3.Row]:
+        if not ad_ids:
+            return []
+        placeholders = ",".join("?" * len(ad_ids))
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(query.format(ids=placeholders), (*params, *ad_ids)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Seen-ad index lookup failed: {e}")
+            return []
+
+    def _write(self, query: str, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(query, rows)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Seen-ad index write failed: {e}")
+
+    # Snapshots (Puppeteer results: {"adId", "images", "videos", ...})
+
+    def get_snapshots(self, ad_ids: Iterable[Any], stats: SeenAdRunStats | None = None) -> dict[str, dict]:
+        """Fresh snapshot results for the given ads, keyed by ad id"""
+        ids = _ids(ad_ids)
+        rows = self._select(
+            "SELECT ad_id, snapshot FROM seen_ads WHERE snapshot IS NOT NULL AND snapshot_at >= ? AND ad_id IN ({ids})",
+            ids, time.time() - self.snapshot_ttl_seconds,
+        )
+        found = {row["ad_id"]: json.loads(row["snapshot"]) for row in rows}
+        if stats is not None:
+            stats.record("snapshot", len(ids), len(found))
+        return found
+
+    def save_snapshots(self, items: list[dict]) -> None:
+        """Store Puppeteer snapshot items that produced creatives"""
+        now = time.time()
+        rows = [
+            (str(item["adId"]).strip(), json.dumps(item), now, now)
+            for item in items
+            if str(item.get("adId") or "").strip() and (item.get("images") or item.get("videos"))
+        ]
+        self._write("""
+            INSERT INTO seen_ads (ad_id, snapshot, snapshot_at, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (ad_id) DO UPDATE SET
+                snapshot = excluded.snapshot, snapshot_at = excluded.snapshot_at, updated_at = excluded.updated_at
+        """, rows)
+
+    def forget_snapshots(self, ad_ids: Iterable[Any]) -> None:
+        """Drop cached snapshots (e.g. their creative URLs no longer download)"""
+        self._write("UPDATE seen_ads SET snapshot = NULL, snapshot_at = NULL WHERE ad_id = ?",
+                    [(ad_id,) for ad_id in _ids(ad_ids)])
+
+    # Media hashes
+
+    def record_media_hashes(self, ad_id: str, hashes: dict[str, str]) -> None:
+        """Merge {media url or file name: sha256} into the ad's media hashes"""
+        ad_id = str(ad_id or "").strip()
+        if not ad_id or not hashes:
+            return
+        rows = self._select("SELECT media_hashes FROM seen_ads WHERE ad_id IN ({ids})", [ad_id])
+        merged = json.loads(rows[0]["media_hashes"]) if rows and rows[0]["media_hashes"] else {}
+        merged.update(hashes)
+        now = time.time()
+        self._write("""
+            INSERT INTO seen_ads (ad_id, media_hashes, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (ad_id) DO UPDATE SET media_hashes = excluded.media_hashes, updated_at = excluded.updated_at
+        """, [(ad_id, json.dumps(merged), now)])
+
+    # Grok inventory analysis ({"inventoryAnalysis", "subcategory"})
+
+    def get_analyses(self, ad_ids: Iterable[Any], stats: SeenAdRunStats | None = None) -> dict[str, dict]:
+        ids = _ids(ad_ids)
+        rows = self._select("SELECT ad_id, analysis FROM seen_ads WHERE analysis IS NOT NULL AND ad_id IN ({ids})", ids)
+        found = {row["ad_id"]: json.loads(row["analysis"]) for row in rows}
+        if stats is not None:
+            stats.record("analysis", len(ids), len(found))
+        return found
+
+    def save_analyses(self, results: dict[str, dict]) -> None:
+        now = time.time()
+        rows = [(str(ad_id).strip(), json.dumps(result), now) for ad_id, result in results.items() if result]
+        self._write("""
+            INSERT INTO seen_ads (ad_id, analysis, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (ad_id) DO UPDATE SET analysis = excluded.analysis, updated_at = excluded.updated_at
+        """, rows)
+
+    # Per-scope processed state (scope = who the ad was processed for, e.g. "brand:42")
+
+    def get_processed(self, scope: str, ad_ids: Iterable[Any],
+                      stats: SeenAdRunStats | None = None) -> dict[str, dict]:
+        """Processed entries {ad_id: {"state", "s3_keys", "processed_at"}} for a scope"""
+        ids = _ids(ad_ids)
+        rows = self._select(
+            "SELECT ad_id, state, s3_keys, processed_at FROM seen_ad_scopes WHERE scope = ? AND ad_id IN ({ids})",
+            ids, scope,
+        )
+        found = {
+            row["ad_id"]: {
+                "state": row["state"],
+                "s3_keys": json.loads(row["s3_keys"]) if row["s3_keys"] else {},
+                "processed_at": row["processed_at"],
+            }
+            for row in rows
+        }
+        if stats is not None:
+            stats.record("media", len(ids), sum(1 for entry in found.values() if entry["state"] == STATE_UPLOADED))
+        return found
+
+    def mark_processed(self, scope: str, ad_id: str, state: str, s3_keys: dict[str, Any] | None = None) -> None:
+        ad_id = str(ad_id or "").strip()
+        if not ad_id:
+            return
+        self._write("""
+            INSERT INTO seen_ad_scopes (ad_id, scope, state, s3_keys, processed_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (ad_id, scope) DO UPDATE SET
+                state = excluded.state, s3_keys = excluded.s3_keys, processed_at = excluded.processed_at
+        """, [(ad_id, scope, state, json.dumps(s3_keys or {}), time.time())])
+
+    def is_recent_no_creatives(self, entry: dict | None) -> bool:
+        """True if the ad yielded no creatives within the snapshot TTL (not worth re-snapshotting yet)"""
+        return bool(
+            entry
+            and entry.get("state") == STATE_NO_CREATIVES
+            and time.time() - (entry.get("processed_at") or 0) < self.snapshot_ttl_seconds
+        )
+
+
+# Global instance
+meta_seen_ad_index = MetaSeenAdIndex()
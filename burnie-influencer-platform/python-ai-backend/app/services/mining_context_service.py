@@ -19,8 +19,8 @@ from typing import Dict, List, Optional, Any
 from urllib.parse import urlparse
 
 from app.config.settings import settings
-from app.database.repositories.campaign_repository import CampaignRepository
 from app.database.repositories.user_repository import UserRepository
+from app.services.campaign_context_cache import campaign_context_cache
 
 logger = logging.getLogger(__name__)
 
@@ -358,8 +358,7 @@ async def gather_miner_context(user_id: int, campaign_id: int) -> Dict:
     logger.info(f"📚 Gathering miner context for user {user_id}, campaign {campaign_id}")
     
     # Step 1: Fetch admin context (campaigns + projects)
-    campaign_repo = CampaignRepository()
-    campaign_data = campaign_repo.get_campaign_by_id(campaign_id)
+    campaign_data = await campaign_context_cache.get_campaign_record(campaign_id)
     
     if not campaign_data:
         logger.error(f"❌ Campaign {campaign_id} not found")
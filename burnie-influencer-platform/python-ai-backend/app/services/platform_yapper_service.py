@@ -13,11 +13,19 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 
+from sqlalchemy import text
+
 from app.services.llm_providers import MultiProviderLLMService
+from app.services.twitter_sync_watermarks import twitter_sync_watermarks, SCOPE_PLATFORM_YAPPER
+from app.services.tweet_bulk_ingestion import tweet_bulk_ingestion
+from app.database.connection import get_db_session
 from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Concurrent LLM calls when analyzing a yapper's tweets before storage
+TWEET_ANALYSIS_CONCURRENCY = 5
+
 class PlatformYapperService:
     """
     Service for managing platform yappers' Twitter data and predictions
@@ -66,8 +74,20 @@ class PlatformYapperService:
             
             user_data = user.data
             
-            # Get recent tweets (last 30 days for analysis)
-            tweets = await self._fetch_user_tweets(twitter_handle, days=30)
+            # Get new tweets since the last sync (last 30 days on a full sync)
+            plan = await twitter_sync_watermarks.plan_sync(twitter_handle, SCOPE_PLATFORM_YAPPER)
+            new_tweets = await self._fetch_user_tweets(
+                twitter_handle, days=30, since_id=plan.since_id, user_id=user_data.id
+            )
+            
+            if plan.is_incremental:
+                # Analysis still covers the last 30 days: merge with tweets stored earlier
+                stored = await asyncio.to_thread(self._load_stored_tweets, twitter_handle, 30)
+                new_ids = {str(tweet['id']) for tweet in new_tweets}
+                tweets = new_tweets + [tweet for tweet in stored if str(tweet['id']) not in new_ids]
+                logger.info(f"♻️ @{twitter_handle}: {len(new_tweets)} new tweets, {len(tweets) - len(new_tweets)} from previous syncs")
+            else:
+                tweets = new_tweets
             
             # Analyze content style and patterns
             content_analysis = await self._analyze_yapper_content_style(tweets, twitter_handle)
@@ -106,11 +126,14 @@ class PlatformYapperService:
             # Store profile data
             await self._store_yapper_profile(profile_data)
             
-            # Store individual tweets for detailed analysis
-            stored_tweets = 0
-            for tweet in tweets:
-                if await self._store_yapper_tweet(yapper_id, twitter_handle, tweet):
-                    stored_tweets += 1
+            # Store individual tweets for detailed analysis (only ones not stored before)
+            storage_result = await self._store_yapper_tweets(yapper_id, twitter_handle, new_tweets)
+            stored_tweets = storage_result.get('inserted', 0) + storage_result.get('updated', 0)
+            
+            if storage_result.get('success'):
+                await twitter_sync_watermarks.record_sync(
+                    plan, [tweet['id'] for tweet in new_tweets], str(user_data.id)
+                )
                     
             logger.info(f"✅ Collected profile for @{twitter_handle}: {len(tweets)} tweets, experience: {experience_level['level']}")
             
@@ -118,6 +141,7 @@ class PlatformYapperService:
                 'success': True,
                 'profile_data': profile_data,
                 'tweets_stored': stored_tweets,
+                'tweet_storage': storage_result,
                 'experience_level': experience_level
             }
             
@@ -125,29 +149,32 @@ class PlatformYapperService:
             logger.error(f"❌ Failed to collect Twitter profile for yapper {yapper_id}: {str(e)}")
             return {'success': False, 'error': str(e)}
             
-    async def _fetch_user_tweets(self, username: str, days: int = 30) -> List[Dict]:
-        """Fetch recent tweets from a user"""
+    async def _fetch_user_tweets(self, username: str, days: int = 30, since_id: Optional[str] = None,
+                                 user_id: Optional[str] = None) -> List[Dict]:
+        """Fetch recent tweets from a user (only tweets newer than since_id when given)"""
         try:
             # Get user ID
-            user = self.twitter_client.get_user(username=username)
-            if not user.data:
-                return []
-                
-            user_id = user.data.id
+            if not user_id:
+                user = self.twitter_client.get_user(username=username)
+                if not user.data:
+                    return []
+                    
+                user_id = user.data.id
             
             # Calculate date range
             end_time = datetime.utcnow()
             start_time = end_time - timedelta(days=days)
             
+            window = {'since_id': since_id} if since_id else {'start_time': start_time, 'end_time': end_time}
+            
             # Fetch tweets
             tweets = self.twitter_client.get_users_tweets(
                 id=user_id,
                 max_results=100,
-                start_time=start_time,
-                end_time=end_time,
                 tweet_fields=['created_at', 'public_metrics', 'context_annotations', 'conversation_id'],
                 media_fields=['url', 'type'],
-                expansions=['attachments.media_keys']
+                expansions=['attachments.media_keys'],
+                **window
             )
             
             if not tweets.data:
@@ -194,6 +221,45 @@ class PlatformYapperService:
             logger.error(f"Error fetching tweets for {username}: {str(e)}")
             return []
             
+    def _load_stored_tweets(self, twitter_handle: str, days: int = 30) -> List[Dict]:
+        """Load previously synced tweets from platform_yapper_twitter_data in the _fetch_user_tweets shape"""
+        session = get_db_session()
+        try:
+            query = text("""
+                SELECT tweet_id, tweet_text, tweet_images, is_thread, parent_tweet_id,
+                       engagement_metrics, posted_at
+                FROM platform_yapper_twitter_data
+                WHERE lower(twitter_handle) = lower(:twitter_handle)
+                  AND posted_at >= :since
+                ORDER BY posted_at DESC
+            """)
+            rows = session.execute(query, {
+                'twitter_handle': twitter_handle,
+                'since': datetime.utcnow() - timedelta(days=days)
+            }).fetchall()
+            
+            stored = []
+            for row in rows:
+                metrics = row.engagement_metrics or {}
+                if not all(key in metrics for key in ('like_count', 'retweet_count', 'reply_count')):
+                    continue
+                stored.append({
+                    'id': row.tweet_id,
+                    'text': row.tweet_text or '',
+                    'created_at': row.posted_at,
+                    'metrics': metrics,
+                    'conversation_id': row.parent_tweet_id or row.tweet_id,
+                    'images': row.tweet_images or [],
+                    'is_thread': row.is_thread
+                })
+            return stored
+            
+        except Exception as e:
+            logger.error(f"Error loading stored tweets for {twitter_handle}: {str(e)}")
+            return []
+        finally:
+            session.close()
+            
     async def _analyze_yapper_content_style(self, tweets: List[Dict], twitter_handle: str) -> Dict[str, Any]:
         """Analyze yapper's content style using Anthropic"""
         try:
@@ -553,65 +619,58 @@ class PlatformYapperService:
             logger.error(f"Error storing yapper profile: {str(e)}")
             return False
             
-    async def _store_yapper_tweet(self, yapper_id: int, twitter_handle: str, tweet: Dict) -> bool:
-        """Store individual yapper tweet data"""
+    async def _analyze_tweet_content(self, tweet: Dict) -> Optional[Dict[str, Any]]:
+        """Analyze tweet content with Anthropic"""
+        if not tweet.get('text'):
+            return None
+            
+        analysis_prompt = f"""
+        Analyze this tweet for content quality and potential platform success.
+        
+        Tweet: "{tweet['text']}"
+        
+        Provide analysis in JSON format:
+        {{
+            "content_quality": <score_out_of_10>,
+            "viral_potential": <score_out_of_10>,
+            "engagement_prediction": <score_out_of_10>,
+            "category": "<gaming/defi/nft/meme/education/other>",
+            "sentiment": "<positive/neutral/negative>",
+            "key_elements": ["element1", "element2"]
+        }}
+        """
+        
         try:
-            # Analyze tweet content with Anthropic
-            content_analysis = None
-            if tweet.get('text'):
-                analysis_prompt = f"""
-                Analyze this tweet for content quality and potential platform success.
-                
-                Tweet: "{tweet['text']}"
-                
-                Provide analysis in JSON format:
-                {{
-                    "content_quality": <score_out_of_10>,
-                    "viral_potential": <score_out_of_10>,
-                    "engagement_prediction": <score_out_of_10>,
-                    "category": "<gaming/defi/nft/meme/education/other>",
-                    "sentiment": "<positive/neutral/negative>",
-                    "key_elements": ["element1", "element2"]
-                }}
-                """
-                
-                try:
-                    analysis_result = await self.llm_service.analyze_text_content(analysis_prompt, provider="anthropic")
-                    if isinstance(analysis_result, dict) and analysis_result.get('success'):
-                        analysis_text = analysis_result.get('content', '')
-                    else:
-                        analysis_text = analysis_result if isinstance(analysis_result, str) else ''
-                    
-                    content_analysis = json.loads(self._clean_json_response(analysis_text))
-                except:
-                    content_analysis = None
-                    
-            tweet_data = {
-                'yapper_id': yapper_id,
-                'twitter_handle': twitter_handle,
-                'tweet_id': tweet['id'],
-                'tweet_text': tweet['text'],
-                'tweet_images': tweet.get('images', []),
-                'is_thread': tweet.get('is_thread', False),
-                'thread_position': None,  # Would need conversation analysis
-                'parent_tweet_id': tweet['conversation_id'] if tweet.get('is_thread') else None,
-                'engagement_metrics': tweet['metrics'],
-                'posted_at': tweet['created_at'],
-                'content_category': content_analysis.get('category') if content_analysis else None,
-                'anthropic_analysis': content_analysis
-            }
+            analysis_result = await self.llm_service.analyze_text_content(analysis_prompt, provider="anthropic")
+            if isinstance(analysis_result, dict) and analysis_result.get('success'):
+                analysis_text = analysis_result.get('content', '')
+            else:
+                analysis_text = analysis_result if isinstance(analysis_result, str) else ''
             
-            response = requests.post(
-                f"{settings.TYPESCRIPT_BACKEND_URL}/api/intelligence/store-platform-yapper-data",
-                json=tweet_data,
-                timeout=30
-            )
+            return json.loads(self._clean_json_response(analysis_text))
+        except:
+            return None
             
-            return response.status_code == 200
+    async def _store_yapper_tweets(self, yapper_id: int, twitter_handle: str, tweets: List[Dict]) -> Dict[str, Any]:
+        """Analyze tweets (bounded concurrency) and bulk-store them in platform_yapper_twitter_data"""
+        try:
+            semaphore = asyncio.Semaphore(TWEET_ANALYSIS_CONCURRENCY)
+            
+            async def analyze(tweet: Dict) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._analyze_tweet_content(tweet)
+            
+            analyses = await asyncio.gather(*(analyze(tweet) for tweet in tweets))
+            return await tweet_bulk_ingestion.store_yapper_tweets(
+                yapper_id,
+                twitter_handle,
+                tweets,
+                {str(tweet['id']): analysis for tweet, analysis in zip(tweets, analyses) if analysis}
+            )
             
         except Exception as e:
-            logger.error(f"Error storing yapper tweet: {str(e)}")
-            return False
+            logger.error(f"Error storing yapper tweets: {str(e)}")
+            return {'success': False, 'error': str(e)}
             
     def _clean_json_response(self, response: str) -> str:
         """Clean LLM response to extract JSON"""
@@ -9,11 +9,12 @@ from temporary URLs to permanent S3 storage.
 import os
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO
 from datetime import datetime, timedelta
 import uuid
 from urllib.parse import urlparse
 import mimetypes
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 
 # Import settings
@@ -22,6 +23,23 @@ from app.services.storage_config import create_s3_client, get_public_url, saniti
 
 logger = logging.getLogger(__name__)
 
+# Part size for streamed multipart uploads (S3 minimum is 5 MB)
+S3_MULTIPART_CHUNK_BYTES = int(os.getenv('S3_MULTIPART_CHUNK_BYTES', str(8 * 1024 * 1024)))
+
+
+class _CountingReader:
+    """File-like wrapper counting the bytes read from a stream"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
 class S3StorageService:
     """Service for uploading AI-generated content to S3"""
     
@@ -196,6 +214,48 @@ class S3StorageService:
                 'error': "AWS credentials not configured"
             }
     
+    def upload_stream_with_key(self, fileobj: BinaryIO, s3_key: str, content_type: str) -> Dict[str, Any]:
+        """
+        Stream a file-like object (e.g. an HTTP response body) to S3 without
+        buffering it in memory. Bodies above S3_MULTIPART_CHUNK_BYTES go up as
+        a multipart upload, part by part as they are read.
+        """
+        try:
+            logger.info(f"⬆️ Streaming to S3: {s3_key}")
+            filename = s3_key.split('/')[-1]
+            counted = _CountingReader(fileobj)
+            self.s3_client.upload_fileobj(
+                counted,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={
+                    'ContentType': content_type,
+                    'ContentDisposition': f'attachment; filename="{filename}"',
+                    'CacheControl': 'max-age=31536000',
+                    'Metadata': {
+                        'uploaded_by': 'burnie-ai-backend',
+                        'upload_timestamp': datetime.utcnow().isoformat()
+                    }
+                },
+                Config=TransferConfig(
+                    multipart_threshold=S3_MULTIPART_CHUNK_BYTES,
+                    multipart_chunksize=S3_MULTIPART_CHUNK_BYTES,
+                    max_concurrency=4,
+                ),
+            )
+            logger.info(f"✅ Successfully streamed to S3: {s3_key} ({counted.bytes_read} bytes)")
+            return {
+                'success': True,
+                's3_key': s3_key,
+                'file_size': counted.bytes_read
+            }
+        except Exception as e:
+            logger.error(f"❌ S3 streaming upload failed: {e}")
+            return {
+                'success': False,
+                'error': f"S3 streaming upload failed: {str(e)}"
+            }
+
     def _generate_s3_key(self, content_type: str, file_extension: str, 
                         wallet_address: Optional[str] = None, 
                         agent_id: Optional[str] = None,
@@ -0,0 +1,252 @@
+"""
+Tweet Bulk Ingestion Service
+Writes fetched tweets into popular_twitter_handles / platform_yapper_twitter_data in bulk.
+
+A whole fetch result for a handle is normalized once (media, thread links,
+engagement metrics) and written with chunked multi-row
+INSERT ... ON CONFLICT (tweet_id) DO UPDATE statements inside a single
+transaction, instead of one statement/HTTP call and commit per tweet.
+Rows whose stored content is unchanged are left untouched and reported as
+skipped.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.database.connection import get_db_session
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row statement (keeps bind parameter count well below PG limits)
+TWEET_INGEST_CHUNK_SIZE = 200
+
+POPULAR_HANDLES_TABLE = "popular_twitter_handles"
+PLATFORM_YAPPER_TABLE = "platform_yapper_twitter_data"
+
+_BASE_COLUMNS = (
+    "twitter_handle", "tweet_id", "tweet_text", "tweet_images", "is_thread", "thread_position",
+    "parent_tweet_id", "engagement_metrics", "posted_at", "content_category", "anthropic_analysis",
+)
+_TABLE_COLUMNS = {
+    POPULAR_HANDLES_TABLE: _BASE_COLUMNS,
+    PLATFORM_YAPPER_TABLE: ("yapper_id",) + _BASE_COLUMNS,
+}
+_JSONB_COLUMNS = {"tweet_images", "engagement_metrics", "anthropic_analysis"}
+
+
+def _as_utc_naive(value: Any) -> Optional[datetime]:
+    """Normalize API/ISO timestamps to naive UTC for `timestamp` columns"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _link_threads(rows: List[Dict[str, Any]]):
+    """Fill is_thread / thread_position / parent_tweet_id from conversation ids (in place)"""
+    conversations: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        conversations.setdefault(row.pop("conversation_id") or row["tweet_id"], []).append(row)
+
+    for conversation_id, group in conversations.items():
+        group.sort(key=lambda r: r["posted_at"])
+        root_in_batch = any(r["tweet_id"] == conversation_id for r in group)
+        for position, row in enumerate(group, start=1):
+            is_reply = row["tweet_id"] != conversation_id
+            row["is_thread"] = len(group) > 1 or is_reply
+            row["parent_tweet_id"] = conversation_id if is_reply else None
+            # Positions are only known when the thread root is part of this batch
+            row["thread_position"] = position if row["is_thread"] and root_in_batch else None
+
+
+class TweetBulkIngestionService:
+    """Set-based ingestion of fetched tweets"""
+
+    def __init__(self, chunk_size: int = TWEET_INGEST_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def _stage(self, twitter_handle: str, tweets: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Normalize tweets into rows. Returns (rows, skipped): tweets without an
+        id or timestamp are skipped and duplicates collapsed (last one wins),
+        because a single ON CONFLICT statement cannot touch the same row twice.
+        """
+        staged: Dict[str, Dict[str, Any]] = {}
+        skipped = 0
+        for tweet in tweets or []:
+            tweet_id = str(tweet.get("tweet_id") or "")
+            posted_at = _as_utc_naive(tweet.get("posted_at"))
+            if not tweet_id or posted_at is None:
+                skipped += 1
+                continue
+            if tweet_id in staged:
+                skipped += 1
+            staged[tweet_id] = {
+                "twitter_handle": twitter_handle[:100],
+                "tweet_id": tweet_id,
+                "conversation_id": str(tweet.get("conversation_id") or tweet_id),
+                "tweet_text": tweet.get("tweet_text"),
+                "tweet_images": tweet.get("tweet_images") or None,
+                "engagement_metrics": tweet.get("engagement_metrics") or {},
+                "posted_at": posted_at,
+                "content_category": tweet.get("content_category"),
+                "anthropic_analysis": tweet.get("anthropic_analysis"),
+                "yapper_id": tweet.get("yapper_id"),
+            }
+        rows = list(staged.values())
+        _link_threads(rows)
+        return rows, skipped
+
+    def _upsert_chunk(self, session, table: str, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert one chunk, returning (inserted, updated); unchanged rows are not touched"""
+        columns = _TABLE_COLUMNS[table]
+        values_sql = []
+        params: Dict[str, Any] = {}
+        for i, row in enumerate(rows):
+            placeholders = []
+            for j, column in enumerate(columns):
+                key = f"c{j}_{i}"
+                value = row.get(column)
+                if column in _JSONB_COLUMNS:
+                    placeholders.append(f"CAST(:{key} AS jsonb)")
+                    value = json.dumps(value) if value is not None else None
+                else:
+                    placeholders.append(f":{key}")
+                params[key] = value
+            values_sql.append(f"({', '.join(placeholders)}, now(), now())")
+
+        query = text(f"""
+            INSERT INTO {table} AS t ({', '.join(columns)}, fetched_at, updated_at)
+            VALUES {', '.join(values_sql)}
+            ON CONFLICT (tweet_id) DO UPDATE SET
+                tweet_text = EXCLUDED.tweet_text,
+                tweet_images = COALESCE(EXCLUDED.tweet_images, t.tweet_images),
+                engagement_metrics = EXCLUDED.engagement_metrics,
+                is_thread = t.is_thread OR EXCLUDED.is_thread,
+                thread_position = COALESCE(EXCLUDED.thread_position, t.thread_position),
+                parent_tweet_id = COALESCE(EXCLUDED.parent_tweet_id, t.parent_tweet_id),
+                content_category = COALESCE(EXCLUDED.content_category, t.content_category),
+                anthropic_analysis = COALESCE(EXCLUDED.anthropic_analysis, t.anthropic_analysis),
+                updated_at = now()
+            WHERE (t.tweet_text, t.tweet_images, t.engagement_metrics, t.is_thread,
+                   t.thread_position, t.parent_tweet_id, t.content_category, t.anthropic_analysis)
+                IS DISTINCT FROM
+                  (EXCLUDED.tweet_text, COALESCE(EXCLUDED.tweet_images, t.tweet_images),
+                   EXCLUDED.engagement_metrics, t.is_thread OR EXCLUDED.is_thread,
+                   COALESCE(EXCLUDED.thread_position, t.thread_position),
+                   COALESCE(EXCLUDED.parent_tweet_id, t.parent_tweet_id),
+                   COALESCE(EXCLUDED.content_category, t.content_category),
+                   COALESCE(EXCLUDED.anthropic_analysis, t.anthropic_analysis))
+            RETURNING (xmax = 0) AS inserted
+        """)
+        results = session.execute(query, params).fetchall()
+        inserted = sum(1 for r in results if r.inserted)
+        return inserted, len(results) - inserted
+
+    def ingest(self, table: str, twitter_handle: str, tweets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalize and upsert one handle's tweets in a single transaction (synchronous)"""
+        start_time = time.time()
+        rows, skipped = self._stage(twitter_handle, tweets)
+        normalize_ms = round((time.time() - start_time) * 1000, 1)
+        if not rows:
+            return {
+                "success": True, "inserted": 0, "updated": 0, "skipped": skipped,
+                "normalize_ms": normalize_ms, "write_ms": 0.0, "elapsed_ms": normalize_ms,
+            }
+
+        session = get_db_session()
+        try:
+            inserted = updated = 0
+            for chunk_start in range(0, len(rows), self.chunk_size):
+                chunk_inserted, chunk_updated = self._upsert_chunk(
+                    session, table, rows[chunk_start:chunk_start + self.chunk_size]
+                )
+                inserted += chunk_inserted
+                updated += chunk_updated
+
+            session.commit()
+            # Rows that matched stored content exactly were not rewritten
+            skipped += len(rows) - inserted - updated
+            elapsed_ms = round((time.time() - start_time) * 1000, 1)
+            logger.info(
+                f"✅ Bulk stored tweets for @{twitter_handle} in {table}: {inserted} inserted, "
+                f"{updated} updated, {skipped} skipped in {elapsed_ms}ms"
+            )
+            return {
+                "success": True,
+                "inserted": inserted,
+                "updated": updated,
+                "skipped": skipped,
+                "normalize_ms": normalize_ms,
+                "write_ms": round(elapsed_ms - normalize_ms, 1),
+                "elapsed_ms": elapsed_ms,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Bulk tweet ingestion failed for @{twitter_handle} in {table}: {e}")
+            return {"success": False, "error": str(e), "elapsed_ms": round((time.time() - start_time) * 1000, 1)}
+        finally:
+            session.close()
+
+    async def store_handle_tweets(self, handle_data: Any) -> Dict[str, Any]:
+        """Bulk-store a popular handle fetch result (routes.twitter_handles.TwitterHandleData)"""
+        tweets = [
+            {
+                "tweet_id": tweet.id,
+                "conversation_id": tweet.conversation_id,
+                "tweet_text": tweet.text,
+                "tweet_images": handle_data.tweet_media_map.get(tweet.id, []),
+                "engagement_metrics": {
+                    'like_count': tweet.public_metrics.get('like_count', 0),
+                    'retweet_count': tweet.public_metrics.get('retweet_count', 0),
+                    'reply_count': tweet.public_metrics.get('reply_count', 0),
+                    'quote_count': tweet.public_metrics.get('quote_count', 0)
+                },
+                "posted_at": tweet.created_at,
+            }
+            for tweet in handle_data.tweets
+        ]
+        return await asyncio.to_thread(self.ingest, POPULAR_HANDLES_TABLE, handle_data.twitter_handle, tweets)
+
+    async def store_yapper_tweets(
+        self,
+        yapper_id: int,
+        twitter_handle: str,
+        tweets: List[Dict[str, Any]],
+        analyses: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Bulk-store platform yapper tweets (PlatformYapperService tweet dicts + optional analysis per tweet id)"""
+        analyses = analyses or {}
+        rows = []
+        for tweet in tweets:
+            analysis = analyses.get(str(tweet.get('id')))
+            if not isinstance(analysis, dict):
+                analysis = None
+            rows.append({
+                "yapper_id": yapper_id,
+                "tweet_id": tweet.get('id'),
+                "conversation_id": tweet.get('conversation_id'),
+                "tweet_text": tweet.get('text'),
+                "tweet_images": tweet.get('images', []),
+                "engagement_metrics": tweet.get('metrics'),
+                "posted_at": tweet.get('created_at'),
+                "content_category": str(analysis['category'])[:50] if analysis and analysis.get('category') else None,
+                "anthropic_analysis": analysis,
+            })
+        return await asyncio.to_thread(self.ingest, PLATFORM_YAPPER_TABLE, twitter_handle, rows)
+
+
+# Global instance
+tweet_bulk_ingestion = TweetBulkIngestionService()
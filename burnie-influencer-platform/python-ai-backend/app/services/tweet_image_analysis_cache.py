@@ -0,0 +1,246 @@
+"""
+Tweet Image Analysis Cache
+Content-addressed, persistent cache of per-image vision analyses for tweet images.
+
+Tweet images are analyzed once per (SHA-256 of the image bytes, prompt
+version) and stored in tweet_image_analysis_cache. Refreshes and other
+yappers sharing the same image (memes, reposted banners) reuse the stored
+result:
+
+1. Known image URLs are resolved straight from the cache (no download)
+2. Unknown URLs are downloaded and hashed; known content is reused and the
+   URL recorded as an alias
+3. Only genuinely new images go to the vision provider, several per request
+
+Per-yapper pattern analyses are then built from the cached per-image results
+with a text-only call instead of re-sending the images.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from app.database.repositories.tweet_image_analysis_repository import TweetImageAnalysisRepository
+
+logger = logging.getLogger(__name__)
+
+# Bump when IMAGE_ANALYSIS_PROMPT changes so stale analyses are not reused
+IMAGE_ANALYSIS_PROMPT_VERSION = "v1"
+# Images sent to the vision provider per request
+IMAGE_ANALYSIS_BATCH_SIZE = int(os.getenv('IMAGE_ANALYSIS_BATCH_SIZE', '8'))
+# Concurrent image downloads
+IMAGE_DOWNLOAD_CONCURRENCY = int(os.getenv('IMAGE_DOWNLOAD_CONCURRENCY', '8'))
+# Providers reject larger images (Anthropic: 5 MB per image)
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+IMAGE_ANALYSIS_PROMPT = """
+Describe each of the {count} images (in the order given) from crypto Twitter posts.
+
+Return JSON only:
+{{
+    "images": [
+        {{
+            "index": <1-based image number>,
+            "description": "<one or two sentences>",
+            "content_style": "<professional/casual/meme/educational/promotional/other>",
+            "themes": ["theme1", "theme2"],
+            "visual_elements": ["element1", "element2"],
+            "text_in_image": "<visible text or empty>",
+            "dominant_colors": ["color1", "color2"]
+        }}
+    ]
+}}
+"""
+
+
+class TweetImageAnalysisCache:
+    """Per-image analysis with a persistent content-hash cache"""
+
+    def __init__(self, repository: Optional[TweetImageAnalysisRepository] = None,
+                 prompt_version: str = IMAGE_ANALYSIS_PROMPT_VERSION):
+        self.repository = repository or TweetImageAnalysisRepository()
+        self.prompt_version = prompt_version
+        self._stats = {
+            'url_hits': 0,
+            'hash_hits': 0,
+            'analyzed': 0,
+            'failed': 0,
+            'provider_requests': 0,
+        }
+
+    async def _download(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                        url: str, directory: str, index: int) -> Optional[Dict[str, Any]]:
+        """Download one image to disk and hash it (None if unusable)"""
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        logger.warning(f"⚠️ Image download failed ({response.status}): {url}")
+                        return None
+                    content_type = response.headers.get('Content-Type', '')
+                    if content_type and not content_type.startswith('image/'):
+                        logger.warning(f"⚠️ Not an image ({content_type}): {url}")
+                        return None
+                    data = await response.read()
+            except Exception as e:
+                logger.warning(f"⚠️ Image download error for {url}: {e}")
+                return None
+
+        if not data or len(data) > MAX_IMAGE_BYTES:
+            logger.warning(f"⚠️ Skipping image of {len(data)} bytes: {url}")
+            return None
+
+        extension = '.png' if 'png' in content_type else '.webp' if 'webp' in content_type else '.jpg'
+        path = os.path.join(directory, f"image_{index}{extension}")
+        await asyncio.to_thread(self._write_file, path, data)
+        return {'url': url, 'path': path, 'content_hash': hashlib.sha256(data).hexdigest()}
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    async def _analyze_batch(self, llm_service, images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send one batch of new images to the vision provider"""
+        self._stats['provider_requests'] += 1
+        result = await llm_service.analyze_multiple_images_with_fallback(
+            image_paths=[image['path'] for image in images],
+            prompt=IMAGE_ANALYSIS_PROMPT.format(count=len(images)),
+            context={'analysis_type': 'tweet_image_description', 'image_count': len(images)}
+        )
+        if not result or not result.get('success'):
+            error = result.get('error', 'Unknown error') if result else 'No result returned'
+            logger.error(f"❌ Image batch analysis failed: {error}")
+            return []
+
+        parsed = result.get('result') or {}
+        items = parsed.get('images') if isinstance(parsed, dict) else parsed
+        if not isinstance(items, list):
+            logger.warning("⚠️ Image batch analysis returned no per-image list")
+            return []
+
+        entries = []
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get('index', position + 1)) - 1
+            except (TypeError, ValueError):
+                index = position
+            if 0 <= index < len(images):
+                image = images[index]
+                entries.append({
+                    'content_hash': image['content_hash'],
+                    'analysis': {k: v for k, v in item.items() if k != 'index'},
+                    'provider': result.get('provider'),
+                    'source_urls': image['urls'],
+                })
+        return entries
+
+    async def analyze_images(self, image_urls: List[str], llm_service) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-image analyses for a list of image URLs.
+
+        Args:
+            image_urls: Image URLs (duplicates are fine)
+            llm_service: MultiProviderLLMService used for images not in the cache
+
+        Returns:
+            Dict of url -> analysis for every image that could be analyzed
+        """
+        urls = list(dict.fromkeys(url for url in image_urls if url))
+        if not urls:
+            return {}
+
+        # 1. Known URLs: no download needed
+        cached = await asyncio.to_thread(self.repository.get_by_urls, urls, self.prompt_version)
+        results = {url: entry['analysis'] for url, entry in cached.items()}
+        self._stats['url_hits'] += len(results)
+        missing = [url for url in urls if url not in results]
+        if not missing:
+            logger.info(f"♻️ All {len(urls)} images served from analysis cache")
+            return results
+
+        directory = tempfile.mkdtemp(prefix='tweet_images_')
+        try:
+            # 2. Download and hash unknown URLs
+            semaphore = asyncio.Semaphore(IMAGE_DOWNLOAD_CONCURRENCY)
+            timeout = aiohttp.ClientTimeout(total=60)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                downloads = await asyncio.gather(*(
+                    self._download(session, semaphore, url, directory, i) for i, url in enumerate(missing)
+                ))
+
+            by_hash: Dict[str, Dict[str, Any]] = {}
+            for download in downloads:
+                if download is None:
+                    self._stats['failed'] += 1
+                    continue
+                image = by_hash.setdefault(download['content_hash'], {**download, 'urls': []})
+                image['urls'].append(download['url'])
+
+            hash_hits = await asyncio.to_thread(
+                self.repository.get_by_hashes,
+                {content_hash: image['urls'] for content_hash, image in by_hash.items()},
+                self.prompt_version
+            )
+            for content_hash, entry in hash_hits.items():
+                for url in by_hash[content_hash]['urls']:
+                    results[url] = entry['analysis']
+                self._stats['hash_hits'] += len(by_hash[content_hash]['urls'])
+
+            # 3. Only new content goes to the provider, several images per request
+            new_images = [image for content_hash, image in by_hash.items() if content_hash not in hash_hits]
+            if new_images:
+                batches = [
+                    new_images[i:i + IMAGE_ANALYSIS_BATCH_SIZE]
+                    for i in range(0, len(new_images), IMAGE_ANALYSIS_BATCH_SIZE)
+                ]
+                batch_entries = await asyncio.gather(*(self._analyze_batch(llm_service, batch) for batch in batches))
+                entries = [entry for batch in batch_entries for entry in batch]
+                await asyncio.to_thread(self.repository.save_analyses, entries, self.prompt_version)
+                for entry in entries:
+                    for url in entry['source_urls']:
+                        results[url] = entry['analysis']
+                self._stats['analyzed'] += len(entries)
+                self._stats['failed'] += len(new_images) - len(entries)
+
+            logger.info(
+                f"🖼️ Image analyses: {len(cached)} by URL, {sum(len(by_hash[h]['urls']) for h in hash_hits)} by content hash, "
+                f"{len(new_images)} new ({len(results)}/{len(urls)} available)"
+            )
+            return results
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for this process"""
+        return {**self._stats, 'prompt_version': self.prompt_version}
+
+
+def format_image_analyses(image_urls: List[str], analyses: Dict[str, Dict[str, Any]]) -> str:
+    """Render cached per-image analyses as prompt context for per-yapper synthesis"""
+    lines = []
+    for number, url in enumerate(dict.fromkeys(image_urls), start=1):
+        analysis = analyses.get(url)
+        if not analysis:
+            continue
+        themes = ', '.join(analysis.get('themes') or [])
+        elements = ', '.join(analysis.get('visual_elements') or [])
+        colors = ', '.join(analysis.get('dominant_colors') or [])
+        lines.append(
+            f"Image {number}: {analysis.get('description', '')} "
+            f"[style: {analysis.get('content_style', 'unknown')}; themes: {themes}; "
+            f"elements: {elements}; colors: {colors}]"
+        )
+    return "\n".join(lines)
+
+
+# Global instance
+tweet_image_analysis_cache = TweetImageAnalysisCache()
@@ -13,6 +13,7 @@ import tweepy
 import aiofiles
 import requests
 from app.services.llm_providers import MultiProviderLLMService
+from app.services.tweet_image_analysis_cache import tweet_image_analysis_cache, format_image_analyses
 from app.config.settings import settings
 import logging
 
@@ -173,15 +174,12 @@ class TwitterIntelligenceCollector:
                 engagement_metrics=tweet['metrics']
             )
             
-            # Analyze images if present
+            # Analyze images if present (cached per image content hash)
             image_analysis = None
             if tweet['images']:
                 image_urls = [img['url'] for img in tweet['images']]
-                image_analysis = await self.llm_service.analyze_image_with_text(
-                    image_paths=image_urls,
-                    text_prompt=analysis_prompt,
-                    provider="anthropic"
-                )
+                image_analyses = await tweet_image_analysis_cache.analyze_images(image_urls, self.llm_service)
+                image_analysis = [image_analyses[url] for url in image_urls if url in image_analyses] or None
                 
             # Analyze text content
             text_analysis_result = await self.llm_service.analyze_text_content(
@@ -225,25 +223,31 @@ class TwitterIntelligenceCollector:
             if not all_images:
                 return None
                 
+            # Per-image analyses: only images not seen before go to the vision model
+            image_analyses = await tweet_image_analysis_cache.analyze_images(all_images, self.llm_service)
+            if not image_analyses:
+                return None
+                
             # Build batch analysis prompt
             batch_prompt = self._build_batch_intelligence_prompt(
                 tweet_texts=tweet_texts,
                 platform_source=platform_source,
-                leaderboard_position=leaderboard_position
+                leaderboard_position=leaderboard_position,
+                image_descriptions=format_image_analyses(all_images, image_analyses)
             )
             
-            # Perform multi-image analysis
-            batch_analysis = await self.llm_service.analyze_image_with_text(
-                image_paths=all_images,
-                text_prompt=batch_prompt,
+            # Merge the cached image analyses into the cross-tweet pattern analysis (text-only call)
+            batch_result = await self.llm_service.analyze_text_content(
+                prompt=batch_prompt,
                 provider="anthropic"
             )
+            batch_analysis = batch_result.get('content', '') if batch_result.get('success') else ''
             
             return {
                 'tweet_id': 'batch_analysis',
                 'tweet_text': ' | '.join(tweet_texts),
                 'content_type': 'batch_image_analysis',
-                'image_analysis_results': batch_analysis,
+                'image_analysis_results': {url: image_analyses[url] for url in all_images if url in image_analyses},
                 'anthropic_analysis': batch_analysis,
                 'engagement_metrics': self._aggregate_metrics([t['metrics'] for t in image_tweets]),
                 'posting_timing': datetime.utcnow(),
@@ -289,7 +293,7 @@ class TwitterIntelligenceCollector:
         """
         
     def _build_batch_intelligence_prompt(self, tweet_texts: List[str], platform_source: str, 
-                                       leaderboard_position: int) -> str:
+                                       leaderboard_position: int, image_descriptions: str = "") -> str:
         """Build prompt for batch image analysis"""
         tweets_context = "\n".join([f"Tweet {i+1}: {text}" for i, text in enumerate(tweet_texts)])
         
@@ -303,6 +307,9 @@ class TwitterIntelligenceCollector:
         TWEET TEXTS:
         {tweets_context}
 
+        IMAGE ANALYSES:
+        {image_descriptions}
+
         ANALYSIS REQUEST:
         Analyze the visual patterns across these images and identify consistent success elements. Provide insights in JSON format:
 
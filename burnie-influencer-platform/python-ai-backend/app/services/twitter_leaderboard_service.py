@@ -4,6 +4,7 @@ Fetches Twitter data for leaderboard yappers including tweets and images
 """
 
 import asyncio
+import json
 import logging
 import re
 from datetime import datetime, timedelta
@@ -17,6 +18,11 @@ from app.config.settings import get_settings
 from app.services.llm_providers import MultiProviderLLMService
 from app.services.comprehensive_llm_analyzer import ComprehensiveLLMAnalyzer
 from app.services.training_data_populator import TrainingDataPopulator
+from app.services.tweet_image_analysis_cache import tweet_image_analysis_cache, format_image_analyses
+from app.services.twitter_rate_limiter import (
+    twitter_rate_limiter, RateLimitAwareClient, BULK,
+    ENDPOINT_USER_BY_USERNAME, ENDPOINT_USER_TWEETS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +59,7 @@ class TwitterLeaderboardService:
                 return
                 
             # Use Twitter API v2 client with Bearer token (same as TwitterService)
-            self.api = tweepy.Client(
+            self.api = RateLimitAwareClient(
                 bearer_token=self.settings.twitter_bearer_token,
                 consumer_key=self.settings.twitter_api_key,
                 consumer_secret=self.settings.twitter_api_secret,
@@ -94,7 +100,12 @@ class TwitterLeaderboardService:
             logger.info(f"🐦 Fetching Twitter data for @{handle} ({yapper_name})")
             
             # Get user info and tweets using Twitter API v2
-            user = self.api.get_user(username=handle, user_fields=['public_metrics', 'description', 'verified', 'location', 'profile_image_url'])
+            user = await twitter_rate_limiter.call(
+                ENDPOINT_USER_BY_USERNAME,
+                self.api.get_user,
+                username=handle,
+                user_fields=['public_metrics', 'description', 'verified', 'location', 'profile_image_url']
+            )
             
             if not user.data:
                 return {"success": False, "error": "User not found"}
@@ -102,7 +113,9 @@ class TwitterLeaderboardService:
             user_data = user.data
             
             # Get user tweets with media
-            tweets_response = self.api.get_users_tweets(
+            tweets_response = await twitter_rate_limiter.call(
+                ENDPOINT_USER_TWEETS,
+                self.api.get_users_tweets,
                 user_data.id,
                 max_results=20,
                 tweet_fields=['created_at', 'public_metrics', 'attachments', 'entities'],
@@ -481,66 +494,51 @@ class TwitterLeaderboardService:
         """
         Fetch Twitter data for multiple yappers with rate limiting
         
+        Requests run on the bulk lane of the shared rate-limit scheduler, which
+        paces them by the x-rate-limit-* headers instead of fixed sleeps.
+        
         Args:
             yapper_handles: List of (twitter_handle, yapper_name) tuples
-            batch_size: Number of concurrent requests
+            batch_size: Maximum number of yappers processed concurrently
             
         Returns:
-            List of Twitter data results
+            List of Twitter data results (same order as yapper_handles)
         """
-        results = []
+        semaphore = asyncio.Semaphore(max(1, batch_size))
         
-        # Process in batches to respect rate limits
-        for i in range(0, len(yapper_handles), batch_size):
-            batch = yapper_handles[i:i + batch_size]
-            
-            # Create tasks for current batch
+        async def fetch_one(handle: str, name: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.fetch_yapper_twitter_data(handle, name)
+                except Exception as e:
+                    logger.error(f"Exception for {handle}: {str(e)}")
+                    return {
+                        "success": False,
+                        "twitter_handle": handle,
+                        "yapper_name": name,
+                        "error": str(e)
+                    }
+        
+        with twitter_rate_limiter.lane(BULK):
             tasks = [
-                self.fetch_yapper_twitter_data(handle, name) 
-                for handle, name in batch
+                asyncio.create_task(fetch_one(handle, name))
+                for handle, name in yapper_handles
             ]
-            
-            # Execute batch
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results
-            for j, result in enumerate(batch_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Exception for {batch[j][0]}: {str(result)}")
-                    results.append({
-                        "success": False,
-                        "twitter_handle": batch[j][0],
-                        "yapper_name": batch[j][1],
-                        "error": str(result)
-                    })
-                else:
-                    results.append(result)
-            
-            # Wait between batches to respect rate limits
-            if i + batch_size < len(yapper_handles):
-                logger.info(f"Processed batch {i//batch_size + 1}, waiting before next batch...")
-                await asyncio.sleep(60)  # 1 minute between batches
         
-        return results
+        results = await asyncio.gather(*tasks)
+        logger.info(f"✅ Fetched Twitter data for {sum(1 for r in results if r.get('success'))}/{len(results)} yappers")
+        return list(results)
     
     def get_rate_limit_status(self) -> Dict[str, Any]:
-        """Get current rate limit status"""
-        if not self.api:
-            return {"error": "Twitter API not available"}
-        
-        try:
-            rate_limit = self.api.get_rate_limit_status()
-            return {
-                "users": rate_limit['resources']['users'],
-                "statuses": rate_limit['resources']['statuses'],
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            return {"error": str(e)}
+        """Get current rate limit status as tracked from response headers"""
+        return {
+            "endpoints": twitter_rate_limiter.get_queue_state(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
     
     async def _analyze_images_with_anthropic(self, image_urls: List[str], twitter_handle: str, tweets: List[Dict[str, Any]]) -> str:
         """
-        Analyze tweet images using Anthropic multi-image analysis
+        Analyze tweet images using cached per-image analyses (new images via Anthropic multi-image analysis)
         Returns a concise analysis (max 200 words) about the yapper's visual content patterns
         """
         try:
@@ -550,6 +548,11 @@ class TwitterLeaderboardService:
             # Limit to first 10 images to avoid overwhelming the analysis
             limited_images = image_urls[:10]
             
+            # Per-image analyses come from the content-hash cache; only new images hit the vision model
+            image_analyses = await tweet_image_analysis_cache.analyze_images(limited_images, self.llm_service)
+            if not image_analyses:
+                return "Analysis unavailable: no images could be analyzed"
+            
             # Gather context from tweets with images
             tweet_contexts = []
             for tweet in tweets:
@@ -566,6 +569,9 @@ class TwitterLeaderboardService:
             Context - Tweet texts with these images:
             {chr(10).join([f"- {ctx['text']} (engagement: {ctx['engagement']})" for ctx in tweet_contexts[:5]])}
             
+            Image analyses:
+            {format_image_analyses(limited_images, image_analyses)}
+            
             Provide a concise analysis (MAX 200 words) covering:
             1. Visual content themes and patterns
             2. Content style (professional/casual/meme/educational)
@@ -576,19 +582,13 @@ class TwitterLeaderboardService:
             Focus on actionable insights for content creation and platform success.
             """
             
-            # Use multi-image analysis with fallback
-            result = await self.llm_service.analyze_multiple_images_with_fallback(
-                image_paths=limited_images,
-                prompt=prompt,
-                context={
-                    'yapper_handle': twitter_handle,
-                    'analysis_type': 'leaderboard_content_patterns',
-                    'image_count': len(limited_images)
-                }
-            )
+            # Merge the cached image analyses into a per-yapper summary (text-only call)
+            result = await self.llm_service.analyze_text_content(prompt, provider="anthropic")
             
             if result and result.get('success'):
-                analysis_text = result.get('analysis', '')
+                analysis_text = result.get('content', '')
+                if not isinstance(analysis_text, str):
+                    analysis_text = json.dumps(analysis_text)
                 
                 # Ensure the analysis is within 200 words
                 words = analysis_text.split()
@@ -0,0 +1,290 @@
+"""
+Twitter Rate Limit Scheduler
+Header-driven request scheduler for Twitter API v2 calls.
+
+Instead of fixed sleeps between batches or blind backoff, every request goes
+through a per-endpoint budget that is kept in sync with the
+x-rate-limit-limit / x-rate-limit-remaining / x-rate-limit-reset headers of
+the responses. Requests are dispatched as fast as the remaining budget allows:
+
+- Two priority lanes: INTERACTIVE (user-facing) always goes first, BULK
+  (leaderboard / yapper refreshes) leaves a reserve of the window untouched
+- When a window is exhausted, waiters sleep until the reset timestamp
+- Queue state per endpoint is exposed for monitoring
+
+The lane is carried in a context variable so bulk jobs can switch all nested
+Twitter calls to the bulk lane with `with twitter_rate_limiter.lane(BULK):`.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tweepy
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Endpoint keys (normalized "METHOD route" as seen by tweepy)
+ENDPOINT_USER_BY_USERNAME = "GET /2/users/by/username/:username"
+ENDPOINT_USER_TWEETS = "GET /2/users/:id/tweets"
+ENDPOINT_SEARCH_RECENT = "GET /2/tweets/search/recent"
+
+# Fraction of each window the bulk lane must leave for interactive requests
+BULK_RESERVE_FRACTION = float(os.getenv('TWITTER_BULK_RESERVE_FRACTION', '0.1'))
+# Max concurrent in-flight requests per endpoint
+MAX_IN_FLIGHT_PER_ENDPOINT = int(os.getenv('TWITTER_MAX_IN_FLIGHT_PER_ENDPOINT', '5'))
+# Fallback window when a 429 arrives without a reset header (Twitter windows are 15 min)
+DEFAULT_WINDOW_SECONDS = 15 * 60
+
+_current_lane: contextvars.ContextVar[int] = contextvars.ContextVar('twitter_request_lane', default=INTERACTIVE)
+
+_ROUTE_PATTERNS = [
+    (re.compile(r'^/2/users/by/username/[^/]+'), '/2/users/by/username/:username'),
+    (re.compile(r'^/2/users/\d+'), '/2/users/:id'),
+    (re.compile(r'^/2/tweets/\d+'), '/2/tweets/:id'),
+]
+
+
+def normalize_endpoint(method: str, route: str) -> str:
+    """Collapse ids/usernames in a route so budgets are tracked per endpoint"""
+    path = route.split('?', 1)[0]
+    for pattern, replacement in _ROUTE_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return f"{method.upper()} {path}"
+
+
+def _header_int(headers: Any, name: str) -> Optional[int]:
+    try:
+        value = headers.get(name) if headers is not None else None
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class EndpointBudget:
+    """Rate-limit window state for one endpoint"""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None  # epoch seconds
+    in_flight: int = 0
+    dispatched: int = 0
+    rate_limited: int = 0
+    waiters: List[Tuple[int, int, Any, Any]] = field(default_factory=list)  # (lane, seq, loop, future)
+    timer_armed: bool = False
+
+    def roll_window(self, now: float):
+        """Start a fresh window once the reset time has passed"""
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+    def can_dispatch(self, lane: int, now: float) -> bool:
+        self.roll_window(now)
+        if self.in_flight >= MAX_IN_FLIGHT_PER_ENDPOINT:
+            return False
+        if self.remaining is None:
+            # Budget unknown: send a single probe and learn it from the headers
+            return self.in_flight == 0
+        reserve = 0
+        if lane == BULK and self.limit:
+            reserve = max(1, int(self.limit * BULK_RESERVE_FRACTION))
+        return self.remaining > reserve
+
+
+class TwitterRateLimitScheduler:
+    """Per-endpoint, header-driven scheduler for Twitter API requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, EndpointBudget] = {}
+        self._seq = itertools.count()
+
+    def _budget(self, endpoint: str) -> EndpointBudget:
+        budget = self._budgets.get(endpoint)
+        if budget is None:
+            budget = EndpointBudget()
+            self._budgets[endpoint] = budget
+        return budget
+
+    @contextmanager
+    def lane(self, lane: int):
+        """Run all Twitter calls in this context on the given lane"""
+        token = _current_lane.set(lane)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    # ---- header feedback -------------------------------------------------
+
+    def observe(self, endpoint: str, headers: Any, status_code: Optional[int] = None):
+        """Update an endpoint's budget from response headers (safe from any thread)"""
+        limit = _header_int(headers, 'x-rate-limit-limit')
+        remaining = _header_int(headers, 'x-rate-limit-remaining')
+        reset = _header_int(headers, 'x-rate-limit-reset')
+
+        with self._lock:
+            budget = self._budget(endpoint)
+            if limit is not None:
+                budget.limit = limit
+            if remaining is not None:
+                budget.remaining = remaining
+            if reset is not None:
+                budget.reset_at = float(reset)
+            if status_code == 429:
+                budget.rate_limited += 1
+                budget.remaining = 0
+                if budget.reset_at is None or budget.reset_at <= time.time():
+                    budget.reset_at = time.time() + DEFAULT_WINDOW_SECONDS
+            self._pump_locked(endpoint, budget)
+
+    def retry_delay(self, endpoint: Optional[str] = None, exc: Optional[Exception] = None) -> Optional[float]:
+        """Seconds until the window for this endpoint (or the one in a 429 response) resets"""
+        reset_at = None
+        response = getattr(exc, 'response', None) if exc is not None else None
+        if response is not None:
+            reset = _header_int(getattr(response, 'headers', None), 'x-rate-limit-reset')
+            if reset is not None:
+                reset_at = float(reset)
+        if reset_at is None and endpoint:
+            with self._lock:
+                budget = self._budgets.get(endpoint)
+                reset_at = budget.reset_at if budget else None
+        if reset_at is None:
+            return None
+        return max(0.0, reset_at - time.time()) + 1.0
+
+    # ---- dispatch ----------------------------------------------------------
+
+    def _pump_locked(self, endpoint: str, budget: EndpointBudget):
+        """Grant slots to waiters in priority order while the budget allows (lock held)"""
+        now = time.time()
+        while budget.waiters:
+            lane, _, loop, future = budget.waiters[0]
+            if future.done():
+                heapq.heappop(budget.waiters)
+                continue
+            if not budget.can_dispatch(lane, now):
+                break
+            heapq.heappop(budget.waiters)
+            self._consume_locked(budget)
+            loop.call_soon_threadsafe(self._grant, endpoint, future)
+
+        if budget.waiters and not budget.timer_armed \
+                and budget.remaining is not None and budget.in_flight < MAX_IN_FLIGHT_PER_ENDPOINT:
+            # Blocked on the window, not on concurrency: wake up when it resets. Without a
+            # reset from the headers, assume a standard window from now so the budget refills
+            if budget.reset_at is None:
+                budget.reset_at = now + DEFAULT_WINDOW_SECONDS
+            _, _, loop, _ = budget.waiters[0]
+            budget.timer_armed = True
+            delay = max(0.0, budget.reset_at - now) + 0.5
+            logger.info(f"⏳ Twitter {endpoint}: window exhausted, {len(budget.waiters)} waiting, resuming in {delay:.0f}s")
+            loop.call_soon_threadsafe(loop.call_later, delay, self._on_timer, endpoint)
+
+    def _consume_locked(self, budget: EndpointBudget):
+        budget.in_flight += 1
+        budget.dispatched += 1
+        if budget.remaining is not None:
+            budget.remaining -= 1
+
+    def _grant(self, endpoint: str, future):
+        if future.done():
+            # Waiter gave up after the slot was granted; hand it back
+            self.release(endpoint)
+            return
+        future.set_result(True)
+
+    def _on_timer(self, endpoint: str):
+        with self._lock:
+            budget = self._budget(endpoint)
+            budget.timer_armed = False
+            self._pump_locked(endpoint, budget)
+
+    async def acquire(self, endpoint: str, lane: Optional[int] = None):
+        """Wait for a slot on an endpoint"""
+        lane = _current_lane.get() if lane is None else lane
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            budget = self._budget(endpoint)
+            if not budget.waiters and budget.can_dispatch(lane, time.time()):
+                self._consume_locked(budget)
+                return
+            future = loop.create_future()
+            heapq.heappush(budget.waiters, (lane, next(self._seq), loop, future))
+            self._pump_locked(endpoint, budget)
+        await future
+
+    def release(self, endpoint: str):
+        """Return a slot after the request completed"""
+        with self._lock:
+            budget = self._budget(endpoint)
+            budget.in_flight = max(0, budget.in_flight - 1)
+            self._pump_locked(endpoint, budget)
+
+    async def call(self, endpoint: str, func: Callable, *args, lane: Optional[int] = None, **kwargs):
+        """
+        Run a blocking tweepy call under the endpoint budget.
+
+        The call runs in a worker thread so the event loop is never blocked;
+        headers are fed back by RateLimitAwareClient.
+        """
+        await self.acquire(endpoint, lane)
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        finally:
+            self.release(endpoint)
+
+    def get_queue_state(self) -> Dict[str, Any]:
+        """Snapshot of budgets and queues per endpoint"""
+        now = time.time()
+        state = {}
+        with self._lock:
+            for endpoint, budget in self._budgets.items():
+                budget.roll_window(now)
+                waiting = {name: 0 for name in LANE_NAMES.values()}
+                for lane, _, _, future in budget.waiters:
+                    if not future.done():
+                        waiting[LANE_NAMES.get(lane, str(lane))] += 1
+                state[endpoint] = {
+                    "limit": budget.limit,
+                    "remaining": budget.remaining,
+                    "reset_in_seconds": round(budget.reset_at - now, 1) if budget.reset_at else None,
+                    "in_flight": budget.in_flight,
+                    "waiting": waiting,
+                    "dispatched": budget.dispatched,
+                    "rate_limited": budget.rate_limited,
+                }
+        return state
+
+
+class RateLimitAwareClient(tweepy.Client):
+    """tweepy.Client that reports rate-limit headers of every response to the scheduler"""
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        endpoint = normalize_endpoint(method, route)
+        try:
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        except tweepy.TooManyRequests as e:
+            twitter_rate_limiter.observe(endpoint, getattr(e.response, 'headers', None), status_code=429)
+            raise
+        twitter_rate_limiter.observe(endpoint, response.headers, status_code=response.status_code)
+        return response
+
+
+# Global instance
+twitter_rate_limiter = TwitterRateLimitScheduler()
@@ -2,26 +2,36 @@ import os
 import tweepy
 import logging
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, replace
+from collections import OrderedDict
 import re
 import random
+import threading
 import time
 from functools import wraps
 
 from app.config.settings import settings
+from app.database.repositories.twitter_thread_repository import TwitterThreadRepository
+from app.services.twitter_rate_limiter import (
+    twitter_rate_limiter, RateLimitAwareClient,
+    ENDPOINT_USER_BY_USERNAME, ENDPOINT_USER_TWEETS, ENDPOINT_SEARCH_RECENT
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def retry_on_rate_limit(max_retries: int = 3, base_delay: float = 60.0):
     """
-    Decorator to retry Twitter API calls with exponential backoff on rate limits
+    Decorator to retry Twitter API calls on rate limits
+    
+    Waits until the x-rate-limit-reset of the 429 response when available,
+    falling back to exponential backoff when the response has no headers.
     
     Args:
         max_retries: Maximum number of retry attempts
-        base_delay: Base delay in seconds (Twitter rate limit window is typically 15 minutes)
+        base_delay: Base delay in seconds for the fallback backoff
     """
     def decorator(func):
         @wraps(func)
@@ -39,11 +49,13 @@ def retry_on_rate_limit(max_retries: int = 3, base_delay: float = 60.0):
                         logger.error(f"❌ Twitter API rate limit exceeded after {max_retries} retries")
                         raise e
                     
-                    # Calculate delay with exponential backoff + jitter
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 5)
+                    # Wait for the window reset reported by Twitter, else exponential backoff + jitter
+                    delay = twitter_rate_limiter.retry_delay(exc=e)
+                    if delay is None:
+                        delay = base_delay * (2 ** attempt) + random.uniform(0, 5)
                     
                     logger.warning(f"⚠️ Twitter API rate limit exceeded (attempt {attempt + 1}/{max_retries + 1})")
-                    logger.info(f"🔄 Retrying in {delay:.1f} seconds with exponential backoff...")
+                    logger.info(f"🔄 Retrying in {delay:.1f} seconds...")
                     
                     await asyncio.sleep(delay)
                     continue
@@ -60,6 +72,46 @@ def retry_on_rate_limit(max_retries: int = 3, base_delay: float = 60.0):
         return wrapper
     return decorator
 
+# Recent search query length limit (512 on Basic access, 1024 on Pro)
+SEARCH_QUERY_MAX_LENGTH = int(os.getenv('TWITTER_SEARCH_QUERY_MAX_LENGTH', '512'))
+# Max result pages read per combined conversation query
+THREAD_SEARCH_MAX_PAGES = int(os.getenv('TWITTER_THREAD_SEARCH_MAX_PAGES', '5'))
+# Threads without new tweets for this long are treated as complete and never refetched
+THREAD_SETTLE_HOURS = int(os.getenv('TWITTER_THREAD_SETTLE_HOURS', '24'))
+# Seconds before a still-active thread is refetched
+THREAD_CACHE_TTL_SECONDS = int(os.getenv('TWITTER_THREAD_CACHE_TTL_SECONDS', '900'))
+THREAD_CACHE_MAX_ENTRIES = int(os.getenv('TWITTER_THREAD_CACHE_MAX_ENTRIES', '5000'))
+
+TWITTER_EPOCH_MS = 1288834974657
+
+
+def conversation_created_at(conversation_id: str) -> Optional[datetime]:
+    """Creation time encoded in a tweet/conversation snowflake id"""
+    try:
+        timestamp_ms = (int(conversation_id) >> 22) + TWITTER_EPOCH_MS
+    except (TypeError, ValueError):
+        return None
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+
+
+def build_conversation_batches(conversation_ids: List[str], max_length: int = SEARCH_QUERY_MAX_LENGTH) -> List[List[str]]:
+    """Pack conversation IDs into OR-combined search queries that fit the query length limit"""
+    batches = []
+    current: List[str] = []
+    length = 0
+    for conversation_id in conversation_ids:
+        term_length = len(f"conversation_id:{conversation_id}")
+        added = term_length if not current else term_length + len(" OR ")
+        if current and length + added > max_length:
+            batches.append(current)
+            current, length, added = [], 0, term_length
+        current.append(conversation_id)
+        length += added
+    if current:
+        batches.append(current)
+    return batches
+
+
 @dataclass
 class TwitterPost:
     """Data class to represent a Twitter post"""
@@ -80,6 +132,88 @@ class TwitterThread:
     thread_tweets: List[TwitterPost]
     total_tweets: int
 
+class ThreadCache:
+    """
+    Reconstructed threads shared by all TwitterService instances: an in-process LRU
+    in front of the twitter_thread_cache table, which keeps complete threads across
+    restarts and worker processes. Used from request handlers and worker threads.
+    """
+    
+    def __init__(self, max_entries: int = THREAD_CACHE_MAX_ENTRIES, ttl_seconds: int = THREAD_CACHE_TTL_SECONDS,
+                 repository: Optional[TwitterThreadRepository] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.repository = repository or TwitterThreadRepository()
+        self._entries: "OrderedDict[str, Tuple[List[TwitterPost], bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+    
+    def get(self, conversation_id: str) -> Optional[List[TwitterPost]]:
+        """Cached thread (copies), or None when missing or an active thread expired"""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or (not entry[1] and time.monotonic() - entry[2] >= self.ttl_seconds):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return [replace(post) for post in entry[0]]
+    
+    def put(self, conversation_id: str, posts: List[TwitterPost], complete: bool):
+        entry = ([replace(post) for post in posts], complete, time.monotonic())
+        with self._lock:
+            self._entries[conversation_id] = entry
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def load_complete(self, conversation_ids: List[str]) -> Dict[str, List[TwitterPost]]:
+        """Complete threads stored in the database, also added to the LRU (blocking)"""
+        threads = {}
+        for conversation_id, records in self.repository.get_threads(conversation_ids).items():
+            try:
+                threads[conversation_id] = [self._post_from_record(record) for record in records]
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable stored thread {conversation_id}: {e}")
+                continue
+            self.put(conversation_id, threads[conversation_id], complete=True)
+        with self._lock:
+            self.store_hits += len(threads)
+        return threads
+    
+    def save_complete(self, threads: Dict[str, List[TwitterPost]]) -> int:
+        """Persist threads that can no longer grow (blocking)"""
+        return self.repository.save_threads({
+            conversation_id: [self._post_to_record(post) for post in posts]
+            for conversation_id, posts in threads.items()
+        })
+    
+    @staticmethod
+    def _post_to_record(post: TwitterPost) -> Dict:
+        record = asdict(post)
+        record['created_at'] = post.created_at.isoformat() if post.created_at else None
+        return record
+    
+    @staticmethod
+    def _post_from_record(record: Dict) -> TwitterPost:
+        created_at = record['created_at']
+        return TwitterPost(**{**record, 'created_at': datetime.fromisoformat(created_at) if created_at else None})
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'complete': sum(1 for _, complete, _ in self._entries.values() if complete),
+                'hits': self.hits,
+                'misses': self.misses,
+                'store_hits': self.store_hits,
+            }
+
+
+thread_cache = ThreadCache()
+
 class TwitterService:
     """Service for fetching Twitter data using Twitter API v2"""
     
@@ -97,7 +231,7 @@ class TwitterService:
             
         try:
             # Initialize Twitter API v2 client
-            self.client = tweepy.Client(
+            self.client = RateLimitAwareClient(
                 bearer_token=self.bearer_token,
                 consumer_key=self.api_key,
                 consumer_secret=self.api_secret,
@@ -145,7 +279,9 @@ class TwitterService:
             return None
         
         try:
-            user = self.client.get_user(username=username)
+            user = await twitter_rate_limiter.call(
+                ENDPOINT_USER_BY_USERNAME, self.client.get_user, username=username
+            )
             if user.data:
                 logger.info(f"✅ Found user ID for @{username}: {user.data.id}")
                 return user.data.id
@@ -170,7 +306,8 @@ class TwitterService:
         self, 
         username: str, 
         max_results: int = 30,
-        since_id: Optional[str] = None
+        since_id: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> List[TwitterPost]:
         """
         Fetch recent tweets from a user
@@ -179,6 +316,7 @@ class TwitterService:
             username: Twitter username (with or without @)
             max_results: Maximum number of tweets to fetch (max 100)
             since_id: Only fetch tweets after this tweet ID
+            user_id: Known Twitter user ID (skips the username lookup)
             
         Returns:
             List of TwitterPost objects
@@ -187,7 +325,8 @@ class TwitterService:
             logger.error("❌ Twitter client not available")
             return []
         
-        user_id = await self.get_user_id(username)
+        if not user_id:
+            user_id = await self.get_user_id(username)
         if not user_id:
             return []
         
@@ -208,7 +347,9 @@ class TwitterService:
             kwargs['since_id'] = since_id
         
         # Fetch tweets (rate limit handling is done by decorator)
-        tweets = self.client.get_users_tweets(user_id, **kwargs)
+        tweets = await twitter_rate_limiter.call(
+            ENDPOINT_USER_TWEETS, self.client.get_users_tweets, user_id, **kwargs
+        )
         
         if not tweets.data:
             logger.info(f"📭 No tweets found for @{username}")
@@ -251,61 +392,148 @@ class TwitterService:
         
         return twitter_posts
     
+    def _build_post(self, tweet, conversation_id: str, position: int) -> TwitterPost:
+        """Convert an API tweet from a conversation search into a TwitterPost"""
+        metrics = tweet.public_metrics or {}
+        return TwitterPost(
+            tweet_id=tweet.id,
+            conversation_id=conversation_id,
+            text=tweet.text,
+            created_at=tweet.created_at,
+            author_username="", # Will be filled by caller
+            is_thread_start=(position == 1),
+            thread_position=position,
+            hashtags=self.extract_hashtags(tweet.text),
+            engagement_metrics={
+                'likes': metrics.get('like_count', 0),
+                'retweets': metrics.get('retweet_count', 0),
+                'replies': metrics.get('reply_count', 0),
+                'views': metrics.get('impression_count', 0)
+            }
+        )
+    
     @retry_on_rate_limit(max_retries=3, base_delay=60.0)
-    async def fetch_thread_tweets(self, conversation_id: str) -> List[TwitterPost]:
+    async def _search_conversations(self, conversation_ids: List[str]) -> Tuple[Dict[str, list], bool]:
         """
-        Fetch all tweets in a thread/conversation
+        Fetch the tweets of several conversations with one combined search query
+        
+        Returns:
+            Tuple of (tweets per conversation_id, truncated) where truncated means
+            the page cap was hit before all results were read
+        """
+        query = " OR ".join(f"conversation_id:{cid}" for cid in conversation_ids)
+        tweets_by_conversation = {cid: [] for cid in conversation_ids}
+        next_token = None
+        
+        for _ in range(THREAD_SEARCH_MAX_PAGES):
+            kwargs = {
+                'query': query,
+                'max_results': 100,  # Max results per request
+                'tweet_fields': ['id', 'text', 'created_at', 'conversation_id', 'author_id', 'public_metrics']
+            }
+            if next_token:
+                kwargs['next_token'] = next_token
+            
+            tweets = await twitter_rate_limiter.call(
+                ENDPOINT_SEARCH_RECENT, self.client.search_recent_tweets, **kwargs
+            )
+            
+            for tweet in tweets.data or []:
+                conversation_id = str(tweet.conversation_id)
+                if conversation_id in tweets_by_conversation:
+                    tweets_by_conversation[conversation_id].append(tweet)
+            
+            next_token = (tweets.meta or {}).get('next_token')
+            if not next_token:
+                return tweets_by_conversation, False
+        
+        logger.warning(f"⚠️ Conversation search hit the {THREAD_SEARCH_MAX_PAGES}-page cap for {len(conversation_ids)} conversations")
+        return tweets_by_conversation, True
+    
+    async def fetch_threads(self, conversation_ids: List[str]) -> Dict[str, List[TwitterPost]]:
+        """
+        Fetch all tweets of several threads/conversations
+        
+        Cached threads are reused: complete ones are never fetched again and are
+        also looked up in the database before searching. The rest are packed into combined OR queries that run concurrently under
+        the search endpoint's rate-limit budget.
         
         Args:
-            conversation_id: Twitter conversation ID
+            conversation_ids: Twitter conversation IDs
             
         Returns:
-            List of TwitterPost objects in thread order
+            Dict of conversation_id -> TwitterPost objects in thread order
         """
         if not self.client:
             logger.error("❌ Twitter client not available")
-            return []
+            return {}
+        
+        results: Dict[str, List[TwitterPost]] = {}
+        missing = []
+        for conversation_id in dict.fromkeys(str(cid) for cid in conversation_ids):
+            cached = thread_cache.get(conversation_id)
+            if cached is not None:
+                results[conversation_id] = cached
+            else:
+                missing.append(conversation_id)
         
-        # Search for tweets in this conversation
-        query = f"conversation_id:{conversation_id}"
+        if missing:
+            stored = await asyncio.to_thread(thread_cache.load_complete, missing)
+            results.update(stored)
+            missing = [conversation_id for conversation_id in missing if conversation_id not in stored]
         
-        tweets = self.client.search_recent_tweets(
-            query=query,
-            max_results=100,  # Max results per request
-            tweet_fields=['id', 'text', 'created_at', 'conversation_id', 'author_id', 'public_metrics']
-        )
+        if not missing:
+            return results
         
-        if not tweets.data:
-            return []
+        batches = build_conversation_batches(missing)
+        logger.info(f"🧵 Fetching {len(missing)} threads in {len(batches)} search requests ({len(results)} cached)")
         
-        # Convert to TwitterPost objects and sort by creation time
-        thread_posts = []
-        for i, tweet in enumerate(sorted(tweets.data, key=lambda x: x.created_at)):
-            hashtags = self.extract_hashtags(tweet.text)
-            
-            metrics = tweet.public_metrics or {}
-            engagement = {
-                'likes': metrics.get('like_count', 0),
-                'retweets': metrics.get('retweet_count', 0),
-                'replies': metrics.get('reply_count', 0),
-                'views': metrics.get('impression_count', 0)
-            }
-            
-            post = TwitterPost(
-                tweet_id=tweet.id,
-                conversation_id=conversation_id,
-                text=tweet.text,
-                created_at=tweet.created_at,
-                author_username="", # Will be filled by caller
-                is_thread_start=(i == 0),
-                thread_position=i + 1,
-                hashtags=hashtags,
-                engagement_metrics=engagement
-            )
+        responses = await asyncio.gather(
+            *(self._search_conversations(batch) for batch in batches),
+            return_exceptions=True
+        )
+        
+        now = datetime.now(timezone.utc)
+        complete_threads: Dict[str, List[TwitterPost]] = {}
+        for batch, response in zip(batches, responses):
+            if isinstance(response, Exception):
+                logger.error(f"❌ Error fetching threads {batch[0]}..{batch[-1]}: {response}")
+                continue
             
-            thread_posts.append(post)
+            tweets_by_conversation, truncated = response
+            for conversation_id, tweets in tweets_by_conversation.items():
+                ordered = sorted(tweets, key=lambda x: x.created_at)
+                thread_posts = [
+                    self._build_post(tweet, conversation_id, i + 1)
+                    for i, tweet in enumerate(ordered)
+                ]
+                results[conversation_id] = thread_posts
+                
+                # Settled threads cannot grow any more: cache them for good
+                last_activity = ordered[-1].created_at if ordered else conversation_created_at(conversation_id)
+                settled = last_activity is not None and now - last_activity >= timedelta(hours=THREAD_SETTLE_HOURS)
+                complete = settled and not truncated
+                thread_cache.put(conversation_id, thread_posts, complete=complete)
+                if complete:
+                    complete_threads[conversation_id] = thread_posts
+        
+        if complete_threads:
+            await asyncio.to_thread(thread_cache.save_complete, complete_threads)
+        
+        return results
+    
+    async def fetch_thread_tweets(self, conversation_id: str) -> List[TwitterPost]:
+        """
+        Fetch all tweets in a thread/conversation
         
-        return thread_posts
+        Args:
+            conversation_id: Twitter conversation ID
+            
+        Returns:
+            List of TwitterPost objects in thread order
+        """
+        threads = await self.fetch_threads([conversation_id])
+        return threads.get(str(conversation_id), [])
     
     async def identify_and_fetch_threads(self, posts: List[TwitterPost]) -> List[TwitterThread]:
         """
@@ -317,29 +545,39 @@ class TwitterService:
         Returns:
             List of TwitterThread objects
         """
-        threads = []
+        # Check which posts could be part of a thread
+        # Heuristics: tweet ends with common thread indicators
+        thread_indicators = ['👇', '🧵', '1/', '1.', 'thread', 'Thread', '(1/']
+        candidates: Dict[str, str] = {}  # conversation_id -> author username
         
         for post in posts:
-            # Check if this could be a thread starter
-            # Heuristics: tweet ends with common thread indicators
-            thread_indicators = ['👇', '🧵', '1/', '1.', 'thread', 'Thread', '(1/']
             is_likely_thread = any(indicator in post.text for indicator in thread_indicators)
+            conversation_id = str(post.conversation_id)
             
-            if is_likely_thread or post.conversation_id != post.tweet_id:
-                # Fetch the complete thread
-                thread_tweets = await self.fetch_thread_tweets(post.conversation_id)
+            if is_likely_thread or conversation_id != str(post.tweet_id):
+                candidates.setdefault(conversation_id, post.author_username)
+        
+        if not candidates:
+            return []
+        
+        # Fetch the complete threads
+        fetched = await self.fetch_threads(list(candidates))
+        
+        threads = []
+        for conversation_id, author_username in candidates.items():
+            thread_tweets = fetched.get(conversation_id, [])
+            
+            if len(thread_tweets) > 1:  # It's actually a thread
+                # Update author usernames
+                for tweet in thread_tweets:
+                    tweet.author_username = author_username
                 
-                if len(thread_tweets) > 1:  # It's actually a thread
-                    # Update author usernames
-                    for tweet in thread_tweets:
-                        tweet.author_username = post.author_username
-                    
-                    thread = TwitterThread(
-                        main_tweet=thread_tweets[0],
-                        thread_tweets=thread_tweets[1:],
-                        total_tweets=len(thread_tweets)
-                    )
-                    threads.append(thread)
+                thread = TwitterThread(
+                    main_tweet=thread_tweets[0],
+                    thread_tweets=thread_tweets[1:],
+                    total_tweets=len(thread_tweets)
+                )
+                threads.append(thread)
         
         return threads
     
@@ -347,7 +585,8 @@ class TwitterService:
         self, 
         username: str, 
         count: int = 30,
-        since_id: Optional[str] = None
+        since_id: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> Tuple[List[TwitterPost], List[TwitterThread]]:
         """
         Get latest tweets and identify/fetch complete threads
@@ -356,6 +595,7 @@ class TwitterService:
             username: Twitter username
             count: Number of tweets to fetch
             since_id: Only fetch tweets after this ID
+            user_id: Known Twitter user ID (skips the username lookup)
             
         Returns:
             Tuple of (individual_posts, complete_threads)
@@ -364,10 +604,13 @@ class TwitterService:
             logger.error("❌ Twitter client not available")
             return [], []
         
-        logger.info(f"🐦 Fetching latest {count} tweets for @{username}")
+        if since_id:
+            logger.info(f"🐦 Fetching up to {count} tweets for @{username} newer than {since_id}")
+        else:
+            logger.info(f"🐦 Fetching latest {count} tweets for @{username}")
         
         # Fetch user's recent tweets
-        posts = await self.fetch_user_tweets(username, count, since_id)
+        posts = await self.fetch_user_tweets(username, count, since_id, user_id)
         
         if not posts:
             return [], []
@@ -0,0 +1,127 @@
+"""
+Twitter Sync Watermarks Service
+Plans incremental tweet syncs from per-handle watermarks stored in the database.
+
+Every refresh path (leaderboard yappers, platform yappers, popular handles)
+records the newest tweet id it has stored for a handle. The next refresh asks
+Twitter only for tweets after that id (since_id) and reuses the stored user id,
+so unchanged handles cost a single cheap request instead of a full timeline
+download. A full re-sync still runs on a schedule (TWITTER_FULL_RESYNC_HOURS)
+to pick up deletions and refreshed engagement metrics.
+
+Each consumer stores tweets in its own table, so watermarks are kept per
+(handle, scope) and a watermark is only advanced after the tweets were stored.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.database.repositories.twitter_sync_watermark_repository import TwitterSyncWatermarkRepository
+
+logger = logging.getLogger(__name__)
+
+SCOPE_LEADERBOARD = "leaderboard"
+SCOPE_PLATFORM_YAPPER = "platform_yapper"
+SCOPE_POPULAR_HANDLE = "popular_handle"
+
+# Hours between full (non-incremental) re-syncs of a handle
+TWITTER_FULL_RESYNC_HOURS = int(os.getenv('TWITTER_FULL_RESYNC_HOURS', '168'))
+
+
+@dataclass
+class SyncPlan:
+    """How the next fetch for a handle should run"""
+    handle: str
+    scope: str
+    since_id: Optional[str] = None
+    twitter_user_id: Optional[str] = None
+    full_sync: bool = True
+    reason: str = "no watermark"
+    has_watermark: bool = False
+
+    @property
+    def is_incremental(self) -> bool:
+        return not self.full_sync and self.since_id is not None
+
+    def as_full(self, reason: str) -> "SyncPlan":
+        """The same plan run as a full sync (recorded as one when the watermark is saved)"""
+        return replace(self, since_id=None, full_sync=True, reason=reason)
+
+
+def newest_tweet_id(tweet_ids: Iterable[Any]) -> Optional[str]:
+    """Highest tweet id (tweet ids are time-ordered snowflakes)"""
+    newest = None
+    for tweet_id in tweet_ids:
+        try:
+            value = int(tweet_id)
+        except (TypeError, ValueError):
+            continue
+        if newest is None or value > newest:
+            newest = value
+    return str(newest) if newest is not None else None
+
+
+class TwitterSyncWatermarkService:
+    """Plans and records incremental tweet syncs per handle"""
+
+    def __init__(self, repository: Optional[TwitterSyncWatermarkRepository] = None,
+                 full_resync_hours: int = TWITTER_FULL_RESYNC_HOURS):
+        self.repository = repository or TwitterSyncWatermarkRepository()
+        self.full_resync_hours = full_resync_hours
+
+    def _plan_from_watermark(self, handle: str, scope: str, watermark: Optional[Dict[str, Any]],
+                             force_full: bool = False) -> SyncPlan:
+        if not watermark:
+            return SyncPlan(handle=handle, scope=scope)
+
+        user_id = watermark.get('twitter_user_id')
+        since_id = watermark.get('newest_tweet_id')
+        last_full_sync = watermark.get('last_full_sync_at')
+
+        if force_full:
+            reason = "forced"
+        elif since_id is None:
+            reason = "no stored tweets"
+        elif last_full_sync is None or datetime.utcnow() - last_full_sync >= timedelta(hours=self.full_resync_hours):
+            reason = "scheduled full re-sync"
+        else:
+            return SyncPlan(handle=handle, scope=scope, since_id=str(since_id), twitter_user_id=user_id,
+                            full_sync=False, reason="incremental", has_watermark=True)
+        return SyncPlan(handle=handle, scope=scope, twitter_user_id=user_id, reason=reason, has_watermark=True)
+
+    async def plan_syncs(self, handles: List[str], scope: str, force_full: bool = False) -> Dict[str, SyncPlan]:
+        """Plan syncs for several handles with a single watermark lookup (keyed by lowercase handle)"""
+        watermarks = await asyncio.to_thread(self.repository.get_watermarks, handles, scope)
+        plans = {
+            handle.lower(): self._plan_from_watermark(handle, scope, watermarks.get(handle.lower()), force_full)
+            for handle in handles
+        }
+        incremental = sum(1 for plan in plans.values() if plan.is_incremental)
+        logger.info(f"📋 Sync plan ({scope}): {incremental}/{len(plans)} handles incremental")
+        return plans
+
+    async def plan_sync(self, handle: str, scope: str, force_full: bool = False) -> SyncPlan:
+        """Plan the sync for one handle"""
+        return (await self.plan_syncs([handle], scope, force_full))[handle.lower()]
+
+    async def record_sync(self, plan: SyncPlan, tweet_ids: Iterable[Any],
+                          twitter_user_id: Optional[str] = None) -> bool:
+        """Advance the watermark after the fetched tweets were stored"""
+        tweet_ids = list(tweet_ids)
+        return await asyncio.to_thread(
+            self.repository.save_watermark,
+            plan.handle,
+            plan.scope,
+            newest_tweet_id(tweet_ids),
+            twitter_user_id or plan.twitter_user_id,
+            plan.full_sync,
+            len(tweet_ids),
+        )
+
+
+# Global instance
+twitter_sync_watermarks = TwitterSyncWatermarkService()
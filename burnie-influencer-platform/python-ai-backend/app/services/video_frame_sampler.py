@@ -0,0 +1,179 @@
+"""
+Video Frame Sampler
+Sparse frame sampling for video analysis (about one frame per second).
+
+Reading every frame with cv2.VideoCapture.read() to keep one per second
+decodes, converts and copies 30-60x more frames than are used. Frames are
+sampled instead by:
+
+- ffmpeg (when on PATH): one process decodes with its own threads. The fps
+  filter picks the sample frames, and they are scaled to the analysis size
+  before being piped out as raw BGR arrays. With keyframes_only, non-key
+  frames are never decoded (-skip_frame nokey), and each sample is the
+  latest keyframe.
+- OpenCV fallback: frames between samples are only grabbed (never
+  converted), and long gaps are skipped by seeking.
+
+Frames come back as in-memory BGR numpy arrays (OpenCV layout) whose
+longest side is at most VIDEO_FRAME_ANALYSIS_MAX_DIM.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Longest side of sampled frames (vision models downscale anything larger anyway)
+VIDEO_FRAME_ANALYSIS_MAX_DIM = int(os.getenv('VIDEO_FRAME_ANALYSIS_MAX_DIM', '1024'))
+# ffmpeg decoder threads (0 = let ffmpeg decide)
+VIDEO_FRAME_FFMPEG_THREADS = int(os.getenv('VIDEO_FRAME_FFMPEG_THREADS', '0'))
+# OpenCV fallback: seek instead of grabbing forward when the next sample is further ahead than this
+VIDEO_FRAME_SEEK_MIN_GAP_SECONDS = 2.0
+
+
+def _analysis_size(width: int, height: int, max_dim: int) -> Tuple[int, int]:
+    """Downscale-only target size with the same aspect ratio (even dimensions for ffmpeg)"""
+    scale = min(1.0, max_dim / max(width, height)) if max_dim else 1.0
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+def probe_video(video_path: str) -> Optional[dict]:
+    """fps, frame_count, duration and display width/height of a video (None if it cannot be opened)"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Display size from the first decoded frame: OpenCV (like ffmpeg) applies the rotation
+        # tag of phone videos, and how the size properties report it varies between versions
+        ok, frame = cap.read()
+        if ok:
+            height, width = frame.shape[:2]
+        else:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return {
+            'fps': fps,
+            'frame_count': frame_count,
+            'duration': frame_count / fps if fps > 0 else 0.0,
+            'width': width,
+            'height': height,
+        }
+    finally:
+        cap.release()
+
+
+def _sample_with_ffmpeg(ffmpeg: str, video_path: str, fps: float, duration: float, max_frames: int,
+                        size: Tuple[int, int], keyframes_only: bool) -> List[np.ndarray]:
+    width, height = size
+    cmd = [ffmpeg, '-v', 'error', '-nostdin']
+    if keyframes_only:
+        cmd += ['-skip_frame', 'nokey']
+    cmd += [
+        '-threads', str(VIDEO_FRAME_FFMPEG_THREADS),
+        '-t', f'{duration:.3f}',
+        '-i', video_path,
+        '-an', '-sn',
+        '-vf', f'fps={fps},scale={width}:{height}:flags=area',
+        '-frames:v', str(max_frames),
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1',
+    ]
+    frame_bytes = width * height * 3
+    frames: List[np.ndarray] = []
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while len(frames) < max_frames:
+            buf = bytearray(frame_bytes)
+            if proc.stdout.readinto(buf) < frame_bytes:
+                break
+            frames.append(np.frombuffer(buf, dtype=np.uint8).reshape(height, width, 3))
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode(errors='replace').strip()
+        proc.stderr.close()
+        returncode = proc.wait()
+    if not frames and returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {returncode}: {stderr[-300:]}")
+    if keyframes_only and frames:
+        # The fps filter stops at the last keyframe; later samples repeat it
+        frames += [frames[-1].copy() for _ in range(max_frames - len(frames))]
+    return frames
+
+
+def _sample_with_opencv(video_path: str, fps: float, video_fps: float, max_frames: int,
+                        size: Tuple[int, int]) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(video_path)
+    frames: List[np.ndarray] = []
+    try:
+        seek_gap = int(VIDEO_FRAME_SEEK_MIN_GAP_SECONDS * video_fps)
+        position = 0  # index of the next frame the decoder returns
+        for i in range(max_frames):
+            target = int(round(i / fps * video_fps))
+            if target - position > seek_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                position = target
+            while position < target:
+                if not cap.grab():
+                    return frames
+                position += 1
+            ok, frame = cap.read()
+            if not ok:
+                break
+            position += 1
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frames.append(frame)
+        return frames
+    finally:
+        cap.release()
+
+
+def sample_video_frames(video_path: str, fps: float = 1.0, max_duration: Optional[float] = None,
+                        max_dim: int = VIDEO_FRAME_ANALYSIS_MAX_DIM,
+                        keyframes_only: bool = False) -> List[np.ndarray]:
+    """
+    Sample frames at `fps` from the start of a video, downscaled for analysis.
+
+    Args:
+        video_path: Local video file
+        fps: Samples per second of video
+        max_duration: Only sample the first max_duration seconds (None: whole video)
+        max_dim: Longest side of the returned frames (0: original size)
+        keyframes_only: Decode keyframes only (much cheaper; a sample may repeat the previous
+                        keyframe when keyframes are further apart than 1/fps)
+
+    Returns BGR uint8 arrays, one per sample (empty if the video cannot be read).
+    """
+    info = probe_video(video_path)
+    if not info or info['fps'] <= 0 or fps <= 0:
+        logger.error(f"❌ Unable to open video: {video_path}")
+        return []
+    duration = info['duration'] if max_duration is None else min(info['duration'], max_duration)
+    max_frames = int(duration * fps)
+    if max_frames <= 0:
+        return []
+    size = _analysis_size(info['width'], info['height'], max_dim)
+
+    start = time.perf_counter()
+    ffmpeg = shutil.which('ffmpeg')
+    frames: List[np.ndarray] = []
+    method = 'opencv'
+    if ffmpeg:
+        try:
+            frames = _sample_with_ffmpeg(ffmpeg, video_path, fps, duration, max_frames, size, keyframes_only)
+            method = 'ffmpeg-keyframes' if keyframes_only else 'ffmpeg'
+        except Exception as e:
+            logger.warning(f"⚠️ ffmpeg frame sampling failed, falling back to OpenCV: {e}")
+    if not frames:
+        frames = _sample_with_opencv(video_path, fps, info['fps'], max_frames, size)
+    logger.info(f"🎞️ Sampled {len(frames)} frames at {size[0]}x{size[1]} via {method} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return frames
@@ -70,13 +70,9 @@ def _parse_json(text: str) -> dict:
 def create_video_with_music_only(video_path: str, output_path: str, work_dir: str | None = None) -> str | None:
     """Demucs: remove vocals, keep drums+bass+other. Creates video with visuals + background music only."""
     try:
-        import torch
-        import torchaudio
-        from demucs.pretrained import get_model
-        from demucs.apply import apply_model
         import soundfile as sf
-        import numpy as np
         from moviepy.editor import VideoFileClip, AudioFileClip
+        from app.services.demucs_separation import demucs_separator
     except ImportError as e:
         print(f"  ❌ Missing dependency: {e}")
         return None
@@ -96,17 +92,9 @@ def create_video_with_music_only(video_path: str, output_path: str, work_dir: st
         clip.close()
 
         print("  🎤 Separating sources with Demucs...")
-        model = get_model("htdemucs")
-        model.eval()
-        waveform, sr = torchaudio.load(audio_path)
-        if waveform.shape[0] == 1:
-            waveform = waveform.repeat(2, 1)
-        with torch.no_grad():
-            sources = apply_model(model, waveform.unsqueeze(0), device="cpu")[0]
-        no_vocals = sources[0].numpy() + sources[1].numpy() + sources[2].numpy()
-        if no_vocals.shape[0] == 2:
-            no_vocals = np.mean(no_vocals, axis=0, keepdims=True)
-        sf.write(music_path, no_vocals.T, sr)
+        stems = demucs_separator.separate(audio_path)
+        # drums + bass + other, vocals discarded (mono)
+        sf.write(music_path, stems.accompaniment(), stems.sample_rate)
 
         print("  📹 Creating video with music only...")
         clip = VideoFileClip(video_path)
@@ -401,14 +389,22 @@ def _is_platform_video_url(url: str) -> bool:
 
 def download_inspiration_video_to_path(url: str, output_dir: str) -> tuple[str | None, bool]:
     """
-    Download inspiration video to a local file.
+    Download inspiration video to a local file (via the shared inspiration media cache).
     - Platform URLs (YouTube, Instagram, Twitter): use yt-dlp
     - Direct URLs (S3, CDN): use requests.get
     Returns (local_path, success).
     """
+    from app.services.inspiration_media_cache import inspiration_media_cache
+
     os.makedirs(output_dir, exist_ok=True)
     out_path = os.path.join(output_dir, f"inspiration_{uuid.uuid4().hex[:8]}.mp4")
+    if inspiration_media_cache.fetch(url, out_path, lambda path: _download_inspiration_video_uncached(url, path)):
+        return (out_path, True)
+    return (None, False)
+
 
+def _download_inspiration_video_uncached(url: str, out_path: str) -> bool:
+    """Download a video into out_path; False if it failed or the URL is not a video."""
     if _is_platform_video_url(url):
         try:
             import yt_dlp
@@ -423,12 +419,12 @@ def download_inspiration_video_to_path(url: str, output_dir: str) -> tuple[str |
                 info = ydl.extract_info(url, download=True)
                 if info.get("duration", 0) == 0:
                     print(f"  ⚠️ No video at URL (might be image)")
-                    return (None, False)
+                    return False
                 print(f"  ✅ Downloaded: {info.get('duration', 0):.1f}s")
-                return (out_path, True)
+                return True
         except Exception as e:
             print(f"  ❌ yt-dlp download failed: {e}")
-            return (None, False)
+            return False
     else:
         # Direct URL (S3 presigned, CDN, etc.)
         try:
@@ -440,10 +436,10 @@ def download_inspiration_video_to_path(url: str, output_dir: str) -> tuple[str |
                     f.write(chunk)
             size = os.path.getsize(out_path)
             print(f"  ✅ Downloaded: {size / 1024 / 1024:.2f} MB")
-            return (out_path, True)
+            return True
         except Exception as e:
             print(f"  ❌ Direct download failed: {e}")
-            return (None, False)
+            return False
 
 
 def get_video_duration_sec(video_path: str) -> float:
@@ -0,0 +1,143 @@
+"""
+Website Analysis Cache
+Domain-level, persistent cache for DVYB website analyses with stale-while-revalidate.
+
+Many accounts onboard with the same domain, and re-analyses often come
+minutes apart. Analyses are stored per (normalized domain, analyzer,
+analyzer version) in website_analysis_cache:
+
+- younger than WEBSITE_ANALYSIS_SOFT_TTL_SECONDS: served as is
+- between the soft and hard TTL: served immediately, refreshed in the background
+- older than WEBSITE_ANALYSIS_HARD_TTL_SECONDS (or missing): analyzed inline
+
+Degraded analyses (site could not be fetched, LLM output unparsable) are
+returned to the caller but never stored, so they cannot replace a good entry.
+
+Concurrent requests for the same domain share one in-flight analysis
+(single-flight) instead of crawling and prompting in parallel.
+"""
+
+import asyncio
+import logging
+import os
+import urllib.parse
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.database.repositories.website_analysis_repository import WebsiteAnalysisRepository
+
+logger = logging.getLogger(__name__)
+
+# Serve without refreshing while younger than this
+WEBSITE_ANALYSIS_SOFT_TTL_SECONDS = int(os.getenv('WEBSITE_ANALYSIS_SOFT_TTL_SECONDS', str(6 * 3600)))
+# Never serve older than this
+WEBSITE_ANALYSIS_HARD_TTL_SECONDS = int(os.getenv('WEBSITE_ANALYSIS_HARD_TTL_SECONDS', str(14 * 24 * 3600)))
+
+AnalyzeFn = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+def normalize_domain(url: str) -> Optional[str]:
+    """Lowercase host without scheme, www. and port (None if the URL has no host)"""
+    url = (url or '').strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = f"https://{url}"
+    host = (urllib.parse.urlparse(url).hostname or '').lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return host or None
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    """Degraded results (site fetch or LLM parsing failures) are not worth serving to other accounts"""
+    return (bool(result) and not result.get('error') and not result.get('_parsing_failed')
+            and not result.get('_fetch_failed'))
+
+
+class WebsiteAnalysisCache:
+    """Stale-while-revalidate cache with single-flight analyses per domain"""
+
+    def __init__(self, repository: Optional[WebsiteAnalysisRepository] = None,
+                 soft_ttl_seconds: int = WEBSITE_ANALYSIS_SOFT_TTL_SECONDS,
+                 hard_ttl_seconds: int = WEBSITE_ANALYSIS_HARD_TTL_SECONDS):
+        self.repository = repository or WebsiteAnalysisRepository()
+        self.soft_ttl_seconds = soft_ttl_seconds
+        self.hard_ttl_seconds = hard_ttl_seconds
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'joined': 0, 'refreshes': 0}
+
+    async def _analyze_and_store(self, key: Tuple[str, str, str], url: str, analyze: AnalyzeFn) -> Dict[str, Any]:
+        domain, analyzer, analyzer_version = key
+        result = await analyze(url)
+        if _is_cacheable(result):
+            await asyncio.to_thread(self.repository.save_analysis, domain, analyzer, analyzer_version, result, url)
+            logger.info(f"💾 Cached {analyzer} website analysis for {domain} ({analyzer_version})")
+        else:
+            # Any existing (good) entry is kept, so a failed refresh never replaces it
+            logger.warning(f"⚠️ Not caching degraded {analyzer} website analysis for {domain}")
+        return result
+
+    def _single_flight(self, key: Tuple[str, str, str], url: str, analyze: AnalyzeFn) -> asyncio.Task:
+        """The in-flight analysis for a key, starting one if there is none"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats['joined'] += 1
+            logger.info(f"🔗 Joining in-flight website analysis for {key[0]}")
+            return task
+        task = asyncio.create_task(self._analyze_and_store(key, url, analyze))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _refresh_in_background(self, key: Tuple[str, str, str], url: str, analyze: AnalyzeFn) -> None:
+        self._stats['refreshes'] += 1
+        task = self._single_flight(key, url, analyze)
+
+        def _log_failure(done: asyncio.Task):
+            if not done.cancelled() and done.exception():
+                logger.warning(f"⚠️ Background website analysis refresh failed for {key[0]}: {done.exception()}")
+
+        task.add_done_callback(_log_failure)
+
+    async def get_or_analyze(self, url: str, analyzer: str, analyzer_version: str, analyze: AnalyzeFn,
+                             force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Analysis for the URL's domain, from the cache where possible.
+
+        Args:
+            url: Website URL (anything with the same normalized domain shares the entry)
+            analyzer: Which analysis ("full" / "fast")
+            analyzer_version: Bumped when prompts or extraction change
+            analyze: Coroutine function running the actual analysis for a URL
+            force_refresh: Skip the cache lookup (the new result is still stored)
+        """
+        domain = normalize_domain(url)
+        if not domain:
+            return await analyze(url)
+        key = (domain, analyzer, analyzer_version)
+
+        if not force_refresh:
+            cached = await asyncio.to_thread(self.repository.get_analysis, domain, analyzer, analyzer_version)
+            if cached and cached['age_seconds'] < self.hard_ttl_seconds:
+                if cached['age_seconds'] < self.soft_ttl_seconds:
+                    self._stats['fresh_hits'] += 1
+                    logger.info(f"♻️ Serving cached {analyzer} website analysis for {domain} "
+                                f"({cached['age_seconds'] / 60:.0f} min old)")
+                else:
+                    self._stats['stale_hits'] += 1
+                    logger.info(f"♻️ Serving stale {analyzer} website analysis for {domain} "
+                                f"({cached['age_seconds'] / 3600:.1f} h old), refreshing in background")
+                    self._refresh_in_background(key, url, analyze)
+                return cached['result']
+
+        self._stats['misses'] += 1
+        # Shielded: a caller going away must not cancel the analysis other callers wait for
+        return await asyncio.shield(self._single_flight(key, url, analyze))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for this process"""
+        return {**self._stats, 'in_flight': len(self._inflight)}
+
+
+# Global instance
+website_analysis_cache = WebsiteAnalysisCache()
@@ -0,0 +1,237 @@
+"""
+Website Asset Fetcher
+Concurrent, cached fetching of website assets for website analysis.
+
+Stylesheets, manifests, favicons and logo candidate probes are fetched in
+parallel (bounded overall and per host) under a total time budget, so an
+analysis waits for its slowest asset instead of the sum of all of them.
+
+Successful (200) responses are kept in an in-process cache scoped per
+domain; errors are never cached. Entries are served without a request while fresh (Cache-Control max-age, otherwise
+WEBSITE_ASSET_FRESH_SECONDS) and revalidated with If-None-Match /
+If-Modified-Since afterwards, so re-analyzing a domain mostly costs 304s.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Concurrent asset requests overall / per host
+WEBSITE_ASSET_CONCURRENCY = int(os.getenv('WEBSITE_ASSET_CONCURRENCY', '8'))
+WEBSITE_ASSET_PER_HOST = int(os.getenv('WEBSITE_ASSET_PER_HOST', '4'))
+# Total time budget for one fetch_many batch; assets not back by then are skipped
+WEBSITE_ASSET_BUDGET_SECONDS = float(os.getenv('WEBSITE_ASSET_BUDGET_SECONDS', '15'))
+# Freshness for responses without Cache-Control max-age
+WEBSITE_ASSET_FRESH_SECONDS = int(os.getenv('WEBSITE_ASSET_FRESH_SECONDS', '600'))
+# Domains kept in the cache (least recently used are dropped)
+WEBSITE_ASSET_CACHE_DOMAINS = int(os.getenv('WEBSITE_ASSET_CACHE_DOMAINS', '256'))
+# Bodies larger than this are returned but not cached
+MAX_CACHED_ASSET_BYTES = 2 * 1024 * 1024
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+_CHARSET_RE = re.compile(r'charset=["\']?([\w-]+)', re.I)
+
+
+@dataclass
+class AssetResponse:
+    """A fetched (or cached) asset; headers are lowercased"""
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('content-type', '').lower()
+
+    @property
+    def text(self) -> str:
+        match = _CHARSET_RE.search(self.headers.get('content-type', ''))
+        try:
+            return self.content.decode(match.group(1) if match else 'utf-8', errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+@dataclass
+class _CacheEntry:
+    response: AssetResponse
+    stored_at: float
+    max_age: float
+
+
+def _domain(url: str) -> str:
+    host = (urllib.parse.urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _freshness(headers: Dict[str, str], default_seconds: int) -> Optional[float]:
+    """Seconds a response may be served without revalidation (None = do not store)"""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else float(default_seconds)
+
+
+class WebsiteAssetFetcher:
+    """Concurrent asset fetching with a per-domain HTTP cache"""
+
+    def __init__(self, concurrency: int = WEBSITE_ASSET_CONCURRENCY, per_host: int = WEBSITE_ASSET_PER_HOST,
+                 fresh_seconds: int = WEBSITE_ASSET_FRESH_SECONDS, max_domains: int = WEBSITE_ASSET_CACHE_DOMAINS):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.fresh_seconds = fresh_seconds
+        self.max_domains = max_domains
+        self._cache: "OrderedDict[str, Dict[Tuple[str, str], _CacheEntry]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._host_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'requests': 0, 'fresh_hits': 0, 'revalidated': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        # Sessions are not thread-safe; one per worker thread keeps connections alive
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = (urllib.parse.urlparse(url).hostname or '').lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.Semaphore(self.per_host)
+            return slot
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def _cached(self, method: str, url: str) -> Optional[_CacheEntry]:
+        with self._cache_lock:
+            entries = self._cache.get(_domain(url))
+            if entries is None:
+                return None
+            self._cache.move_to_end(_domain(url))
+            return entries.get((method, url))
+
+    def _store(self, method: str, url: str, response: AssetResponse) -> None:
+        max_age = _freshness(response.headers, self.fresh_seconds)
+        if response.status != 200 or max_age is None or len(response.content) > MAX_CACHED_ASSET_BYTES:
+            return
+        with self._cache_lock:
+            entries = self._cache.setdefault(_domain(url), {})
+            self._cache.move_to_end(_domain(url))
+            entries[(method, url)] = _CacheEntry(response=response, stored_at=time.time(), max_age=max_age)
+            while len(self._cache) > self.max_domains:
+                self._cache.popitem(last=False)
+
+    def fetch(self, url: str, method: str = "GET", timeout: float = 12,
+              headers: Optional[Dict[str, str]] = None) -> Optional[AssetResponse]:
+        """Fetch one asset through the cache (None on connection errors)"""
+        method = method.upper()
+        entry = self._cached(method, url)
+        if entry and time.time() - entry.stored_at < entry.max_age:
+            self._count('fresh_hits')
+            return AssetResponse(**{**entry.response.__dict__, 'from_cache': True})
+
+        request_headers = {**DEFAULT_HEADERS, **(headers or {})}
+        if entry:
+            if entry.response.headers.get('etag'):
+                request_headers['If-None-Match'] = entry.response.headers['etag']
+            if entry.response.headers.get('last-modified'):
+                request_headers['If-Modified-Since'] = entry.response.headers['last-modified']
+
+        try:
+            with self._host_slot(url):
+                self._count('requests')
+                resp = self._session().request(method, url, headers=request_headers,
+                                               timeout=timeout, allow_redirects=True)
+        except requests.exceptions.RequestException as e:
+            self._count('failed')
+            logger.debug(f"  Asset fetch failed for {url}: {e}")
+            return None
+
+        response_headers = {k.lower(): v for k, v in resp.headers.items()}
+        # Only 200s are cached, so a 304 always refreshes a cached 200
+        if resp.status_code == 304 and entry:
+            self._count('revalidated')
+            refreshed = AssetResponse(**{**entry.response.__dict__,
+                                         'headers': {**entry.response.headers, **response_headers}})
+            self._store(method, url, refreshed)
+            return AssetResponse(**{**refreshed.__dict__, 'from_cache': True})
+
+        response = AssetResponse(
+            url=url,
+            status=resp.status_code,
+            headers=response_headers,
+            content=resp.content if method != "HEAD" else b"",
+        )
+        self._store(method, url, response)
+        return response
+
+    def fetch_many(self, urls: Iterable[str], method: str = "GET", timeout: float = 12,
+                   budget_seconds: float = WEBSITE_ASSET_BUDGET_SECONDS,
+                   headers: Optional[Dict[str, str]] = None) -> Dict[str, Optional[AssetResponse]]:
+        """
+        Fetch several assets concurrently. Returns url -> response for every
+        requested url; assets that failed or missed the time budget map to None.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return {}
+        start = time.time()
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(urls)))
+        try:
+            futures = {url: executor.submit(self.fetch, url, method, timeout, headers) for url in urls}
+            done, not_done = wait(futures.values(), timeout=budget_seconds)
+        finally:
+            # Stragglers finish in the background (and still populate the cache)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {
+            url: future.result() if future in done and future.exception() is None else None
+            for url, future in futures.items()
+        }
+        cached = sum(1 for r in results.values() if r is not None and r.from_cache)
+        logger.info(
+            f"  📦 Fetched {sum(1 for r in results.values() if r is not None)}/{len(urls)} assets "
+            f"({cached} from cache, {len(not_done)} over budget) in {time.time() - start:.2f}s"
+        )
+        return results
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics for this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._cache_lock:
+            return {**stats, 'cached_domains': len(self._cache)}
+
+
+# Global instance
+website_asset_fetcher = WebsiteAssetFetcher()
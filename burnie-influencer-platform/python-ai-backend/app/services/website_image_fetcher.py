@@ -6,9 +6,13 @@ Used for onboarding: extract images from user's domain for product selection.
 from __future__ import annotations
 
 import hashlib
+import heapq
 import mimetypes
 import re
 import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Callable
 from urllib.parse import urljoin, urlparse
@@ -23,6 +27,11 @@ from app.utils.web2_s3_helper import web2_s3_helper
 WEBSITE_MIN_IMAGE_BYTES = 15_000
 WEBSITE_MIN_WHEN_FEW_CANDIDATES = 0
 
+# Concurrent size probes / downloads+uploads, and requests in flight per image host
+WEBSITE_PROBE_CONCURRENCY = 16
+WEBSITE_DOWNLOAD_CONCURRENCY = 4
+WEBSITE_REQUESTS_PER_HOST = 6
+
 # URL path substrings that indicate logo/icon (skip these)
 LOGO_URL_HINTS = (
     "logo", "favicon", "/icon/", "/icons/", "sprite", "badge", ".ico", "brand-logo", "site-logo",
@@ -240,79 +249,141 @@ def fetch_images_from_website(
     )
 
     req_headers = {**headers, "Referer": base_url}
+    host_slots: dict[str, threading.Semaphore] = {}
+    host_slots_lock = threading.Lock()
+
+    def host_slot(url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc.lower()
+        with host_slots_lock:
+            if host not in host_slots:
+                host_slots[host] = threading.Semaphore(WEBSITE_REQUESTS_PER_HOST)
+            return host_slots[host]
 
     def size_for(url: str) -> int:
-        try:
-            r = requests.head(url, headers=req_headers, timeout=8, allow_redirects=True)
-            if r.status_code != 200:
-                return 0
-            cl = r.headers.get("content-length")
-            return int(cl) if cl else 0
-        except Exception:
+        """Content length via HEAD, or a 1-byte ranged GET when HEAD gives none (0 if unknown)"""
+        with host_slot(url):
+            try:
+                r = requests.head(url, headers=req_headers, timeout=8, allow_redirects=True)
+                if r.status_code == 200 and r.headers.get("content-length"):
+                    return int(r.headers["content-length"])
+            except Exception:
+                pass
+            try:
+                with requests.get(url, headers={**req_headers, "Range": "bytes=0-0"}, timeout=8,
+                                  allow_redirects=True, stream=True) as r:
+                    if r.status_code == 206:
+                        total = r.headers.get("content-range", "").rpartition("/")[2]
+                        return int(total) if total.isdigit() else 0
+                    if r.status_code == 200 and r.headers.get("content-length"):
+                        return int(r.headers["content-length"])
+            except Exception:
+                pass
             return 0
 
-    collected_with_size = [(url, label, size_for(url)) for url, label in collected]
-    collected_with_size.sort(key=lambda x: -x[2])
-    collected = [(url, label) for url, label, _ in collected_with_size]
+    def download_and_upload(i: int, img_url: str, out_dir: Path) -> dict | None:
+        with host_slot(img_url):
+            r = requests.get(img_url, headers={**req_headers, "Referer": base_url}, timeout=15, stream=True)
+            r.raise_for_status()
+            ct = r.headers.get("content-type", "").lower()
+            if "image" not in ct and "octet-stream" not in ct:
+                if len(collected) > max_images:
+                    return None
+            cl = r.headers.get("content-length")
+            if cl:
+                try:
+                    if int(cl) < effective_min_bytes:
+                        return None
+                except ValueError:
+                    pass
+            ext = mimetypes.guess_extension(ct.split(";")[0].strip()) if ct else None
+            if not ext or ext not in (".jpg", ".jpeg", ".png", ".webp", ".gif"):
+                path_part = urlparse(img_url).path
+                if path_part.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
+                    ext = path_part[path_part.rfind(".") :].lower()
+                else:
+                    ext = ".jpg"
+            local_path = out_dir / f"web_{i}{ext}"
+            with open(local_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    f.write(chunk)
+        size = local_path.stat().st_size
+        if size < effective_min_bytes:
+            return None
+        # Validate actual binary content (Grok rejects HTML/placeholders)
+        validated = validate_image_for_grok(local_path)
+        if not validated:
+            print(f"[fetch-domain-images] Custom website: skip URL (invalid binary): {img_url[:60]}...")
+            return None
+        ext, content_type = validated
+        if local_path.suffix.lower() != ext.lower():
+            local_path_final = out_dir / f"web_{i}{ext}"
+            local_path.rename(local_path_final)
+        else:
+            local_path_final = local_path
+        domain_hash = hashlib.md5(page_url.encode()).hexdigest()[:12]
+        s3_key = f"dvyb/domain-products/{domain_hash}/web_{i}{ext}"
+        upload_result = web2_s3_helper.upload_file_to_s3(str(local_path_final), s3_key, content_type)
+        if not upload_result.get("success"):
+            return None
+        presigned = web2_s3_helper.generate_presigned_url(s3_key)
+        return {"s3_key": s3_key, "presigned_url": presigned or "", "sourceLabel": "website"}
 
+    # Probes run concurrently; candidates that qualify by size are downloaded and uploaded while the
+    # remaining probes are still running (largest known first). Candidates of unknown size are only
+    # tried once all probes are done, and everything stops as soon as max_images are saved.
     results: list[dict] = []
-    with tempfile.TemporaryDirectory(prefix="dvyb_domain_fetch_") as tmpdir:
+    qualified: list[tuple[int, int, str]] = []  # heap of (-size, index, url)
+    unknown_size: list[tuple[int, str]] = []
+    min_qualifying = max(effective_min_bytes, 1)
+    started = time.time()
+    probe_pool = ThreadPoolExecutor(max_workers=WEBSITE_PROBE_CONCURRENCY)
+    with tempfile.TemporaryDirectory(prefix="dvyb_domain_fetch_") as tmpdir, \
+            ThreadPoolExecutor(max_workers=WEBSITE_DOWNLOAD_CONCURRENCY) as download_pool:
         out_dir = Path(tmpdir)
-        for i, (img_url, label) in enumerate(collected):
-            if len(results) >= max_images:
-                break
-            try:
-                r = requests.get(img_url, headers={**req_headers, "Referer": base_url}, timeout=15, stream=True)
-                r.raise_for_status()
-                ct = r.headers.get("content-type", "").lower()
-                if "image" not in ct and "octet-stream" not in ct:
-                    if len(collected) > max_images:
-                        continue
-                cl = r.headers.get("content-length")
-                if cl:
-                    try:
-                        if int(cl) < effective_min_bytes:
-                            continue
-                    except ValueError:
-                        pass
-                ext = mimetypes.guess_extension(ct.split(";")[0].strip()) if ct else None
-                if not ext or ext not in (".jpg", ".jpeg", ".png", ".webp", ".gif"):
-                    path_part = urlparse(img_url).path
-                    if path_part.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
-                        ext = path_part[path_part.rfind(".") :].lower()
+        probes = {probe_pool.submit(size_for, url): (i, url) for i, (url, _) in enumerate(collected)}
+        downloads: dict = {}
+        probed = 0
+
+        def start_downloads() -> None:
+            while qualified and len(results) + len(downloads) < max_images:
+                _, i, url = heapq.heappop(qualified)
+                downloads[download_pool.submit(download_and_upload, i, url, out_dir)] = url
+            if not probes and not qualified:
+                unknown_size.sort()
+                while unknown_size and len(results) + len(downloads) < max_images:
+                    i, url = unknown_size.pop(0)
+                    downloads[download_pool.submit(download_and_upload, i, url, out_dir)] = url
+
+        while (probes or downloads) and len(results) < max_images:
+            done, _ = wait(list(probes) + list(downloads), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in probes:
+                    i, url = probes.pop(future)
+                    probed += 1
+                    size = future.result()
+                    if size >= min_qualifying:
+                        heapq.heappush(qualified, (-size, i, url))
                     else:
-                        ext = ".jpg"
-                local_path = out_dir / f"web_{i}{ext}"
-                with open(local_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                size = local_path.stat().st_size
-                if size < effective_min_bytes:
-                    continue
-                # Validate actual binary content (Grok rejects HTML/placeholders)
-                validated = validate_image_for_grok(local_path)
-                if not validated:
-                    print(f"[fetch-domain-images] Custom website: skip URL (invalid binary): {img_url[:60]}...")
-                    continue
-                ext, content_type = validated
-                if local_path.suffix.lower() != ext.lower():
-                    local_path_final = out_dir / f"web_{i}{ext}"
-                    local_path.rename(local_path_final)
+                        unknown_size.append((i, url))
                 else:
-                    local_path_final = local_path
-                domain_hash = hashlib.md5(page_url.encode()).hexdigest()[:12]
-                s3_key = f"dvyb/domain-products/{domain_hash}/web_{i}{ext}"
-                upload_result = web2_s3_helper.upload_file_to_s3(str(local_path_final), s3_key, content_type)
-                if upload_result.get("success"):
-                    presigned = web2_s3_helper.generate_presigned_url(s3_key)
-                    img_data = {"s3_key": s3_key, "presigned_url": presigned or "", "sourceLabel": "website"}
-                    results.append(img_data)
-                    if on_image_ready:
-                        on_image_ready(img_data)
-                    print(f"[fetch-domain-images] Custom website: saved {len(results)}/{max_images} - {s3_key}")
-            except Exception as ex:
-                print(f"[fetch-domain-images] Custom website: URL failed: {ex}")
-                continue
+                    downloads.pop(future)
+                    try:
+                        img_data = future.result()
+                        if img_data and len(results) < max_images:
+                            results.append(img_data)
+                            if on_image_ready:
+                                on_image_ready(img_data)
+                            print(f"[fetch-domain-images] Custom website: saved {len(results)}/{max_images} - {img_data['s3_key']}")
+                    except Exception as ex:
+                        print(f"[fetch-domain-images] Custom website: URL failed: {ex}")
+            start_downloads()
+
+        # Enough images: drop the remaining probes without waiting for them
+        probe_pool.shutdown(wait=False, cancel_futures=True)
+        print(
+            f"[fetch-domain-images] Custom website: probed {probed}/{len(collected)} candidates "
+            f"in {time.time() - started:.1f}s"
+        )
 
     print(f"[fetch-domain-images] Custom website: done, {len(results)} images saved (target {max_images})")
     return results
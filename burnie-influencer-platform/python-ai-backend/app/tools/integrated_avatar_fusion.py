@@ -4,10 +4,10 @@ import requests
 import time
 from datetime import datetime
 from pathlib import Path
-import fal_client
 from botocore.exceptions import ClientError, NoCredentialsError
 from dotenv import load_dotenv
 from app.services.storage_config import create_s3_client, get_default_bucket, sanitize_extra_args
+from app.services.fal_job_client import fal_job_client
 from PIL import Image
 from xai_sdk import Client
 from xai_sdk.chat import user, system, image
@@ -339,12 +339,6 @@ Respond with ONLY the JSON object:"""
             else:
                 print("🏷️ Project logo URL: None")
             
-            def on_queue_update(update):
-                if isinstance(update, fal_client.InProgress):
-                    for log in update.logs:
-                        print(f"📋 {log['message']}")
-                print(f"🔄 Queue update: {update}")
-            
             # Prepare image URLs list based on what's available
             image_urls = [original_image_url]
             if avatar_image_url:
@@ -374,38 +368,26 @@ Respond with ONLY the JSON object:"""
             # Call fal.ai nano-banana edit model
             print("🚀 Calling fal.ai nano-banana/edit model...")
             
-            # Add timeout to prevent hanging
-            import signal
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError("FAL API call timed out after 300 seconds")
-            
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(300)  # 5 minute timeout
-            
+            # Queued on the shared FAL job loop; the request is cancelled after 5 minutes
             try:
-                # Try using fal_client.run instead of subscribe for better reliability
-                print("🔄 Attempting with fal_client.run...")
-                result = fal_client.run(
+                result = fal_job_client.run(
                     "fal-ai/nano-banana/edit",
-                    arguments=arguments
+                    arguments=arguments,
+                    timeout=300,
+                    on_log=lambda message: print(f"📋 {message}")
                 )
-                print("✅ fal_client.run completed successfully")
+                print("✅ fal nano-banana/edit completed successfully")
+            except TimeoutError:
+                raise
             except Exception as run_error:
-                print(f"⚠️ fal_client.run failed: {run_error}")
-                print("🔄 Falling back to fal_client.subscribe...")
-                try:
-                    result = fal_client.subscribe(
-                        "fal-ai/nano-banana/edit",
-                        arguments=arguments,
-                        with_logs=True,
-                        on_queue_update=on_queue_update,
-                    )
-                except Exception as subscribe_error:
-                    print(f"❌ fal_client.subscribe also failed: {subscribe_error}")
-                    raise subscribe_error
-            finally:
-                signal.alarm(0)  # Cancel the alarm
+                print(f"⚠️ fal nano-banana/edit failed: {run_error}")
+                print("🔄 Retrying once...")
+                result = fal_job_client.run(
+                    "fal-ai/nano-banana/edit",
+                    arguments=arguments,
+                    timeout=300,
+                    on_log=lambda message: print(f"📋 {message}")
+                )
             
             print(f"📥 Received result: {type(result)}")
             print(f"📊 Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
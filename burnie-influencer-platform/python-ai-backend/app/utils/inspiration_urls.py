@@ -0,0 +1,68 @@
+"""
+Inspiration URL normalization.
+
+The same inspiration is pasted in many shapes: with or without www./m.,
+tracking parameters (igsh, utm_*, si), /reel/ vs /p/, youtu.be vs
+watch?v=, or as differently signed presigned S3 URLs. normalize_inspiration_url
+maps all of these to one stable key used to look up and share analyses
+and downloaded media.
+"""
+
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from app.services.storage_config import extract_storage_key
+
+# Query parameters that never change what a link points to
+_TRACKING_PARAMS = {"igsh", "igshid", "si", "feature", "fbclid", "gclid", "ref_src", "is_from_webapp", "sender_device"}
+_STORAGE_HOST_HINTS = ("amazonaws.com", "storage.googleapis.com")
+
+_PLATFORM_PATTERNS = (
+    ("instagram", re.compile(r"^(?:instagram\.com|instagr\.am)/(?:[\w.]+/)?(?:p|reels?|tv)/([\w-]+)")),
+    ("tiktok", re.compile(r"^tiktok\.com/@[\w.-]+/(?:video|photo)/(\d+)")),
+    ("youtube", re.compile(r"^youtube\.com/(?:shorts|embed|live)/([\w-]{6,})")),
+    ("youtube", re.compile(r"^youtu\.be/([\w-]{6,})")),
+    ("twitter", re.compile(r"^(?:twitter\.com|x\.com)/[\w]+/status/(\d+)")),
+)
+
+
+def normalize_inspiration_url(url: str) -> Optional[str]:
+    """
+    Stable key for an inspiration link or media URL (None for empty input).
+
+    - Instagram / TikTok / YouTube / X posts: "<platform>:<post id>"
+    - S3 / GCS URLs and bare object keys: "s3:<object key>" (signature ignored)
+    - anything else: lowercase host without www./m. + path + non-tracking query
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+    if url.startswith("s3://"):
+        key = extract_storage_key(url)
+        return f"s3:{key}" if key else url
+    if not re.match(r"^https?://", url, re.I):
+        if url.startswith(("dvyb/", "dvyb_brands/")):
+            return f"s3:{url}"
+        url = f"https://{url}"
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower().rstrip(".")
+    if any(hint in host for hint in _STORAGE_HOST_HINTS):
+        key = extract_storage_key(url)
+        if key:
+            return f"s3:{key}"
+    host = re.sub(r"^(?:www|m|mobile|vm)\.", "", host)
+    path = re.sub(r"/{2,}", "/", parsed.path or "/").rstrip("/")
+    host_path = f"{host}{path}"
+
+    for platform, pattern in _PLATFORM_PATTERNS:
+        match = pattern.match(host_path)
+        if match:
+            return f"{platform}:{match.group(1)}"
+    query = [(k, v) for k, v in parse_qsl(parsed.query) if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith("utm_")]
+    if host == "youtube.com" and path == "/watch":
+        video_id = dict(query).get("v")
+        if video_id:
+            return f"youtube:{video_id}"
+    return f"{host_path}?{urlencode(sorted(query))}" if query else host_path
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Video Frame Sampling
+
+Compares the previous extract_frames_from_video approach (decode and convert
+every frame with cv2.VideoCapture.read(), keep one per second) against the
+sparse samplers in app/services/video_frame_sampler.py. Reports wall time and
+CPU time (this process plus ffmpeg child processes) for each method, and checks
+that each method's frames keep the orientation of the decoded video (try a phone
+clip with a 90/270 rotation tag).
+
+Usage:
+    python benchmark_frame_sampling.py /path/to/video.mp4 [--fps 1] [--max-duration 30] [--runs 3]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.services import video_frame_sampler
+from app.services.video_frame_sampler import probe_video, sample_video_frames
+
+
+def full_decode(video_path: str, fps: float, max_duration: float) -> list:
+    """The original loop: read() every frame, keep every (video_fps / fps)-th one"""
+    cap = cv2.VideoCapture(video_path)
+    video_fps = cap.get(cv2.CAP_PROP_FPS)
+    duration = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / video_fps if video_fps > 0 else 0
+    max_frames = int(min(duration, max_duration) * fps)
+    frame_interval = int(video_fps / fps) if fps > 0 else int(video_fps)
+    frames = []
+    frame_count = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_count % frame_interval == 0:
+            frames.append(frame)
+        frame_count += 1
+    cap.release()
+    return frames
+
+
+def opencv_sparse(video_path: str, fps: float, max_duration: float) -> list:
+    """Sparse sampler with ffmpeg hidden from PATH (grab/seek fallback)"""
+    which = shutil.which
+    shutil.which = lambda name, *args, **kwargs: None if name == 'ffmpeg' else which(name, *args, **kwargs)
+    try:
+        return sample_video_frames(video_path, fps=fps, max_duration=max_duration)
+    finally:
+        shutil.which = which
+
+
+def _is_portrait(frame) -> bool:
+    height, width = frame.shape[:2]
+    return height > width
+
+
+def _cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video frame sampling methods")
+    parser.add_argument("video_path")
+    parser.add_argument("--fps", type=float, default=1.0)
+    parser.add_argument("--max-duration", type=float, default=30.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    info = probe_video(args.video_path)
+    if not info:
+        print(f"❌ Unable to open video: {args.video_path}")
+        sys.exit(1)
+    print(f"🎬 {args.video_path}: {info['width']}x{info['height']}, {info['fps']:.1f} FPS, {info['duration']:.1f}s")
+    print(f"   Sampling {args.fps} fps from the first {args.max_duration:.0f}s, "
+          f"analysis size {video_frame_sampler.VIDEO_FRAME_ANALYSIS_MAX_DIM}px, best of {args.runs} runs\n")
+
+    methods = [
+        ("full decode (read every frame)", lambda: full_decode(args.video_path, args.fps, args.max_duration)),
+        ("opencv grab/seek", lambda: opencv_sparse(args.video_path, args.fps, args.max_duration)),
+    ]
+    if shutil.which('ffmpeg'):
+        methods += [
+            ("ffmpeg fps+scale", lambda: sample_video_frames(args.video_path, args.fps, args.max_duration)),
+            ("ffmpeg keyframes only", lambda: sample_video_frames(args.video_path, args.fps, args.max_duration,
+                                                                  keyframes_only=True)),
+        ]
+    else:
+        print("⚠️ ffmpeg not on PATH, skipping ffmpeg methods\n")
+
+    print(f"{'method':<34}{'frames':>8}{'wall s':>10}{'cpu s':>10}{'speedup':>10}  orientation")
+    baseline = None
+    reference = None
+    mismatches = []
+    for name, run in methods:
+        best_wall, best_cpu, count = float('inf'), float('inf'), 0
+        for _ in range(args.runs):
+            cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+            frames = run()
+            best_wall = min(best_wall, time.perf_counter() - wall_start)
+            best_cpu = min(best_cpu, _cpu_seconds() - cpu_start)
+            count = len(frames)
+        baseline = baseline or best_wall
+        # Full decode frames are the reference; sampled frames must have the same aspect
+        if reference is None and frames:
+            reference = _is_portrait(frames[0])
+        orientation_ok = not frames or _is_portrait(frames[0]) == reference
+        if not orientation_ok:
+            mismatches.append(name)
+        print(f"{name:<34}{count:>8}{best_wall:>10.2f}{best_cpu:>10.2f}{baseline / best_wall:>9.1f}x  "
+              f"{'ok' if orientation_ok else 'WRONG'}")
+
+    if mismatches:
+        print(f"\n❌ Frames rotated differently from the decoded video: {', '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
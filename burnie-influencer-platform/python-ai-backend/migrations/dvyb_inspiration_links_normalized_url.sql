@@ -0,0 +1,24 @@
+-- DVYB Inspiration Links Normalized URL Migration
+-- Normalized URL keys for bulk inspiration analysis lookups
+-- Date: 2026-10-18
+-- Purpose: Inspiration links are pasted in many URL variants (tracking params,
+--          www./m., reel vs p, re-signed S3 URLs). Keying rows by normalized url /
+--          mediaUrl lets generation look up all links of a request in one indexed
+--          query instead of an OR query per link. Keys are filled in by python-ai-backend
+--          (app/utils/inspiration_urls.py) for rows that do not have them yet.
+
+ALTER TABLE dvyb_inspiration_links ADD COLUMN IF NOT EXISTS "normalizedUrl" TEXT;
+ALTER TABLE dvyb_inspiration_links ADD COLUMN IF NOT EXISTS "normalizedMediaUrl" TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_normalized_url
+    ON dvyb_inspiration_links ("normalizedUrl")
+    WHERE "isActive" = true AND "inspirationAnalysis" IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_normalized_media_url
+    ON dvyb_inspiration_links ("normalizedMediaUrl")
+    WHERE "isActive" = true AND "inspirationAnalysis" IS NOT NULL;
+
+-- Finds rows still waiting for keys (new rows from the admin dashboard)
+CREATE INDEX IF NOT EXISTS idx_dvyb_inspiration_links_unkeyed
+    ON dvyb_inspiration_links (id)
+    WHERE "normalizedUrl" IS NULL;
@@ -0,0 +1,21 @@
+-- Tweet Image Analysis Cache Migration
+-- Persistent cache of vision-model analyses for tweet images
+-- Date: 2026-10-18
+-- Purpose: Analyze each distinct image once per prompt version, no matter how
+--          many refreshes or yappers share it (keyed by SHA-256 of the image bytes)
+
+CREATE TABLE IF NOT EXISTS tweet_image_analysis_cache (
+    content_hash CHAR(64) NOT NULL,
+    prompt_version VARCHAR(32) NOT NULL,
+    analysis JSONB NOT NULL,
+    provider VARCHAR(50),
+    source_urls TEXT[] NOT NULL DEFAULT '{}',
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (content_hash, prompt_version)
+);
+
+-- URL alias lookup lets repeat refreshes skip downloading known images
+CREATE INDEX IF NOT EXISTS idx_tweet_image_analysis_cache_urls
+    ON tweet_image_analysis_cache USING GIN (source_urls);
@@ -0,0 +1,21 @@
+-- Twitter Sync Watermarks Migration
+-- Per-handle watermarks for incremental (since_id based) tweet syncs
+-- Date: 2026-10-18
+-- Purpose: Let leaderboard, platform yapper and popular handle refreshes fetch
+--          only tweets newer than the last synced tweet id, with a scheduled
+--          full re-sync to pick up edits and deletions
+
+CREATE TABLE IF NOT EXISTS twitter_sync_watermarks (
+    twitter_handle VARCHAR(100) NOT NULL,
+    sync_scope VARCHAR(50) NOT NULL,
+    twitter_user_id VARCHAR(32),
+    newest_tweet_id BIGINT,
+    last_refresh_at TIMESTAMP,
+    last_full_sync_at TIMESTAMP,
+    tweets_synced INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (twitter_handle, sync_scope)
+);
+
+CREATE INDEX IF NOT EXISTS idx_twitter_sync_watermarks_scope_refresh
+    ON twitter_sync_watermarks (sync_scope, last_refresh_at);
@@ -0,0 +1,14 @@
+-- Twitter Thread Cache Migration
+-- Reconstructed threads that can no longer grow
+-- Date: 2026-10-18
+-- Purpose: Let thread reconstruction skip conversation searches for settled
+--          threads across restarts and worker processes (the in-process LRU
+--          stays in front of this table)
+
+CREATE TABLE IF NOT EXISTS twitter_thread_cache (
+    conversation_id VARCHAR(32) PRIMARY KEY,
+    posts JSONB NOT NULL,
+    tweet_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,18 @@
+-- Website Analysis Cache Migration
+-- Persistent per-domain cache of DVYB website analyses
+-- Date: 2026-10-18
+-- Purpose: Accounts sharing a domain (and re-runs minutes apart) reuse one
+--          analysis per (domain, analyzer, analyzer version) instead of
+--          re-crawling and re-prompting; stale entries are refreshed in the background
+
+CREATE TABLE IF NOT EXISTS website_analysis_cache (
+    domain VARCHAR(255) NOT NULL,
+    analyzer VARCHAR(32) NOT NULL,
+    analyzer_version VARCHAR(32) NOT NULL,
+    result JSONB NOT NULL,
+    source_url TEXT,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (domain, analyzer, analyzer_version)
+);
@@ -6,6 +6,10 @@ import { Entity, PrimaryGeneratedColumn, Column, CreateDateColumn, UpdateDateCol
  */
 @Entity('dvyb_inspiration_links')
 @Index(['platform', 'category'])
+// Partial indexes on the normalized URL keys are managed by python-ai-backend
+@Index('idx_dvyb_inspiration_links_normalized_url', { synchronize: false })
+@Index('idx_dvyb_inspiration_links_normalized_media_url', { synchronize: false })
+@Index('idx_dvyb_inspiration_links_unkeyed', { synchronize: false })
 export class DvybInspirationLink {
   @PrimaryGeneratedColumn()
   id!: number;
@@ -68,6 +72,16 @@ export class DvybInspirationLink {
   @Column({ type: 'text', nullable: true })
   inspirationAnalysis!: string | null;
 
+  /**
+   * Normalized keys of url / mediaUrl, filled in by python-ai-backend
+   * for bulk inspiration analysis lookups
+   */
+  @Column({ type: 'text', nullable: true })
+  normalizedUrl!: string | null;
+
+  @Column({ type: 'text', nullable: true })
+  normalizedMediaUrl!: string | null;
+
   @CreateDateColumn()
   createdAt!: Date;
 
@@ -211,7 +211,10 @@ router.put('/:id', async (req: Request, res: Response) => {
     
     if (platform) inspiration.platform = platform.toLowerCase();
     if (category) inspiration.category = category.trim();
-    if (url) inspiration.url = url.trim();
+    if (url && url.trim() !== inspiration.url) {
+      inspiration.url = url.trim();
+      inspiration.normalizedUrl = null; // re-keyed by python-ai-backend on its next lookup
+    }
     if (title !== undefined) inspiration.title = title?.trim() || null;
     if (isActive !== undefined) inspiration.isActive = isActive;
     if (mediaType) {